@@ -29,7 +29,8 @@ from controllers.propietarios_controller import PropietariosController
 from controllers.reportes_controller import ReportesController
 from controllers.sbuscar_controller import SbuscarController  # ✅ Controlador Reportes Salud
 from controllers.rbuscar_controller import RbuscarController  # ✅ Controlador Reportes Reproducción
-from database import Database
+from database import obtener_database, cerrar_conexiones
+from tareas import ProgramadorRespaldos
 
 def cargar_estilos_sidebar(window):
     """Cargar estilos SOLO para el sidebar"""
@@ -72,6 +73,10 @@ class EMainWindow(QMainWindow):
         # CONECTAR SEÑALES
         self.connect_signals_admin_style()
         
+        # ✅ COPIAS DE SEGURIDAD AUTOMÁTICAS MIENTRAS LA APLICACIÓN ESTÉ ABIERTA
+        self.programador_respaldos = ProgramadorRespaldos(self)
+        self.programador_respaldos.iniciar()
+        
         print(f"✅ Sidebar Empleado inicializado - Página actual: {self.ui.stackedWidget.currentIndex()}")
         print(f"👤 Usuario en sidebar: {self.usuario_actual}")
     
@@ -623,7 +628,7 @@ class EMainWindow(QMainWindow):
             
             self.bitacora_controller = BitacoraController(
                 ui=self.bitacora_ui,
-                db=Database(),
+                db=obtener_database(),
                 usuario_actual=self.usuario_actual
             )
             print("✅ Controlador de bitácora creado para empleado")
@@ -658,6 +663,12 @@ class EMainWindow(QMainWindow):
                     controller.limpiar_recursos()
                 elif hasattr(controller, 'db') and controller.db:
                     controller.db.disconnect()
+        
+        if hasattr(self, 'programador_respaldos'):
+            self.programador_respaldos.detener()
+        
+        # ✅ CERRAR LAS CONEXIONES COMPARTIDAS (TODOS LOS CONTROLADORES USAN LA MISMA)
+        cerrar_conexiones()
             
         event.accept()
 
@@ -0,0 +1,94 @@
+from collections import OrderedDict
+
+from PyQt5 import QtCore
+
+# Espera tras la última tecla antes de consultar (ms)
+RETARDO_BUSQUEDA_MS = 250
+# Búsquedas recientes que se conservan por buscador
+TAMANO_CACHE_BUSQUEDA = 20
+
+
+class _TareaBusqueda(QtCore.QRunnable):
+    """Ejecuta la consulta en un hilo del QThreadPool (cada hilo usa su propia conexión SQLite)"""
+
+    def __init__(self, busqueda, generacion, clave):
+        super().__init__()
+        self.busqueda = busqueda
+        self.generacion = generacion
+        self.clave = clave
+
+    def run(self):
+        try:
+            resultado = self.busqueda.consulta(self.clave)
+        except Exception as e:
+            print(f"❌ Error en búsqueda en segundo plano: {e}")
+            resultado = []
+        try:
+            self.busqueda.terminada.emit(self.generacion, self.clave, resultado)
+        except RuntimeError:
+            # El buscador ya se destruyó (se cerró la página)
+            pass
+
+
+class BusquedaDiferida(QtCore.QObject):
+    """
+    Buscador con debounce: espera a que se deje de escribir, ejecuta la consulta fuera del
+    hilo de la interfaz y entrega solo el resultado de la última búsqueda solicitada.
+
+    consulta(clave) corre en un hilo del pool y devuelve la lista de filas;
+    al_terminar(filas) se llama en el hilo de la interfaz.
+    """
+
+    terminada = QtCore.pyqtSignal(int, object, object)
+
+    def __init__(self, consulta, al_terminar, retardo_ms=RETARDO_BUSQUEDA_MS, parent=None):
+        super().__init__(parent)
+        self.consulta = consulta
+        self.al_terminar = al_terminar
+        self._generacion = 0
+        self._clave = None
+        self._cache = OrderedDict()
+
+        self._temporizador = QtCore.QTimer(self)
+        self._temporizador.setSingleShot(True)
+        self._temporizador.setInterval(retardo_ms)
+        self._temporizador.timeout.connect(self._lanzar)
+
+        # Conexión en cola: el resultado se emite desde el hilo del pool
+        self.terminada.connect(self._entregar, QtCore.Qt.QueuedConnection)
+
+    def solicitar(self, clave):
+        """Programa una búsqueda; cada llamada reinicia la espera"""
+        self._clave = clave
+        self._temporizador.start()
+
+    def cancelar(self):
+        """Descarta la búsqueda pendiente y cualquier resultado que aún no haya llegado"""
+        self._temporizador.stop()
+        self._generacion += 1
+
+    def invalidar(self):
+        """Olvida los resultados guardados (llamar cuando cambian los datos)"""
+        self._cache.clear()
+
+    def _lanzar(self):
+        self._generacion += 1
+        clave = self._clave
+
+        if clave in self._cache:
+            self._cache.move_to_end(clave)
+            self.al_terminar(self._cache[clave])
+            return
+
+        QtCore.QThreadPool.globalInstance().start(_TareaBusqueda(self, self._generacion, clave))
+
+    def _entregar(self, generacion, clave, resultado):
+        # ✅ UNA RESPUESTA DE UNA TECLA ANTERIOR LLEGA TARDE: SE DESCARTA
+        if generacion != self._generacion:
+            return
+
+        self._cache[clave] = resultado
+        while len(self._cache) > TAMANO_CACHE_BUSQUEDA:
+            self._cache.popitem(last=False)
+
+        self.al_terminar(resultado)
@@ -0,0 +1,116 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+from database import GestorConexiones
+
+# Registros que se escriben como máximo en una sola transacción
+TAMANO_LOTE = 500
+# Reintentos de un lote si la BD está ocupada (p. ej. mientras se restaura una copia)
+REINTENTOS = 5
+
+SQL_INSERTAR = """
+    INSERT INTO tbitacora (fecha, usuario, modulo, accion, descripcion, detalles, arete_afectado)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+class _Vaciado:
+    """Marca en la cola: se avisa cuando todo lo encolado antes ya está escrito"""
+
+    def __init__(self):
+        self.listo = threading.Event()
+
+
+class ColaBitacora:
+    """
+    Escritura diferida de la bitácora: registrar() solo encola y vuelve enseguida; un hilo
+    escribe en lotes (una transacción por lote, un solo fsync). Hay un único escritor y la
+    cola es FIFO, así que los registros quedan en el mismo orden en que se hicieron.
+    """
+
+    def __init__(self, db_name="bdd/SDLGAPP.db"):
+        self.db_name = db_name
+        self.gestor = GestorConexiones.instancia()
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._candado = threading.Lock()
+
+    def _asegurar_hilo(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._candado:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._escribir, name="bitacora", daemon=True)
+                self._hilo.start()
+
+    def registrar(self, fecha, usuario, modulo, accion, descripcion="", detalles="", arete_afectado=""):
+        """Encola un registro; no toca el disco"""
+        self._asegurar_hilo()
+        self._cola.put((fecha, usuario, modulo, accion, descripcion, detalles, arete_afectado))
+
+    def vaciar(self, espera: float = 5.0) -> bool:
+        """Espera a que se escriba todo lo encolado hasta ahora (al cerrar sesión o la app)"""
+        if self._hilo is None or not self._hilo.is_alive():
+            return self._cola.empty()
+        marca = _Vaciado()
+        self._cola.put(marca)
+        return marca.listo.wait(espera)
+
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    # ✅ HILO ESCRITOR
+    def _escribir(self):
+        while True:
+            lote, marcas = [], []
+            elemento = self._cola.get()
+            while True:
+                if isinstance(elemento, _Vaciado):
+                    marcas.append(elemento)
+                    break  # lo anterior a la marca se escribe antes de avisar
+                lote.append(elemento)
+                if len(lote) >= TAMANO_LOTE:
+                    break
+                try:
+                    elemento = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+
+            if lote:
+                self._escribir_lote(lote)
+            for marca in marcas:
+                marca.listo.set()
+
+    def _escribir_lote(self, lote):
+        for intento in range(1, REINTENTOS + 1):
+            try:
+                # La conexión se pide cada vez: si se cerraron todas (restauración) se abre otra
+                conexion = self.gestor.obtener_conexion(self.db_name)
+                with conexion:
+                    conexion.executemany(SQL_INSERTAR, lote)
+                return
+            except sqlite3.Error as e:
+                print(f"⚠️ Bitácora - Error escribiendo {len(lote)} registros (intento {intento}): {e}")
+                self.gestor.cerrar_conexion(self.db_name)
+                time.sleep(0.5 * intento)
+        for registro in lote:
+            print(f"❌ Bitácora - Registro no guardado: {registro}")
+
+
+_cola_compartida = None
+_candado_cola = threading.Lock()
+
+
+def obtener_cola_bitacora() -> ColaBitacora:
+    """Cola única de la bitácora para todo el proceso"""
+    global _cola_compartida
+    if _cola_compartida is None:
+        with _candado_cola:
+            if _cola_compartida is None:
+                _cola_compartida = ColaBitacora()
+                # Si la app termina sin pasar por closeEvent, igual se escribe lo pendiente
+                atexit.register(_cola_compartida.vaciar)
+    return _cola_compartida
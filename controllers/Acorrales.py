@@ -1,7 +1,7 @@
 # Acorrales.py - VERSIÓN CON BITÁCORA
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarcorral_ui import Ui_Dialog
-from database import Database
+from database import obtener_database
 import uuid
 
 class AgregarCorralController(QtWidgets.QDialog):
@@ -9,7 +9,7 @@ class AgregarCorralController(QtWidgets.QDialog):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         self.setup_connections()
@@ -46,6 +46,9 @@ class AgregarCorralController(QtWidgets.QDialog):
         self.ui.spinBox.setMinimum(0)
         self.ui.spinBox.setMaximum(1000)
         self.ui.spinBox.setValue(0)
+        # La capacidad actual la cuenta la BD con los animales del corral; no se escribe a mano
+        self.ui.spinBox.setReadOnly(True)
+        self.ui.spinBox.setToolTip("Se calcula con los animales del corral (sin muertos ni vendidos)")
         
         self.ui.spinBox_2.setMinimum(1)
         self.ui.spinBox_2.setMaximum(1000)
@@ -1,20 +1,25 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarprop_ui import Ui_Dialog
-from database import Database
-import os
-from pathlib import Path
+from database import obtener_database
+from fotos import FILTRO_IMAGENES, ProcesadorFotos
 
 class AgregarPropietarioController(QtWidgets.QDialog):
     def __init__(self, parent=None, bitacora_controller=None):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         # Variable para almacenar la foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
+        
+        # ✅ LAS FOTOS SE PROCESAN EN SEGUNDO PLANO (EXIF, TAMAÑO, COMPRESIÓN, MINIATURA)
+        self.procesador_fotos = ProcesadorFotos(self)
+        self.procesador_fotos.terminado.connect(self.foto_procesada)
+        self.procesador_fotos.fallido.connect(self.foto_no_procesada)
         
         self.setup_connections()
         self.verificar_widgets()
@@ -53,47 +58,21 @@ class AgregarPropietarioController(QtWidgets.QDialog):
             self.ui.textEdit.clear()
     
     def subir_foto(self):
-        """Abre un diálogo para seleccionar y cargar una foto"""
+        """Abre un diálogo para seleccionar una foto; se reduce y comprime en segundo plano"""
         try:
-            # Configurar los filtros de archivo
-            filtros = "Imágenes (*.png *.jpg *.jpeg *.bmp *.gif *.tiff);;Todos los archivos (*)"
-            
-            # Abrir diálogo de selección de archivo
             ruta_archivo, _ = QtWidgets.QFileDialog.getOpenFileName(
                 self, 
                 "Seleccionar foto del propietario", 
                 "", 
-                filtros
+                FILTRO_IMAGENES
             )
             
             if ruta_archivo:
-                # Verificar tamaño del archivo (máximo 5MB)
-                tamaño_archivo = os.path.getsize(ruta_archivo)
-                if tamaño_archivo > 5 * 1024 * 1024:  # 5MB en bytes
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Archivo muy grande", 
-                        "La imagen no puede ser mayor a 5MB"
-                    )
-                    return
-                
-                # Leer el archivo como bytes
-                with open(ruta_archivo, 'rb') as archivo:
-                    self.foto_data = archivo.read()
-                    self.foto_ruta = ruta_archivo
-                
-                # Mostrar información al usuario
-                nombre_archivo = Path(ruta_archivo).name
-                tamaño_kb = tamaño_archivo / 1024
-                
-                # Poner el nombre del archivo en lineEdit_4
-                self.ui.lineEdit_4.setText(nombre_archivo)
-                
-                # Cambiar el estilo del botón para indicar que la foto fue cargada
-                self.ui.indexbtn2.setText("✓ Foto Cargada")
-                self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
-                
-                print(f"✅ Foto cargada: {nombre_archivo} ({tamaño_kb:.1f} KB)")
+                # ✅ LA FOTO SE PROCESA FUERA DEL HILO DE LA INTERFAZ; NO SE GUARDA HASTA QUE TERMINE
+                self.ui.indexbtn2.setText("⏳ Procesando...")
+                self.ui.indexbtn2.setStyleSheet("")
+                self.ui.pushButton_2.setEnabled(False)
+                self.procesador_fotos.procesar(ruta_archivo)
                 
         except Exception as e:
             print(f"❌ Error al subir foto: {e}")
@@ -103,6 +82,31 @@ class AgregarPropietarioController(QtWidgets.QDialog):
                 f"No se pudo cargar la foto: {str(e)}"
             )
     
+    def foto_procesada(self, foto):
+        """Recibe la foto ya orientada, reducida y sin metadatos, con su miniatura"""
+        self.foto_data = foto.datos
+        self.foto_miniatura = foto.miniatura
+        self.foto_ruta = foto.ruta
+        self.ui.pushButton_2.setEnabled(True)
+        
+        # Poner el nombre del archivo en lineEdit_4
+        self.ui.lineEdit_4.setText(foto.nombre)
+        self.ui.indexbtn2.setText("✓ Foto Cargada")
+        self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        
+        print(f"✅ Foto cargada: {foto.nombre} - {foto.resumen()}")
+    
+    def foto_no_procesada(self, mensaje):
+        """La foto elegida no se pudo leer; se conserva la que había"""
+        self.ui.pushButton_2.setEnabled(True)
+        if self.foto_data:
+            self.ui.indexbtn2.setText("✓ Foto Cargada")
+            self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        else:
+            self.ui.indexbtn2.setText("Subir archivo")
+            self.ui.indexbtn2.setStyleSheet("")
+        QtWidgets.QMessageBox.warning(self, "Foto no válida", f"No se pudo cargar la foto: {mensaje}")
+    
     def validar_datos(self):
         """Valida que los datos ingresados sean correctos"""
         try:
@@ -166,7 +170,8 @@ class AgregarPropietarioController(QtWidgets.QDialog):
                 upp=upp if upp else None,
                 rfc=rfc if rfc else None,
                 observaciones=observaciones if observaciones else None,
-                foto=self.foto_data  # Incluir la foto como BLOB
+                foto=self.foto_data,  # Incluir la foto como BLOB
+                miniatura=self.foto_miniatura
             ):
                 # ✅ REGISTRAR EN BITÁCORA - AÑADIDO
                 if self.bitacora_controller:
@@ -205,6 +210,7 @@ class AgregarPropietarioController(QtWidgets.QDialog):
         # Limpiar foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
         self.ui.lineEdit_4.clear()  # Nombre del archivo
         self.ui.indexbtn2.setText("Subir archivo")
         self.ui.indexbtn2.setStyleSheet("")  # Resetear estilo
@@ -1,21 +1,27 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.editaranimal_ui import Ui_Dialog
-from database import Database
-import os
-from pathlib import Path
+from database import obtener_database, CorralLleno
+from fotos import FILTRO_IMAGENES, ProcesadorFotos
 
 class EditarAnimalController(QtWidgets.QDialog):
     def __init__(self, animal_data=None, parent=None, bitacora_controller=None):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         # Variable para almacenar la foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
+        
+        # ✅ LAS FOTOS SE PROCESAN EN SEGUNDO PLANO (EXIF, TAMAÑO, COMPRESIÓN, MINIATURA)
+        self.procesador_fotos = ProcesadorFotos(self)
+        self.procesador_fotos.terminado.connect(self.foto_procesada)
+        self.procesador_fotos.fallido.connect(self.foto_no_procesada)
+
         self.animal_original = animal_data  # Datos originales del animal
         self.arete_original = animal_data.get('arete', '') if animal_data else ''
         
@@ -88,7 +94,7 @@ class EditarAnimalController(QtWidgets.QDialog):
                 corrales = []
                 for corral in corrales_finales:
                     identcorral, nomcorral, capmax, capactual = corral
-                    animales_actuales = self.db.contar_animales_en_corral(nomcorral)
+                    animales_actuales = int(capactual or 0)  # capactual lo mantienen los triggers de la BD
                     
                     # Convertir capacidades a enteros
                     try:
@@ -235,44 +241,21 @@ class EditarAnimalController(QtWidgets.QDialog):
         return ""
     
     def subir_foto(self):
-        """Abre un diálogo para seleccionar y cargar una foto"""
+        """Abre un diálogo para seleccionar una foto; se reduce y comprime en segundo plano"""
         try:
-            # Configurar los filtros de archivo
-            filtros = "Imágenes (*.png *.jpg *.jpeg *.bmp *.gif *.tiff);;Todos los archivos (*)"
-            
-            # Abrir diálogo de selección de archivo
             ruta_archivo, _ = QtWidgets.QFileDialog.getOpenFileName(
                 self, 
                 "Seleccionar foto del animal", 
                 "", 
-                filtros
+                FILTRO_IMAGENES
             )
             
             if ruta_archivo:
-                # Verificar tamaño del archivo (máximo 5MB)
-                tamaño_archivo = os.path.getsize(ruta_archivo)
-                if tamaño_archivo > 5 * 1024 * 1024:  # 5MB en bytes
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Archivo muy grande", 
-                        "La imagen no puede ser mayor a 5MB"
-                    )
-                    return
-                
-                # Leer el archivo como bytes
-                with open(ruta_archivo, 'rb') as archivo:
-                    self.foto_data = archivo.read()
-                    self.foto_ruta = ruta_archivo
-                
-                # Mostrar información al usuario
-                nombre_archivo = Path(ruta_archivo).name
-                
-                # Actualizar la interfaz
-                self.ui.lineEdit_4.setText(nombre_archivo)
-                self.ui.indexbtn2.setText("✓ Foto Cargada")
-                self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
-                
-                print(f"✅ Foto cargada: {nombre_archivo}")
+                # ✅ LA FOTO SE PROCESA FUERA DEL HILO DE LA INTERFAZ; NO SE GUARDA HASTA QUE TERMINE
+                self.ui.indexbtn2.setText("⏳ Procesando...")
+                self.ui.indexbtn2.setStyleSheet("")
+                self.ui.pushButton_2.setEnabled(False)
+                self.procesador_fotos.procesar(ruta_archivo)
                 
         except Exception as e:
             print(f"❌ Error al subir foto: {e}")
@@ -282,6 +265,31 @@ class EditarAnimalController(QtWidgets.QDialog):
                 f"No se pudo cargar la foto: {str(e)}"
             )
     
+    def foto_procesada(self, foto):
+        """Recibe la foto ya orientada, reducida y sin metadatos, con su miniatura"""
+        self.foto_data = foto.datos
+        self.foto_miniatura = foto.miniatura
+        self.foto_ruta = foto.ruta
+        self.ui.pushButton_2.setEnabled(True)
+        
+        # Poner el nombre del archivo en lineEdit_4
+        self.ui.lineEdit_4.setText(foto.nombre)
+        self.ui.indexbtn2.setText("✓ Foto Cargada")
+        self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        
+        print(f"✅ Foto cargada: {foto.nombre} - {foto.resumen()}")
+    
+    def foto_no_procesada(self, mensaje):
+        """La foto elegida no se pudo leer; se conserva la que había"""
+        self.ui.pushButton_2.setEnabled(True)
+        if self.foto_data:
+            self.ui.indexbtn2.setText("✓ Foto Cargada")
+            self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        else:
+            self.ui.indexbtn2.setText("Subir archivo")
+            self.ui.indexbtn2.setStyleSheet("")
+        QtWidgets.QMessageBox.warning(self, "Foto no válida", f"No se pudo cargar la foto: {mensaje}")
+    
     def validar_datos(self):
         """Valida que los datos ingresados sean correctos"""
         try:
@@ -317,37 +325,14 @@ class EditarAnimalController(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Error", f"Error en validación: {str(e)}")
             return False
 
-    def validar_capacidad_corral(self, corral_destino: str) -> bool:
-        """Valida que el corral destino tenga capacidad disponible"""
-        try:
-            # Obtener el corral actual del animal
-            corral_actual = self.animal_original.get('corral', '')
-            
-            # Si es el mismo corral, no hay problema de capacidad
-            if corral_destino == corral_actual:
-                return True
-            
-            # Validar capacidad del corral destino
-            capacidad = self.db.obtener_capacidad_corral(corral_destino)
-            animales_actuales = self.db.contar_animales_en_corral(corral_destino)
-            
-            capacidad_maxima = capacidad['capacidad_maxima']
-            
-            if capacidad_maxima > 0 and animales_actuales >= capacidad_maxima:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Corral lleno",
-                    f"El corral '{corral_destino}' ha alcanzado su capacidad máxima ({capacidad_maxima} animales).\n\n"
-                    f"Actualmente tiene {animales_actuales} animales.\n"
-                    f"Por favor, seleccione otro corral con capacidad disponible."
-                )
-                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error validando capacidad del corral: {e}")
-            return True  # Por seguridad, permitir continuar si hay error
+    def mostrar_corral_lleno(self, error):
+        """La BD rechazó el cambio: el corral no tiene lugar (se revisa dentro de la transacción)"""
+        QtWidgets.QMessageBox.warning(
+            self,
+            "Corral lleno",
+            f"El corral '{error.corral}' ha alcanzado su capacidad máxima ({error.capacidad} animales).\n\n"
+            f"Por favor, seleccione otro corral con capacidad disponible."
+        )
     
     def guardar_cambios(self):
         """Guarda los cambios del animal en la base de datos"""
@@ -382,13 +367,9 @@ class EditarAnimalController(QtWidgets.QDialog):
             print(f"   Observaciones: {observaciones}")
             print(f"   Foto actualizada: {'Sí' if self.foto_data else 'No'}")
             
-            # Validar capacidad del corral destino
-            if not self.validar_capacidad_corral(corral):
-                return
-            
-            # ✅ REGISTRAR EN BITÁCORA ANTES DE ACTUALIZAR
+            # Cambios para la bitácora (se registran solo si la actualización se guarda)
+            cambios = []
             if self.bitacora_controller:
-                cambios = []
                 if arete != arete_original:
                     cambios.append(f"Arete: {arete_original} → {arete}")
                 if nombre != self.animal_original.get('nombre', ''):
@@ -406,15 +387,7 @@ class EditarAnimalController(QtWidgets.QDialog):
                 if estatus != self.animal_original.get('estatus', ''):
                     cambios.append(f"Estatus: {self.animal_original.get('estatus', '')} → {estatus}")
                 
-                if cambios:
-                    cambios_str = ", ".join(cambios)
-                    self.bitacora_controller.registrar_edicion_animal(
-                        arete=arete_original,
-                        cambios=cambios_str
-                    )
-                    print("✅ Edición registrada en bitácora con cambios detallados")
-            
-            # Actualizar en la base de datos
+            # Actualizar en la base de datos (la capacidad del corral se revisa en la misma transacción)
             if self.db.actualizar_animal(
                 arete_original=arete_original,
                 arete=arete,
@@ -427,13 +400,24 @@ class EditarAnimalController(QtWidgets.QDialog):
                 corral=corral,
                 estatus=estatus,
                 observaciones=observaciones,
-                foto=self.foto_data  # Incluir la foto como BLOB (puede ser None)
+                foto=self.foto_data,  # Incluir la foto como BLOB (puede ser None)
+                miniatura=self.foto_miniatura
             ):
+                if self.bitacora_controller and cambios:
+                    cambios_str = ", ".join(cambios)
+                    self.bitacora_controller.registrar_edicion_animal(
+                        arete=arete_original,
+                        cambios=cambios_str
+                    )
+                    print("✅ Edición registrada en bitácora con cambios detallados")
+                
                 QtWidgets.QMessageBox.information(self, "Éxito", "Animal actualizado correctamente")
                 self.accept()
             else:
                 QtWidgets.QMessageBox.warning(self, "Error", "Error al actualizar el animal")
                 
+        except CorralLleno as e:
+            self.mostrar_corral_lleno(e)
         except Exception as e:
             print(f"❌ Error al actualizar animal: {e}")
             QtWidgets.QMessageBox.critical(self, "Error", f"Error al actualizar: {str(e)}")
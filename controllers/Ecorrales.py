@@ -1,7 +1,7 @@
 # Ecorrales.py - VERSIÓN CON BITÁCORA ACTUALIZADA
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.editarcorral_ui import Ui_Dialog
-from database import Database
+from database import obtener_database
 import os
 from pathlib import Path
 
@@ -10,7 +10,7 @@ class EditarCorralController(QtWidgets.QDialog):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         # Datos originales del corral
@@ -37,6 +37,9 @@ class EditarCorralController(QtWidgets.QDialog):
             # Configurar spinboxes
             self.ui.spinBox.setMinimum(0)
             self.ui.spinBox.setMaximum(1000)
+            # La capacidad actual la cuenta la BD con los animales del corral; no se escribe a mano
+            self.ui.spinBox.setReadOnly(True)
+            self.ui.spinBox.setToolTip("Se calcula con los animales del corral (sin muertos ni vendidos)")
             
             self.ui.spinBox_2.setMinimum(1)
             self.ui.spinBox_2.setMaximum(1000)
@@ -1,21 +1,26 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarbecerro_ui import Ui_Dialog
-from database import Database
-import os
-from pathlib import Path
+from database import obtener_database, CorralLleno
+from fotos import FILTRO_IMAGENES, ProcesadorFotos
 
 class AgregarBecerroController(QtWidgets.QDialog):
     def __init__(self, parent=None, bitacora_controller=None):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         # Variable para almacenar la foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
+        
+        # ✅ LAS FOTOS SE PROCESAN EN SEGUNDO PLANO (EXIF, TAMAÑO, COMPRESIÓN, MINIATURA)
+        self.procesador_fotos = ProcesadorFotos(self)
+        self.procesador_fotos.terminado.connect(self.foto_procesada)
+        self.procesador_fotos.fallido.connect(self.foto_no_procesada)
         
         self.setup_connections()
         self.configurar_combobox()
@@ -70,7 +75,7 @@ class AgregarBecerroController(QtWidgets.QDialog):
                 corrales = []
                 for corral in corrales_data:
                     identcorral, nomcorral, capmax, capactual = corral
-                    animales_actuales = self.db.contar_animales_en_corral(nomcorral)
+                    animales_actuales = int(capactual or 0)  # capactual lo mantienen los triggers de la BD
                     
                     # Convertir capacidades a enteros
                     try:
@@ -150,46 +155,21 @@ class AgregarBecerroController(QtWidgets.QDialog):
             self.ui.textEdit.clear()
     
     def subir_foto(self):
-        """Abre un diálogo para seleccionar y cargar una foto"""
+        """Abre un diálogo para seleccionar una foto; se reduce y comprime en segundo plano"""
         try:
-            # Configurar los filtros de archivo
-            filtros = "Imágenes (*.png *.jpg *.jpeg *.bmp *.gif *.tiff);;Todos los archivos (*)"
-            
-            # Abrir diálogo de selección de archivo
             ruta_archivo, _ = QtWidgets.QFileDialog.getOpenFileName(
                 self, 
                 "Seleccionar foto del becerro", 
                 "", 
-                filtros
+                FILTRO_IMAGENES
             )
             
             if ruta_archivo:
-                # Verificar tamaño del archivo (máximo 5MB)
-                tamaño_archivo = os.path.getsize(ruta_archivo)
-                if tamaño_archivo > 5 * 1024 * 1024:  # 5MB en bytes
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Archivo muy grande", 
-                        "La imagen no puede ser mayor a 5MB"
-                    )
-                    return
-                
-                # Leer el archivo como bytes
-                with open(ruta_archivo, 'rb') as archivo:
-                    self.foto_data = archivo.read()
-                    self.foto_ruta = ruta_archivo
-                
-                # Mostrar información al usuario
-                nombre_archivo = Path(ruta_archivo).name
-                
-                # Poner el nombre del archivo en lineEdit_4
-                self.ui.lineEdit_4.setText(nombre_archivo)
-                
-                # Cambiar el texto y estilo del botón para indicar que la foto fue cargada
-                self.ui.indexbtn2.setText("✓ Foto Cargada")
-                self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
-                
-                print(f"✅ Foto cargada: {nombre_archivo}")
+                # ✅ LA FOTO SE PROCESA FUERA DEL HILO DE LA INTERFAZ; NO SE GUARDA HASTA QUE TERMINE
+                self.ui.indexbtn2.setText("⏳ Procesando...")
+                self.ui.indexbtn2.setStyleSheet("")
+                self.ui.pushButton_2.setEnabled(False)
+                self.procesador_fotos.procesar(ruta_archivo)
                 
         except Exception as e:
             print(f"❌ Error al subir foto: {e}")
@@ -199,6 +179,31 @@ class AgregarBecerroController(QtWidgets.QDialog):
                 f"No se pudo cargar la foto: {str(e)}"
             )
     
+    def foto_procesada(self, foto):
+        """Recibe la foto ya orientada, reducida y sin metadatos, con su miniatura"""
+        self.foto_data = foto.datos
+        self.foto_miniatura = foto.miniatura
+        self.foto_ruta = foto.ruta
+        self.ui.pushButton_2.setEnabled(True)
+        
+        # Poner el nombre del archivo en lineEdit_4
+        self.ui.lineEdit_4.setText(foto.nombre)
+        self.ui.indexbtn2.setText("✓ Foto Cargada")
+        self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        
+        print(f"✅ Foto cargada: {foto.nombre} - {foto.resumen()}")
+    
+    def foto_no_procesada(self, mensaje):
+        """La foto elegida no se pudo leer; se conserva la que había"""
+        self.ui.pushButton_2.setEnabled(True)
+        if self.foto_data:
+            self.ui.indexbtn2.setText("✓ Foto Cargada")
+            self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        else:
+            self.ui.indexbtn2.setText("Subir archivo")
+            self.ui.indexbtn2.setStyleSheet("")
+        QtWidgets.QMessageBox.warning(self, "Foto no válida", f"No se pudo cargar la foto: {mensaje}")
+    
     def validar_datos(self):
         """Valida que los datos ingresados sean correctos"""
         try:
@@ -239,29 +244,14 @@ class AgregarBecerroController(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Error", f"Error en validación: {str(e)}")
             return False
 
-    def validar_capacidad_corral(self, corral: str) -> bool:
-        """Valida que el corral tenga capacidad disponible"""
-        try:
-            capacidad = self.db.obtener_capacidad_corral(corral)
-            animales_actuales = self.db.contar_animales_en_corral(corral)
-            
-            capacidad_maxima = capacidad['capacidad_maxima']
-            
-            if capacidad_maxima > 0 and animales_actuales >= capacidad_maxima:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Corral lleno",
-                    f"El corral '{corral}' ha alcanzado su capacidad máxima ({capacidad_maxima} animales).\n\n"
-                    f"Actualmente tiene {animales_actuales} animales.\n"
-                    f"Por favor, seleccione otro corral con capacidad disponible."
-                )
-                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error validando capacidad del corral: {e}")
-            return True  # Por seguridad, permitir continuar si hay error
+    def mostrar_corral_lleno(self, error):
+        """La BD rechazó el cambio: el corral no tiene lugar (se revisa dentro de la transacción)"""
+        QtWidgets.QMessageBox.warning(
+            self,
+            "Corral lleno",
+            f"El corral '{error.corral}' ha alcanzado su capacidad máxima ({error.capacidad} animales).\n\n"
+            f"Por favor, seleccione otro corral con capacidad disponible."
+        )
     
     def guardar_becerro(self):
         """Guarda el nuevo becerro en la base de datos"""
@@ -293,11 +283,7 @@ class AgregarBecerroController(QtWidgets.QDialog):
             print(f"📝 Guardando becerro: {nombre}, Arete: {arete}")
             print(f"   Corral seleccionado: {corral}")
         
-            # Validar capacidad del corral antes de guardar
-            if not self.validar_capacidad_corral(corral):
-                return
-        
-            # Insertar en la base de datos
+            # Insertar en la base de datos (la capacidad del corral se revisa en la misma transacción)
             if self.db.insertar_becerro(
                 arete=arete,
                 nombre=nombre,
@@ -309,7 +295,8 @@ class AgregarBecerroController(QtWidgets.QDialog):
                 estatus=estatus,
                 aretemadre=arete_madre,
                 observacion=observaciones,
-                foto=self.foto_data
+                foto=self.foto_data,
+                miniatura=self.foto_miniatura
             ):
                 # ✅ REGISTRAR EN BITÁCORA
                 if self.bitacora_controller:
@@ -330,6 +317,8 @@ class AgregarBecerroController(QtWidgets.QDialog):
             else:
                 QtWidgets.QMessageBox.warning(self, "Error", "Error al guardar el becerro")
             
+        except CorralLleno as e:
+            self.mostrar_corral_lleno(e)
         except Exception as e:
             print(f"❌ Error al guardar becerro: {e}")
             QtWidgets.QMessageBox.critical(self, "Error", f"Error al guardar: {str(e)}")
@@ -352,6 +341,7 @@ class AgregarBecerroController(QtWidgets.QDialog):
         # Limpiar foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
         self.ui.indexbtn2.setText("Subir archivo")
         self.ui.indexbtn2.setStyleSheet("")  # Resetear estilo
         
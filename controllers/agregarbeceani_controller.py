@@ -1,16 +1,15 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarbeceani_ui import Ui_Dialog
-from database import Database
-import os
-from pathlib import Path
+from database import obtener_database, CorralLleno
+from fotos import FILTRO_IMAGENES, ProcesadorFotos
 
 class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
     def __init__(self, becerro_data=None, parent=None, bitacora_controller=None):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         # Datos del becerro que se va a transferir
@@ -20,6 +19,14 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
         # Variable para almacenar la foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
+        # La foto del becerro se conserva en la BD (no se lee); solo se sube si se elige otra
+        self.foto_del_becerro = False
+        
+        # ✅ LAS FOTOS SE PROCESAN EN SEGUNDO PLANO (EXIF, TAMAÑO, COMPRESIÓN, MINIATURA)
+        self.procesador_fotos = ProcesadorFotos(self)
+        self.procesador_fotos.terminado.connect(self.foto_procesada)
+        self.procesador_fotos.fallido.connect(self.foto_no_procesada)
         
         self.setup_connections()
         self.configurar_combobox()
@@ -90,7 +97,7 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
                 corrales = []
                 for corral in corrales_finales:
                     identcorral, nomcorral, capmax, capactual = corral
-                    animales_actuales = self.db.contar_animales_en_corral(nomcorral)
+                    animales_actuales = int(capactual or 0)  # capactual lo mantienen los triggers de la BD
                     
                     # Convertir capacidades a enteros
                     try:
@@ -215,10 +222,9 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
             if hasattr(self.ui, 'textEdit') and observaciones:
                 self.ui.textEdit.setPlainText(observaciones)
             
-            # Foto - cargar si existe
-            foto_data = self.becerro_data.get('foto')
-            if foto_data:
-                self.foto_data = foto_data
+            # Foto - la del becerro pasa al animal sin leerla de la BD
+            self.foto_del_becerro = bool(self.becerro_data.get('tiene_foto'))
+            if self.foto_del_becerro:
                 self.ui.indexbtn2.setText("✓ Foto Cargada")
                 self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
                 self.ui.lineEdit_4.setText("Foto cargada desde becerro")
@@ -240,37 +246,21 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
         return ""
     
     def subir_foto(self):
-        """Abre un diálogo para seleccionar y cargar una foto"""
+        """Abre un diálogo para seleccionar una foto; se reduce y comprime en segundo plano"""
         try:
-            filtros = "Imágenes (*.png *.jpg *.jpeg *.bmp *.gif *.tiff);;Todos los archivos (*)"
-            
             ruta_archivo, _ = QtWidgets.QFileDialog.getOpenFileName(
                 self, 
                 "Seleccionar foto del animal", 
                 "", 
-                filtros
+                FILTRO_IMAGENES
             )
             
             if ruta_archivo:
-                tamaño_archivo = os.path.getsize(ruta_archivo)
-                if tamaño_archivo > 5 * 1024 * 1024:
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Archivo muy grande", 
-                        "La imagen no puede ser mayor a 5MB"
-                    )
-                    return
-                
-                with open(ruta_archivo, 'rb') as archivo:
-                    self.foto_data = archivo.read()
-                    self.foto_ruta = ruta_archivo
-                
-                nombre_archivo = Path(ruta_archivo).name
-                self.ui.lineEdit_4.setText(nombre_archivo)
-                self.ui.indexbtn2.setText("✓ Foto Cargada")
-                self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
-                
-                print(f"✅ Foto cargada: {nombre_archivo}")
+                # ✅ LA FOTO SE PROCESA FUERA DEL HILO DE LA INTERFAZ; NO SE GUARDA HASTA QUE TERMINE
+                self.ui.indexbtn2.setText("⏳ Procesando...")
+                self.ui.indexbtn2.setStyleSheet("")
+                self.ui.pushButton_2.setEnabled(False)
+                self.procesador_fotos.procesar(ruta_archivo)
                 
         except Exception as e:
             print(f"❌ Error al subir foto: {e}")
@@ -280,37 +270,39 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
                 f"No se pudo cargar la foto: {str(e)}"
             )
     
-    def validar_capacidad_corral(self, corral_destino: str) -> bool:
-        """Valida que el corral destino tenga capacidad disponible"""
-        try:
-            # Obtener el corral actual del becerro
-            corral_actual = self.becerro_data.get('corral', '') if self.becerro_data else ''
-            
-            # Si es el mismo corral, no hay problema de capacidad
-            if corral_destino == corral_actual:
-                return True
-            
-            # Validar capacidad del corral destino
-            capacidad = self.db.obtener_capacidad_corral(corral_destino)
-            animales_actuales = self.db.contar_animales_en_corral(corral_destino)
-            
-            capacidad_maxima = capacidad['capacidad_maxima']
-            
-            if capacidad_maxima > 0 and animales_actuales >= capacidad_maxima:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Corral lleno",
-                    f"El corral '{corral_destino}' ha alcanzado su capacidad máxima ({capacidad_maxima} animales).\n\n"
-                    f"Actualmente tiene {animales_actuales} animales.\n"
-                    f"Por favor, seleccione otro corral con capacidad disponible."
-                )
-                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error validando capacidad del corral: {e}")
-            return True  # Por seguridad, permitir continuar si hay error
+    def foto_procesada(self, foto):
+        """Recibe la foto ya orientada, reducida y sin metadatos, con su miniatura"""
+        self.foto_data = foto.datos
+        self.foto_miniatura = foto.miniatura
+        self.foto_ruta = foto.ruta
+        self.ui.pushButton_2.setEnabled(True)
+        
+        # Poner el nombre del archivo en lineEdit_4
+        self.ui.lineEdit_4.setText(foto.nombre)
+        self.ui.indexbtn2.setText("✓ Foto Cargada")
+        self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        
+        print(f"✅ Foto cargada: {foto.nombre} - {foto.resumen()}")
+    
+    def foto_no_procesada(self, mensaje):
+        """La foto elegida no se pudo leer; se conserva la que había"""
+        self.ui.pushButton_2.setEnabled(True)
+        if self.foto_data or self.foto_del_becerro:
+            self.ui.indexbtn2.setText("✓ Foto Cargada")
+            self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        else:
+            self.ui.indexbtn2.setText("Subir archivo")
+            self.ui.indexbtn2.setStyleSheet("")
+        QtWidgets.QMessageBox.warning(self, "Foto no válida", f"No se pudo cargar la foto: {mensaje}")
+    
+    def mostrar_corral_lleno(self, error):
+        """La BD rechazó el cambio: el corral no tiene lugar (se revisa dentro de la transacción)"""
+        QtWidgets.QMessageBox.warning(
+            self,
+            "Corral lleno",
+            f"El corral '{error.corral}' ha alcanzado su capacidad máxima ({error.capacidad} animales).\n\n"
+            f"Por favor, seleccione otro corral con capacidad disponible."
+        )
     
     def validar_datos(self):
         """Valida que los datos ingresados sean correctos"""
@@ -360,10 +352,6 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
                 self.ui.lineEdit_6.setFocus()
                 return False
             
-            # Validar capacidad del corral
-            if not self.validar_capacidad_corral(corral):
-                return False
-            
             # Verificar si el arete ya existe en animales (si cambió el arete)
             if arete != self.arete_original:
                 animal_existente = self.db.obtener_animal_por_arete(arete)
@@ -409,21 +397,11 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
             print(f"   Corral: {corral}, Sexo: {sexo}, Raza: {raza}")
             print(f"   Tipo producción: {tipo_produccion}, Tipo alimento: {tipo_alimento}")
             print(f"   Estatus: {estatus}")
-            print(f"   Foto transferida: {'Sí' if self.foto_data else 'No'}")
-            
-            # ✅ REGISTRAR EN BITÁCORA LA TRANSFERENCIA
-            if self.bitacora_controller:
-                self.bitacora_controller.registrar_accion(
-                    modulo="Transferencia",
-                    accion="TRANSFERIR",
-                    descripcion=f"Transferencia de becerro a animal: {nombre}",
-                    detalles=f"Becerro {arete_original} transferido a animales con arete {arete}",
-                    arete_afectado=arete_original
-                )
-                print("✅ Transferencia registrada en bitácora")
+            print(f"   Foto: {'Nueva' if self.foto_data else 'La del becerro' if self.foto_del_becerro else 'No'}")
             
-            # 1. INSERTAR EN TABLA DE ANIMALES
-            if self.db.insertar_animal(
+            # ✅ ALTA EN GANADO Y BAJA EN BECERROS EN UNA SOLA TRANSACCIÓN (TODO O NADA)
+            if self.db.promover_becerro(
+                arete_original,
                 arete=arete,
                 nombre=nombre,
                 sexo=sexo,
@@ -433,36 +411,36 @@ class AgregarBecerroAAnimalesController(QtWidgets.QDialog):
                 fecha_nacimiento=fecha_nacimiento,
                 corral=corral,
                 estatus=estatus,
-                observaciones=observaciones if observaciones else None,
-                foto=self.foto_data
+                observaciones=observaciones,
+                foto=self.foto_data,
+                miniatura=self.foto_miniatura
             ):
-                print("✅ Animal insertado correctamente en tganado")
-                
-                # 2. ELIMINAR DE TABLA DE BECERROS
-                if self.db.eliminar_becerro_por_arete(arete_original):
-                    print("✅ Becerro eliminado correctamente de tbecerros")
-                    
-                    QtWidgets.QMessageBox.information(
-                        self, 
-                        "Éxito", 
-                        f"Becerro '{nombre}' transferido correctamente a animales y eliminado de becerros"
-                    )
-                    self.accept()
-                else:
-                    # Si no se pudo eliminar el becerro, revertir la inserción del animal
-                    self.db.eliminar_animal_por_arete(arete)
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Error", 
-                        "Error al eliminar el becerro. La operación fue revertida."
+                # ✅ REGISTRAR EN BITÁCORA LA TRANSFERENCIA
+                if self.bitacora_controller:
+                    self.bitacora_controller.registrar_accion(
+                        modulo="Transferencia",
+                        accion="TRANSFERIR",
+                        descripcion=f"Transferencia de becerro a animal: {nombre}",
+                        detalles=f"Becerro {arete_original} transferido a animales con arete {arete}",
+                        arete_afectado=arete_original
                     )
+                    print("✅ Transferencia registrada en bitácora")
+                
+                QtWidgets.QMessageBox.information(
+                    self, 
+                    "Éxito", 
+                    f"Becerro '{nombre}' transferido correctamente a animales y eliminado de becerros"
+                )
+                self.accept()
             else:
                 QtWidgets.QMessageBox.warning(
                     self, 
                     "Error", 
-                    "Error al insertar el animal en la base de datos"
+                    "No se pudo transferir el becerro (¿el arete ya existe en animales?). No se hizo ningún cambio."
                 )
                 
+        except CorralLleno as e:
+            self.mostrar_corral_lleno(e)
         except Exception as e:
             print(f"❌ Error al transferir becerro a animal: {e}")
             QtWidgets.QMessageBox.critical(
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarreproduccion_ui import Ui_Dialog
-from database import Database
+from database import obtener_database
 from datetime import datetime, timedelta
 
 class AgregarReproduccionController(QtWidgets.QDialog):
@@ -9,7 +9,7 @@ class AgregarReproduccionController(QtWidgets.QDialog):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         self.arete_animal = arete_animal
         self.main_window = main_window
@@ -190,48 +190,6 @@ class AgregarReproduccionController(QtWidgets.QDialog):
             print(f"❌ Error en validación: {e}")
             return False
     
-    def verificar_y_actualizar_tabla(self):
-        """Verifica y actualiza la estructura de la tabla treprod si es necesario"""
-        try:
-            # Verificar si la tabla existe
-            tablas = self.db.listar_tablas()
-            if 'treprod' not in tablas:
-                print("❌ La tabla 'treprod' no existe")
-                return self.crear_tabla_reproduccion()
-            
-            # Verificar si tiene la columna 'observacion' (SINGULAR)
-            cursor = self.db.ejecutar_consulta("PRAGMA table_info(treprod)")
-            if cursor:
-                columnas = [col[1] for col in cursor.fetchall()]  # [id, areteanimal, cargada, ...]
-                print(f"📋 Columnas actuales en treprod: {columnas}")
-                
-                if 'observacion' not in columnas:  # CAMBIADO A SINGULAR
-                    print("🔄 Agregando columna 'observacion' a la tabla existente...")
-                    return self.agregar_columna_observacion()  # CAMBIADO A SINGULAR
-                else:
-                    print("✅ La tabla ya tiene la columna 'observacion'")  # CAMBIADO A SINGULAR
-                    return True
-            return False
-            
-        except Exception as e:
-            print(f"❌ Error verificando estructura de tabla: {e}")
-            return False
-
-    def agregar_columna_observacion(self):  # CAMBIADO A SINGULAR
-        """Agrega la columna observacion (SINGULAR) a la tabla existente"""
-        try:
-            query = "ALTER TABLE treprod ADD COLUMN observacion TEXT"  # CAMBIADO A SINGULAR
-            cursor = self.db.ejecutar_consulta(query)
-            if cursor:
-                print("✅ Columna 'observacion' agregada exitosamente")  # CAMBIADO A SINGULAR
-                return True
-            else:
-                print("❌ Error al agregar columna 'observacion'")  # CAMBIADO A SINGULAR
-                return False
-        except Exception as e:
-            print(f"❌ Error agregando columna observacion: {e}")  # CAMBIADO A SINGULAR
-            return False
-    
     def guardar_reproduccion(self):
         """Guarda el nuevo registro de reproducción en la base de datos"""
         try:
@@ -314,11 +272,6 @@ class AgregarReproduccionController(QtWidgets.QDialog):
                                      fservicioactual, faproxparto, fnuevoservicio, observaciones):
         """Inserta el registro de reproducción en la base de datos"""
         try:
-            # Primero verificamos y actualizamos la tabla si es necesario
-            if not self.verificar_y_actualizar_tabla():
-                print("❌ No se pudo verificar/actualizar la tabla treprod")
-                return False
-            
             # Asegurarnos de que observaciones no sea None
             if observaciones is None:
                 observaciones = ""
@@ -357,49 +310,18 @@ class AgregarReproduccionController(QtWidgets.QDialog):
         """Verifica que el registro se insertó correctamente"""
         try:
             query = "SELECT * FROM treprod WHERE areteanimal = ? ORDER BY idreprod DESC LIMIT 1"
-            cursor = self.db.ejecutar_consulta(query, (arete,))
-            if cursor:
-                resultado = cursor.fetchone()
-                if resultado:
-                    print(f"✅ Registro verificado en BD:")
-                    print(f"   ID: {resultado[0]}")
-                    print(f"   Arete: {resultado[1]}")
-                    # La columna observacion ahora está en la posición 8 (si es la última)
-                    print(f"   Observacion: '{resultado[8]}'")  # CAMBIADO A SINGULAR
-                else:
-                    print("❌ No se encontró el registro insertado")
+            resultado = self.db.consultar_uno(query, (arete,))
+            if resultado:
+                print(f"✅ Registro verificado en BD:")
+                print(f"   ID: {resultado[0]}")
+                print(f"   Arete: {resultado[1]}")
+                # La columna observacion ahora está en la posición 8 (si es la última)
+                print(f"   Observacion: '{resultado[8]}'")  # CAMBIADO A SINGULAR
             else:
-                print("❌ Error al verificar la inserción")
+                print("❌ No se encontró el registro insertado")
         except Exception as e:
             print(f"❌ Error verificando inserción: {e}")
     
-    def crear_tabla_reproduccion(self):
-        """Crea la tabla treprod si no existe"""
-        try:
-            query = """
-            CREATE TABLE IF NOT EXISTS treprod (
-                idreprod INTEGER PRIMARY KEY AUTOINCREMENT,
-                areteanimal TEXT NOT NULL,
-                cargada TEXT NOT NULL,
-                tecnica TEXT NOT NULL,
-                cantpartos INTEGER,
-                fservicioactual DATE NOT NULL,
-                faproxparto DATE,
-                fnuevoservicio DATE,
-                observacion TEXT  -- CAMBIADO A SINGULAR
-            )
-            """
-            cursor = self.db.ejecutar_consulta(query)
-            if cursor:
-                print("✅ Tabla 'treprod' creada exitosamente")
-                return True
-            else:
-                print("❌ Error al crear tabla 'treprod'")
-                return False
-        except Exception as e:
-            print(f"❌ Error creando tabla reproducción: {e}")
-            return False
-
     def _obtener_main_window(self):
         """Obtiene la ventana principal (MainWindow) de la jerarquía de padres"""
         parent = self.parent()
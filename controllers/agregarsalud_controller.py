@@ -1,15 +1,14 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarsalud_ui import Ui_Dialog
-from database import Database
-import os
-from pathlib import Path
+from database import obtener_database
+from fotos import ProcesadorFotos
 
 class AgregarSaludController(QtWidgets.QDialog):
     def __init__(self, parent=None, bitacora_controller=None, arete_animal=None, tipo_animal=None, main_window=None):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         self.arete_animal = arete_animal
         self.tipo_animal = tipo_animal
@@ -19,6 +18,11 @@ class AgregarSaludController(QtWidgets.QDialog):
         self.archivo_data = None
         self.archivo_ruta = None
         
+        # ✅ LAS IMÁGENES SE REDUCEN Y COMPRIMEN EN SEGUNDO PLANO; LOS PDF SE GUARDAN TAL CUAL
+        self.procesador_archivos = ProcesadorFotos(self)
+        self.procesador_archivos.terminado.connect(self.archivo_procesado)
+        self.procesador_archivos.fallido.connect(self.archivo_no_procesado)
+        
         self.setup_connections()
         self.configurar_widgets()
         self.cargar_datos_combo()
@@ -132,33 +136,10 @@ class AgregarSaludController(QtWidgets.QDialog):
             )
             
             if ruta_archivo:
-                # Verificar tamaño del archivo (máximo 10MB)
-                tamaño_archivo = os.path.getsize(ruta_archivo)
-                if tamaño_archivo > 10 * 1024 * 1024:  # 10MB en bytes
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Archivo muy grande", 
-                        "El archivo no puede ser mayor a 10MB"
-                    )
-                    return
-                
-                # Leer el archivo como bytes
-                with open(ruta_archivo, 'rb') as archivo:
-                    self.archivo_data = archivo.read()
-                    self.archivo_ruta = ruta_archivo
-                
-                # Mostrar información al usuario
-                nombre_archivo = Path(ruta_archivo).name
-                tamaño_kb = tamaño_archivo / 1024
-                
-                # Poner el nombre del archivo en lineEdit_4
-                self.ui.lineEdit_4.setText(nombre_archivo)
-                
-                # Opcional: Cambiar el estilo del botón para indicar que el archivo fue cargado
-                self.ui.indexbtn2.setText("✓ Archivo Cargado")
-                self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
-                
-                print(f"✅ Archivo cargado: {nombre_archivo} ({tamaño_kb:.1f} KB)")
+                self.ui.indexbtn2.setText("⏳ Procesando...")
+                self.ui.indexbtn2.setStyleSheet("")
+                self.ui.pushButton_2.setEnabled(False)  # No guardar hasta que termine
+                self.procesador_archivos.procesar(ruta_archivo, adjunto=True)
                 
         except Exception as e:
             print(f"❌ Error al subir archivo: {e}")
@@ -168,6 +149,30 @@ class AgregarSaludController(QtWidgets.QDialog):
                 f"No se pudo cargar el archivo: {str(e)}"
             )
     
+    def archivo_procesado(self, archivo):
+        """Recibe el archivo listo para guardar (imagen ya reducida o PDF sin cambios)"""
+        self.archivo_data = archivo.datos
+        self.archivo_ruta = archivo.ruta
+        self.ui.pushButton_2.setEnabled(True)
+        
+        # Poner el nombre del archivo en lineEdit_4
+        self.ui.lineEdit_4.setText(archivo.nombre)
+        self.ui.indexbtn2.setText("✓ Archivo Cargado")
+        self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        
+        print(f"✅ Archivo cargado: {archivo.nombre} - {archivo.resumen()}")
+    
+    def archivo_no_procesado(self, mensaje):
+        """El archivo no se pudo cargar; se conserva el anterior"""
+        self.ui.pushButton_2.setEnabled(True)
+        if self.archivo_data:
+            self.ui.indexbtn2.setText("✓ Archivo Cargado")
+            self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        else:
+            self.ui.indexbtn2.setText("Subir archivo")
+            self.ui.indexbtn2.setStyleSheet("")
+        QtWidgets.QMessageBox.warning(self, "Archivo no válido", f"No se pudo cargar el archivo: {mensaje}")
+    
     def validar_datos(self):
         """Valida que los datos ingresados sean correctos"""
         try:
@@ -320,63 +325,25 @@ class AgregarSaludController(QtWidgets.QDialog):
                               observaciones, archivo=None):
         """Inserta el registro de salud en la base de datos"""
         try:
-            # Primero verificamos si la tabla tsalud existe
-            tablas = self.db.listar_tablas()
-            if 'tsalud' not in tablas:
-                print("❌ La tabla 'tsalud' no existe, creándola...")
-                if not self.crear_tabla_salud():
-                    return False
-            
             # Insertar en la tabla tsalud
             query = """
             INSERT INTO tsalud 
-            (areteanimal, tipoanimal, nomvet, procedimiento, medprev, condicionsalud, fecharev, observacionsalud, archivo)
+            (areteanimal, tipoanimal, nomvet, procedimiento, medprev, condicionsalud, fecharev, observacionsalud, hasharchivo)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
-            params = (arete, tipo_animal, veterinario, procedimiento, medicina_preventiva, 
-                     condicion_salud, fecha_revision, observaciones, archivo)
-            
-            cursor = self.db.ejecutar_consulta(query, params)
+            # ✅ EL ARCHIVO SE GUARDA EN tarchivos; LA FILA SOLO LLEVA SU HASH (AMBOS EN UNA TRANSACCIÓN)
+            with self.db.transaccion():
+                params = (arete, tipo_animal, veterinario, procedimiento, medicina_preventiva, 
+                         condicion_salud, fecha_revision, observaciones, self.db.guardar_archivo(archivo))
+                self.db.ejecutar_consulta(query, params)
             
-            if cursor:
-                print(f"✅ Registro de salud insertado correctamente para arete: {arete}")
-                return True
-            else:
-                print(f"❌ Error al insertar registro de salud")
-                return False
+            print(f"✅ Registro de salud insertado correctamente para arete: {arete}")
+            return True
                 
         except Exception as e:
             print(f"❌ Error en insertar_registro_salud: {e}")
             return False
     
-    def crear_tabla_salud(self):
-        """Crea la tabla tsalud si no existe"""
-        try:
-            query = """
-            CREATE TABLE IF NOT EXISTS tsalud (
-                idsalud INTEGER PRIMARY KEY AUTOINCREMENT,
-                areteanimal TEXT NOT NULL,
-                tipoanimal TEXT NOT NULL,
-                nomvet TEXT NOT NULL,
-                procedimiento TEXT NOT NULL,
-                medprev TEXT,
-                condicionsalud TEXT,
-                fecharev DATE NOT NULL,
-                observacionsalud TEXT,
-                archivo BLOB
-            )
-            """
-            cursor = self.db.ejecutar_consulta(query)
-            if cursor:
-                print("✅ Tabla 'tsalud' creada exitosamente")
-                return True
-            else:
-                print("❌ Error al crear tabla 'tsalud'")
-                return False
-        except Exception as e:
-            print(f"❌ Error creando tabla salud: {e}")
-            return False
-
     def ver_registros_salud(self):
         """Abre la página de reportes de salud con el arete actual filtrado"""
         try:
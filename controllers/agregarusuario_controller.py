@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.agregarusuario_ui import Ui_Dialog
-from database import Database
+from database import obtener_database
 # ⬇️ Eliminamos la importación de hashlib
 # import hashlib
 
@@ -10,7 +10,7 @@ class AgregarUsuarioController(QtWidgets.QDialog):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         self.setup_connections()
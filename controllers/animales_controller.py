@@ -1,14 +1,20 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database, CursorPaginado
+from tabla_modelo import (ModeloTabla, ProveedorMiniaturas, DelegadoFoto, DelegadoAcciones,
+                          Columna, Accion, FOTO, FECHA, OBSERVACIONES, ACCIONES, reemplazar_tabla)
+from busqueda import BusquedaDiferida
 from controllers.Aanimal import AgregarAnimalController
 from controllers.Eanimal import EditarAnimalController
 
 class AnimalesController:
     def __init__(self, animales_widget, bitacora_controller=None):
         self.animales_widget = animales_widget
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.db.buscar_animales_en_todos_los_campos, self.llenar_tabla,
+                                         parent=self.animales_widget)
         self.setup_connections()
         self.configurar_tabla()
         
@@ -93,7 +99,7 @@ class AnimalesController:
             
             for corral in corrales_data:
                 identcorral, nomcorral, ubicorral, capmax, capactual, fechamant, condicion, observacioncorral = corral
-                animales_actuales = self.db.contar_animales_en_corral(nomcorral)
+                animales_actuales = int(capactual or 0)  # capactual lo mantienen los triggers de la BD
                 
                 if capmax and capmax > 0:
                     disponible = capmax - animales_actuales
@@ -160,14 +166,37 @@ class AnimalesController:
             
         try:
             # Columnas según el diseño UI
+            # (posiciones de la fila de obtener_animales: 0 id ... 10 observaciones, 11 foto)
             columnas = [
-                "ID", "Foto", "Arete", "Nombre", "Corral", "Sexo", "Raza", 
-                "Tipo de producción", "Tipo de alimento", "Fecha de nacimiento", 
-                "Estatus", "Observaciones", "Opciones"
+                Columna("ID", 0), Columna("Foto", 11, FOTO), Columna("Arete", 1), Columna("Nombre", 2),
+                Columna("Corral", 3), Columna("Sexo", 4), Columna("Raza", 5),
+                Columna("Tipo de producción", 6), Columna("Tipo de alimento", 7),
+                Columna("Fecha de nacimiento", 8, FECHA), Columna("Estatus", 9),
+                Columna("Observaciones", 10, OBSERVACIONES), Columna("Opciones", tipo=ACCIONES)
             ]
             
-            self.tableWidget.setColumnCount(len(columnas))
-            self.tableWidget.setHorizontalHeaderLabels(columnas)
+            # ✅ GRID MODELO/VISTA: LAS CELDAS SE PINTAN, NO HAY WIDGETS POR FILA
+            self.modelo = ModeloTabla(columnas)
+            self.tableWidget = reemplazar_tabla(self.tableWidget, self.modelo)
+            ProveedorMiniaturas(self.modelo, self.db, 'animal', indice_clave=1, indice_foto=11, columna=1)
+            
+            self.delegado_foto = DelegadoFoto("📷", self.tableWidget)
+            self.delegado_foto.clic.connect(self.on_foto_clic)
+            self.tableWidget.setItemDelegateForColumn(1, self.delegado_foto)
+            
+            # ✅ OPCIONES - SOLO REPRODUCCIÓN PARA HEMBRAS
+            self.delegado_opciones = DelegadoAcciones([
+                Accion("❤️", "#e74c3c", "#c0392b", "Registro de salud",
+                       lambda animal: self.abrir_registro_salud(str(animal[1] or ""))),
+                Accion("🐄", "#9b59b6", "#8e44ad", "Registro de reproducción",
+                       lambda animal: self.abrir_registro_reproduccion(str(animal[1] or "")),
+                       visible=lambda animal: str(animal[4] or "").strip().lower() == "hembra"),
+                Accion("✏️", "#3498db", "#2980b9", "Editar animal",
+                       lambda animal: self.editar_animal(str(animal[1] or ""))),
+                Accion("🗑️", "#34495e", "#2c3e50", "Eliminar animal",
+                       lambda animal: self.eliminar_animal(str(animal[1] or ""))),
+            ], parent=self.tableWidget)
+            self.tableWidget.setItemDelegateForColumn(12, self.delegado_opciones)
             
             # Configurar tamaños de columnas
             self.tableWidget.setColumnWidth(0, 40)    # ID
@@ -194,16 +223,18 @@ class AnimalesController:
             self.tableWidget.verticalHeader().setVisible(False)
             
             # Conexión para doble clic en observaciones
-            self.tableWidget.cellDoubleClicked.connect(self.on_cell_double_clicked)
+            self.tableWidget.doubleClicked.connect(
+                lambda index: self.on_cell_double_clicked(index.row(), index.column())
+            )
             
             # Estilo para la tabla
             self.tableWidget.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     gridline-color: #d0d0d0;
                     background-color: white;
                     alternate-background-color: #f8f8f8;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 5px;
                     border-bottom: 1px solid #e0e0e0;
                 }
@@ -224,12 +255,9 @@ class AnimalesController:
     def on_cell_double_clicked(self, row, column):
         """Maneja el doble clic en celdas específicas - SOLO OBSERVACIONES"""
         if column == 11:  # Columna de Observaciones
-            arete_item = self.tableWidget.item(row, 2)  # Columna Arete
-            observacion_item = self.tableWidget.item(row, 11)  # Columna Observaciones
-            
-            if arete_item and observacion_item:
-                arete = arete_item.text()
-                observaciones = observacion_item.data(QtCore.Qt.UserRole)  # Datos completos
+            if self.modelo.fila(row) is not None:
+                arete = self.modelo.texto(row, 2)  # Columna Arete
+                observaciones = self.modelo.texto(row, 11)  # Observaciones completas
                 
                 if observaciones and observaciones.strip():
                     print(f"🖱️ Doble clic en observaciones para animal arete: {arete}")
@@ -241,25 +269,19 @@ class AnimalesController:
         """Carga todos los animales en la tabla"""
         try:
             print("🔄 Cargando animales desde la base de datos...")
+            self.busqueda.invalidar()
             
-            animales = self.db.obtener_animales()
-            print(f"📊 {len(animales)} animales encontrados en el controlador")
+            animales = self.db.paginar_animales()
+            self.llenar_tabla(animales)
+            print(f"📊 {animales.total_leido} animales en la primera página")
             
-            if len(animales) == 0:
+            if animales.total_leido == 0:
                 print("⚠️ ADVERTENCIA: No se encontraron animales en la base de datos")
                 QtWidgets.QMessageBox.information(
                     self.animales_widget, 
                     "Información", 
                     "No se encontraron animales en la base de datos."
                 )
-
-            print("🔍 Verificando estatus de animales encontrados:")
-            for animal in animales:
-                estatus = animal[9] if len(animal) > 9 else "N/A"  # Estatus está en posición 9
-                arete = animal[1] if len(animal) > 1 else "N/A"
-                print(f"   - Arete: {arete}, Estatus: {estatus}")
-
-            self.llenar_tabla(animales)
         except Exception as e:
             print(f"❌ Error al cargar animales: {e}")
             import traceback
@@ -272,162 +294,30 @@ class AnimalesController:
             return
 
         try:
-            self.tableWidget.setRowCount(0)
-
-            for row_number, animal in enumerate(animales):
-                self.tableWidget.insertRow(row_number)
-                self.tableWidget.setRowHeight(row_number, 80)  # Altura mayor para las fotos
-                
-                # ID (oculto pero necesario para operaciones)
-                id_item = QtWidgets.QTableWidgetItem(str(animal[0] if animal[0] is not None else ""))
-                self.tableWidget.setItem(row_number, 0, id_item)
-                
-                # Foto
-                arete = str(animal[1] if animal[1] else "")
-                self.mostrar_foto_en_tabla(row_number, 1, arete)
-                
-                # Arete (2)
-                arete_item = QtWidgets.QTableWidgetItem(arete)
-                self.tableWidget.setItem(row_number, 2, arete_item)
-                
-                # Nombre (3)
-                nombre_item = QtWidgets.QTableWidgetItem(str(animal[2] if animal[2] else ""))
-                self.tableWidget.setItem(row_number, 3, nombre_item)
-                
-                # Corral (4)
-                corral_item = QtWidgets.QTableWidgetItem(str(animal[3] if animal[3] else ""))
-                self.tableWidget.setItem(row_number, 4, corral_item)
-                
-                # Sexo (5)
-                sexo_item = QtWidgets.QTableWidgetItem(str(animal[4] if animal[4] else ""))
-                self.tableWidget.setItem(row_number, 5, sexo_item)
-                
-                # Raza (6)
-                raza_item = QtWidgets.QTableWidgetItem(str(animal[5] if animal[5] else ""))
-                self.tableWidget.setItem(row_number, 6, raza_item)
-                
-                # Tipo de producción (7)
-                prod_item = QtWidgets.QTableWidgetItem(str(animal[6] if animal[6] else ""))
-                self.tableWidget.setItem(row_number, 7, prod_item)
-                
-                # Tipo de alimento (8)
-                alimento_item = QtWidgets.QTableWidgetItem(str(animal[7] if animal[7] else ""))
-                self.tableWidget.setItem(row_number, 8, alimento_item)
-                
-                # Fecha de nacimiento (9)
-                fecha_item = QtWidgets.QTableWidgetItem(str(animal[8] if animal[8] else ""))
-                self.tableWidget.setItem(row_number, 9, fecha_item)
-                
-                # Estatus (10)
-                estatus_item = QtWidgets.QTableWidgetItem(str(animal[9] if animal[9] else ""))
-                self.tableWidget.setItem(row_number, 10, estatus_item)
-                
-                # Observaciones (11)
-                observacion = str(animal[10] if len(animal) > 10 and animal[10] is not None else "")
-                observacion_preview = observacion[:30] + "..." if len(observacion) > 30 else observacion
-                observacion_item = QtWidgets.QTableWidgetItem(observacion_preview)
-                
-                # Guardar observaciones completas para el doble clic
-                observacion_item.setData(QtCore.Qt.UserRole, observacion)
-                
-                # Hacer que la celda sea clickeable solo si hay observaciones
-                if observacion and observacion.strip():
-                    observacion_item.setForeground(QtGui.QColor('#2980b9'))
-                    observacion_item.setToolTip("Doble clic para ver observaciones completas")
-                    observacion_item.setFlags(observacion_item.flags() | QtCore.Qt.ItemIsEnabled)
-                else:
-                    observacion_item.setToolTip("Sin observaciones")
-                    observacion_item.setForeground(QtGui.QColor('#95a5a6'))
-                    
-                self.tableWidget.setItem(row_number, 11, observacion_item)
-                
-                # Opciones (12)
-                sexo_animal = str(animal[4] if animal[4] else "")
-
-                print(f"🔍 DEBUG - Fila {row_number}: Arete={arete}, Sexo='{sexo_animal}', Es hembra={sexo_animal and sexo_animal.strip().lower() == 'hembra'}")
-
-                self.agregar_botones_opciones(row_number, 12, arete, sexo_animal)
+            # ✅ EL MODELO GUARDA LAS TUPLAS TAL CUAL; LA VISTA SOLO PINTA LAS FILAS VISIBLES
+            # ✅ UN CURSOR PAGINADO SE LEE POR PÁGINAS CONFORME SE HACE SCROLL
+            if isinstance(animales, CursorPaginado):
+                self.modelo.establecer_cursor(animales)
+            else:
+                self.modelo.establecer_filas(animales)
 
             # Ocultar columna ID
             self.tableWidget.setColumnHidden(0, True)
             
-            print(f"✅ Tabla llenada con {len(animales)} registros de animales")
-
+            print(f"✅ Tabla llenada con {self.modelo.rowCount()} registros de animales")
             
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
             import traceback
             traceback.print_exc()
 
-    def mostrar_foto_en_tabla(self, row, column, arete_animal):
-        """Muestra la foto en pequeño directamente en la tabla usando el arete"""
-        try:
-            print(f"📸 Intentando mostrar foto para animal arete: {arete_animal}")
-            foto_data = self.db.obtener_foto_animal_por_arete(arete_animal)
-            
-            if foto_data:
-                print(f"✅ Foto encontrada en BD - Tamaño: {len(foto_data)} bytes")
-                
-                # Crear un pixmap desde los datos BLOB
-                pixmap = QtGui.QPixmap()
-                if pixmap.loadFromData(foto_data):
-                    print("✅ Pixmap cargado correctamente desde datos BLOB")
-                    
-                    # Escalar la imagen a un tamaño pequeño para la tabla (60x60)
-                    pixmap_escalado = pixmap.scaled(60, 60, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-                    
-                    # Crear un QLabel para mostrar la imagen
-                    label_foto = QtWidgets.QLabel()
-                    label_foto.setPixmap(pixmap_escalado)
-                    label_foto.setAlignment(QtCore.Qt.AlignCenter)
-                    label_foto.setToolTip("Haz clic para ver la foto en tamaño completo")
-                    label_foto.setCursor(QtCore.Qt.PointingHandCursor)
-                    label_foto.setStyleSheet("""
-                        border: 2px solid #bdc3c7; 
-                        background-color: #ecf0f1;
-                        border-radius: 5px;
-                        padding: 2px;
-                    """)
-                    
-                    # Hacer que el label sea clickeable
-                    label_foto.mousePressEvent = lambda event, arete=arete_animal: self.mostrar_foto_completa_por_arete(arete)
-                    
-                    self.tableWidget.setCellWidget(row, column, label_foto)
-                    print(f"✅ Miniatura de foto mostrada en tabla para arete: {arete_animal}")
-                else:
-                    print("❌ No se pudo cargar el pixmap desde los datos BLOB")
-                    self.mostrar_placeholder_foto_por_arete(row, column, arete_animal, "❌ Error carga")
-            else:
-                print(f"❌ No hay datos de foto para animal arete: {arete_animal}")
-                self.mostrar_placeholder_foto_por_arete(row, column, arete_animal, "📷 Sin foto")
-                
-        except Exception as e:
-            print(f"❌ Error al mostrar foto en tabla: {e}")
-            self.mostrar_placeholder_foto_por_arete(row, column, arete_animal, f"❌ Error: {str(e)}")
-
-    def mostrar_placeholder_foto_por_arete(self, row, column, arete_animal, motivo="Sin foto"):
-        """Muestra un placeholder cuando no hay foto o hay error"""
-        try:
-            label_placeholder = QtWidgets.QLabel("📷")
-            label_placeholder.setAlignment(QtCore.Qt.AlignCenter)
-            label_placeholder.setStyleSheet("""
-                font-size: 24px; 
-                color: #95a5a6; 
-                border: 2px dashed #bdc3c7; 
-                background-color: #ecf0f1;
-                padding: 10px;
-                border-radius: 5px;
-            """)
-            label_placeholder.setToolTip(f"{motivo} - Haz clic para más información")
-            label_placeholder.setCursor(QtCore.Qt.PointingHandCursor)
-            
-            # Hacer clickeable para mostrar información de debug
-            label_placeholder.mousePressEvent = lambda event, arete=arete_animal, msg=motivo: self.mostrar_info_foto_por_arete(arete, msg)
-            
-            self.tableWidget.setCellWidget(row, column, label_placeholder)
-            
-        except Exception as e:
-            print(f"❌ Error al mostrar placeholder: {e}")
+    def on_foto_clic(self, animal):
+        """Clic en la miniatura: foto completa, o información si no tiene foto"""
+        arete = str(animal[1] if animal[1] else "")
+        if len(animal) > 11 and animal[11]:
+            self.mostrar_foto_completa_por_arete(arete)
+        else:
+            self.mostrar_info_foto_por_arete(arete, "📷 Sin foto")
 
     def mostrar_info_foto_por_arete(self, arete_animal, mensaje):
         """Muestra información de debug sobre la foto usando arete"""
@@ -538,104 +428,6 @@ class AnimalesController:
                 f"Error al mostrar foto: {str(e)}"
             )
 
-    def agregar_botones_opciones(self, row, column, arete_animal, sexo_animal):
-        """Agrega botones de salud, editar y eliminar en la columna de opciones - SOLO REPRODUCCIÓN PARA HEMBRAS"""
-        try:
-            widget = QtWidgets.QWidget()
-            layout = QtWidgets.QHBoxLayout(widget)
-            layout.setContentsMargins(2, 2, 2, 2)
-            layout.setSpacing(4)
-        
-        # ✅ BOTÓN: Salud del becerro
-            btn_salud = QtWidgets.QPushButton("❤️")
-            btn_salud.setToolTip("Registro de salud")
-            btn_salud.setStyleSheet("""
-                QPushButton { 
-                    background-color: #e74c3c; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #c0392b;
-                }
-            """)
-            btn_salud.clicked.connect(lambda: self.abrir_registro_salud(arete_animal))
-        
-        # ✅ BOTÓN: Reproducción del becerro - SOLO PARA HEMBRAS
-            btn_reproduccion = None
-            if sexo_animal and sexo_animal.lower() == "hembra":
-                btn_reproduccion = QtWidgets.QPushButton("🐄")
-                btn_reproduccion.setToolTip("Registro de reproducción")
-                btn_reproduccion.setStyleSheet("""
-                    QPushButton { 
-                        background-color: #9b59b6; 
-                        color: white; 
-                        border: none; 
-                        padding: 5px; 
-                        border-radius: 3px;
-                        font-size: 12px;
-                        min-width: 25px;
-                    }
-                    QPushButton:hover {
-                        background-color: #8e44ad;
-                    }
-                """)
-                btn_reproduccion.clicked.connect(lambda: self.abrir_registro_reproduccion(arete_animal))
-        # ✅ BOTÓN EDITAR
-            btn_editar = QtWidgets.QPushButton("✏️")
-            btn_editar.setToolTip("Editar becerro")
-            btn_editar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #3498db; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-            """)
-            btn_editar.clicked.connect(lambda: self.editar_animal(arete_animal))
-        
-            # Botón eliminar
-            btn_eliminar = QtWidgets.QPushButton("🗑️")
-            btn_eliminar.setToolTip("Eliminar animal")
-            btn_eliminar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #34495e; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #2c3e50;
-                }
-            """)
-            btn_eliminar.clicked.connect(lambda: self.eliminar_animal(arete_animal))
-        
-        # ✅ AGREGAR BOTONES CONDICIONALMENTE
-            layout.addWidget(btn_salud)
-            if btn_reproduccion:
-                layout.addWidget(btn_reproduccion)
-            layout.addWidget(btn_editar)
-            layout.addWidget(btn_eliminar)
-            layout.addStretch()
-        
-            self.tableWidget.setCellWidget(row, column, widget)
-        
-        except Exception as e:
-            print(f"❌ Error al agregar botones: {e}")
-    
     def editar_animal(self, arete_animal):
         """Abre diálogo para editar animal existente"""
         try:
@@ -811,11 +603,10 @@ class AnimalesController:
                 texto = self.lineEdit.text().strip()
                 if texto:
                     print(f"🔍 Buscando animales: '{texto}'")
-                    animales = self.db.buscar_animales_en_todos_los_campos(texto)
-                    print(f"📊 {len(animales)} animales encontrados en la búsqueda")
+                    self.busqueda.solicitar(texto)
                 else:
-                    animales = self.db.obtener_animales()
-                self.llenar_tabla(animales)
+                    self.busqueda.cancelar()
+                    self.llenar_tabla(self.db.paginar_animales())
         except Exception as e:
             print(f"❌ Error al buscar animales: {e}")
     
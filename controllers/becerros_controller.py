@@ -1,12 +1,19 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database, CursorPaginado
+from tabla_modelo import (ModeloTabla, ProveedorMiniaturas, DelegadoFoto, DelegadoAcciones,
+                          Columna, Accion, FOTO, FECHA, OBSERVACIONES, ACCIONES, reemplazar_tabla)
+from busqueda import BusquedaDiferida
+from tareas import TareaFondo
 from controllers.agregar_becerro_controller import AgregarBecerroController
 from controllers.editar_becerro_controller import EditarBecerroController  # ✅ NUEVA IMPORTACIÓN
 
 class BecerrosController:
     def __init__(self, becerros_widget, bitacora_controller=None):
         self.becerros_widget = becerros_widget
-        self.db = Database()
+        self.db = obtener_database()
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.db.buscar_becerros_en_todos_los_campos, self.llenar_tabla,
+                                         parent=self.becerros_widget)
         self.setup_connections()
         self.configurar_tabla()
         self.bitacora_controller = bitacora_controller
@@ -34,6 +41,14 @@ class BecerrosController:
                 print("✅ Botón agregar conectado")
             else:
                 print("❌ NO SE ENCONTRÓ indexbtn2")
+            
+            # ✅ DESTETE POR LOTES: JUNTO AL BOTÓN AGREGAR (LA PÁGINA NO TIENE UNO EN EL .ui)
+            if self.indexbtn2:
+                self.btn_destete = QtWidgets.QPushButton("Destetar lote", self.indexbtn2.parentWidget())
+                self.btn_destete.setToolTip("Pasar a animales todos los becerros que cumplen edad y peso")
+                layout = self.indexbtn2.parentWidget().layout()
+                layout.insertWidget(layout.indexOf(self.indexbtn2) + 1, self.btn_destete)
+                self.btn_destete.clicked.connect(self.abrir_destete)
                 
             # Buscar lineEdit para búsqueda
             self.lineEdit = self.becerros_widget.findChild(QtWidgets.QLineEdit, "lineEdit")
@@ -63,13 +78,35 @@ class BecerrosController:
 
         try:
             # ✅ COLUMNAS REORGANIZADAS - FOTO PRIMERO + OBSERVACIONES
+            # (posiciones de la fila de obtener_becerros: 0 id ... 10 observaciones, 11 foto)
             columnas = [
-                "ID", "Foto", "Arete", "Nombre", "Peso", "Sexo", "Raza", 
-                "Fecha Nac.", "Corral", "Estatus", "Madre", "Observaciones", "Opciones"
+                Columna("ID", 0), Columna("Foto", 11, FOTO), Columna("Arete", 1), Columna("Nombre", 2),
+                Columna("Peso", 3), Columna("Sexo", 4), Columna("Raza", 5), Columna("Fecha Nac.", 6, FECHA),
+                Columna("Corral", 7), Columna("Estatus", 8), Columna("Madre", 9),
+                Columna("Observaciones", 10, OBSERVACIONES), Columna("Opciones", tipo=ACCIONES)
             ]
             
-            self.tableWidget.setColumnCount(len(columnas))
-            self.tableWidget.setHorizontalHeaderLabels(columnas)
+            # ✅ GRID MODELO/VISTA: LAS CELDAS SE PINTAN, NO HAY WIDGETS POR FILA
+            self.modelo = ModeloTabla(columnas)
+            self.tableWidget = reemplazar_tabla(self.tableWidget, self.modelo)
+            ProveedorMiniaturas(self.modelo, self.db, 'becerro', indice_clave=1, indice_foto=11, columna=1)
+            
+            self.delegado_foto = DelegadoFoto("📷", self.tableWidget)
+            self.delegado_foto.clic.connect(self.on_foto_clic)
+            self.tableWidget.setItemDelegateForColumn(1, self.delegado_foto)
+            
+            # ✅ OPCIONES: SALUD, EDITAR, TRANSFERIR Y ELIMINAR
+            self.delegado_opciones = DelegadoAcciones([
+                Accion("❤️", "#e74c3c", "#c0392b", "Registro de salud",
+                       lambda becerro: self.abrir_registro_salud(str(becerro[1] or ""))),
+                Accion("✏️", "#3498db", "#2980b9", "Editar becerro",
+                       lambda becerro: self.editar_becerro(str(becerro[1] or ""))),
+                Accion("🐄", "#9b59b6", "#8e44ad", "Transferir a animales",
+                       lambda becerro: self.transferir_a_animales(str(becerro[1] or ""))),
+                Accion("🗑️", "#34495e", "#2c3e50", "Eliminar becerro",
+                       lambda becerro: self.eliminar_becerro(str(becerro[1] or ""))),
+            ], parent=self.tableWidget)
+            self.tableWidget.setItemDelegateForColumn(12, self.delegado_opciones)
             
             # ✅ TAMAÑOS DE COLUMNAS REORGANIZADOS CON OBSERVACIONES
             self.tableWidget.setColumnWidth(0, 40)    # ID
@@ -97,21 +134,23 @@ class BecerrosController:
             
             # ✅ CORRECCIÓN: Desconectar antes de conectar para evitar múltiples conexiones
             try:
-                self.tableWidget.cellDoubleClicked.disconnect()
+                self.tableWidget.doubleClicked.disconnect()
             except:
                 pass  # Si no estaba conectado, no hay problema
                 
             # ✅ CONEXIÓN ÚNICA: Doble clic en celdas - SOLO PARA OBSERVACIONES
-            self.tableWidget.cellDoubleClicked.connect(self.on_cell_double_clicked)
+            self.tableWidget.doubleClicked.connect(
+                lambda index: self.on_cell_double_clicked(index.row(), index.column())
+            )
             
             # Estilo para la tabla
             self.tableWidget.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     gridline-color: #d0d0d0;
                     background-color: white;
                     alternate-background-color: #f8f8f8;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 5px;
                     border-bottom: 1px solid #e0e0e0;
                 }
@@ -133,12 +172,9 @@ class BecerrosController:
         """Maneja el doble clic en celdas específicas - SOLO OBSERVACIONES"""
         # ✅ SOLO responder a doble clic en columna de Observaciones (11)
         if column == 11:  
-            arete_item = self.tableWidget.item(row, 2)  # Columna Arete
-            observacion_item = self.tableWidget.item(row, 11)  # Columna Observaciones
-            
-            if arete_item and observacion_item:
-                arete = arete_item.text()
-                observaciones = observacion_item.data(QtCore.Qt.UserRole)  # Datos completos
+            if self.modelo.fila(row) is not None:
+                arete = self.modelo.texto(row, 2)  # Columna Arete
+                observaciones = self.modelo.texto(row, 11)  # Observaciones completas
                 
                 # ✅ VERIFICAR que hay observaciones antes de abrir el diálogo
                 if observaciones and observaciones.strip():
@@ -150,15 +186,13 @@ class BecerrosController:
         """Carga todos los becerros en la tabla"""
         try:
             print("🔄 Cargando becerros desde la base de datos...")
+            self.busqueda.invalidar()
             
-            # ✅ DIAGNÓSTICO MEJORADO: Verificar estado de la BD
-            print("🔍 Realizando diagnóstico de BD...")
-            self.db.diagnostico_completo()
-            
-            becerros = self.db.obtener_becerros()
-            print(f"📊 {len(becerros)} becerros encontrados en el controlador")
+            becerros = self.db.paginar_becerros()
+            self.llenar_tabla(becerros)
+            print(f"📊 {becerros.total_leido} becerros en la primera página")
             
-            if len(becerros) == 0:
+            if becerros.total_leido == 0:
                 print("⚠️ ADVERTENCIA: No se encontraron becerros en la base de datos")
                 # Mostrar mensaje en la interfaz
                 QtWidgets.QMessageBox.information(
@@ -167,13 +201,6 @@ class BecerrosController:
                     "No se encontraron becerros en la base de datos."
                 )
             
-            print("🔍 Verificando estatus de becerros encontrados:")
-            for becerro in becerros:
-                estatus = becerro[8] if len(becerro) > 8 else "N/A"
-                arete = becerro[1] if len(becerro) > 1 else "N/A"
-                print(f"   - Arete: {arete}, Estatus: {estatus}")
-        
-            self.llenar_tabla(becerros)
         except Exception as e:
             print(f"❌ Error al cargar becerros: {e}")
             import traceback
@@ -186,161 +213,30 @@ class BecerrosController:
             return
 
         try:
-            self.tableWidget.setRowCount(0)
-
-            for row_number, becerro in enumerate(becerros):
-                self.tableWidget.insertRow(row_number)
-                self.tableWidget.setRowHeight(row_number, 80)  # Altura mayor para las fotos
-                
-                # ID (oculto pero necesario para operaciones)
-                id_item = QtWidgets.QTableWidgetItem(str(becerro[0] if becerro[0] is not None else ""))
-                self.tableWidget.setItem(row_number, 0, id_item)
-                
-                # ✅ FOTO AHORA EN COLUMNA 1 (SEGUNDA COLUMNA, PERO PRIMERA VISIBLE)
-                arete = str(becerro[1] if becerro[1] else "")
-                self.mostrar_foto_en_tabla(row_number, 1, arete)
-                
-                # Arete (2)
-                arete_item = QtWidgets.QTableWidgetItem(arete)
-                self.tableWidget.setItem(row_number, 2, arete_item)
-                
-                # Nombre (3)
-                nombre_item = QtWidgets.QTableWidgetItem(str(becerro[2] if becerro[2] else ""))
-                self.tableWidget.setItem(row_number, 3, nombre_item)
-                
-                # Peso (4)
-                peso_item = QtWidgets.QTableWidgetItem(str(becerro[3] if becerro[3] else ""))
-                self.tableWidget.setItem(row_number, 4, peso_item)
-                
-                # Sexo (5)
-                sexo_item = QtWidgets.QTableWidgetItem(str(becerro[4] if becerro[4] else ""))
-                self.tableWidget.setItem(row_number, 5, sexo_item)
-                
-                # Raza (6)
-                raza_item = QtWidgets.QTableWidgetItem(str(becerro[5] if becerro[5] else ""))
-                self.tableWidget.setItem(row_number, 6, raza_item)
-                
-                # Fecha Nacimiento (7)
-                fecha_item = QtWidgets.QTableWidgetItem(str(becerro[6] if becerro[6] else ""))
-                self.tableWidget.setItem(row_number, 7, fecha_item)
-                
-                # Corral (8)
-                corral_item = QtWidgets.QTableWidgetItem(str(becerro[7] if becerro[7] else ""))
-                self.tableWidget.setItem(row_number, 8, corral_item)
-                
-                # Estatus (9)
-                estatus_item = QtWidgets.QTableWidgetItem(str(becerro[8] if becerro[8] else ""))
-                self.tableWidget.setItem(row_number, 9, estatus_item)
-                
-                # Arete Madre (10)
-                madre_item = QtWidgets.QTableWidgetItem(str(becerro[9] if becerro[9] else ""))
-                self.tableWidget.setItem(row_number, 10, madre_item)
-                
-                # ✅ OBSERVACIONES EN COLUMNA 11 - AHORA CLICKEABLE
-                observacion = str(becerro[10] if len(becerro) > 10 and becerro[10] is not None else "")
-                # Mostrar solo preview en la tabla
-                observacion_preview = observacion[:30] + "..." if len(observacion) > 30 else observacion
-                observacion_item = QtWidgets.QTableWidgetItem(observacion_preview)
-                
-                # ✅ GUARDAR OBSERVACIONES COMPLETAS para el doble clic
-                observacion_item.setData(QtCore.Qt.UserRole, observacion)
-                
-                # ✅ HACER QUE LA CELDA SEA CLICKEABLE SOLO SI HAY OBSERVACIONES
-                if observacion and observacion.strip():
-                    observacion_item.setForeground(QtGui.QColor('#2980b9'))  # Color azul para indicar clickeable
-                    observacion_item.setToolTip("Doble clic para ver observaciones completas")
-                    # Hacer que se vea como un enlace
-                    observacion_item.setFlags(observacion_item.flags() | QtCore.Qt.ItemIsEnabled)
-                else:
-                    observacion_item.setToolTip("Sin observaciones")
-                    observacion_item.setForeground(QtGui.QColor('#95a5a6'))  # Color gris para indicar vacío
-                    
-                self.tableWidget.setItem(row_number, 11, observacion_item)
-                
-                # ✅ OPCIONES AHORA EN COLUMNA 12 CON SOLO 3 BOTONES (SIN OBSERVACIONES)
-                self.agregar_botones_opciones(row_number, 12, arete)
+            # ✅ EL MODELO GUARDA LAS TUPLAS TAL CUAL; LA VISTA SOLO PINTA LAS FILAS VISIBLES
+            # ✅ UN CURSOR PAGINADO SE LEE POR PÁGINAS CONFORME SE HACE SCROLL
+            if isinstance(becerros, CursorPaginado):
+                self.modelo.establecer_cursor(becerros)
+            else:
+                self.modelo.establecer_filas(becerros)
 
             # Ocultar columna ID
             self.tableWidget.setColumnHidden(0, True)
             
-            print(f"✅ Tabla llenada con {len(becerros)} registros - OBSERVACIONES SOLO CON DOBLE CLIC")
+            print(f"✅ Tabla llenada con {self.modelo.rowCount()} registros - OBSERVACIONES SOLO CON DOBLE CLIC")
 
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
             import traceback
             traceback.print_exc()
 
-    def mostrar_foto_en_tabla(self, row, column, arete_becerro):
-        """Muestra la foto en pequeño directamente en la tabla usando el arete"""
-        try:
-            print(f"📸 Intentando mostrar foto para becerro arete: {arete_becerro}")
-            foto_data = self.db.obtener_foto_becerro_por_arete(arete_becerro)
-            
-            if foto_data:
-                print(f"✅ Foto encontrada en BD - Tamaño: {len(foto_data)} bytes")
-                
-                # Crear un pixmap desde los datos BLOB
-                pixmap = QtGui.QPixmap()
-                if pixmap.loadFromData(foto_data):
-                    print("✅ Pixmap cargado correctamente desde datos BLOB")
-                    
-                    # Escalar la imagen a un tamaño pequeño para la tabla (60x60)
-                    pixmap_escalado = pixmap.scaled(60, 60, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-                    
-                    # Crear un QLabel para mostrar la imagen
-                    label_foto = QtWidgets.QLabel()
-                    label_foto.setPixmap(pixmap_escalado)
-                    label_foto.setAlignment(QtCore.Qt.AlignCenter)
-                    label_foto.setToolTip("Haz clic para ver la foto en tamaño completo")
-                    label_foto.setCursor(QtCore.Qt.PointingHandCursor)
-                    label_foto.setStyleSheet("""
-                        border: 2px solid #bdc3c7; 
-                        background-color: #ecf0f1;
-                        border-radius: 5px;
-                        padding: 2px;
-                    """)
-                    
-                    # Hacer que el label sea clickeable
-                    label_foto.mousePressEvent = lambda event, arete=arete_becerro: self.mostrar_foto_completa_por_arete(arete)
-                    
-                    self.tableWidget.setCellWidget(row, column, label_foto)
-                    print(f"✅ Miniatura de foto mostrada en tabla para arete: {arete_becerro}")
-                else:
-                    print("❌ No se pudo cargar el pixmap desde los datos BLOB")
-                    # Si no se puede cargar la foto, mostrar un placeholder
-                    self.mostrar_placeholder_foto_por_arete(row, column, arete_becerro, "❌ Error carga")
-            else:
-                print(f"❌ No hay datos de foto para becerro arete: {arete_becerro}")
-                # Si no hay foto, mostrar un placeholder
-                self.mostrar_placeholder_foto_por_arete(row, column, arete_becerro, "📷 Sin foto")
-                
-        except Exception as e:
-            print(f"❌ Error al mostrar foto en tabla: {e}")
-            self.mostrar_placeholder_foto_por_arete(row, column, arete_becerro, f"❌ Error: {str(e)}")
-
-    def mostrar_placeholder_foto_por_arete(self, row, column, arete_becerro, motivo="Sin foto"):
-        """Muestra un placeholder cuando no hay foto o hay error (usando arete)"""
-        try:
-            label_placeholder = QtWidgets.QLabel("📷")
-            label_placeholder.setAlignment(QtCore.Qt.AlignCenter)
-            label_placeholder.setStyleSheet("""
-                font-size: 24px; 
-                color: #95a5a6; 
-                border: 2px dashed #bdc3c7; 
-                background-color: #ecf0f1;
-                padding: 10px;
-                border-radius: 5px;
-            """)
-            label_placeholder.setToolTip(f"{motivo} - Haz clic para más información")
-            label_placeholder.setCursor(QtCore.Qt.PointingHandCursor)
-            
-            # Hacer clickeable para mostrar información de debug
-            label_placeholder.mousePressEvent = lambda event, arete=arete_becerro, msg=motivo: self.mostrar_info_foto_por_arete(arete, msg)
-            
-            self.tableWidget.setCellWidget(row, column, label_placeholder)
-            
-        except Exception as e:
-            print(f"❌ Error al mostrar placeholder: {e}")
+    def on_foto_clic(self, becerro):
+        """Clic en la miniatura: foto completa, o información si no tiene foto"""
+        arete = str(becerro[1] if becerro[1] else "")
+        if len(becerro) > 11 and becerro[11]:
+            self.mostrar_foto_completa_por_arete(arete)
+        else:
+            self.mostrar_info_foto_por_arete(arete, "📷 Sin foto")
 
     def mostrar_info_foto_por_arete(self, arete_becerro, mensaje):
         """Muestra información de debug sobre la foto usando arete"""
@@ -451,103 +347,6 @@ class BecerrosController:
                 f"Error al mostrar foto: {str(e)}"
             )
     
-    def agregar_botones_opciones(self, row, column, arete_becerro):
-        """Agrega botones de salud, editar y eliminar en la columna de opciones (SIN OBSERVACIONES)"""
-        try:
-            widget = QtWidgets.QWidget()
-            layout = QtWidgets.QHBoxLayout(widget)
-            layout.setContentsMargins(2, 2, 2, 2)
-            layout.setSpacing(4)
-            
-            # ✅ BOTÓN: Salud del becerro
-            btn_salud = QtWidgets.QPushButton("❤️")
-            btn_salud.setToolTip("Registro de salud")
-            btn_salud.setStyleSheet("""
-                QPushButton { 
-                    background-color: #e74c3c; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #c0392b;
-                }
-            """)
-            btn_salud.clicked.connect(lambda: self.abrir_registro_salud(arete_becerro))
-            
-            # ✅ BOTÓN EDITAR - ACTUALIZADO para usar EditarBecerroController
-            btn_editar = QtWidgets.QPushButton("✏️")
-            btn_editar.setToolTip("Editar becerro")
-            btn_editar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #3498db; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-            """)
-            btn_editar.clicked.connect(lambda: self.editar_becerro(arete_becerro))  # ✅ ACTUALIZADO
-            
-            # ✅ NUEVO BOTÓN: Transferir a animales
-            btn_transferir = QtWidgets.QPushButton("🐄")
-            btn_transferir.setToolTip("Transferir a animales")
-            btn_transferir.setStyleSheet("""
-                QPushButton { 
-                    background-color: #9b59b6; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #8e44ad;
-                }
-            """)
-            btn_transferir.clicked.connect(lambda: self.transferir_a_animales(arete_becerro))
-
-            # Botón eliminar
-            btn_eliminar = QtWidgets.QPushButton("🗑️")
-            btn_eliminar.setToolTip("Eliminar becerro")
-            btn_eliminar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #34495e; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #2c3e50;
-                }
-            """)
-            btn_eliminar.clicked.connect(lambda: self.eliminar_becerro(arete_becerro))
-            
-            # ✅ AGREGAR SOLO 3 BOTONES (sin observaciones)
-            layout.addWidget(btn_salud)
-            layout.addWidget(btn_editar)
-            layout.addWidget(btn_transferir)
-            layout.addWidget(btn_eliminar)
-            layout.addStretch()
-            
-            self.tableWidget.setCellWidget(row, column, widget)
-            
-        except Exception as e:
-            print(f"❌ Error al agregar botones: {e}")
-    
-
     def mostrar_observaciones_completas(self, arete_becerro, observaciones):
         """Muestra las observaciones completas en un diálogo"""
         try:
@@ -652,7 +451,7 @@ class BecerrosController:
             
             for corral in corrales_data:
                 identcorral, nomcorral, ubicorral, capmax, capactual, fechamant, condicion, observacioncorral = corral
-                animales_actuales = self.db.contar_animales_en_corral(nomcorral)
+                animales_actuales = int(capactual or 0)  # capactual lo mantienen los triggers de la BD
                 
                 if capmax and capmax > 0:
                     disponible = capmax - animales_actuales
@@ -756,8 +555,8 @@ class BecerrosController:
         try:
             print(f"✏️ Editando becerro con arete: {arete_becerro}")
             
-            # Obtener datos completos del becerro
-            becerro_data = self.db.obtener_becerro_completo_por_arete(arete_becerro)
+            # Obtener datos del becerro (con el hash de la foto: la foto no hace falta leerla)
+            becerro_data = self.db.obtener_becerro_por_arete(arete_becerro)
             if not becerro_data:
                 QtWidgets.QMessageBox.warning(
                     self.becerros_widget, 
@@ -778,7 +577,7 @@ class BecerrosController:
                 'estatus': becerro_data[8] if len(becerro_data) > 8 else 'Activo',
                 'aretemadre': becerro_data[9] if len(becerro_data) > 9 else '',
                 'observacion': becerro_data[10] if len(becerro_data) > 10 else '',
-                'foto': becerro_data[11] if len(becerro_data) > 11 else None
+                'tiene_foto': bool(becerro_data[11]) if len(becerro_data) > 11 else False
             }
             
             print(f"📋 Datos del becerro a editar: {datos_becerro['nombre']} (Arete: {datos_becerro['arete']})")
@@ -902,8 +701,8 @@ class BecerrosController:
         try:
             print(f"🐄 Transferiendo becerro a animales - Arete: {arete_becerro}")
         
-        # Obtener datos completos del becerro
-            becerro_data = self.db.obtener_becerro_completo_por_arete(arete_becerro)
+        # Datos del becerro (la foto solo como hash: se pasa a tganado sin leer sus bytes)
+            becerro_data = self.db.obtener_becerro_por_arete(arete_becerro)
             if not becerro_data:
                 QtWidgets.QMessageBox.warning(
                     self.becerros_widget, 
@@ -924,7 +723,7 @@ class BecerrosController:
                 'estatus': becerro_data[8] if len(becerro_data) > 8 else 'Activo',
                 'aretemadre': becerro_data[9] if len(becerro_data) > 9 else '',
                 'observacion': becerro_data[10] if len(becerro_data) > 10 else '',
-                'foto': becerro_data[11] if len(becerro_data) > 11 else None
+                'tiene_foto': bool(becerro_data[11]) if len(becerro_data) > 11 else False
             }
         
             print(f"📋 Datos del becerro a transferir: {datos_becerro['nombre']} (Arete: {datos_becerro['arete']})")
@@ -954,6 +753,14 @@ class BecerrosController:
                 f"No se pudo abrir el formulario de transferencia: {str(e)}"
             )
     
+    def abrir_destete(self):
+        """Abre el diálogo de destete por lotes y recarga la tabla si se promovió alguno"""
+        dialog = DesteteDialog(self.db, self.bitacora_controller, self.becerros_widget)
+        dialog.exec_()
+        if dialog.promovidos:
+            self.cargar_becerros()
+            print(f"✅ Destete por lotes: {dialog.promovidos} becerros pasados a animales, tabla recargada")
+
     def buscar_becerros(self):
         """Busca becerros en todos los campos según el texto en el buscador"""
         try:
@@ -961,16 +768,13 @@ class BecerrosController:
                 texto = self.lineEdit.text().strip()
                 if texto:
                     print(f"🔍 Buscando becerros en todos los campos: '{texto}'")
-                # Usar la nueva función de búsqueda que busca en todos los campos
-                    becerros = self.db.buscar_becerros_en_todos_los_campos(texto)
-                    print(f"📊 {len(becerros)} becerros encontrados en la búsqueda múltiple")
+                    self.busqueda.solicitar(texto)
                 else:
                 # Si no hay texto, cargar todos los becerros
-                    becerros = self.db.obtener_becerros()
+                    self.busqueda.cancelar()
+                    self.llenar_tabla(self.db.paginar_becerros())
                     print("📋 Mostrando todos los becerros")
             
-                self.llenar_tabla(becerros)
-            
         except Exception as e:
             print(f"❌ Error al buscar becerros: {e}")
             import traceback
@@ -983,3 +787,168 @@ class BecerrosController:
         print("🔄 Forzando actualización de tabla...")
         self.cargar_becerros()
 
+
+class DesteteDialog(QtWidgets.QDialog):
+    """Destete por lotes: pasa a animales los becerros que cumplen edad y peso, todos o ninguno"""
+
+    def __init__(self, db, bitacora_controller=None, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.bitacora_controller = bitacora_controller
+        self.promovidos = 0
+        self.progress_dialog = None
+        self.criterios_destete = None
+        self.setWindowTitle("Destetar lote")
+        self.setMinimumWidth(440)
+        self.crear_controles()
+
+        # ✅ EL HILO DEL POOL USA SU PROPIA CONEXIÓN (self.db.connection ES POR HILO); LOS CRITERIOS
+        # SE LEEN DE LOS CONTROLES ANTES DE INICIAR, NUNCA DESDE EL HILO
+        self.tarea = TareaFondo(
+            lambda progreso, cancelada: self.db.promover_becerros(
+                progreso=progreso, cancelada=cancelada, **self.criterios_destete),
+            self
+        )
+        self.tarea.progreso.connect(self.actualizar_progreso)
+        self.tarea.terminada.connect(self.destete_terminado)
+        self.tarea.cancelada.connect(self.destete_cancelado)
+        self.tarea.fallida.connect(self.destete_fallido)
+
+    def crear_controles(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        formulario = QtWidgets.QFormLayout()
+
+        self.spin_edad = QtWidgets.QSpinBox()
+        self.spin_edad.setRange(0, 60)
+        self.spin_edad.setValue(8)
+        self.spin_edad.setSuffix(" meses")
+        formulario.addRow("Edad mínima:", self.spin_edad)
+
+        self.spin_peso = QtWidgets.QDoubleSpinBox()
+        self.spin_peso.setRange(0, 2000)
+        self.spin_peso.setDecimals(1)
+        self.spin_peso.setSuffix(" kg")
+        self.spin_peso.setSpecialValueText("Sin mínimo")
+        formulario.addRow("Peso mínimo:", self.spin_peso)
+
+        self.combo_origen = QtWidgets.QComboBox()
+        self.combo_destino = QtWidgets.QComboBox()
+        self.combo_origen.addItem("Todos", None)
+        self.combo_destino.addItem("El mismo corral", None)
+        for _, nombre in self.db.obtener_corrales():
+            self.combo_origen.addItem(nombre, nombre)
+            self.combo_destino.addItem(nombre, nombre)
+        formulario.addRow("Corral de origen:", self.combo_origen)
+        formulario.addRow("Corral destino:", self.combo_destino)
+
+        self.txt_produccion = QtWidgets.QLineEdit()
+        self.txt_alimento = QtWidgets.QLineEdit()
+        formulario.addRow("Tipo de producción:", self.txt_produccion)
+        formulario.addRow("Tipo de alimento:", self.txt_alimento)
+        layout.addLayout(formulario)
+
+        self.lbl_resultado = QtWidgets.QLabel("Elija los criterios y presione Vista previa.")
+        self.lbl_resultado.setWordWrap(True)
+        layout.addWidget(self.lbl_resultado)
+
+        botones = QtWidgets.QDialogButtonBox()
+        self.btn_vista_previa = botones.addButton("Vista previa", QtWidgets.QDialogButtonBox.ActionRole)
+        self.btn_destetar = botones.addButton("Destetar", QtWidgets.QDialogButtonBox.AcceptRole)
+        botones.addButton(QtWidgets.QDialogButtonBox.Close)
+        self.btn_vista_previa.clicked.connect(self.vista_previa)
+        self.btn_destetar.clicked.connect(self.destetar)
+        botones.rejected.connect(self.reject)
+        layout.addWidget(botones)
+
+    def criterios(self):
+        return {
+            'edad_minima_meses': self.spin_edad.value(),
+            'peso_minimo': self.spin_peso.value(),
+            'corral': self.combo_origen.currentData(),
+            'corral_destino': self.combo_destino.currentData(),
+            'tipo_produccion': self.txt_produccion.text().strip(),
+            'tipo_alimento': self.txt_alimento.text().strip(),
+        }
+
+    def vista_previa(self):
+        criterios = self.criterios()
+        seleccion = self.db.becerros_para_destete(
+            criterios['edad_minima_meses'], criterios['peso_minimo'], criterios['corral'])
+        aretes = ", ".join(fila[1] for fila in seleccion['aptos'][:20])
+        if len(seleccion['aptos']) > 20:
+            aretes += ", ..."
+        texto = f"{len(seleccion['aptos'])} becerros se pasarán a animales"
+        texto += f": {aretes}" if aretes else "."
+        if seleccion['duplicados']:
+            texto += (f"\n⚠️ {len(seleccion['duplicados'])} se omiten porque su arete ya existe en animales: "
+                      f"{', '.join(seleccion['duplicados'][:10])}")
+        self.lbl_resultado.setText(texto)
+        return len(seleccion['aptos'])
+
+    def destetar(self):
+        total = self.vista_previa()
+        if not total:
+            return
+        respuesta = QtWidgets.QMessageBox.question(
+            self, "Confirmar destete",
+            f"¿Pasar {total} becerros a animales?\nSi algo falla o se cancela no se cambia ninguno.",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, QtWidgets.QMessageBox.No)
+        if respuesta == QtWidgets.QMessageBox.No:
+            return
+
+        self.progress_dialog = QtWidgets.QProgressDialog("Destetando becerros...", "Cancelar", 0, total, self)
+        self.progress_dialog.setWindowTitle("Procesando")
+        self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.canceled.connect(self.tarea.cancelar)
+        self.progress_dialog.show()
+        self.btn_destetar.setEnabled(False)
+        self.criterios_destete = self.criterios()
+        self.tarea.iniciar()
+
+    def actualizar_progreso(self, hechos, total):
+        if self.progress_dialog:
+            self.progress_dialog.setMaximum(total)
+            self.progress_dialog.setValue(hechos)
+
+    def cerrar_progreso(self):
+        if self.progress_dialog:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+        self.btn_destetar.setEnabled(True)
+
+    def destete_terminado(self, resultado):
+        self.cerrar_progreso()
+        self.promovidos += resultado['promovidos']
+        texto = f"✅ {resultado['promovidos']} becerros pasados a animales"
+        if resultado['duplicados']:
+            texto += f"\n⚠️ Omitidos (arete ya existe en animales): {', '.join(resultado['duplicados'])}"
+        self.lbl_resultado.setText(texto)
+
+        if self.bitacora_controller and resultado['promovidos']:
+            criterios = self.criterios_destete
+            self.bitacora_controller.registrar_accion(
+                modulo="Transferencia",
+                accion="DESTETE_LOTE",
+                descripcion=f"Destete por lotes: {resultado['promovidos']} becerros transferidos a animales",
+                detalles=(f"Edad mínima: {criterios['edad_minima_meses']} meses, peso mínimo: "
+                          f"{criterios['peso_minimo']} kg, origen: {criterios['corral'] or 'Todos'}, "
+                          f"destino: {criterios['corral_destino'] or 'El mismo corral'}, "
+                          f"omitidos: {len(resultado['duplicados'])}")
+            )
+
+    def destete_cancelado(self):
+        self.cerrar_progreso()
+        self.lbl_resultado.setText("Destete cancelado: no se pasó ningún becerro.")
+
+    def destete_fallido(self, error):
+        self.cerrar_progreso()
+        self.lbl_resultado.setText(f"❌ No se pasó ningún becerro: {error}")
+
+    def done(self, resultado):
+        """No se cierra mientras la transacción está en curso"""
+        if self.tarea.en_curso:
+            self.tarea.cancelar()
+            return
+        super().done(resultado)
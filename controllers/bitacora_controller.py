@@ -4,12 +4,11 @@ import sqlite3
 from datetime import datetime, date, timedelta
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtWidgets import QMessageBox, QFileDialog
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+from cola_bitacora import obtener_cola_bitacora
+from reporte_bitacora import contar_registros, generar_pdf_bitacora
+from tareas import TareaFondo
+from fechas import para_mostrar
+from tabla_modelo import ModeloTabla, VistaTabla, Columna, FECHA, OBSERVACIONES, reemplazar_tabla
 
 try:
     import pytz
@@ -26,12 +25,13 @@ class BitacoraController:
         self.ui = ui
         self.db = db
         self.usuario_actual = usuario_actual
+        self._usuario_bitacora = self.nombre_para_bitacora()
+        self.cola = obtener_cola_bitacora()
+        self.tarea_reporte = None
+        self.progress_dialog = None
         self.setup_ui()
         self.connect_signals()
         
-        # Crear tabla de bitácora si no existe
-        self.crear_tabla_bitacora()
-        
         print("✅ Controlador de bitácora inicializado")
 
     def setup_ui(self):
@@ -43,14 +43,154 @@ class BitacoraController:
         self.ui.dateEdit_desde.setDate(fecha_desde)
         self.ui.dateEdit_hasta.setDate(fecha_hasta)
         
+        self.construir_visor()
+        self.configurar_tabla()
+        self.cargar_filtros()
+        
         print("✅ UI de bitácora configurada")
 
+    def construir_visor(self):
+        """
+        Agrega a la página los filtros, la tabla de registros y el contador de resultados
+        (bitacora.ui solo trae las fechas y el botón del reporte)
+        """
+        layout = self.ui.verticalLayout_3
+        pagina = self.ui.widget_7.parentWidget()
+        
+        # ✅ LOS FILTROS Y LA TABLA OCUPAN EL LUGAR DEL ESPACIADOR QUE HAY BAJO LAS FECHAS
+        indice = layout.indexOf(self.ui.widget_7) + 1
+        elemento = layout.itemAt(indice)
+        if elemento is not None and elemento.spacerItem() is not None:
+            layout.takeAt(indice)
+        
+        filtros = QtWidgets.QWidget(pagina)
+        fila = QtWidgets.QHBoxLayout(filtros)
+        self.comboBox_usuario = QtWidgets.QComboBox(filtros)
+        self.comboBox_modulo = QtWidgets.QComboBox(filtros)
+        self.comboBox_accion = QtWidgets.QComboBox(filtros)
+        for texto, combo in (("Usuario", self.comboBox_usuario), ("Módulo", self.comboBox_modulo),
+                             ("Acción", self.comboBox_accion)):
+            combo.setMinimumSize(QtCore.QSize(110, 0))
+            fila.addWidget(QtWidgets.QLabel(texto, filtros))
+            fila.addWidget(combo)
+        self.lineEdit_arete = QtWidgets.QLineEdit(filtros)
+        self.lineEdit_arete.setPlaceholderText("Arete afectado")
+        fila.addWidget(QtWidgets.QLabel("Arete", filtros))
+        fila.addWidget(self.lineEdit_arete)
+        self.pushButton_buscar = QtWidgets.QPushButton("Buscar", filtros)
+        self.pushButton_buscar.setMinimumSize(QtCore.QSize(90, 30))
+        fila.addWidget(self.pushButton_buscar)
+        layout.insertWidget(indice, filtros)
+        
+        self.tabla = VistaTabla(pagina)
+        layout.insertWidget(indice + 1, self.tabla)
+        
+        # Contador a la izquierda del botón "Generar Reporte"
+        self.label_resultados = QtWidgets.QLabel("", self.ui.widget_8)
+        self.ui.horizontalLayout_3.insertWidget(0, self.label_resultados)
+        
+        self.ui.label_5.setText("Seleccione un rango de fechas y filtros para consultar la bitácora o generar su reporte.")
+
+    def configurar_tabla(self):
+        """Visor de registros: ModeloTabla sobre un CursorPaginado (páginas al hacer scroll)"""
+        try:
+            # Los datos vienen en el orden de COLUMNAS_BITACORA:
+            # [idbitacora, fecha, usuario, modulo, accion, descripcion, detalles, arete_afectado]
+            columnas = [
+                Columna("Fecha/Hora", 1, tipo=FECHA), Columna("Usuario", 2), Columna("Módulo", 3),
+                Columna("Acción", 4), Columna("Arete", 7), Columna("Descripción", 5),
+                Columna("Detalles", 6, tipo=OBSERVACIONES, largo_preview=40)
+            ]
+            self.modelo = ModeloTabla(columnas)
+            self.tabla = reemplazar_tabla(self.tabla, self.modelo)
+            
+            self.tabla.setColumnWidth(0, 130)  # Fecha/Hora
+            self.tabla.setColumnWidth(1, 100)  # Usuario
+            self.tabla.setColumnWidth(2, 100)  # Módulo
+            self.tabla.setColumnWidth(3, 110)  # Acción
+            self.tabla.setColumnWidth(4, 80)   # Arete
+            self.tabla.setColumnWidth(5, 220)  # Descripción
+            self.tabla.horizontalHeader().setStretchLastSection(True)
+            
+            self.tabla.setAlternatingRowColors(True)
+            self.tabla.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+            self.tabla.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+            self.tabla.verticalHeader().setVisible(False)
+            # ✅ SIN ORDENAR POR COLUMNA: SIEMPRE DEL MÁS RECIENTE AL MÁS ANTIGUO, COMO EL ÍNDICE
+            self.tabla.setSortingEnabled(False)
+            self.tabla.doubleClicked.connect(self.mostrar_detalles)
+        except Exception as e:
+            print(f"❌ Error configurando tabla de bitácora: {e}")
+
+    def cargar_filtros(self):
+        """Llena los combos de usuario, módulo y acción con los valores que hay en la bitácora"""
+        try:
+            valores = self.db.obtener_valores_filtro_bitacora()
+            for combo, clave in ((self.comboBox_usuario, 'usuarios'),
+                                 (self.comboBox_modulo, 'modulos'),
+                                 (self.comboBox_accion, 'acciones')):
+                seleccionado = combo.currentData()
+                combo.blockSignals(True)
+                combo.clear()
+                combo.addItem("Todos", None)
+                for valor in valores[clave]:
+                    combo.addItem(str(valor), valor)
+                indice = combo.findData(seleccionado)
+                combo.setCurrentIndex(indice if indice >= 0 else 0)
+                combo.blockSignals(False)
+        except Exception as e:
+            print(f"❌ Error cargando filtros de bitácora: {e}")
+
+    def buscar_registros(self):
+        """Consulta la bitácora con los filtros de la pantalla (primera página; el resto al hacer scroll)"""
+        try:
+            fecha_desde = self.ui.dateEdit_desde.date().toString('yyyy-MM-dd')
+            fecha_hasta = self.ui.dateEdit_hasta.date().toString('yyyy-MM-dd')
+            if fecha_desde > fecha_hasta:
+                self.mostrar_error("Error de fechas", "La fecha 'Desde' no puede ser mayor que la fecha 'Hasta'.")
+                return
+            
+            # Lo que aún está en la cola también debe aparecer
+            self.cola.vaciar()
+            cursor = self.db.paginar_bitacora(
+                fecha_desde, fecha_hasta,
+                usuario=self.comboBox_usuario.currentData(),
+                modulo=self.comboBox_modulo.currentData(),
+                accion=self.comboBox_accion.currentData(),
+                arete=self.lineEdit_arete.text().strip() or None,
+            )
+            self.modelo.establecer_cursor(cursor)
+            
+            cantidad = self.modelo.rowCount()
+            if cursor.hay_mas:
+                self.label_resultados.setText(f"Mostrando {cantidad}+ registros (desplácese para ver más)")
+            else:
+                self.label_resultados.setText(f"{cantidad} registros")
+            print(f"🔍 Bitácora - {cantidad} registros en la primera página")
+        except Exception as e:
+            print(f"❌ Error buscando en bitácora: {e}")
+            self.mostrar_error("Error", f"Error al consultar la bitácora: {str(e)}")
+
+    def mostrar_detalles(self, index):
+        """Doble clic: muestra el registro completo"""
+        fila = self.modelo.fila(index.row())
+        if not fila:
+            return
+        _, fecha, usuario, modulo, accion, descripcion, detalles, arete = fila
+        texto = (f"Fecha: {para_mostrar(fecha)}\nUsuario: {usuario or 'N/A'}\nMódulo: {modulo or 'N/A'}\n"
+                 f"Acción: {accion or 'N/A'}\nArete: {arete or '-'}\n\n{descripcion or ''}\n\n{detalles or ''}")
+        QMessageBox.information(self.tabla.window(), "Registro de bitácora", texto.strip())
+
     def connect_signals(self):
         """Conectar todas las señales de la interfaz"""
         try:
             # Botón de generar reporte
             self.ui.pushButton_generar.clicked.connect(self.generar_reporte_pdf)
             
+            # Visor: buscar con el botón o con Enter en el arete
+            self.pushButton_buscar.clicked.connect(self.buscar_registros)
+            self.lineEdit_arete.returnPressed.connect(self.buscar_registros)
+            
             print("✅ Señales de bitácora conectadas correctamente")
             
         except Exception as e:
@@ -75,163 +215,38 @@ class BitacoraController:
             # Fallback final: hora local del sistema
             return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-    def crear_tabla_bitacora(self):
-        """Crear la tabla de bitácora si no existe - ACTUALIZADO"""
-        try:
-            query = """
-            CREATE TABLE IF NOT EXISTS tbitacora (
-                id_bitacora INTEGER PRIMARY KEY AUTOINCREMENT,
-                fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                usuario TEXT NOT NULL,
-                modulo TEXT NOT NULL,
-                accion TEXT NOT NULL,
-                descripcion TEXT,
-                detalles TEXT,
-                arete_afectado TEXT
-            )
-            """
-            cursor = self.db.ejecutar_consulta(query)
-            if cursor:
-                print("✅ Tabla de bitácora verificada/creada correctamente")
-                
-                # ✅ VERIFICAR Y AGREGAR COLUMNAS FALTANTES
-                self.verificar_estructura_bitacora()
-                
-                return True
-            return False
-        except Exception as e:
-            print(f"❌ Error creando tabla de bitácora: {e}")
-            return False
 
-    def verificar_estructura_bitacora(self):
-        """Verificar y actualizar la estructura de la tabla bitácora"""
-        try:
-            print("🔍 Verificando estructura de tabla bitácora...")
-            
-            # Verificar columnas existentes
-            query = "PRAGMA table_info(tbitacora)"
-            cursor = self.db.ejecutar_consulta(query)
-            
-            if cursor:
-                columnas = cursor.fetchall()
-                columnas_existentes = [col[1] for col in columnas]
-                
-                print(f"📋 Columnas existentes: {columnas_existentes}")
-                
-                # Columnas que deben existir
-                columnas_requeridas = [
-                    'usuario', 'modulo', 'accion', 'descripcion', 
-                    'detalles', 'arete_afectado'
-                ]
-                
-                for columna in columnas_requeridas:
-                    if columna not in columnas_existentes:
-                        print(f"🔧 Agregando columna faltante: {columna}")
-                        query_alter = f"ALTER TABLE tbitacora ADD COLUMN {columna} TEXT"
-                        resultado = self.db.ejecutar_consulta(query_alter)
-                        if resultado:
-                            print(f"✅ Columna {columna} agregada correctamente")
-                        else:
-                            print(f"❌ Error agregando columna {columna}")
-                
-                print("✅ Estructura de bitácora verificada")
-                
-        except Exception as e:
-            print(f"❌ Error verificando estructura bitácora: {e}")
-            
+    def nombre_para_bitacora(self):
+        """Login del usuario actual (o nombre, o rol); se calcula al fijar el usuario"""
+        if not self.usuario_actual:
+            return "Desconocido"
+        if not isinstance(self.usuario_actual, dict):
+            return str(self.usuario_actual)
+        # ✅ PRIORIDAD: LOGIN, LUEGO NOMBRE COMPLETO, LUEGO ROL
+        for campo in ('usuario', 'nombre', 'rol'):
+            valor = self.usuario_actual.get(campo)
+            if valor and str(valor).strip():
+                return valor
+        return "Desconocido"
+
     def registrar_accion(self, modulo, accion, descripcion="", detalles="", arete_afectado=""):
         """
-        Registrar una acción en la bitácora - CORREGIDO DEFINITIVO
+        Registrar una acción en la bitácora. Solo se encola (no espera al disco); el hilo
+        de ColaBitacora la escribe en orden junto con las demás pendientes.
         """
         try:
-            # ✅ VERIFICAR SI HAY USUARIO ACTUAL - ESTRATEGIA MEJORADA
-            if not self.usuario_actual:
-                print("⚠️  No hay usuario actual para registrar en bitácora")
-                usuario = "Desconocido"
-            else:
-                # ✅ ESTRATEGIA MEJORADA: Priorizar nombre de usuario sobre nombre completo
-                if isinstance(self.usuario_actual, dict):
-                    print(f"🔍 DEBUG - Diccionario usuario: {self.usuario_actual}")
-                    
-                    # ESTRATEGIA 1: Buscar específicamente el campo 'usuario' (login)
-                    usuario_login = self.usuario_actual.get('usuario')
-                    nombre_completo = self.usuario_actual.get('nombre')
-                    rol = self.usuario_actual.get('rol')
-                    
-                    print(f"   🔍 Usuario (login): '{usuario_login}'")
-                    print(f"   🔍 Nombre completo: '{nombre_completo}'") 
-                    print(f"   🔍 Rol: '{rol}'")
-                    
-                    # ✅ DECISIÓN INTELIGENTE: Usar login si está disponible
-                    if usuario_login and usuario_login.strip():
-                        usuario = usuario_login
-                        print(f"   ✅ Usando LOGIN: {usuario}")
-                    elif nombre_completo and nombre_completo.strip():
-                        usuario = nombre_completo
-                        print(f"   ✅ Usando NOMBRE: {usuario}")
-                    elif rol and rol.strip():
-                        usuario = rol
-                        print(f"   ✅ Usando ROL: {usuario}")
-                    else:
-                        usuario = "Desconocido"
-                        print("   ⚠️  Usando valor por defecto")
-                        
-                else:
-                    usuario = str(self.usuario_actual)
-                    print(f"   ℹ️  Usuario no es diccionario: {usuario}")
-                
-                print(f"👤 FINAL - Usuario para bitácora: {usuario}")
-            
-            # ✅ OBTENER HORA DE MÉXICO
-            fecha_hora = self.obtener_hora_mexico()
-            
-            # ✅ REGISTRAR EN BASE DE DATOS
-            try:
-                query = """
-                INSERT INTO tbitacora 
-                (fecha, usuario, modulo, accion, descripcion, detalles, arete_afectado)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """
-                params = (fecha_hora, usuario, modulo, accion, descripcion, detalles, arete_afectado)
-                
-                cursor = self.db.ejecutar_consulta(query, params)
-                
-                if cursor:
-                    print(f"✅ Acción registrada en bitácora: {usuario} - {modulo} - {accion}")
-                    return True
-                else:
-                    print(f"❌ Error al registrar acción en bitácora")
-                    return False
-                    
-            except Exception as e:
-                print(f"⚠️  Error con consulta completa: {e}")
-                
-                # ✅ FALLBACK: Intentar con consulta simple
-                try:
-                    query_simple = """
-                    INSERT INTO tbitacora 
-                    (fecha, usuario, modulo, accion, descripcion)
-                    VALUES (?, ?, ?, ?, ?)
-                    """
-                    params_simple = (fecha_hora, usuario, modulo, accion, descripcion)
-                    
-                    cursor_simple = self.db.ejecutar_consulta(query_simple, params_simple)
-                    
-                    if cursor_simple:
-                        print(f"✅ Acción registrada (consulta simple): {usuario} - {modulo} - {accion}")
-                        return True
-                    else:
-                        print(f"❌ Error al registrar acción (consulta simple)")
-                        return False
-                        
-                except Exception as e2:
-                    print(f"❌ Error fatal registrando acción: {e2}")
-                    return False
-                    
+            self.cola.registrar(self.obtener_hora_mexico(), self._usuario_bitacora, modulo, accion,
+                                descripcion, detalles, arete_afectado)
+            return True
         except Exception as e:
             print(f"❌ Error en registrar_accion: {e}")
             return False
 
+    def vaciar_bitacora(self):
+        """Escribe lo que quede en la cola (al cerrar sesión o la aplicación)"""
+        if not self.cola.vaciar():
+            print(f"⚠️ Bitácora - {self.cola.pendientes()} registros aún sin escribir")
+
     def obtener_registros_bitacora(self, fecha_desde, fecha_hasta):
         """
         Obtener registros de bitácora en un rango de fechas
@@ -244,10 +259,14 @@ class BitacoraController:
             list: Lista de tuplas con los registros
         """
         try:
+            # Los registros que aún están en la cola también deben salir en el reporte
+            self.cola.vaciar()
+            
+            # Comparación directa sobre fecha (sin DATE()) para que use el índice idx_tbitacora_fecha
             query = """
             SELECT fecha, usuario, modulo, accion, descripcion, detalles, arete_afectado
             FROM tbitacora 
-            WHERE DATE(fecha) BETWEEN ? AND ?
+            WHERE fecha >= ? AND fecha < date(?, '+1 day')
             ORDER BY fecha DESC
             """
             cursor = self.db.ejecutar_consulta(query, (fecha_desde, fecha_hasta))
@@ -263,8 +282,12 @@ class BitacoraController:
             return []
 
     def generar_reporte_pdf(self):
-        """Generar reporte PDF de la bitácora"""
+        """Generar reporte PDF de la bitácora (en segundo plano, con progreso y cancelación)"""
         try:
+            if self.tarea_reporte and self.tarea_reporte.en_curso:
+                self.mostrar_informacion("Reporte en curso", "Ya se está generando un reporte.")
+                return
+            
             # Obtener fechas seleccionadas
             fecha_desde = self.ui.dateEdit_desde.date().toString('yyyy-MM-dd')
             fecha_hasta = self.ui.dateEdit_hasta.date().toString('yyyy-MM-dd')
@@ -274,10 +297,11 @@ class BitacoraController:
                 self.mostrar_error("Error de fechas", "La fecha 'Desde' no puede ser mayor que la fecha 'Hasta'.")
                 return
             
-            # Obtener registros
-            registros = self.obtener_registros_bitacora(fecha_desde, fecha_hasta)
+            # Solo se cuentan (con el índice por fecha); las filas se leen por lotes al generar
+            self.cola.vaciar()
+            total = contar_registros(self.db.connection, fecha_desde, fecha_hasta)
             
-            if not registros:
+            if not total:
                 self.mostrar_informacion("Sin registros", 
                                        f"No hay registros de bitácora para el período {fecha_desde} a {fecha_hasta}.")
                 return
@@ -294,123 +318,70 @@ class BitacoraController:
                 return  # Usuario canceló
             
             # Generar PDF
-            if self.crear_pdf(registros, file_path, fecha_desde, fecha_hasta):
-                self.mostrar_informacion("Éxito", f"Reporte generado exitosamente:\n{file_path}")
-                
-                # Registrar la acción en la bitácora
-                self.registrar_accion(
-                    modulo="Bitácora",
-                    accion="GENERAR_REPORTE",
-                    descripcion=f"Generó reporte PDF del {fecha_desde} al {fecha_hasta}",
-                    detalles=f"Total de registros: {len(registros)}"
-                )
-            else:
-                self.mostrar_error("Error", "No se pudo generar el reporte PDF.")
+            self.crear_pdf(file_path, fecha_desde, fecha_hasta, total)
                 
         except Exception as e:
             print(f"❌ Error generando reporte PDF: {e}")
             self.mostrar_error("Error", f"Error al generar reporte: {str(e)}")
 
-    def crear_pdf(self, registros, file_path, fecha_desde, fecha_hasta):
-        try:
-            # Crear documento
-            doc = SimpleDocTemplate(
-                file_path,
-                pagesize=A4,
-                topMargin=1*inch,
-                bottomMargin=1*inch
-            )
-            
-            # Estilos
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # Centrado
-            )
-            
-            # Contenido
-            story = []
-            
-            # Título
-            title = Paragraph("REPORTE DE BITÁCORA - SISTEMA GANADERO", title_style)
-            story.append(title)
-            
-            # Información del reporte
-            usuario_nombre = self.usuario_actual.get('nombre', 'N/A') if self.usuario_actual else 'N/A'
-            
-            # ✅ CORREGIDO: Usar datetime.now() directamente sin conflicto
-            from datetime import datetime
-            fecha_generacion = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            info_text = f"""
-            <b>Período:</b> {fecha_desde} a {fecha_hasta}<br/>
-            <b>Total de registros:</b> {len(registros)}<br/>
-            <b>Generado por:</b> {usuario_nombre}<br/>
-            <b>Fecha de generación:</b> {fecha_generacion}
-            """
-            info = Paragraph(info_text, styles['Normal'])
-            story.append(info)
-            story.append(Spacer(1, 0.3*inch))
-            
-            # ✅ CORREGIDO: Preparar datos para la tabla SIN la columna ARETE
-            table_data = [['Fecha/Hora', 'Usuario', 'Módulo', 'Acción', 'Descripción']]  # Quitado 'Arete'
-            
-            for registro in registros:
-                fecha, usuario, modulo, accion, descripcion, detalles, arete = registro
-                
-                # Formatear fecha
-                if isinstance(fecha, str):
-                    fecha_str = fecha
-                else:
-                    fecha_str = fecha.strftime('%Y-%m-%d %H:%M') if hasattr(fecha, 'strftime') else str(fecha)
-                
-                # Limitar longitud de campos para que quepan en la tabla
-                descripcion_short = (descripcion or '')[:50] + '...' if descripcion and len(descripcion) > 50 else (descripcion or '')
-                
-                # ✅ CORREGIDO: Quitar el campo arete de la tabla
-                table_data.append([
-                    fecha_str,
-                    usuario or 'N/A',
-                    modulo or 'N/A', 
-                    accion or 'N/A',
-                    descripcion_short
-                    # arete or 'N/A'  # ❌ ELIMINADO
-                ])
-            
-            # Crear tabla
-            table = Table(table_data, repeatRows=1)
-            table.setStyle(TableStyle([
-                # Encabezado
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                
-                # Filas de datos
-                ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                
-                # Grid
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ]))
-            
-            story.append(table)
-            
-            # Generar PDF
-            doc.build(story)
-            print(f"✅ PDF generado exitosamente: {file_path}")
-            return True
+    def crear_pdf(self, file_path, fecha_desde, fecha_hasta, total):
+        """Lanza la generación del PDF en un hilo del pool con un diálogo de progreso"""
+        usuario_nombre = self.usuario_actual.get('nombre', 'N/A') if self.usuario_actual else 'N/A'
+        ventana = self.ui.pushButton_generar.window()
         
-        except Exception as e:
-            print(f"❌ Error creando PDF: {e}")
-            return False
+        self.progress_dialog = QtWidgets.QProgressDialog(
+            "Generando reporte de bitácora...", "Cancelar", 0, total, ventana)
+        self.progress_dialog.setWindowTitle("Procesando")
+        self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        
+        # ✅ EL HILO USA SU PROPIA CONEXIÓN (self.db.connection ES POR HILO)
+        self.tarea_reporte = TareaFondo(
+            lambda progreso, cancelada: generar_pdf_bitacora(
+                self.db.connection, file_path, fecha_desde, fecha_hasta, usuario_nombre, total,
+                progreso, cancelada),
+            ventana
+        )
+        self.tarea_reporte.progreso.connect(self.actualizar_progreso)
+        self.tarea_reporte.terminada.connect(
+            lambda registros: self.reporte_terminado(file_path, fecha_desde, fecha_hasta, registros))
+        self.tarea_reporte.cancelada.connect(self.reporte_cancelado)
+        self.tarea_reporte.fallida.connect(self.reporte_fallido)
+        self.progress_dialog.canceled.connect(self.tarea_reporte.cancelar)
+        
+        self.progress_dialog.show()
+        self.tarea_reporte.iniciar()
+
+    def actualizar_progreso(self, hechas, total):
+        if self.progress_dialog:
+            self.progress_dialog.setValue(hechas)
+
+    def cerrar_progreso(self):
+        if self.progress_dialog:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+
+    def reporte_terminado(self, file_path, fecha_desde, fecha_hasta, registros):
+        self.cerrar_progreso()
+        self.mostrar_informacion("Éxito", f"Reporte generado exitosamente:\n{file_path}")
+        
+        # Registrar la acción en la bitácora
+        self.registrar_accion(
+            modulo="Bitácora",
+            accion="GENERAR_REPORTE",
+            descripcion=f"Generó reporte PDF del {fecha_desde} al {fecha_hasta}",
+            detalles=f"Total de registros: {registros}"
+        )
+
+    def reporte_cancelado(self):
+        self.cerrar_progreso()
+        print("⚠️ Reporte de bitácora cancelado")
+
+    def reporte_fallido(self, error):
+        self.cerrar_progreso()
+        print(f"❌ Error creando PDF: {error}")
+        self.mostrar_error("Error", f"No se pudo generar el reporte PDF:\n{error}")
 
     def mostrar_error(self, titulo, mensaje):
         """Mostrar mensaje de error"""
@@ -435,13 +406,14 @@ class BitacoraController:
         )
 
     def registrar_logout(self, usuario):
-        """Registrar cierre de sesión"""
+        """Registrar cierre de sesión (y escribir todo lo pendiente antes de salir)"""
         self.registrar_accion(
             modulo="Sistema",
             accion="LOGOUT",
             descripcion="Cierre de sesión del sistema",
             detalles=f"Usuario: {usuario}"
         )
+        self.vaciar_bitacora()
 
     def registrar_alta_becerro(self, arete, datos):
         """Registrar alta de becerro"""
@@ -515,6 +487,7 @@ class BitacoraController:
     def set_usuario_actual(self, usuario_actual):
         """Establecer el usuario actual - MEJORADO"""
         self.usuario_actual = usuario_actual
+        self._usuario_bitacora = self.nombre_para_bitacora()
 
         self.diagnostico_usuario_detallado()
     
@@ -581,6 +554,7 @@ class BitacoraController:
     def limpiar_recursos(self):
         """Limpiar recursos del controlador"""
         try:
+            self.vaciar_bitacora()
             if hasattr(self.db, 'disconnect'):
                 self.db.disconnect()
             print("✅ Recursos de bitácora limpiados")
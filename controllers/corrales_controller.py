@@ -1,13 +1,18 @@
 # corrales_controller.py - VERSIÓN CORREGIDA
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database
+from tabla_modelo import ModeloTabla, DelegadoAcciones, Columna, Accion, ACCIONES, FECHA, VistaTabla, reemplazar_tabla
+from busqueda import BusquedaDiferida
 from controllers.Acorrales import AgregarCorralController
 from controllers.Ecorrales import EditarCorralController
 
 class CorralesController:
     def __init__(self, corrales_widget, bitacora_controller=None):
         self.corrales_widget = corrales_widget
-        self.db = Database()
+        self.db = obtener_database()
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.db.buscar_corrales_en_todos_los_campos, self.llenar_tabla,
+                                         parent=self.corrales_widget)
         self.bitacora_controller = bitacora_controller
         self.setup_connections()
         self.configurar_tabla()
@@ -77,7 +82,7 @@ class CorralesController:
     
     def crear_tabla_temporal(self):
         """Crea una tabla temporal si no se encuentra en el UI"""
-        self.tabla = QtWidgets.QTableWidget()
+        self.tabla = VistaTabla()
         layout = self.corrales_widget.layout()
         if layout:
             layout.addWidget(self.tabla)
@@ -90,13 +95,25 @@ class CorralesController:
         """Configura el aspecto y comportamiento de la tabla"""
         try:
             # CORREGIDO: Quitamos la columna ID y empezamos con Nombre
+            # (corral[0] = ID, no se muestra; las columnas visibles salen de corral[1..7])
             columnas = [
-                "Nombre", "Ubicación", "Capacidad Máx", "Capacidad Actual", 
-                "Fecha Mantenimiento", "Condición", "Observaciones", "Opciones"
+                Columna("Nombre", 1), Columna("Ubicación", 2), Columna("Capacidad Máx", 3),
+                Columna("Capacidad Actual", 4), Columna("Fecha Mantenimiento", 5, FECHA),
+                Columna("Condición", 6), Columna("Observaciones", 7), Columna("Opciones", tipo=ACCIONES)
             ]
             
-            self.tabla.setColumnCount(len(columnas))
-            self.tabla.setHorizontalHeaderLabels(columnas)
+            # ✅ GRID MODELO/VISTA: LOS BOTONES SE PINTAN, NO HAY WIDGETS POR FILA
+            self.modelo = ModeloTabla(columnas)
+            self.tabla = reemplazar_tabla(self.tabla, self.modelo)
+            
+            # Botones de opciones - usan el ID del corral (corral[0])
+            self.delegado_opciones = DelegadoAcciones([
+                Accion("Editar", "#3498db", "#2980b9", "Editar corral",
+                       lambda corral: self.editar_corral(str(corral[0]))),
+                Accion("Eliminar", "#e74c3c", "#c0392b", "Eliminar corral",
+                       lambda corral: self.eliminar_corral(str(corral[0]))),
+            ], tamano_fuente=10, parent=self.tabla)
+            self.tabla.setItemDelegateForColumn(7, self.delegado_opciones)
             
             # Configurar tamaños de columnas
             self.tabla.setColumnWidth(0, 120)  # Nombre
@@ -126,6 +143,7 @@ class CorralesController:
         """Carga todos los corrales en la tabla"""
         try:
             print("🔄 Cargando corrales desde la base de datos...")
+            self.busqueda.invalidar()
             corrales = self.db.obtener_corrales_completos()
             print(f"📊 {len(corrales)} corrales encontrados")
             self.llenar_tabla(corrales)
@@ -137,81 +155,13 @@ class CorralesController:
     def llenar_tabla(self, corrales):
         """Llena la tabla con los datos de los corrales"""
         try:
-            self.tabla.setRowCount(0)
-
-            for row_number, corral in enumerate(corrales):
-                self.tabla.insertRow(row_number)
-                
-                # CORREGIDO: Empezamos desde la columna 1 (Nombre) en lugar de 0 (ID)
-                # corral[0] = ID (lo ocultamos)
-                # corral[1] = Nombre
-                # corral[2] = Ubicación
-                # etc...
-                
-                # Llenar datos visibles (empezando desde nombre)
-                for col in range(1, min(8, len(corral))):  # Empezar desde 1 para omitir ID
-                    item = QtWidgets.QTableWidgetItem(str(corral[col] if corral[col] is not None else ""))
-                    self.tabla.setItem(row_number, col-1, item)  # col-1 porque quitamos la columna ID
-                
-                # Botones de opciones - usar el ID del corral (corral[0])
-                self.agregar_botones_opciones(row_number, 7, str(corral[0]))  # 7 porque ahora tenemos 7 columnas visibles
+            self.modelo.establecer_filas(corrales)
 
             print(f"✅ Tabla llenada con {len(corrales)} registros")
 
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
 
-    def agregar_botones_opciones(self, row, column, id_corral):
-        """Agrega botones de editar y eliminar"""
-        try:
-            widget = QtWidgets.QWidget()
-            layout = QtWidgets.QHBoxLayout(widget)
-            layout.setContentsMargins(2, 2, 2, 2)
-            layout.setSpacing(4)
-            
-            # Botón editar
-            btn_editar = QtWidgets.QPushButton("Editar")
-            btn_editar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #3498db; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-            """)
-            btn_editar.clicked.connect(lambda checked, id=id_corral: self.editar_corral(id))
-            
-            # Botón eliminar
-            btn_eliminar = QtWidgets.QPushButton("Eliminar")
-            btn_eliminar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #e74c3c; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #c0392b;
-                }
-            """)
-            btn_eliminar.clicked.connect(lambda checked, id=id_corral: self.eliminar_corral(id))
-            
-            layout.addWidget(btn_editar)
-            layout.addWidget(btn_eliminar)
-            layout.addStretch()
-            
-            self.tabla.setCellWidget(row, column, widget)
-            
-        except Exception as e:
-            print(f"❌ Error al agregar botones: {e}")
-    
     def agregar_corral(self):
         """Abre diálogo para agregar nuevo corral"""
         try:
@@ -342,9 +292,9 @@ class CorralesController:
             if self.buscador:
                 texto = self.buscador.text().strip()
                 if texto:
-                    corrales = self.db.buscar_corrales_en_todos_los_campos(texto)
+                    self.busqueda.solicitar(texto)
                 else:
-                    corrales = self.db.obtener_corrales_completos()
-                self.llenar_tabla(corrales)
+                    self.busqueda.cancelar()
+                    self.llenar_tabla(self.db.obtener_corrales_completos())
         except Exception as e:
             print(f"❌ Error al buscar corrales: {e}")
\ No newline at end of file
@@ -1,21 +1,27 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.editarbecerro_ui import Ui_Dialog
-from database import Database
-import os
-from pathlib import Path
+from database import obtener_database, CorralLleno
+from fotos import FILTRO_IMAGENES, ProcesadorFotos
 
 class EditarBecerroController(QtWidgets.QDialog):
     def __init__(self, becerro_data=None, parent=None, bitacora_controller=None):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.bitacora_controller = bitacora_controller
         
         # Variable para almacenar la foto
         self.foto_data = None
         self.foto_ruta = None
+        self.foto_miniatura = None
+        
+        # ✅ LAS FOTOS SE PROCESAN EN SEGUNDO PLANO (EXIF, TAMAÑO, COMPRESIÓN, MINIATURA)
+        self.procesador_fotos = ProcesadorFotos(self)
+        self.procesador_fotos.terminado.connect(self.foto_procesada)
+        self.procesador_fotos.fallido.connect(self.foto_no_procesada)
+
         self.becerro_original = becerro_data  # Datos originales del becerro
         self.arete_original = becerro_data.get('arete', '') if becerro_data else ''
         
@@ -89,7 +95,7 @@ class EditarBecerroController(QtWidgets.QDialog):
                 corrales = []
                 for corral in corrales_finales:
                     identcorral, nomcorral, capmax, capactual = corral
-                    animales_actuales = self.db.contar_animales_en_corral(nomcorral)
+                    animales_actuales = int(capactual or 0)  # capactual lo mantienen los triggers de la BD
                     
                     # Convertir capacidades a enteros
                     try:
@@ -233,10 +239,8 @@ class EditarBecerroController(QtWidgets.QDialog):
             if hasattr(self.ui, 'textEdit') and observaciones:
                 self.ui.textEdit.setPlainText(observaciones)
             
-            # Foto - cargar si existe
-            foto_data = self.becerro_original.get('foto')
-            if foto_data:
-                self.foto_data = foto_data
+            # Foto: no se leen sus bytes; si no se elige otra, actualizar_becerro conserva la guardada
+            if self.becerro_original.get('tiene_foto'):
                 self.ui.indexbtn2.setText("✓ Foto Cargada")
                 self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
                 self.ui.lineEdit_5.setText("Foto cargada desde BD")
@@ -258,44 +262,21 @@ class EditarBecerroController(QtWidgets.QDialog):
         return ""
     
     def subir_foto(self):
-        """Abre un diálogo para seleccionar y cargar una foto"""
+        """Abre un diálogo para seleccionar una foto; se reduce y comprime en segundo plano"""
         try:
-            # Configurar los filtros de archivo
-            filtros = "Imágenes (*.png *.jpg *.jpeg *.bmp *.gif *.tiff);;Todos los archivos (*)"
-            
-            # Abrir diálogo de selección de archivo
             ruta_archivo, _ = QtWidgets.QFileDialog.getOpenFileName(
                 self, 
                 "Seleccionar foto del becerro", 
                 "", 
-                filtros
+                FILTRO_IMAGENES
             )
             
             if ruta_archivo:
-                # Verificar tamaño del archivo (máximo 5MB)
-                tamaño_archivo = os.path.getsize(ruta_archivo)
-                if tamaño_archivo > 5 * 1024 * 1024:  # 5MB en bytes
-                    QtWidgets.QMessageBox.warning(
-                        self, 
-                        "Archivo muy grande", 
-                        "La imagen no puede ser mayor a 5MB"
-                    )
-                    return
-                
-                # Leer el archivo como bytes
-                with open(ruta_archivo, 'rb') as archivo:
-                    self.foto_data = archivo.read()
-                    self.foto_ruta = ruta_archivo
-                
-                # Mostrar información al usuario
-                nombre_archivo = Path(ruta_archivo).name
-                
-                # Actualizar la interfaz
-                self.ui.lineEdit_5.setText(nombre_archivo)
-                self.ui.indexbtn2.setText("✓ Foto Cargada")
-                self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
-                
-                print(f"✅ Foto cargada: {nombre_archivo}")
+                # ✅ LA FOTO SE PROCESA FUERA DEL HILO DE LA INTERFAZ; NO SE GUARDA HASTA QUE TERMINE
+                self.ui.indexbtn2.setText("⏳ Procesando...")
+                self.ui.indexbtn2.setStyleSheet("")
+                self.ui.pushButton_2.setEnabled(False)
+                self.procesador_fotos.procesar(ruta_archivo)
                 
         except Exception as e:
             print(f"❌ Error al subir foto: {e}")
@@ -305,6 +286,31 @@ class EditarBecerroController(QtWidgets.QDialog):
                 f"No se pudo cargar la foto: {str(e)}"
             )
     
+    def foto_procesada(self, foto):
+        """Recibe la foto ya orientada, reducida y sin metadatos, con su miniatura"""
+        self.foto_data = foto.datos
+        self.foto_miniatura = foto.miniatura
+        self.foto_ruta = foto.ruta
+        self.ui.pushButton_2.setEnabled(True)
+        
+        # Poner el nombre del archivo en lineEdit_5 (lineEdit_4 muestra el arete)
+        self.ui.lineEdit_5.setText(foto.nombre)
+        self.ui.indexbtn2.setText("✓ Foto Cargada")
+        self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        
+        print(f"✅ Foto cargada: {foto.nombre} - {foto.resumen()}")
+    
+    def foto_no_procesada(self, mensaje):
+        """La foto elegida no se pudo leer; se conserva la que había"""
+        self.ui.pushButton_2.setEnabled(True)
+        if self.foto_data or self.becerro_original.get('tiene_foto'):
+            self.ui.indexbtn2.setText("✓ Foto Cargada")
+            self.ui.indexbtn2.setStyleSheet("QPushButton { background-color: #27ae60; color: white; }")
+        else:
+            self.ui.indexbtn2.setText("Subir archivo")
+            self.ui.indexbtn2.setStyleSheet("")
+        QtWidgets.QMessageBox.warning(self, "Foto no válida", f"No se pudo cargar la foto: {mensaje}")
+    
     def validar_datos(self):
         """Valida que los datos ingresados sean correctos"""
         try:
@@ -346,37 +352,14 @@ class EditarBecerroController(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Error", f"Error en validación: {str(e)}")
             return False
 
-    def validar_capacidad_corral(self, corral_destino: str) -> bool:
-        """Valida que el corral destino tenga capacidad disponible"""
-        try:
-            # Obtener el corral actual del becerro
-            corral_actual = self.becerro_original.get('corral', '')
-            
-            # Si es el mismo corral, no hay problema de capacidad
-            if corral_destino == corral_actual:
-                return True
-            
-            # Validar capacidad del corral destino
-            capacidad = self.db.obtener_capacidad_corral(corral_destino)
-            animales_actuales = self.db.contar_animales_en_corral(corral_destino)
-            
-            capacidad_maxima = capacidad['capacidad_maxima']
-            
-            if capacidad_maxima > 0 and animales_actuales >= capacidad_maxima:
-                QtWidgets.QMessageBox.warning(
-                    self,
-                    "Corral lleno",
-                    f"El corral '{corral_destino}' ha alcanzado su capacidad máxima ({capacidad_maxima} animales).\n\n"
-                    f"Actualmente tiene {animales_actuales} animales.\n"
-                    f"Por favor, seleccione otro corral con capacidad disponible."
-                )
-                return False
-            
-            return True
-            
-        except Exception as e:
-            print(f"❌ Error validando capacidad del corral: {e}")
-            return True  # Por seguridad, permitir continuar si hay error
+    def mostrar_corral_lleno(self, error):
+        """La BD rechazó el cambio: el corral no tiene lugar (se revisa dentro de la transacción)"""
+        QtWidgets.QMessageBox.warning(
+            self,
+            "Corral lleno",
+            f"El corral '{error.corral}' ha alcanzado su capacidad máxima ({error.capacidad} animales).\n\n"
+            f"Por favor, seleccione otro corral con capacidad disponible."
+        )
     
     def guardar_cambios(self):
         """Guarda los cambios del becerro en la base de datos"""
@@ -416,13 +399,9 @@ class EditarBecerroController(QtWidgets.QDialog):
             print(f"   Observaciones: {observaciones}")
             print(f"   Foto actualizada: {'Sí' if self.foto_data else 'No'}")
             
-            # Validar capacidad del corral destino
-            if not self.validar_capacidad_corral(corral):
-                return
-            
-            # ✅ REGISTRAR EN BITÁCORA ANTES DE ACTUALIZAR
+            # Cambios para la bitácora (se registran solo si la actualización se guarda)
+            cambios = []
             if self.bitacora_controller:
-                cambios = []
                 if arete != arete_original:
                     cambios.append(f"Arete: {arete_original} → {arete}")
                 if nombre != self.becerro_original.get('nombre', ''):
@@ -440,18 +419,7 @@ class EditarBecerroController(QtWidgets.QDialog):
                 if arete_madre != self.becerro_original.get('aretemadre', ''):
                     cambios.append(f"Arete madre: {self.becerro_original.get('aretemadre', '')} → {arete_madre}")
                 
-                if cambios:
-                    cambios_str = ", ".join(cambios)
-                    self.bitacora_controller.registrar_accion(
-                        modulo="Becerros",
-                        accion="ACTUALIZAR",
-                        descripcion=f"Edición de becerro: {nombre}",
-                        detalles=cambios_str,
-                        arete_afectado=arete_original
-                    )
-                    print("✅ Edición registrada en bitácora con cambios detallados")
-            
-            # Actualizar en la base de datos
+            # Actualizar en la base de datos (la capacidad del corral se revisa en la misma transacción)
             if self.db.actualizar_becerro(
                 arete_original=arete_original,
                 arete=arete,
@@ -464,13 +432,27 @@ class EditarBecerroController(QtWidgets.QDialog):
                 estatus=estatus,
                 aretemadre=arete_madre,
                 observacion=observaciones if observaciones else None,
-                foto=self.foto_data
+                foto=self.foto_data,
+                miniatura=self.foto_miniatura
             ):
+                if self.bitacora_controller and cambios:
+                    cambios_str = ", ".join(cambios)
+                    self.bitacora_controller.registrar_accion(
+                        modulo="Becerros",
+                        accion="ACTUALIZAR",
+                        descripcion=f"Edición de becerro: {nombre}",
+                        detalles=cambios_str,
+                        arete_afectado=arete_original
+                    )
+                    print("✅ Edición registrada en bitácora con cambios detallados")
+                
                 QtWidgets.QMessageBox.information(self, "Éxito", "Becerro actualizado correctamente")
                 self.accept()
             else:
                 QtWidgets.QMessageBox.warning(self, "Error", "Error al actualizar el becerro")
                 
+        except CorralLleno as e:
+            self.mostrar_corral_lleno(e)
         except Exception as e:
             print(f"❌ Error al actualizar becerro: {e}")
             QtWidgets.QMessageBox.critical(self, "Error", f"Error al actualizar: {str(e)}")
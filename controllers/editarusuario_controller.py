@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 from PyQt5 import QtCore, QtGui, QtWidgets
 from ui.editarusuario_ui import Ui_Dialog
-from database import Database
+from database import obtener_database
 import hashlib
 
 class EditarUsuarioController(QtWidgets.QDialog):
@@ -9,7 +9,7 @@ class EditarUsuarioController(QtWidgets.QDialog):
         super().__init__(parent)
         self.ui = Ui_Dialog()
         self.ui.setupUi(self)
-        self.db = Database()
+        self.db = obtener_database()
         self.id_usuario = id_usuario
         self.usuario_original = None
         self.bitacora_controller = bitacora_controller
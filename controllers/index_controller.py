@@ -1,11 +1,11 @@
 # controllers/index_controller.py
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database
 
 class MainController:
     def __init__(self, main_widget):
         self.main_widget = main_widget
-        self.db = Database()
+        self.db = obtener_database()
         self.setup_connections()
         self.cargar_estadisticas()
         print("✅ MainController inicializado para página principal")
@@ -48,11 +48,12 @@ class MainController:
         try:
             print("📊 Cargando estadísticas...")
             
-            # Obtener datos de la base de datos
-            total_ganado = self.obtener_total_ganado()
-            total_machos = self.obtener_total_machos()
-            total_hembras = self.obtener_total_hembras()
-            total_becerros = self.obtener_total_becerros()
+            # ✅ UNA SOLA CONSULTA AGRUPADA PARA TODOS LOS CONTADORES
+            estadisticas = self.db.obtener_estadisticas_rebano()
+            total_ganado = estadisticas['total_ganado']
+            total_machos = estadisticas['machos']
+            total_hembras = estadisticas['hembras']
+            total_becerros = estadisticas['total_becerros']
             
             # Actualizar las etiquetas
             self.actualizar_etiqueta("label_7", str(total_ganado))      # Total Ganado
@@ -81,137 +82,6 @@ class MainController:
         except Exception as e:
             print(f"❌ Error al actualizar etiqueta {nombre_etiqueta}: {e}")
 
-    def obtener_total_ganado(self):
-        """Obtiene el total de animales (ganado + becerros) - CORREGIDO CON DIAGNÓSTICO"""
-        try:
-            print("🔍 Calculando total de ganado...")
-            
-            # Conectar a la base de datos si no está conectada
-            if not self.db.connection:
-                self.db.connect()
-            
-            # Contar animales de ganado
-            animales = self.db.obtener_animales()
-            total_animales = len(animales) if animales else 0
-            print(f"📊 Animales encontrados: {total_animales}")
-            
-            # DEBUG: Mostrar algunos animales si existen
-            if animales and len(animales) > 0:
-                print(f"🐮 Primer animal: {animales[0]}")
-            
-            # Contar becerros
-            becerros = self.db.obtener_becerros()
-            total_becerros = len(becerros) if becerros else 0
-            print(f"📊 Becerros encontrados: {total_becerros}")
-            
-            # DEBUG: Mostrar algunos becerros si existen
-            if becerros and len(becerros) > 0:
-                print(f"🐂 Primer becerro: {becerros[0]}")
-            
-            # ✅ CORRECCIÓN: Sumar animales + becerros para el total general
-            total_general = total_animales + total_becerros
-            
-            print(f"📊 Total ganado calculado: {total_animales} animales + {total_becerros} becerros = {total_general}")
-            
-            return total_general
-            
-        except Exception as e:
-            print(f"❌ Error al obtener total ganado: {e}")
-            import traceback
-            traceback.print_exc()
-            return 0
-
-    def obtener_total_machos(self):
-        """Obtiene el total de animales machos - CORREGIDO CON DIAGNÓSTICO"""
-        try:
-            total_machos = 0
-            
-            # Contar machos en ganado
-            animales = self.db.obtener_animales()
-            if animales:
-                print(f"🔍 Revisando {len(animales)} animales para machos...")
-                for i, animal in enumerate(animales):
-                    if len(animal) > 4 and animal[4]:
-                        sexo = str(animal[4]).lower().strip()
-                        if sexo in ['macho', 'm', 'male']:
-                            total_machos += 1
-                            print(f"🐂 Macho #{total_machos} en animales: {animal[2] if len(animal) > 2 else 'N/A'} - Sexo: '{sexo}'")
-            
-            # Contar machos en becerros
-            becerros = self.db.obtener_becerros()
-            if becerros:
-                print(f"🔍 Revisando {len(becerros)} becerros para machos...")
-                for i, becerro in enumerate(becerros):
-                    if len(becerro) > 4 and becerro[4]:
-                        sexo = str(becerro[4]).lower().strip()
-                        if sexo in ['macho', 'm', 'male']:
-                            total_machos += 1
-                            print(f"🐂 Macho #{total_machos} en becerros: {becerro[2] if len(becerro) > 2 else 'N/A'} - Sexo: '{sexo}'")
-            
-            print(f"📊 Total machos encontrados: {total_machos}")
-            return total_machos
-            
-        except Exception as e:
-            print(f"❌ Error al obtener total machos: {e}")
-            import traceback
-            traceback.print_exc()
-            return 0
-
-    def obtener_total_hembras(self):
-        """Obtiene el total de animales hembras - CORREGIDO CON DIAGNÓSTICO"""
-        try:
-            total_hembras = 0
-            
-            # Contar hembras en ganado
-            animales = self.db.obtener_animales()
-            if animales:
-                print(f"🔍 Revisando {len(animales)} animales para hembras...")
-                for i, animal in enumerate(animales):
-                    if len(animal) > 4 and animal[4]:
-                        sexo = str(animal[4]).lower().strip()
-                        if sexo in ['hembra', 'h', 'f', 'female']:
-                            total_hembras += 1
-                            print(f"🐄 Hembra #{total_hembras} en animales: {animal[2] if len(animal) > 2 else 'N/A'} - Sexo: '{sexo}'")
-            
-            # Contar hembras en becerros
-            becerros = self.db.obtener_becerros()
-            if becerros:
-                print(f"🔍 Revisando {len(becerros)} becerros para hembras...")
-                for i, becerro in enumerate(becerros):
-                    if len(becerro) > 4 and becerro[4]:
-                        sexo = str(becerro[4]).lower().strip()
-                        if sexo in ['hembra', 'h', 'f', 'female']:
-                            total_hembras += 1
-                            print(f"🐄 Hembra #{total_hembras} en becerros: {becerro[2] if len(becerro) > 2 else 'N/A'} - Sexo: '{sexo}'")
-            
-            print(f"📊 Total hembras encontradas: {total_hembras}")
-            return total_hembras
-            
-        except Exception as e:
-            print(f"❌ Error al obtener total hembras: {e}")
-            import traceback
-            traceback.print_exc()
-            return 0
-
-    def obtener_total_becerros(self):
-        """Obtiene el total de becerros - CORREGIDO CON DIAGNÓSTICO"""
-        try:
-            becerros = self.db.obtener_becerros()
-            total = len(becerros) if becerros else 0
-            print(f"📊 Total becerros encontrados: {total}")
-            
-            # DEBUG: Mostrar información de becerros
-            if becerros:
-                for i, becerro in enumerate(becerros[:3]):  # Mostrar primeros 3
-                    print(f"🐂 Becerro {i+1}: {becerro[1] if len(becerro) > 1 else 'N/A'} - {becerro[2] if len(becerro) > 2 else 'N/A'}")
-            
-            return total
-        except Exception as e:
-            print(f"❌ Error al obtener total becerros: {e}")
-            import traceback
-            traceback.print_exc()
-            return 0
-
     def abrir_animales(self):
         """Abre la sección de animales - NAVEGACIÓN REAL CON ACTUALIZACIÓN DE BOTONES"""
         try:
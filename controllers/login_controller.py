@@ -4,7 +4,7 @@ from PyQt5.QtWidgets import QMessageBox
 from PyQt5.QtCore import pyqtSignal
 from controllers.sidebar import MainWindow
 from Esidebar import EMainWindow  # Importar el sidebar para empleados
-from database import Database
+from database import obtener_database
 
 class LoginController:
     def __init__(self, login_ui, login_window):
@@ -13,7 +13,7 @@ class LoginController:
         """
         self.ui = login_ui
         self.login_window = login_window
-        self.db = Database()
+        self.db = obtener_database()
         self.password_visible = False
         self.main_window = None
         
@@ -127,11 +127,6 @@ class LoginController:
                 self.mostrar_error("Error de validación", "Por favor, complete todos los campos.")
                 return
             
-            # Verificar que la tabla de usuarios exista
-            if not self.db.verificar_tabla_usuarios():
-                self.mostrar_error("Error", "No se pudo verificar la tabla de usuarios.")
-                return
-            
             # Validar credenciales en la base de datos
             usuario_data = self.db.verificar_credenciales(usuario, password)
             
@@ -1,13 +1,19 @@
 # propietarios_controller.py - VERSIÓN ACTUALIZADA CON BITÁCORA
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database, CursorPaginado
+from tabla_modelo import (ModeloTabla, ProveedorMiniaturas, DelegadoFoto, DelegadoAcciones,
+                          Columna, Accion, FOTO, OBSERVACIONES, ACCIONES, VistaTabla, reemplazar_tabla)
+from busqueda import BusquedaDiferida
 from controllers.Apropietarios import AgregarPropietarioController
 from controllers.Epropietarios import EditarPropietarioController
 
 class PropietariosController:
     def __init__(self, propietarios_widget, bitacora_controller=None):
         self.propietarios_widget = propietarios_widget
-        self.db = Database()
+        self.db = obtener_database()
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.db.buscar_propietarios_en_todos_los_campos, self.llenar_tabla,
+                                         parent=self.propietarios_widget)
         self.bitacora_controller = bitacora_controller
         self.setup_connections()
         self.configurar_tabla()
@@ -79,7 +85,7 @@ class PropietariosController:
     
     def crear_tabla_temporal(self):
         """Crea una tabla temporal si no se encuentra en el UI"""
-        self.tabla = QtWidgets.QTableWidget()
+        self.tabla = VistaTabla()
         layout = self.propietarios_widget.layout()
         if layout:
             layout.addWidget(self.tabla)
@@ -92,13 +98,30 @@ class PropietariosController:
         """Configura el aspecto y comportamiento de la tabla"""
         try:
             # ✅ COLUMNAS CON FOTO PRIMERO + OBSERVACIONES
+            # (posiciones de la fila de obtener_propietarios_completos: 0 id ... 8 observaciones, 9 foto)
             columnas = [
-                "ID", "Foto", "Nombre", "Teléfono", "Correo", "Dirección", 
-                "PSG", "UPP", "RFC", "Observaciones", "Opciones"
+                Columna("ID", 0), Columna("Foto", 9, FOTO, placeholder="👤"), Columna("Nombre", 1),
+                Columna("Teléfono", 2), Columna("Correo", 3), Columna("Dirección", 4),
+                Columna("PSG", 5), Columna("UPP", 6), Columna("RFC", 7),
+                Columna("Observaciones", 8, OBSERVACIONES), Columna("Opciones", tipo=ACCIONES)
             ]
             
-            self.tabla.setColumnCount(len(columnas))
-            self.tabla.setHorizontalHeaderLabels(columnas)
+            # ✅ GRID MODELO/VISTA: LAS CELDAS SE PINTAN, NO HAY WIDGETS POR FILA
+            self.modelo = ModeloTabla(columnas)
+            self.tabla = reemplazar_tabla(self.tabla, self.modelo)
+            ProveedorMiniaturas(self.modelo, self.db, 'propietario', indice_clave=0, indice_foto=9, columna=1)
+            
+            self.delegado_foto = DelegadoFoto("👤", self.tabla)
+            self.delegado_foto.clic.connect(self.on_foto_clic)
+            self.tabla.setItemDelegateForColumn(1, self.delegado_foto)
+            
+            self.delegado_opciones = DelegadoAcciones([
+                Accion("✏️", "#3498db", "#2980b9", "Editar propietario",
+                       lambda propietario: self.editar_propietario(str(propietario[0] or ""))),
+                Accion("🗑️", "#e74c3c", "#c0392b", "Eliminar propietario",
+                       lambda propietario: self.eliminar_propietario(str(propietario[0] or ""))),
+            ], parent=self.tabla)
+            self.tabla.setItemDelegateForColumn(10, self.delegado_opciones)
             
             # ✅ TAMAÑOS DE COLUMNAS OPTIMIZADOS
             self.tabla.setColumnWidth(0, 40)    # ID
@@ -124,21 +147,23 @@ class PropietariosController:
             
             # ✅ CORRECCIÓN: Desconectar antes de conectar para evitar múltiples conexiones
             try:
-                self.tabla.cellDoubleClicked.disconnect()
+                self.tabla.doubleClicked.disconnect()
             except:
                 pass
                 
             # ✅ CONEXIÓN ÚNICA: Doble clic en celdas - SOLO PARA OBSERVACIONES
-            self.tabla.cellDoubleClicked.connect(self.on_cell_double_clicked)
+            self.tabla.doubleClicked.connect(
+                lambda index: self.on_cell_double_clicked(index.row(), index.column())
+            )
             
             # Estilo para la tabla
             self.tabla.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     gridline-color: #d0d0d0;
                     background-color: white;
                     alternate-background-color: #f8f8f8;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 5px;
                     border-bottom: 1px solid #e0e0e0;
                 }
@@ -160,12 +185,9 @@ class PropietariosController:
         """Maneja el doble clic en celdas específicas - SOLO OBSERVACIONES"""
         # ✅ SOLO responder a doble clic en columna de Observaciones (9)
         if column == 9:  
-            id_item = self.tabla.item(row, 0)  # Columna ID
-            observacion_item = self.tabla.item(row, 9)  # Columna Observaciones
-            
-            if id_item and observacion_item:
-                id_propietario = id_item.text()
-                observaciones = observacion_item.data(QtCore.Qt.UserRole)  # Datos completos
+            if self.modelo.fila(row) is not None:
+                id_propietario = self.modelo.texto(row, 0)  # Columna ID
+                observaciones = self.modelo.texto(row, 9)  # Observaciones completas
                 
                 # ✅ VERIFICAR que hay observaciones antes de abrir el diálogo
                 if observaciones and observaciones.strip():
@@ -177,9 +199,10 @@ class PropietariosController:
         """Carga todos los propietarios en la tabla"""
         try:
             print("🔄 Cargando propietarios desde la base de datos...")
-            propietarios = self.db.obtener_propietarios_completos()
-            print(f"📊 {len(propietarios)} propietarios encontrados")
+            self.busqueda.invalidar()
+            propietarios = self.db.paginar_propietarios()
             self.llenar_tabla(propietarios)
+            print(f"📊 {propietarios.total_leido} propietarios en la primera página")
         except Exception as e:
             print(f"❌ Error al cargar propietarios: {e}")
             import traceback
@@ -192,141 +215,30 @@ class PropietariosController:
             return
 
         try:
-            self.tabla.setRowCount(0)
-
-            for row_number, propietario in enumerate(propietarios):
-                self.tabla.insertRow(row_number)
-                self.tabla.setRowHeight(row_number, 80)  # Altura mayor para las fotos
-                
-                # ID (oculto pero necesario para operaciones)
-                id_item = QtWidgets.QTableWidgetItem(str(propietario[0] if propietario[0] is not None else ""))
-                self.tabla.setItem(row_number, 0, id_item)
-                
-                # ✅ FOTO EN COLUMNA 1 (PRIMERA VISIBLE)
-                id_propietario = str(propietario[0] if propietario[0] else "")
-                self.mostrar_foto_en_tabla(row_number, 1, id_propietario)
-                
-                # Nombre (2)
-                nombre_item = QtWidgets.QTableWidgetItem(str(propietario[1] if propietario[1] else ""))
-                self.tabla.setItem(row_number, 2, nombre_item)
-                
-                # Teléfono (3)
-                telefono_item = QtWidgets.QTableWidgetItem(str(propietario[2] if propietario[2] else ""))
-                self.tabla.setItem(row_number, 3, telefono_item)
-                
-                # Correo (4)
-                correo_item = QtWidgets.QTableWidgetItem(str(propietario[3] if propietario[3] else ""))
-                self.tabla.setItem(row_number, 4, correo_item)
-                
-                # Dirección (5)
-                direccion_item = QtWidgets.QTableWidgetItem(str(propietario[4] if propietario[4] else ""))
-                self.tabla.setItem(row_number, 5, direccion_item)
-                
-                # PSG (6)
-                psg_item = QtWidgets.QTableWidgetItem(str(propietario[5] if propietario[5] else ""))
-                self.tabla.setItem(row_number, 6, psg_item)
-                
-                # UPP (7)
-                upp_item = QtWidgets.QTableWidgetItem(str(propietario[6] if propietario[6] else ""))
-                self.tabla.setItem(row_number, 7, upp_item)
-                
-                # RFC (8)
-                rfc_item = QtWidgets.QTableWidgetItem(str(propietario[7] if propietario[7] else ""))
-                self.tabla.setItem(row_number, 8, rfc_item)
-                
-                # ✅ OBSERVACIONES EN COLUMNA 9 - CLICKEABLE
-                observacion = str(propietario[8] if len(propietario) > 8 and propietario[8] is not None else "")
-                observacion_preview = observacion[:30] + "..." if len(observacion) > 30 else observacion
-                observacion_item = QtWidgets.QTableWidgetItem(observacion_preview)
-                
-                # ✅ GUARDAR OBSERVACIONES COMPLETAS para el doble clic
-                observacion_item.setData(QtCore.Qt.UserRole, observacion)
-                
-                # ✅ HACER QUE LA CELDA SEA CLICKEABLE SOLO SI HAY OBSERVACIONES
-                if observacion and observacion.strip():
-                    observacion_item.setForeground(QtGui.QColor('#2980b9'))
-                    observacion_item.setToolTip("Doble clic para ver observaciones completas")
-                    observacion_item.setFlags(observacion_item.flags() | QtCore.Qt.ItemIsEnabled)
-                else:
-                    observacion_item.setToolTip("Sin observaciones")
-                    observacion_item.setForeground(QtGui.QColor('#95a5a6'))
-                    
-                self.tabla.setItem(row_number, 9, observacion_item)
-                
-                # ✅ OPCIONES EN COLUMNA 10 CON BOTONES
-                self.agregar_botones_opciones(row_number, 10, id_propietario)
+            # ✅ EL MODELO GUARDA LAS TUPLAS TAL CUAL; LA VISTA SOLO PINTA LAS FILAS VISIBLES
+            # ✅ UN CURSOR PAGINADO SE LEE POR PÁGINAS CONFORME SE HACE SCROLL
+            if isinstance(propietarios, CursorPaginado):
+                self.modelo.establecer_cursor(propietarios)
+            else:
+                self.modelo.establecer_filas(propietarios)
 
             # Ocultar columna ID
             self.tabla.setColumnHidden(0, True)
             
-            print(f"✅ Tabla llenada con {len(propietarios)} registros")
+            print(f"✅ Tabla llenada con {self.modelo.rowCount()} registros")
 
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
             import traceback
             traceback.print_exc()
 
-    def mostrar_foto_en_tabla(self, row, column, id_propietario):
-        """Muestra la foto en pequeño directamente en la tabla usando el id"""
-        try:
-            foto_data = self.db.obtener_foto_propietario_por_id(id_propietario)
-            
-            if foto_data:
-                # Crear un pixmap desde los datos BLOB
-                pixmap = QtGui.QPixmap()
-                if pixmap.loadFromData(foto_data):
-                    # Escalar la imagen a un tamaño pequeño para la tabla (60x60)
-                    pixmap_escalado = pixmap.scaled(60, 60, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
-                    
-                    # Crear un QLabel para mostrar la imagen
-                    label_foto = QtWidgets.QLabel()
-                    label_foto.setPixmap(pixmap_escalado)
-                    label_foto.setAlignment(QtCore.Qt.AlignCenter)
-                    label_foto.setToolTip("Haz clic para ver la foto en tamaño completo")
-                    label_foto.setCursor(QtCore.Qt.PointingHandCursor)
-                    label_foto.setStyleSheet("""
-                        border: 2px solid #bdc3c7; 
-                        background-color: #ecf0f1;
-                        border-radius: 5px;
-                        padding: 2px;
-                    """)
-                    
-                    # Hacer que el label sea clickeable
-                    label_foto.mousePressEvent = lambda event, id=id_propietario: self.mostrar_foto_completa_por_id(id)
-                    
-                    self.tabla.setCellWidget(row, column, label_foto)
-                else:
-                    self.mostrar_placeholder_foto_por_id(row, column, id_propietario, "❌ Error carga")
-            else:
-                self.mostrar_placeholder_foto_por_id(row, column, id_propietario, "📷 Sin foto")
-                
-        except Exception as e:
-            print(f"❌ Error al mostrar foto en tabla: {e}")
-            self.mostrar_placeholder_foto_por_id(row, column, id_propietario, f"❌ Error: {str(e)}")
-
-    def mostrar_placeholder_foto_por_id(self, row, column, id_propietario, motivo="Sin foto"):
-        """Muestra un placeholder cuando no hay foto o hay error"""
-        try:
-            label_placeholder = QtWidgets.QLabel("👤")
-            label_placeholder.setAlignment(QtCore.Qt.AlignCenter)
-            label_placeholder.setStyleSheet("""
-                font-size: 24px; 
-                color: #95a5a6; 
-                border: 2px dashed #bdc3c7; 
-                background-color: #ecf0f1;
-                padding: 10px;
-                border-radius: 5px;
-            """)
-            label_placeholder.setToolTip(f"{motivo} - Haz clic para más información")
-            label_placeholder.setCursor(QtCore.Qt.PointingHandCursor)
-            
-            # Hacer clickeable para mostrar información de debug
-            label_placeholder.mousePressEvent = lambda event, id=id_propietario, msg=motivo: self.mostrar_info_foto_por_id(id, msg)
-            
-            self.tabla.setCellWidget(row, column, label_placeholder)
-            
-        except Exception as e:
-            print(f"❌ Error al mostrar placeholder: {e}")
+    def on_foto_clic(self, propietario):
+        """Clic en la miniatura: foto completa, o información si no tiene foto"""
+        id_propietario = str(propietario[0] if propietario[0] else "")
+        if len(propietario) > 9 and propietario[9]:
+            self.mostrar_foto_completa_por_id(id_propietario)
+        else:
+            self.mostrar_info_foto_por_id(id_propietario, "📷 Sin foto")
 
     def mostrar_info_foto_por_id(self, id_propietario, mensaje):
         """Muestra información de debug sobre la foto usando id"""
@@ -428,61 +340,6 @@ class PropietariosController:
                 f"Error al mostrar foto: {str(e)}"
             )
     
-    def agregar_botones_opciones(self, row, column, id_propietario):
-        """Agrega botones de editar y eliminar en la columna de opciones"""
-        try:
-            widget = QtWidgets.QWidget()
-            layout = QtWidgets.QHBoxLayout(widget)
-            layout.setContentsMargins(2, 2, 2, 2)
-            layout.setSpacing(4)
-            
-            # Botón Editar
-            btn_editar = QtWidgets.QPushButton("✏️")
-            btn_editar.setToolTip("Editar propietario")
-            btn_editar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #3498db; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-            """)
-            btn_editar.clicked.connect(lambda: self.editar_propietario(id_propietario))
-            
-            # Botón Eliminar
-            btn_eliminar = QtWidgets.QPushButton("🗑️")
-            btn_eliminar.setToolTip("Eliminar propietario")
-            btn_eliminar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #e74c3c; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 12px;
-                    min-width: 25px;
-                }
-                QPushButton:hover {
-                    background-color: #c0392b;
-                }
-            """)
-            btn_eliminar.clicked.connect(lambda: self.eliminar_propietario(id_propietario))
-            
-            layout.addWidget(btn_editar)
-            layout.addWidget(btn_eliminar)
-            layout.addStretch()
-            
-            self.tabla.setCellWidget(row, column, widget)
-            
-        except Exception as e:
-            print(f"❌ Error al agregar botones: {e}")
-
     def mostrar_observaciones_completas(self, id_propietario, observaciones):
         """Muestra las observaciones completas en un diálogo"""
         try:
@@ -675,10 +532,10 @@ class PropietariosController:
             if self.buscador:
                 texto = self.buscador.text().strip()
                 if texto:
-                    propietarios = self.db.buscar_propietarios_en_todos_los_campos(texto)
+                    self.busqueda.solicitar(texto)
                 else:
-                    propietarios = self.db.obtener_propietarios_completos()
-                self.llenar_tabla(propietarios)
+                    self.busqueda.cancelar()
+                    self.llenar_tabla(self.db.paginar_propietarios())
         except Exception as e:
             print(f"❌ Error al buscar propietarios: {e}")
 
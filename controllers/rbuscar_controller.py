@@ -1,12 +1,12 @@
 # rbuscar_controller.py - VERSIÓN CORREGIDA
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database
 import os
 
 class RbuscarController:
     def __init__(self, rbuscar_widget):
         self.rbuscar_widget = rbuscar_widget
-        self.db = Database()
+        self.db = obtener_database()
         self.setup_connections()
         print("✅ RbuscarController inicializado")
 
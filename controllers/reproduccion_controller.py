@@ -1,14 +1,18 @@
 # reproduccion_controller.py - VERSIÓN COMPLETA CORREGIDA
-from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from PyQt5 import QtCore, QtWidgets
+from database import obtener_database, CursorPaginado
+from tabla_modelo import ModeloTabla, Columna, FECHA, OBSERVACIONES, reemplazar_tabla
 from datetime import datetime
+from busqueda import BusquedaDiferida
 import os
 import tempfile
 
 class ReproduccionController:
     def __init__(self, reproduccion_widget):
         self.reproduccion_widget = reproduccion_widget
-        self.db = Database()
+        self.db = obtener_database()
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.consultar_registros, self.llenar_tabla, parent=self.reproduccion_widget)
         self.setup_connections()
         self.configurar_tabla()
         print("✅ ReproduccionController inicializado")
@@ -58,6 +62,18 @@ class ReproduccionController:
             return
             
         try:
+            # Columnas de la tabla de reproducción (mismo orden que las columnas de treprod)
+            columnas = [
+                Columna("ID", 0), Columna("Arete Animal", 1), Columna("Cargada", 2),
+                Columna("Cant. Partos", 3), Columna("Fecha Servicio", 4, FECHA), Columna("Fecha Parto", 5, FECHA),
+                Columna("Nuevo Servicio", 6, FECHA), Columna("Técnica", 7),
+                Columna("Observaciones", 8, OBSERVACIONES, largo_preview=50)
+            ]
+            
+            # ✅ GRID MODELO/VISTA: LA VISTA SOLO PINTA LAS FILAS VISIBLES
+            self.modelo = ModeloTabla(columnas)
+            self.tableWidget = reemplazar_tabla(self.tableWidget, self.modelo)
+            
             # Configurar tamaños de columnas para la tabla de reproducción
             self.tableWidget.setColumnWidth(0, 80)   # ID
             self.tableWidget.setColumnWidth(1, 100)  # Arete Animal
@@ -76,22 +92,28 @@ class ReproduccionController:
             self.tableWidget.verticalHeader().setVisible(False)
             
             # Conexión para doble clic en observaciones
-            self.tableWidget.cellDoubleClicked.connect(self.on_cell_double_clicked)
+            try:
+                self.tableWidget.doubleClicked.disconnect()
+            except:
+                pass
+            self.tableWidget.doubleClicked.connect(
+                lambda index: self.on_cell_double_clicked(index.row(), index.column())
+            )
             
             # Estilo para la tabla
             self.tableWidget.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     gridline-color: #d0d0d0;
                     background-color: white;
                     alternate-background-color: #f8f8f8;
                     border: 1px solid #d0d0d0;
                     border-radius: 4px;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 6px;
                     border-bottom: 1px solid #e0e0e0;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #e74c3c;
                     color: white;
                 }
@@ -117,9 +139,8 @@ class ReproduccionController:
             return
             
         if column == 8:  # Columna de Observaciones (índice 8)
-            observacion_item = self.tableWidget.item(row, 8)
-            if observacion_item:
-                observaciones_completas = observacion_item.data(QtCore.Qt.UserRole)
+            if self.modelo.fila(row) is not None:
+                observaciones_completas = self.modelo.texto(row, 8)
                 if observaciones_completas and observaciones_completas.strip():
                     self.dialogo_abierto = True
                     self.mostrar_observaciones_completas(observaciones_completas)
@@ -128,26 +149,25 @@ class ReproduccionController:
         """Carga todos los registros de reproducción en la tabla"""
         try:
             print("🔄 Cargando registros de reproducción desde la base de datos...")
+            self.busqueda.invalidar()
             
-            # Obtener todos los registros de reproducción
+            # Obtener todos los registros de reproducción (por páginas)
             registros = self.obtener_todos_los_registros_reproduccion()
-            print(f"📊 {len(registros)} registros de reproducción encontrados")
+            self.llenar_tabla(registros)
+            print(f"📊 {self.modelo.rowCount()} registros de reproducción en la primera página")
             
-            if len(registros) == 0:
+            if self.modelo.rowCount() == 0:
                 print("ℹ️ No se encontraron registros de reproducción en la base de datos")
-            
-            self.llenar_tabla(registros)
         except Exception as e:
             print(f"❌ Error al cargar registros de reproducción: {e}")
             import traceback
             traceback.print_exc()
     
     def obtener_todos_los_registros_reproduccion(self):
-        """Obtiene todos los registros de reproducción de la base de datos"""
+        """Obtiene un cursor paginado sobre todos los registros de reproducción"""
         try:
-            # Obtener registros de la tabla treprod
-            registros = self.db.obtener_todos_registros_reproduccion()
-            return registros
+            # Leer la tabla treprod por páginas
+            return self.db.paginar_registros_reproduccion()
         except Exception as e:
             print(f"❌ Error obteniendo registros de reproducción: {e}")
             return []
@@ -159,86 +179,14 @@ class ReproduccionController:
             return
 
         try:
-            # Limpiar la tabla completamente
-            self.tableWidget.setRowCount(0)
-            
-            print(f"🔄 Llenando tabla con {len(registros)} registros...")
-
-            for row_number, registro in enumerate(registros):
-                # Insertar nueva fila
-                self.tableWidget.insertRow(row_number)
-                
-                # Debug: mostrar qué registro se está procesando
-                print(f"📝 Procesando registro {row_number}: {registro}")
-                
-                # ID (0) - idreprod en posición 0
-                id_reproduccion = registro[0] if len(registro) > 0 and registro[0] is not None else ""
-                id_item = QtWidgets.QTableWidgetItem(str(id_reproduccion))
-                self.tableWidget.setItem(row_number, 0, id_item)
-                
-                # Arete Animal (1) - areteanimal en posición 1
-                arete = registro[1] if len(registro) > 1 and registro[1] is not None else ""
-                arete_item = QtWidgets.QTableWidgetItem(str(arete))
-                self.tableWidget.setItem(row_number, 1, arete_item)
-                
-                # Cargada (2) - cargada en posición 2
-                cargada = registro[2] if len(registro) > 2 and registro[2] is not None else ""
-                cargada_item = QtWidgets.QTableWidgetItem(str(cargada))
-                self.tableWidget.setItem(row_number, 2, cargada_item)
-                
-                # Cantidad de Partos (3) - cantpartos en posición 3
-                cant_partos = registro[3] if len(registro) > 3 and registro[3] is not None else ""
-                cant_partos_item = QtWidgets.QTableWidgetItem(str(cant_partos))
-                self.tableWidget.setItem(row_number, 3, cant_partos_item)
-                
-                # Fecha Servicio Actual (4) - fservicioactual en posición 4
-                fecha_servicio = registro[4] if len(registro) > 4 and registro[4] is not None else ""
-                fecha_servicio_item = QtWidgets.QTableWidgetItem(str(fecha_servicio))
-                self.tableWidget.setItem(row_number, 4, fecha_servicio_item)
-                
-                # Fecha Aproximada de Parto (5) - faproxparto en posición 5
-                fecha_parto = registro[5] if len(registro) > 5 and registro[5] is not None else ""
-                fecha_parto_item = QtWidgets.QTableWidgetItem(str(fecha_parto))
-                self.tableWidget.setItem(row_number, 5, fecha_parto_item)
-                
-                # Fecha Nuevo Servicio (6) - fnuevoservicio en posición 6
-                fecha_nuevo_servicio = registro[6] if len(registro) > 6 and registro[6] is not None else ""
-                fecha_nuevo_servicio_item = QtWidgets.QTableWidgetItem(str(fecha_nuevo_servicio))
-                self.tableWidget.setItem(row_number, 6, fecha_nuevo_servicio_item)
-                
-                # Técnica (7) - tecnica en posición 7
-                tecnica = registro[7] if len(registro) > 7 and registro[7] is not None else ""
-                tecnica_item = QtWidgets.QTableWidgetItem(str(tecnica))
-                self.tableWidget.setItem(row_number, 7, tecnica_item)
-                
-                # Observaciones (8) - observacion en posición 8 - CORREGIDO
-                observacion = registro[8] if len(registro) > 8 and registro[8] is not None else ""
-                
-                # Manejar correctamente el caso cuando observacion es None o vacío
-                if observacion and observacion.strip():
-                    observacion_preview = observacion[:50] + "..." if len(observacion) > 50 else observacion
-                else:
-                    observacion_preview = ""  # Cadena vacía en lugar de None
-                    
-                observacion_item = QtWidgets.QTableWidgetItem(observacion_preview)
-                
-                # Guardar observaciones completas para el doble clic
-                observacion_item.setData(QtCore.Qt.UserRole, observacion)
-                
-                # Hacer que la celda sea clickeable solo si hay observaciones
-                if observacion and observacion.strip():
-                    observacion_item.setForeground(QtGui.QColor('#2980b9'))
-                    observacion_item.setToolTip("Doble clic para ver observaciones completas")
-                else:
-                    observacion_item.setToolTip("Sin observaciones")
-                    observacion_item.setForeground(QtGui.QColor('#95a5a6'))
-                    
-                self.tableWidget.setItem(row_number, 8, observacion_item)
+            # ✅ EL MODELO GUARDA LAS TUPLAS TAL CUAL; LA VISTA SOLO PINTA LAS FILAS VISIBLES
+            # ✅ UN CURSOR PAGINADO SE LEE POR PÁGINAS CONFORME SE HACE SCROLL
+            if isinstance(registros, CursorPaginado):
+                self.modelo.establecer_cursor(registros)
+            else:
+                self.modelo.establecer_filas(registros)
 
-            print(f"✅ Tabla llenada correctamente con {len(registros)} registros de reproducción")
-            
-            # Debug: verificar cuántas filas tiene la tabla
-            print(f"🔍 Tabla tiene {self.tableWidget.rowCount()} filas después de llenar")
+            print(f"✅ Tabla llenada correctamente con {self.modelo.rowCount()} registros de reproducción")
 
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
@@ -320,63 +268,50 @@ class ReproduccionController:
     def buscar_registros_reproduccion(self):
         """Busca registros de reproducción según el texto en el buscador general, COMBINADO con el filtro de arete actual"""
         try:
-            if self.lineEdit:
-                texto = self.lineEdit.text().strip()
-                arete_actual = self.lineEdit_5.text().strip() if self.lineEdit_5 else ""
-                
-                print(f"🔍 Buscando registros de reproducción: '{texto}' para arete: '{arete_actual}'")
-                
-                if arete_actual:
-                    # Si hay un arete específico seleccionado, buscar SOLO en los registros de ese arete
-                    if texto:
-                        registros = self.db.buscar_registros_reproduccion_por_arete_y_texto(arete_actual, texto)
-                        print(f"📊 Búsqueda combinada: {len(registros)} registros encontrados para arete '{arete_actual}' con texto '{texto}'")
-                    else:
-                        # Si no hay texto de búsqueda, mostrar todos los registros del arete
-                        registros = self.db.obtener_registros_reproduccion_por_arete(arete_actual)
-                        print(f"📊 Mostrando todos los {len(registros)} registros del arete '{arete_actual}'")
-                else:
-                    # Si no hay arete específico, búsqueda general en todos los registros
-                    if texto:
-                        registros = self.db.buscar_registros_reproduccion_en_todos_los_campos(texto)
-                    else:
-                        registros = self.obtener_todos_los_registros_reproduccion()
-                        
-                self.llenar_tabla(registros)
+            texto = self.lineEdit.text().strip() if self.lineEdit else ""
+            arete_actual = self.lineEdit_5.text().strip() if self.lineEdit_5 else ""
+
+            print(f"🔍 Buscando registros de reproducción: '{texto}' para arete: '{arete_actual}'")
+
+            if texto or arete_actual:
+                self.busqueda.solicitar((arete_actual, texto))
+            else:
+                self.busqueda.cancelar()
+                self.llenar_tabla(self.obtener_todos_los_registros_reproduccion())
         except Exception as e:
             print(f"❌ Error al buscar registros de reproducción: {e}")
             import traceback
             traceback.print_exc()
 
+    def consultar_registros(self, filtro):
+        """Consulta de la búsqueda (arete, texto); se ejecuta en un hilo del pool"""
+        arete, texto = filtro
+        if arete and texto:
+            # Si hay un arete específico seleccionado, buscar SOLO en los registros de ese arete
+            registros = self.db.buscar_registros_reproduccion_por_arete_y_texto(arete, texto)
+            print(f"📊 Búsqueda combinada: {len(registros)} registros encontrados para arete '{arete}' con texto '{texto}'")
+        elif arete:
+            registros = self.db.obtener_registros_reproduccion_por_arete(arete)
+            print(f"📊 {len(registros)} registros encontrados para arete: '{arete}'")
+        else:
+            registros = self.db.buscar_registros_reproduccion_en_todos_los_campos(texto)
+        return registros
+
     def filtrar_por_arete(self):
         """Filtra los registros por el arete del animal - MEJORADO"""
         try:
             if self.lineEdit_5:
-                arete = self.lineEdit_5.text().strip()
-                print(f"🔍 Filtrando por arete: '{arete}'")
-                
-                # Limpiar el buscador general cuando se filtra por arete
-                if self.lineEdit:
+                print(f"🔍 Filtrando por arete: '{self.lineEdit_5.text().strip()}'")
+
+                # Limpiar el buscador general cuando se filtra por arete (sin disparar otra búsqueda)
+                if self.lineEdit and self.lineEdit.text():
+                    self.lineEdit.blockSignals(True)
                     self.lineEdit.clear()
+                    self.lineEdit.blockSignals(False)
                     print("🧹 Buscador general limpiado")
-                
-                if arete:
-                    registros = self.db.obtener_registros_reproduccion_por_arete(arete)
-                    print(f"📊 {len(registros)} registros encontrados para arete: '{arete}'")
-                    
-                    if registros:
-                        for i, reg in enumerate(registros[:3]):
-                            arete_en_registro = reg[1] if len(reg) > 1 and reg[1] is not None else "N/A"
-                            print(f"   Registro {i+1} - Arete en BD: '{arete_en_registro}'")
-                    else:
-                        print(f"⚠️ No se encontraron registros para el arete: '{arete}'")
-                        
-                    self.llenar_tabla(registros)
-                else:
-                    # Si no hay arete, mostrar todos los registros
-                    registros = self.obtener_todos_los_registros_reproduccion()
-                    self.llenar_tabla(registros)
-                    
+
+                self.buscar_registros_reproduccion()
+
         except Exception as e:
             print(f"❌ Error al filtrar por arete: {e}")
             import traceback
@@ -387,8 +322,9 @@ class ReproduccionController:
         try:
             print("📄 Exportando registros de reproducción a PDF...")
             
-            # Obtener los registros actualmente mostrados
-            row_count = self.tableWidget.rowCount()
+            # Obtener los registros actualmente mostrados (incluidas las páginas aún no leídas)
+            self.modelo.cargar_todo()
+            row_count = self.modelo.rowCount()
             if row_count == 0:
                 self.mostrar_informacion("No hay datos para exportar")
                 return
@@ -435,23 +371,19 @@ class ReproduccionController:
                 
                 # Encabezados
                 encabezados = []
-                for col in range(self.tableWidget.columnCount()):
-                    encabezados.append(self.tableWidget.horizontalHeaderItem(col).text())
+                for col in range(self.modelo.columnCount()):
+                    encabezados.append(self.modelo.headerData(col, QtCore.Qt.Horizontal))
                 datos.append(encabezados)
                 
                 # Datos de las filas
                 for row in range(row_count):
                     fila = []
-                    for col in range(self.tableWidget.columnCount()):
-                        item = self.tableWidget.item(row, col)
-                        if item is not None:
-                            texto = item.text()
-                            # Acortar observaciones largas para el PDF
-                            if col == 8 and len(texto) > 50:  # Observaciones en columna 8
-                                texto = texto[:50] + "..."
-                            fila.append(texto)
-                        else:
-                            fila.append("")
+                    for col in range(self.modelo.columnCount()):
+                        texto = self.modelo.data(self.modelo.index(row, col)) or ""
+                        # Acortar observaciones largas para el PDF
+                        if col == 8 and len(texto) > 50:  # Observaciones en columna 8
+                            texto = texto[:50] + "..."
+                        fila.append(texto)
                     datos.append(fila)
                 
                 # Crear tabla en PDF
@@ -1,14 +1,18 @@
 # salud_controller.py - VERSIÓN CON CALENDARIOS
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database, CursorPaginado
+from tabla_modelo import ModeloTabla, DelegadoAcciones, Columna, Accion, FECHA, OBSERVACIONES, ACCIONES, reemplazar_tabla
 from datetime import datetime
+from busqueda import BusquedaDiferida
 import os
 import tempfile
 
 class SaludController:
     def __init__(self, salud_widget):
         self.salud_widget = salud_widget
-        self.db = Database()
+        self.db = obtener_database()
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.consultar_registros, self.llenar_tabla, parent=self.salud_widget)
         self.setup_connections()
         self.configurar_tabla()
         self.configurar_fechas()
@@ -137,17 +141,30 @@ class SaludController:
             
         try:
             # Configurar encabezados de columnas según lo requerido
+            # (posiciones del registro de tsalud: 3 nomvet, 4 procedimiento, 5 medprev,
+            #  6 condicionsalud, 7 fecharev, 8 observacionsalud, 9 hash del archivo en tarchivos)
             headers = [
-                "Fecha de Revisión",
-                "Nombre del Veterinario", 
-                "Procedimiento",
-                "Medicina Preventiva/Manejo",
-                "Condición de Salud",
-                "Observaciones",
-                "Imagen del Procedimiento"
+                Columna("Fecha de Revisión", 7, FECHA),
+                Columna("Nombre del Veterinario", 3),
+                Columna("Procedimiento", 4),
+                Columna("Medicina Preventiva/Manejo", 5),
+                Columna("Condición de Salud", 6),
+                Columna("Observaciones", 8, OBSERVACIONES, largo_preview=50),
+                Columna("Imagen del Procedimiento", tipo=ACCIONES)
             ]
-            self.tableWidget.setColumnCount(len(headers))
-            self.tableWidget.setHorizontalHeaderLabels(headers)
+            
+            # ✅ GRID MODELO/VISTA: EL BOTÓN DE IMAGEN SE PINTA, NO HAY WIDGETS POR FILA
+            self.modelo = ModeloTabla(headers)
+            self.tableWidget = reemplazar_tabla(self.tableWidget, self.modelo)
+            
+            # Verificar si hay imagen disponible (hash del archivo en posición 9)
+            tiene_imagen = lambda registro: len(registro) > 9 and registro[9] is not None
+            self.delegado_imagen = DelegadoAcciones([
+                Accion(lambda registro: "🖼️ Ver" if tiene_imagen(registro) else "📷 No",
+                       "#3498db", "#2980b9", "Ver imagen del procedimiento",
+                       self.mostrar_imagen_procedimiento, habilitada=tiene_imagen),
+            ], tamano_fuente=10, ancho_minimo=50, parent=self.tableWidget)
+            self.tableWidget.setItemDelegateForColumn(6, self.delegado_imagen)
             
             # Configurar tamaños de columnas según el diseño UI
             self.tableWidget.setColumnWidth(0, 120)  # Fecha de revisión
@@ -167,25 +184,27 @@ class SaludController:
             # Conexión para doble clic en observaciones - SOLO UNA VEZ
             # Desconectar primero para evitar múltiples conexiones
             try:
-                self.tableWidget.cellDoubleClicked.disconnect()
+                self.tableWidget.doubleClicked.disconnect()
             except:
                 pass
-            self.tableWidget.cellDoubleClicked.connect(self.on_cell_double_clicked)
+            self.tableWidget.doubleClicked.connect(
+                lambda index: self.on_cell_double_clicked(index.row(), index.column())
+            )
             
             # Estilo para la tabla
             self.tableWidget.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     gridline-color: #d0d0d0;
                     background-color: white;
                     alternate-background-color: #f8f8f8;
                     border: 1px solid #d0d0d0;
                     border-radius: 4px;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 6px;
                     border-bottom: 1px solid #e0e0e0;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #e74c3c;
                     color: white;
                 }
@@ -211,9 +230,8 @@ class SaludController:
             return
             
         if column == 5:  # Columna de Observaciones (ahora en posición 5)
-            observacion_item = self.tableWidget.item(row, 5)
-            if observacion_item:
-                observaciones_completas = observacion_item.data(QtCore.Qt.UserRole)
+            if self.modelo.fila(row) is not None:
+                observaciones_completas = self.modelo.texto(row, 5)
                 if observaciones_completas and observaciones_completas.strip():
                     self.dialogo_abierto = True
                     self.mostrar_observaciones_completas(observaciones_completas)
@@ -223,31 +241,24 @@ class SaludController:
         """Carga todos los registros de salud en la tabla"""
         try:
             print("🔄 Cargando registros de salud desde la base de datos...")
+            self.busqueda.invalidar()
             
-            # Obtener todos los registros de salud
+            # Obtener todos los registros de salud (por páginas)
             registros = self.obtener_todos_los_registros_salud()
-            print(f"📊 {len(registros)} registros de salud encontrados")
+            self.llenar_tabla(registros)
+            print(f"📊 {self.modelo.rowCount()} registros de salud en la primera página")
             
-            if len(registros) == 0:
+            if self.modelo.rowCount() == 0:
                 print("ℹ️ No se encontraron registros de salud en la base de datos")
-            
-            self.llenar_tabla(registros)
         except Exception as e:
             print(f"❌ Error al cargar registros de salud: {e}")
             import traceback
             traceback.print_exc()
     
     def obtener_todos_los_registros_salud(self):
-        """Obtiene todos los registros de salud de la base de datos"""
+        """Obtiene un cursor paginado sobre todos los registros de salud"""
         try:
-            # Verificar si la tabla existe primero
-            tablas = self.db.listar_tablas()
-            if 'tsalud' not in tablas:
-                print("❌ La tabla 'tsalud' no existe en la base de datos")
-                return []
-                
-            registros = self.db.obtener_todos_registros_salud()
-            return registros
+            return self.db.paginar_registros_salud()
         except Exception as e:
             print(f"❌ Error obteniendo registros de salud: {e}")
             return []
@@ -259,106 +270,25 @@ class SaludController:
             return
 
         try:
-            self.tableWidget.setRowCount(0)
-
-            for row_number, registro in enumerate(registros):
-                self.tableWidget.insertRow(row_number)
-                
-                # Fecha de revisión (0) - fecharev en posición 7
-                fecha_revision = registro[7] if len(registro) > 7 else ""
-                fecha_item = QtWidgets.QTableWidgetItem(str(fecha_revision if fecha_revision else ""))
-                self.tableWidget.setItem(row_number, 0, fecha_item)
-                
-                # Nombre del Veterinario (1) - nomvet en posición 3
-                veterinario = registro[3] if len(registro) > 3 else ""
-                veterinario_item = QtWidgets.QTableWidgetItem(str(veterinario if veterinario else ""))
-                self.tableWidget.setItem(row_number, 1, veterinario_item)
-                
-                # Procedimiento (2) - procedimiento en posición 4
-                procedimiento = registro[4] if len(registro) > 4 else ""
-                procedimiento_item = QtWidgets.QTableWidgetItem(str(procedimiento if procedimiento else ""))
-                self.tableWidget.setItem(row_number, 2, procedimiento_item)
-                
-                # Medicina Preventiva/Manejo (3) - SOLO medprev (posición 5)
-                medicina = registro[5] if len(registro) > 5 else ""
-                medicina_item = QtWidgets.QTableWidgetItem(str(medicina if medicina else ""))
-                self.tableWidget.setItem(row_number, 3, medicina_item)
-                
-                # Condición de salud (4) - condicionsalud en posición 6
-                condicion = registro[6] if len(registro) > 6 else ""
-                condicion_item = QtWidgets.QTableWidgetItem(str(condicion if condicion else ""))
-                self.tableWidget.setItem(row_number, 4, condicion_item)
-                
-                # Observaciones (5) - observacionsalud en posición 8
-                observacion = registro[8] if len(registro) > 8 else ""
-                observacion_preview = observacion[:50] + "..." if len(observacion) > 50 else observacion
-                observacion_item = QtWidgets.QTableWidgetItem(observacion_preview)
-                
-                # Guardar observaciones completas para el doble clic
-                observacion_item.setData(QtCore.Qt.UserRole, observacion)
-                
-                # Hacer que la celda sea clickeable solo si hay observaciones
-                if observacion and observacion.strip():
-                    observacion_item.setForeground(QtGui.QColor('#2980b9'))
-                    observacion_item.setToolTip("Doble clic para ver observaciones completas")
-                else:
-                    observacion_item.setToolTip("Sin observaciones")
-                    observacion_item.setForeground(QtGui.QColor('#95a5a6'))
-                    
-                self.tableWidget.setItem(row_number, 5, observacion_item)
-                
-                # Imagen del procedimiento (6) - archivo en posición 9
-                self.agregar_boton_imagen(row_number, 6, registro)
+            # ✅ EL MODELO GUARDA LAS TUPLAS TAL CUAL; LA VISTA SOLO PINTA LAS FILAS VISIBLES
+            # ✅ UN CURSOR PAGINADO SE LEE POR PÁGINAS CONFORME SE HACE SCROLL
+            if isinstance(registros, CursorPaginado):
+                self.modelo.establecer_cursor(registros)
+            else:
+                self.modelo.establecer_filas(registros)
 
-            print(f"✅ Tabla llenada con {len(registros)} registros de salud")
+            print(f"✅ Tabla llenada con {self.modelo.rowCount()} registros de salud")
 
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
             import traceback
             traceback.print_exc()
 
-    def agregar_boton_imagen(self, row, column, registro):
-        """Agrega un botón para ver la imagen del procedimiento"""
-        try:
-            btn_imagen = QtWidgets.QPushButton("🖼️ Ver")
-            btn_imagen.setToolTip("Ver imagen del procedimiento")
-            btn_imagen.setStyleSheet("""
-                QPushButton { 
-                    background-color: #3498db; 
-                    color: white; 
-                    border: none; 
-                    padding: 4px 8px; 
-                    border-radius: 3px;
-                    font-size: 10px;
-                    min-width: 50px;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-                QPushButton:disabled {
-                    background-color: #bdc3c7;
-                    color: #7f8c8d;
-                }
-            """)
-            
-            # Verificar si hay imagen disponible (archivo en posición 9)
-            tiene_imagen = len(registro) > 9 and registro[9] is not None
-            if not tiene_imagen:
-                btn_imagen.setText("📷 No")
-                btn_imagen.setEnabled(False)
-            else:
-                btn_imagen.clicked.connect(lambda checked, r=registro: self.mostrar_imagen_procedimiento(r))
-            
-            self.tableWidget.setCellWidget(row, column, btn_imagen)
-            
-        except Exception as e:
-            print(f"❌ Error al agregar botón de imagen: {e}")
-
     def mostrar_imagen_procedimiento(self, registro):
         """Muestra la imagen del procedimiento en tamaño completo"""
         try:
-            # Obtener datos de la imagen (archivo en posición 9)
-            archivo_data = registro[9] if len(registro) > 9 else None
+            # ✅ LA FILA SOLO TRAE EL HASH (POSICIÓN 9); LOS BYTES SE LEEN AL ABRIR LA IMAGEN
+            archivo_data = self.db.obtener_archivo(registro[9]) if len(registro) > 9 else None
             
             if archivo_data:
                 # Crear un pixmap desde los datos BLOB
@@ -486,63 +416,50 @@ class SaludController:
     def buscar_registros_salud(self):
         """Busca registros de salud según el texto en el buscador general, COMBINADO con el filtro de arete actual"""
         try:
-            if self.lineEdit:
-                texto = self.lineEdit.text().strip()
-                arete_actual = self.lineEdit_5.text().strip() if self.lineEdit_5 else ""
-            
-                print(f"🔍 Buscando registros de salud: '{texto}' para arete: '{arete_actual}'")
-            
-                if arete_actual:
-                    # Si hay un arete específico seleccionado, buscar SOLO en los registros de ese arete
-                    if texto:
-                        registros = self.db.buscar_registros_salud_por_arete_y_texto(arete_actual, texto)
-                        print(f"📊 Búsqueda combinada: {len(registros)} registros encontrados para arete '{arete_actual}' con texto '{texto}'")
-                    else:
-                        # Si no hay texto de búsqueda, mostrar todos los registros del arete
-                        registros = self.db.obtener_registros_salud_por_arete(arete_actual)
-                        print(f"📊 Mostrando todos los {len(registros)} registros del arete '{arete_actual}'")
-                else:
-                    # Si no hay arete específico, búsqueda general en todos los registros
-                    if texto:
-                        registros = self.db.buscar_registros_salud_en_todos_los_campos(texto)
-                    else:
-                        registros = self.obtener_todos_los_registros_salud()
-                    
-                self.llenar_tabla(registros)
+            texto = self.lineEdit.text().strip() if self.lineEdit else ""
+            arete_actual = self.lineEdit_5.text().strip() if self.lineEdit_5 else ""
+
+            print(f"🔍 Buscando registros de salud: '{texto}' para arete: '{arete_actual}'")
+
+            if texto or arete_actual:
+                self.busqueda.solicitar((arete_actual, texto))
+            else:
+                self.busqueda.cancelar()
+                self.llenar_tabla(self.obtener_todos_los_registros_salud())
         except Exception as e:
             print(f"❌ Error al buscar registros de salud: {e}")
             import traceback
             traceback.print_exc()
 
+    def consultar_registros(self, filtro):
+        """Consulta de la búsqueda (arete, texto); se ejecuta en un hilo del pool"""
+        arete, texto = filtro
+        if arete and texto:
+            # Si hay un arete específico seleccionado, buscar SOLO en los registros de ese arete
+            registros = self.db.buscar_registros_salud_por_arete_y_texto(arete, texto)
+            print(f"📊 Búsqueda combinada: {len(registros)} registros encontrados para arete '{arete}' con texto '{texto}'")
+        elif arete:
+            registros = self.db.obtener_registros_salud_por_arete(arete)
+            print(f"📊 {len(registros)} registros encontrados para arete: '{arete}'")
+        else:
+            registros = self.db.buscar_registros_salud_en_todos_los_campos(texto)
+        return registros
+
     def filtrar_por_arete(self):
         """Filtra los registros por el arete del animal - MEJORADO"""
         try:
             if self.lineEdit_5:
-                arete = self.lineEdit_5.text().strip()
-                print(f"🔍 Filtrando por arete: '{arete}'")
-            
-                # Limpiar el buscador general cuando se filtra por arete
-                if self.lineEdit:
+                print(f"🔍 Filtrando por arete: '{self.lineEdit_5.text().strip()}'")
+
+                # Limpiar el buscador general cuando se filtra por arete (sin disparar otra búsqueda)
+                if self.lineEdit and self.lineEdit.text():
+                    self.lineEdit.blockSignals(True)
                     self.lineEdit.clear()
+                    self.lineEdit.blockSignals(False)
                     print("🧹 Buscador general limpiado")
-            
-                if arete:
-                    registros = self.db.obtener_registros_salud_por_arete(arete)
-                    print(f"📊 {len(registros)} registros encontrados para arete: '{arete}'")
-                
-                    if registros:
-                        for i, reg in enumerate(registros[:3]):
-                            arete_en_registro = reg[1] if len(reg) > 1 else "N/A"
-                            print(f"   Registro {i+1} - Arete en BD: '{arete_en_registro}'")
-                    else:
-                        print(f"⚠️ No se encontraron registros para el arete: '{arete}'")
-                    
-                    self.llenar_tabla(registros)
-                else:
-                    # Si no hay arete, mostrar todos los registros
-                    registros = self.obtener_todos_los_registros_salud()
-                    self.llenar_tabla(registros)
-                
+
+                self.buscar_registros_salud()
+
         except Exception as e:
             print(f"❌ Error al filtrar por arete: {e}")
             import traceback
@@ -552,6 +469,9 @@ class SaludController:
         """Filtra los registros por rango de fechas - CORREGIDO"""
         try:
             if self.dateEdit and self.dateEdit_2:
+            # Una búsqueda por texto aún pendiente no debe reemplazar este filtro
+                self.busqueda.cancelar()
+
             # Obtener fechas en formato QDate
                 fecha_inicio_qdate = self.dateEdit.date()
                 fecha_fin_qdate = self.dateEdit_2.date()
@@ -594,8 +514,9 @@ class SaludController:
         try:
             print("📄 Exportando registros de salud a PDF...")
             
-            # Obtener los registros actualmente mostrados
-            row_count = self.tableWidget.rowCount()
+            # Obtener los registros actualmente mostrados (incluidas las páginas aún no leídas)
+            self.modelo.cargar_todo()
+            row_count = self.modelo.rowCount()
             if row_count == 0:
                 self.mostrar_informacion("No hay datos para exportar")
                 return
@@ -644,27 +565,19 @@ class SaludController:
                 
                 # Encabezados
                 encabezados = []
-                for col in range(self.tableWidget.columnCount()):
-                    encabezados.append(self.tableWidget.horizontalHeaderItem(col).text())
+                for col in range(self.modelo.columnCount()):
+                    encabezados.append(self.modelo.headerData(col, QtCore.Qt.Horizontal))
                 datos.append(encabezados)
                 
                 # Datos de las filas
                 for row in range(row_count):
                     fila = []
-                    for col in range(self.tableWidget.columnCount()):
-                        item = self.tableWidget.item(row, col)
-                        if item is not None:
-                            texto = item.text()
-                            # Acortar observaciones largas para el PDF
-                            if col == 5 and len(texto) > 100:  # Observaciones en columna 5
-                                texto = texto[:100] + "..."
-                            fila.append(texto)
-                        else:
-                            widget = self.tableWidget.cellWidget(row, col)
-                            if widget and isinstance(widget, QtWidgets.QPushButton):
-                                fila.append(widget.text())
-                            else:
-                                fila.append("")
+                    for col in range(self.modelo.columnCount()):
+                        texto = self.modelo.data(self.modelo.index(row, col)) or self.modelo.texto(row, col)
+                        # Acortar observaciones largas para el PDF
+                        if col == 5 and len(texto) > 100:  # Observaciones en columna 5
+                            texto = texto[:100] + "..."
+                        fila.append(texto)
                     datos.append(fila)
                 
                 # Crear tabla en PDF
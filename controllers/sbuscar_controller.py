@@ -1,12 +1,12 @@
 # sbuscar_controller.py (modificado)
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database
 import os
 
 class SbuscarController:
     def __init__(self, sbuscar_widget):
         self.sbuscar_widget = sbuscar_widget
-        self.db = Database()
+        self.db = obtener_database()
         self.setup_connections()
         print("✅ SbuscarController inicializado")
 
@@ -39,7 +39,8 @@ from controllers.seguridad_controller import SeguridadController
 from controllers.salud_controller import SaludController
 from controllers.reproduccion_controller import ReproduccionController
 
-from database import Database
+from database import obtener_database, cerrar_conexiones
+from tareas import ProgramadorRespaldos
 
 def cargar_estilos_sidebar(window):
     """Cargar estilos SOLO para el sidebar"""
@@ -79,6 +80,10 @@ class MainWindow(QMainWindow):
         # CONECTAR SEÑALES
         self.connect_signals()
         
+        # ✅ COPIAS DE SEGURIDAD AUTOMÁTICAS MIENTRAS LA APLICACIÓN ESTÉ ABIERTA
+        self.programador_respaldos = ProgramadorRespaldos(self)
+        self.programador_respaldos.iniciar()
+        
         print(f"✅ Sidebar inicializado - Página actual: {self.ui.stackedWidget.currentIndex()}")
         print(f"👤 Usuario en sidebar: {self.usuario_actual}")
     
@@ -206,7 +211,7 @@ class MainWindow(QMainWindow):
             # ✅ CREAR CONTROLADOR DE BITÁCORA CON USUARIO ACTUAL
             self.bitacora_controller = BitacoraController(
                 ui=self.bitacora_ui,
-                db=Database(),
+                db=obtener_database(),
                 usuario_actual=self.usuario_actual
             )
             print(f"✅ Página bitácora REAL creada en índice {index}")
@@ -812,15 +817,6 @@ class MainWindow(QMainWindow):
         if hasattr(self, 'main_controller') and self.main_controller:
             self.main_controller.limpiar_recursos()
             
-        if hasattr(self, 'becerros_controller') and self.becerros_controller and self.becerros_controller.db:
-            self.becerros_controller.db.disconnect()
-        if hasattr(self, 'animales_controller') and self.animales_controller and self.animales_controller.db:
-            self.animales_controller.db.disconnect()
-        if hasattr(self, 'propietarios_controller') and self.propietarios_controller and self.propietarios_controller.db:
-            self.propietarios_controller.db.disconnect()
-        if hasattr(self, 'corrales_controller') and self.corrales_controller and self.corrales_controller.db:
-            self.corrales_controller.db.disconnect()
-            
         # Limpiar recursos de todos los controladores
         controllers = [
             'bitacora_controller', 'reportes_controller', 'seguridad_controller', 'sbuscar_controller',
@@ -833,6 +829,12 @@ class MainWindow(QMainWindow):
                 controller = getattr(self, controller_name)
                 if hasattr(controller, 'limpiar_recursos'):
                     controller.limpiar_recursos()
+        
+        if hasattr(self, 'programador_respaldos'):
+            self.programador_respaldos.detener()
+        
+        # ✅ CERRAR LAS CONEXIONES COMPARTIDAS (TODOS LOS CONTROLADORES USAN LA MISMA)
+        cerrar_conexiones()
             
         event.accept()
 
@@ -1,12 +1,17 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
-from database import Database
+from database import obtener_database, CursorPaginado
+from tabla_modelo import ModeloTabla, DelegadoAcciones, Columna, Accion, ACCIONES, reemplazar_tabla
+from busqueda import BusquedaDiferida
 from controllers.agregarusuario_controller import AgregarUsuarioController
 from controllers.editarusuario_controller import EditarUsuarioController
 
 class UsuariosController:
     def __init__(self, usuarios_widget, bitacora_controller=None):
         self.usuarios_widget = usuarios_widget
-        self.db = Database()
+        self.db = obtener_database()
+        # ✅ LA BÚSQUEDA ESPERA A QUE SE DEJE DE ESCRIBIR Y CORRE FUERA DEL HILO DE LA INTERFAZ
+        self.busqueda = BusquedaDiferida(self.db.buscar_usuarios_en_todos_los_campos, self.llenar_tabla,
+                                         parent=self.usuarios_widget)
         self.bitacora_controller = bitacora_controller
         self.setup_connections()
         self.configurar_tabla()
@@ -94,9 +99,24 @@ class UsuariosController:
         """Configura el aspecto y comportamiento de la tabla"""
         try:
             # Configurar encabezados (sin ID)
-            encabezados = ["Usuario", "Nombre", "Teléfono", "Rol", "Opciones"]
-            self.tabla.setColumnCount(len(encabezados))
-            self.tabla.setHorizontalHeaderLabels(encabezados)
+            # Los datos vienen en este orden: [idusuario, usuario, nombre, telefono, rol]
+            encabezados = [
+                Columna("Usuario", 1), Columna("Nombre", 2), Columna("Teléfono", 3),
+                Columna("Rol", 4), Columna("Opciones", tipo=ACCIONES)
+            ]
+            
+            # ✅ GRID MODELO/VISTA: LOS BOTONES SE PINTAN, NO HAY WIDGETS POR FILA
+            self.modelo = ModeloTabla(encabezados)
+            self.tabla = reemplazar_tabla(self.tabla, self.modelo)
+            
+            # Botones de opciones - usan el ID del usuario (usuario[0])
+            self.delegado_opciones = DelegadoAcciones([
+                Accion("Editar", "#3498db", "#2980b9", "Editar usuario",
+                       lambda usuario: self.editar_usuario(str(usuario[0]))),
+                Accion("Eliminar", "#e74c3c", "#c0392b", "Eliminar usuario",
+                       lambda usuario: self.eliminar_usuario(str(usuario[0]))),
+            ], tamano_fuente=10, parent=self.tabla)
+            self.tabla.setItemDelegateForColumn(4, self.delegado_opciones)
             
             # Configurar tamaños de columnas (sin ID)
             self.tabla.setColumnWidth(0, 120)  # Usuario
@@ -117,18 +137,18 @@ class UsuariosController:
             
             # Mejorar estilo
             self.tabla.setStyleSheet("""
-                QTableWidget {
+                QTableView {
                     background-color: white;
                     alternate-background-color: #f8f9fa;
                     gridline-color: #dee2e6;
                     border: 1px solid #dee2e6;
                     border-radius: 4px;
                 }
-                QTableWidget::item {
+                QTableView::item {
                     padding: 5px;
                     border-bottom: 1px solid #dee2e6;
                 }
-                QTableWidget::item:selected {
+                QTableView::item:selected {
                     background-color: #3498db;
                     color: white;
                 }
@@ -165,9 +185,10 @@ class UsuariosController:
         """Carga todos los usuarios en la tabla"""
         try:
             print("🔄 Cargando usuarios desde la base de datos...")
-            usuarios = self.db.obtener_usuarios()
-            print(f"📊 {len(usuarios)} usuarios encontrados")
+            self.busqueda.invalidar()
+            usuarios = self.db.paginar_usuarios()
             self.llenar_tabla(usuarios)
+            print(f"📊 {usuarios.total_leido} usuarios en la primera página")
         except Exception as e:
             print(f"❌ Error al cargar usuarios: {e}")
             import traceback
@@ -176,89 +197,17 @@ class UsuariosController:
     def llenar_tabla(self, usuarios):
         """Llena la tabla con los datos de los usuarios (sin ID)"""
         try:
-            self.tabla.setRowCount(0)
-
-            for row_number, usuario in enumerate(usuarios):
-                self.tabla.insertRow(row_number)
-                
-                # Los datos vienen en este orden: [idusuario, usuario, nombre, telefono, rol]
-                # Pero ahora solo mostramos: [usuario, nombre, telefono, rol, opciones]
-                
-                # Usuario (columna 0)
-                item_usuario = QtWidgets.QTableWidgetItem(str(usuario[1] if usuario[1] else ""))
-                self.tabla.setItem(row_number, 0, item_usuario)
-                
-                # Nombre (columna 1)
-                item_nombre = QtWidgets.QTableWidgetItem(str(usuario[2] if usuario[2] else ""))
-                self.tabla.setItem(row_number, 1, item_nombre)
-                
-                # Teléfono (columna 2)
-                item_telefono = QtWidgets.QTableWidgetItem(str(usuario[3] if usuario[3] else ""))
-                self.tabla.setItem(row_number, 2, item_telefono)
-                
-                # Rol (columna 3)
-                item_rol = QtWidgets.QTableWidgetItem(str(usuario[4] if usuario[4] else ""))
-                self.tabla.setItem(row_number, 3, item_rol)
-                
-                # Botones de opciones (columna 4) - guardamos el ID internamente
-                self.agregar_botones_opciones(row_number, 4, str(usuario[0]))  # usuario[0] es el ID
+            # El ID no se muestra pero queda en la fila para las opciones
+            if isinstance(usuarios, CursorPaginado):
+                self.modelo.establecer_cursor(usuarios)
+            else:
+                self.modelo.establecer_filas(usuarios)
 
-            print(f"✅ Tabla llenada con {len(usuarios)} registros (ID oculto)")
+            print(f"✅ Tabla llenada con {self.modelo.rowCount()} registros (ID oculto)")
 
         except Exception as e:
             print(f"❌ Error al llenar tabla: {e}")
 
-    def agregar_botones_opciones(self, row, column, id_usuario):
-        """Agrega botones de editar y eliminar"""
-        try:
-            widget = QtWidgets.QWidget()
-            layout = QtWidgets.QHBoxLayout(widget)
-            layout.setContentsMargins(2, 2, 2, 2)
-            layout.setSpacing(4)
-            
-            # Botón editar
-            btn_editar = QtWidgets.QPushButton("Editar")
-            btn_editar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #3498db; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #2980b9;
-                }
-            """)
-            btn_editar.clicked.connect(lambda checked, id=id_usuario: self.editar_usuario(id))
-            
-            # Botón eliminar
-            btn_eliminar = QtWidgets.QPushButton("Eliminar")
-            btn_eliminar.setStyleSheet("""
-                QPushButton { 
-                    background-color: #e74c3c; 
-                    color: white; 
-                    border: none; 
-                    padding: 5px; 
-                    border-radius: 3px;
-                    font-size: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #c0392b;
-                }
-            """)
-            btn_eliminar.clicked.connect(lambda checked, id=id_usuario: self.eliminar_usuario(id))
-            
-            layout.addWidget(btn_editar)
-            layout.addWidget(btn_eliminar)
-            layout.addStretch()
-            
-            self.tabla.setCellWidget(row, column, widget)
-            
-        except Exception as e:
-            print(f"❌ Error al agregar botones: {e}")
-    
     def agregar_usuario(self):
         """Abre diálogo para agregar nuevo usuario"""
         try:
@@ -383,10 +332,10 @@ class UsuariosController:
             if self.buscador:
                 texto = self.buscador.text().strip()
                 if texto:
-                    usuarios = self.db.buscar_usuarios_en_todos_los_campos(texto)
+                    self.busqueda.solicitar(texto)
                 else:
-                    usuarios = self.db.obtener_usuarios()
-                self.llenar_tabla(usuarios)
+                    self.busqueda.cancelar()
+                    self.llenar_tabla(self.db.paginar_usuarios())
         except Exception as e:
             print(f"❌ Error al buscar usuarios: {e}")
 
@@ -1,13 +1,14 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 import os
-import shutil
-import sqlite3
-from datetime import datetime
-import sys
+
+from respaldos import RUTA_BD, DIRECTORIO_REPOSITORIO, RepositorioRespaldos, registrar_en_log, resumen_filas
+from tareas import TareaFondo
 
 class CopiaBDDController:
     def __init__(self, copiabdd_widget):
         self.copiabdd_widget = copiabdd_widget
+        self.tarea_copia = None
+        self.progress_dialog = None
         self.setup_connections()
         self.configurar_fecha()
         print("✅ CopiaBDDController inicializado")
@@ -88,102 +89,109 @@ class CopiaBDDController:
             print(f"❌ Error obteniendo main window: {e}")
             return None
 
+    def nombre_usuario_actual(self):
+        """Usuario con sesión iniciada, para el catálogo de copias"""
+        main_window = self.get_main_window()
+        usuario = getattr(main_window, 'usuario_actual', None) or {}
+        return usuario.get('usuario', '')
+
     def crear_copia_seguridad(self):
         """Crea una copia de seguridad de la base de datos"""
         try:
-            # Obtener la fecha seleccionada
+            # Obtener la fecha seleccionada (queda como etiqueta de la copia)
             fecha = self.date_edit.date().toString("dd-MM-yyyy")
             print(f"💾 Creando copia de seguridad para la fecha: {fecha}")
             
-            # Ruta de la base de datos original
-            db_path = "bdd/SDLGAPP.db"
+            if self.tarea_copia and self.tarea_copia.en_curso:
+                self.mostrar_informacion("Ya hay una copia de seguridad en curso.")
+                return
             
             # Verificar si existe la base de datos
-            if not os.path.exists(db_path):
+            if not os.path.exists(RUTA_BD):
                 self.mostrar_error("No se encontró la base de datos original.")
                 return
             
-            # Crear directorio de backups si no existe
-            backup_dir = "backups"
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
-                print(f"✅ Directorio de backups creado: {backup_dir}")
-            
-            # Nombre del archivo de backup
-            backup_name = f"SDLGAPP_backup_{fecha}.db"
-            backup_path = os.path.join(backup_dir, backup_name)
-            
-            # Verificar si ya existe un backup para esa fecha
-            if os.path.exists(backup_path):
-                respuesta = QtWidgets.QMessageBox.question(
-                    self.copiabdd_widget,
-                    "Copia existente",
-                    f"Ya existe una copia de seguridad para la fecha {fecha}. ¿Desea reemplazarla?",
-                    QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
-                    QtWidgets.QMessageBox.No
-                )
-                if respuesta == QtWidgets.QMessageBox.No:
-                    return
-            
-            # Crear la copia de seguridad
-            self.realizar_copia_seguridad(db_path, backup_path, fecha)
+            # Crear la copia de seguridad (cada copia es una instantánea nueva: nunca se reemplaza otra)
+            self.realizar_copia_seguridad(RUTA_BD, fecha)
             
         except Exception as e:
             print(f"❌ Error al crear copia de seguridad: {e}")
             self.mostrar_error(f"Error al crear copia de seguridad: {str(e)}")
 
-    def realizar_copia_seguridad(self, origen, destino, fecha):
-        """Realiza la copia de seguridad de la base de datos"""
+    def realizar_copia_seguridad(self, origen, fecha):
+        """Crea la instantánea en el repositorio en segundo plano, con progreso real"""
         try:
-            # Mostrar progreso
-            progress_dialog = QtWidgets.QProgressDialog("Creando copia de seguridad...", "Cancelar", 0, 100, self.copiabdd_widget)
-            progress_dialog.setWindowTitle("Procesando")
-            progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
-            progress_dialog.show()
-            
-            # Simular progreso
-            for i in range(101):
-                QtCore.QThread.msleep(20)  # Pequeña pausa para simular trabajo
-                progress_dialog.setValue(i)
-                QtWidgets.QApplication.processEvents()
-                
-                if progress_dialog.wasCanceled():
-                    progress_dialog.close()
-                    self.mostrar_informacion("Copia de seguridad cancelada.")
-                    return
-            
-            progress_dialog.close()
+            self.progress_dialog = QtWidgets.QProgressDialog(
+                "Creando copia de seguridad...", "Cancelar", 0, 100, self.copiabdd_widget)
+            self.progress_dialog.setWindowTitle("Procesando")
+            self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+            self.progress_dialog.setAutoClose(False)
+            self.progress_dialog.setAutoReset(False)
+            self.progress_dialog.setValue(0)
+            
+            # ✅ LA COPIA CORRE FUERA DEL HILO DE LA INTERFAZ; SOLO SE ESCRIBEN LOS BLOQUES QUE CAMBIARON
+            repositorio = RepositorioRespaldos()
+            usuario = self.nombre_usuario_actual()
+            self.tarea_copia = TareaFondo(
+                lambda progreso, cancelada: repositorio.crear_instantanea(
+                    origen, "manual", fecha, progreso, cancelada, usuario),
+                self.copiabdd_widget
+            )
+            self.tarea_copia.progreso.connect(self.actualizar_progreso)
+            self.tarea_copia.terminada.connect(lambda manifiesto: self.copia_terminada(origen, manifiesto))
+            self.tarea_copia.cancelada.connect(self.copia_cancelada)
+            self.tarea_copia.fallida.connect(self.copia_fallida)
+            self.progress_dialog.canceled.connect(self.tarea_copia.cancelar)
             
-            # Realizar la copia real del archivo
-            shutil.copy2(origen, destino)
+            self.progress_dialog.show()
+            self.tarea_copia.iniciar()
             
-            # Verificar que se creó correctamente
-            if os.path.exists(destino):
-                tamaño_original = os.path.getsize(origen)
-                tamaño_backup = os.path.getsize(destino)
-                
-                mensaje = f"""
+        except Exception as e:
+            print(f"❌ Error en realizar_copia_seguridad: {e}")
+            self.mostrar_error(f"Error durante la copia: {str(e)}")
+
+    def actualizar_progreso(self, copiadas, total):
+        """Actualiza la barra con las páginas copiadas y los bloques guardados"""
+        if self.progress_dialog and total:
+            self.progress_dialog.setMaximum(total)
+            self.progress_dialog.setValue(copiadas)
+
+    def cerrar_progreso(self):
+        if self.progress_dialog:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+
+    def copia_terminada(self, origen, manifiesto):
+        """La instantánea quedó guardada en el repositorio"""
+        self.cerrar_progreso()
+        tamaño_original = os.path.getsize(origen)
+        
+        mensaje = f"""
 ✅ Copia de seguridad creada exitosamente
 
 📊 Detalles:
-• Fecha: {fecha}
-• Archivo: {os.path.basename(destino)}
+• Fecha: {manifiesto['etiqueta']}
+• Copia: {manifiesto['id']}
 • Tamaño original: {self.formatear_tamaño(tamaño_original)}
-• Tamaño backup: {self.formatear_tamaño(tamaño_backup)}
-• Ubicación: {destino}
-                """
-                
-                self.mostrar_informacion(mensaje)
-                print(f"✅ Copia de seguridad creada: {destino}")
-                
-                # Registrar en logs
-                self.registrar_backup(fecha, destino, tamaño_backup)
-            else:
-                self.mostrar_error("No se pudo crear la copia de seguridad.")
-                
-        except Exception as e:
-            print(f"❌ Error en realizar_copia_seguridad: {e}")
-            self.mostrar_error(f"Error durante la copia: {str(e)}")
+• Contenido: {resumen_filas(manifiesto['filas'])}
+• Bloques nuevos: {manifiesto['bloques_nuevos']} de {len(manifiesto['bloques'])}
+• Espacio usado: {self.formatear_tamaño(manifiesto['bytes_nuevos'])}
+• Ubicación: {DIRECTORIO_REPOSITORIO}
+        """
+        
+        print(f"✅ Copia de seguridad creada: {manifiesto['id']}")
+        self.registrar_backup(manifiesto)
+        self.mostrar_informacion(mensaje)
+
+    def copia_cancelada(self):
+        self.cerrar_progreso()
+        print("⚠️ Copia de seguridad cancelada")
+        self.mostrar_informacion("Copia de seguridad cancelada.")
+
+    def copia_fallida(self, error):
+        self.cerrar_progreso()
+        print(f"❌ Error en la copia de seguridad: {error}")
+        self.mostrar_error(f"Error durante la copia: {error}")
 
     def formatear_tamaño(self, bytes):
         """Formatea el tamaño en bytes a formato legible"""
@@ -193,23 +201,11 @@ class CopiaBDDController:
             bytes /= 1024.0
         return f"{bytes:.2f} TB"
 
-    def registrar_backup(self, fecha, archivo, tamaño):
+    def registrar_backup(self, manifiesto):
         """Registra el backup en un archivo de log"""
-        try:
-            log_dir = "logs"
-            if not os.path.exists(log_dir):
-                os.makedirs(log_dir)
-            
-            log_file = os.path.join(log_dir, "backups.log")
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(f"[{timestamp}] Backup creado - Fecha: {fecha}, Archivo: {archivo}, Tamaño: {tamaño} bytes\n")
-            
-            print(f"✅ Backup registrado en log: {log_file}")
-            
-        except Exception as e:
-            print(f"⚠️ Error registrando backup en log: {e}")
+        registrar_en_log(f"Backup creado - Fecha: {manifiesto['etiqueta']}, Copia: {manifiesto['id']}, "
+                         f"Tamaño: {manifiesto['tamano']} bytes, Nuevos: {manifiesto['bytes_nuevos']} bytes")
+        print("✅ Backup registrado en log")
 
     def mostrar_error(self, mensaje):
         """Muestra un mensaje de error"""
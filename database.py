@@ -1,33 +1,937 @@
 import hashlib
 import sqlite3
 import os
+import re
+import threading
+from contextlib import contextmanager
 from typing import List, Tuple, Optional
 
+from fechas import a_iso, sql_a_iso, texto_de_busqueda
+
+
+class GestorConexiones:
+    """Administra las conexiones SQLite de todo el proceso (una por hilo y por archivo)"""
+
+    _instancia = None
+    _candado_instancia = threading.Lock()
+
+    def __init__(self):
+        self._locales = threading.local()
+        self._candado = threading.Lock()
+        self._rutas_configuradas = set()
+        self._esquemas_verificados = set()
+        # Generación de las conexiones por archivo: al subirla, cada hilo reabre la suya
+        self._generaciones = {}
+        # Catálogos de los combos por archivo: ruta -> {nombre: (generaciones, valores)}
+        self._catalogos = {}
+
+    @classmethod
+    def instancia(cls) -> "GestorConexiones":
+        """Obtiene el gestor compartido por todo el proceso"""
+        if cls._instancia is None:
+            with cls._candado_instancia:
+                if cls._instancia is None:
+                    cls._instancia = cls()
+        return cls._instancia
+
+    def _conexiones_del_hilo(self) -> dict:
+        if not hasattr(self._locales, 'conexiones'):
+            self._locales.conexiones = {}
+        return self._locales.conexiones
+
+    def _transacciones_del_hilo(self) -> dict:
+        if not hasattr(self._locales, 'transacciones'):
+            self._locales.transacciones = {}
+        return self._locales.transacciones
+
+    def profundidad_transaccion(self, db_name: str) -> int:
+        """Bloques Database.transaccion() abiertos en el hilo actual sobre db_name"""
+        return self._transacciones_del_hilo().get(os.path.abspath(db_name), 0)
+
+    def cambiar_profundidad_transaccion(self, db_name: str, cambio: int):
+        transacciones = self._transacciones_del_hilo()
+        ruta = os.path.abspath(db_name)
+        transacciones[ruta] = max(0, transacciones.get(ruta, 0) + cambio)
+
+    def obtener_conexion(self, db_name: str) -> sqlite3.Connection:
+        """Devuelve la conexión del hilo actual para db_name, abriéndola una sola vez"""
+        ruta = os.path.abspath(db_name)
+        conexiones = self._conexiones_del_hilo()
+        abierta = conexiones.get(ruta)
+        if abierta is not None:
+            conexion, generacion = abierta
+            # ✅ INVALIDADA (P. EJ. TRAS RESTAURAR): EL HILO DUEÑO LA CIERRA Y ABRE OTRA, NUNCA A MITAD DE UNA TRANSACCIÓN
+            if (generacion == self._generacion(ruta) or self.profundidad_transaccion(ruta)
+                    or conexion.in_transaction):
+                return conexion
+            self.cerrar_conexion(ruta)
+
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        print(f"Abriendo base de datos en: {ruta}")
+
+        generacion = self._generacion(ruta)
+        # check_same_thread=False por compatibilidad; cada hilo usa y cierra exclusivamente la suya
+        conexion = sqlite3.connect(ruta, timeout=10, check_same_thread=False)
+        self._aplicar_pragmas(conexion, ruta)
+
+        conexiones[ruta] = (conexion, generacion)
+        return conexion
+
+    def _generacion(self, ruta: str) -> int:
+        with self._candado:
+            return self._generaciones.setdefault(ruta, 0)
+
+    def _aplicar_pragmas(self, conexion: sqlite3.Connection, ruta: str):
+        """Pragmas por conexión; el modo WAL es persistente y se fija una vez por archivo"""
+        conexion.execute("PRAGMA busy_timeout = 5000")
+        conexion.execute("PRAGMA synchronous = NORMAL")
+        conexion.execute("PRAGMA temp_store = MEMORY")
+        conexion.execute("PRAGMA cache_size = -8000")
+
+        with self._candado:
+            if ruta in self._rutas_configuradas:
+                return
+            self._rutas_configuradas.add(ruta)
+        try:
+            modo = conexion.execute("PRAGMA journal_mode = WAL").fetchone()
+            print(f"✅ BD - Modo de diario: {modo[0] if modo else 'desconocido'}")
+        except sqlite3.Error as e:
+            print(f"⚠️ BD - No se pudo activar WAL: {e}")
+
+    def esquema_verificado(self, db_name: str) -> bool:
+        return os.path.abspath(db_name) in self._esquemas_verificados
+
+    def marcar_esquema_verificado(self, db_name: str):
+        with self._candado:
+            self._esquemas_verificados.add(os.path.abspath(db_name))
+
+    def olvidar_esquema(self, db_name: str):
+        """El archivo cambió (p. ej. se restauró una copia): se revisan de nuevo pragmas y migraciones"""
+        ruta = os.path.abspath(db_name)
+        with self._candado:
+            self._esquemas_verificados.discard(ruta)
+            self._rutas_configuradas.discard(ruta)
+            # Otro archivo puede tener las mismas generaciones con otros datos
+            self._catalogos.pop(ruta, None)
+
+    def catalogo_en_cache(self, db_name: str, nombre: str, generaciones):
+        """Valores guardados del catálogo si se leyeron con esas mismas generaciones; si no, None"""
+        with self._candado:
+            guardado = self._catalogos.get(os.path.abspath(db_name), {}).get(nombre)
+        if guardado and guardado[0] == generaciones:
+            return guardado[1]
+        return None
+
+    def guardar_catalogo(self, db_name: str, nombre: str, generaciones, valores):
+        with self._candado:
+            self._catalogos.setdefault(os.path.abspath(db_name), {})[nombre] = (generaciones, valores)
+
+    def cerrar_conexion(self, db_name: str):
+        """Cierra la conexión del hilo actual; se reabrirá al volver a usarse"""
+        abierta = self._conexiones_del_hilo().pop(os.path.abspath(db_name), None)
+        if abierta is None:
+            return
+        try:
+            abierta[0].close()
+        except sqlite3.Error as e:
+            print(f"⚠️ BD - Error cerrando conexión: {e}")
+
+    def cerrar_todas(self, db_name: str = None):
+        """
+        Invalida las conexiones de todos los hilos (o solo las de db_name). Ninguna se cierra
+        desde otro hilo: cada hilo cierra la suya y abre otra la próxima vez que la pida, al
+        terminar la transacción que tenga en curso. La del hilo actual se cierra ya si puede.
+        """
+        with self._candado:
+            rutas = [os.path.abspath(db_name)] if db_name else list(self._generaciones)
+            for ruta in rutas:
+                self._generaciones[ruta] = self._generaciones.get(ruta, 0) + 1
+        for ruta in rutas:
+            abierta = self._conexiones_del_hilo().get(ruta)
+            if abierta and not self.profundidad_transaccion(ruta) and not abierta[0].in_transaction:
+                self.cerrar_conexion(ruta)
+        print(f"🔌 BD - Conexiones invalidadas: {len(rutas)} archivo(s)")
+
+
+_database_compartida = None
+_candado_database = threading.Lock()
+
+
+def obtener_database() -> "Database":
+    """Instancia única de Database que comparten todos los controladores"""
+    global _database_compartida
+    if _database_compartida is None:
+        with _candado_database:
+            if _database_compartida is None:
+                _database_compartida = Database()
+    return _database_compartida
+
+
+def cerrar_conexiones():
+    """Cierra la conexión del hilo actual e invalida las de los demás hilos (al salir)"""
+    GestorConexiones.instancia().cerrar_todas()
+
+
+def reabrir_base_de_datos(db_name: str = "bdd/SDLGAPP.db") -> "Database":
+    """
+    Después de restaurar una copia en caliente: invalida las conexiones (cada hilo reabre la
+    suya al usarla), olvida que el esquema ya estaba verificado y vuelve a migrar, porque la copia
+    puede ser de una versión anterior del esquema.
+    """
+    gestor = GestorConexiones.instancia()
+    gestor.cerrar_todas(db_name)
+    gestor.olvidar_esquema(db_name)
+    return Database(db_name)
+
+
+class CorralLleno(Exception):
+    """La escritura dejaba al corral con más animales que su capacidad; se deshizo"""
+
+    def __init__(self, corral: str, ocupados: int, capacidad: int):
+        super().__init__(f"El corral '{corral}' está lleno: su capacidad es {capacidad} "
+                         f"y quedaría con {ocupados} animales")
+        self.corral = corral
+        self.ocupados = ocupados
+        self.capacidad = capacidad
+
+
+class PromocionCancelada(Exception):
+    """El usuario canceló el destete por lotes (no se promovió ningún becerro)"""
+
+
+# Becerros que se promueven por sentencia en el destete por lotes
+BECERROS_POR_LOTE = 200
+
+# Filas por página de los listados (se piden más al hacer scroll)
+TAMANO_PAGINA = 200
+
+# Columnas de los listados, en el mismo orden que usan las tablas de cada página.
+# En la posición de la foto/archivo va el hash de tarchivos, no los bytes.
+COLUMNAS_BECERROS = ("idbece", "aretebece", "nombrebece", "pesobece", "sexobece", "razabece", "nacimientobece",
+                     "corralbece", "estatusbece", "aretemadre", "observacionbece", "hashfotobece")
+COLUMNAS_ANIMALES = ("idgdo", "aretegdo", "nombregdo", "corralgdo", "sexogdo", "razagdo", "prodgdo",
+                     "alimentogdo", "nacimientogdo", "estatusgdo", "observaciongdo", "hashfotogdo")
+COLUMNAS_SALUD = ("idsalud", "areteanimal", "tipoanimal", "nomvet", "procedimiento",
+                  "medprev", "condicionsalud", "fecharev", "observacionsalud", "hasharchivo")
+COLUMNAS_REPRODUCCION = ("idreprod", "areteanimal", "cargada", "cantpartos", "fservicioactual",
+                         "faproxparto", "fnuevoservicio", "tecnica", "observacion")
+COLUMNAS_PROPIETARIOS = ("idprop", "nombreprop", "telprop", "correoprop", "dirprop", "psgprop", "uppprop",
+                         "rfcprop", "observacionprop", "hashfotoprop")
+COLUMNAS_USUARIOS = ("idusuario", "usuario", "nombre", "telefono", "rol")
+COLUMNAS_BITACORA = ("idbitacora", "fecha", "usuario", "modulo", "accion", "descripcion",
+                     "detalles", "arete_afectado")
+COLUMNAS_CORRALES = ("identcorral", "nomcorral", "ubicorral", "capmax", "capactual",
+                     "fechamant", "condicion", "observacioncorral")
+
+# Índices de texto completo (FTS5): tabla -> (tabla fts, clave rowid, columnas indexadas)
+INDICES_BUSQUEDA = {
+    "tbecerros": ("fts_becerros", "idbece",
+                  ("aretebece", "nombrebece", "razabece", "corralbece", "estatusbece", "aretemadre",
+                   "observacionbece", "sexobece", "pesobece", "nacimientobece")),
+    "tganado": ("fts_ganado", "idgdo",
+                ("aretegdo", "nombregdo", "corralgdo", "sexogdo", "razagdo", "prodgdo", "alimentogdo",
+                 "estatusgdo", "observaciongdo", "nacimientogdo")),
+    "tcorral": ("fts_corral", "idcorral",
+                ("nomcorral", "ubicorral", "capmax", "capactual", "fechamant", "condicion", "observacioncorral")),
+    "tpropietarios": ("fts_propietarios", "idprop",
+                      ("nombreprop", "telprop", "correoprop", "dirprop", "psgprop", "uppprop", "rfcprop",
+                       "observacionprop")),
+    "tsalud": ("fts_salud", "idsalud",
+               ("areteanimal", "tipoanimal", "nomvet", "procedimiento", "medprev", "condicionsalud",
+                "observacionsalud", "fecharev")),
+    "treprod": ("fts_reprod", "idreprod",
+                ("areteanimal", "cargada", "cantpartos", "fservicioactual", "faproxparto", "fnuevoservicio",
+                 "tecnica", "observacion")),
+    "tusuarios": ("fts_usuarios", "idusuario", ("usuario", "nombre", "telefono", "rol")),
+}
+
+# Fotos y archivos guardados en tarchivos: tabla -> (clave, columna en línea anterior, columna con el hash)
+ARCHIVOS_EN_FILAS = {
+    "tganado": ("idgdo", "fotogdo", "hashfotogdo"),
+    "tbecerros": ("idbece", "fotobece", "hashfotobece"),
+    "tpropietarios": ("idprop", "fotoprop", "hashfotoprop"),
+    "tsalud": ("idsalud", "archivo", "hasharchivo"),
+}
+# Tamaño de cada parte al leer un archivo por partes
+TAMANO_PARTE_ARCHIVO = 64 * 1024
+
+# Animales que ocupan lugar en un corral: tabla -> (columna del corral, columna del estatus)
+ANIMALES_EN_CORRAL = {
+    "tganado": ("corralgdo", "estatusgdo"),
+    "tbecerros": ("corralbece", "estatusbece"),
+}
+# Estatus que ya no ocupan lugar en el corral
+ESTATUS_FUERA_DE_CORRAL = ("Muerto", "Vendido")
+
+# Columnas de las que salen los catálogos de los combos (razas, estatus, aretes de madres,
+# corrales): al escribirlas, un trigger sube la generación de la tabla en tgeneraciones
+COLUMNAS_DE_CATALOGOS = {
+    "tganado": ("aretegdo", "sexogdo", "razagdo", "estatusgdo"),
+    "tbecerros": ("aretebece", "sexobece", "razabece", "estatusbece"),
+    "tcorral": ("identcorral", "nomcorral"),
+}
+
+
+def sql_contenido_archivo(tabla: str) -> str:
+    """
+    Expresión SQL con los bytes de la foto/archivo de una fila; también cubre lo que otro
+    cliente haya escrito en la columna anterior y aún no se haya movido a tarchivos
+    """
+    _, en_linea, columna_hash = ARCHIVOS_EN_FILAS[tabla]
+    return f"COALESCE({en_linea}, (SELECT datos FROM tarchivos WHERE hash = {columna_hash}))"
+
+
+def hash_archivo(datos: bytes) -> str:
+    """SHA-256 del contenido: identifica el archivo en tarchivos (mismo contenido, una sola copia)"""
+    return hashlib.sha256(datos).hexdigest()
+
+
+class CursorPaginado:
+    """
+    Recorre una tabla por páginas con keyset pagination: cada página continúa desde la
+    última clave leída, WHERE (orden, id) > (?, ?), en lugar de usar OFFSET o fetchall.
+    """
+
+    def __init__(self, db, tabla, columnas, clave_id, orden=None, descendente=False,
+                 tamano_pagina=TAMANO_PAGINA, filtro="", parametros=(), sin_nulos=()):
+        self.db = db
+        self.tabla = tabla
+        self.columnas = tuple(columnas)
+        self.clave_id = clave_id
+        self.orden = orden or clave_id
+        self.descendente = descendente
+        self.tamano_pagina = tamano_pagina
+        # Condición fija (sin WHERE) que se combina con la de la página
+        self.filtro = filtro
+        self.parametros = tuple(parametros)
+        # Columnas que el filtro garantiza sin NULL: se ordenan sin COALESCE y el índice sirve para el ORDER BY
+        self.sin_nulos = tuple(sin_nulos)
+        self.hay_mas = True
+        self.total_leido = 0
+        self._ultima_clave = None
+        # El orden y el id deben venir en la fila para poder continuar desde ella
+        self._pos_id = self.columnas.index(clave_id)
+        self._pos_orden = self.columnas.index(self.orden)
+
+    def reordenado(self, orden, descendente=False) -> "CursorPaginado":
+        """Nuevo cursor desde el inicio sobre la misma tabla con otro orden"""
+        return CursorPaginado(self.db, self.tabla, self.columnas, self.clave_id,
+                              orden, descendente, self.tamano_pagina,
+                              self.filtro, self.parametros, self.sin_nulos)
+
+    def siguiente_pagina(self) -> List[Tuple]:
+        """Lee la siguiente página; devuelve [] cuando ya no hay más filas"""
+        if not self.hay_mas:
+            return []
+
+        direccion = "DESC" if self.descendente else "ASC"
+        comparador = "<" if self.descendente else ">"
+        por_id = self.orden == self.clave_id
+        # COALESCE: un NULL en la clave de orden rompería la comparación por tuplas
+        if por_id or self.orden in self.sin_nulos:
+            expresion = self.orden
+        else:
+            expresion = f"COALESCE({self.orden}, '')"
+
+        condiciones = []
+        params = []
+        if self._ultima_clave is not None:
+            if por_id:
+                condiciones.append(f"{self.clave_id} {comparador} ?")
+                params.append(self._ultima_clave[1])
+            else:
+                if expresion == self.orden:
+                    # Redundante, pero así el índice empieza a leer desde la última clave (va primero:
+                    # si el filtro también acota la columna, SQLite usa el primer límite que encuentra)
+                    condiciones.append(f"{self.orden} {comparador}= ?")
+                    params.append(self._ultima_clave[0])
+                condiciones.append(f"({expresion}, {self.clave_id}) {comparador} (?, ?)")
+                params.extend(self._ultima_clave)
+        if self.filtro:
+            condiciones.append(f"({self.filtro})")
+            params.extend(self.parametros)
+        condicion = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        orden_sql = f"{expresion} {direccion}" if por_id else f"{expresion} {direccion}, {self.clave_id} {direccion}"
+        query = f"""
+        SELECT {", ".join(self.columnas)} FROM {self.tabla}
+        {condicion}
+        ORDER BY {orden_sql}
+        LIMIT ?
+        """
+        try:
+            filas = self.db.connection.execute(query, (*params, self.tamano_pagina)).fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error leyendo página de {self.tabla}: {e}")
+            self.hay_mas = False
+            return []
+
+        if len(filas) < self.tamano_pagina:
+            self.hay_mas = False
+        if filas:
+            ultima = filas[-1]
+            valor_orden = ultima[self._pos_orden]
+            self._ultima_clave = ("" if valor_orden is None else valor_orden, ultima[self._pos_id])
+        self.total_leido += len(filas)
+        return filas
+
+
+# MIGRACIONES DE ESQUEMA
+# Cada migración se aplica una sola vez, en orden, y queda registrada en schema_version.
+# Para cambiar el esquema se agrega una migración nueva al final; las ya publicadas no se editan.
+
+def _ejecutar_script(conexion: sqlite3.Connection, script: str):
+    """Ejecuta un script sentencia por sentencia dentro de la transacción actual (executescript haría COMMIT)"""
+    sentencia = ""
+    for linea in script.splitlines(keepends=True):
+        sentencia += linea
+        if sqlite3.complete_statement(sentencia):
+            conexion.execute(sentencia)
+            sentencia = ""
+    if sentencia.strip():
+        conexion.execute(sentencia)
+
+
+def _columnas_de(conexion: sqlite3.Connection, tabla: str) -> List[str]:
+    return [fila[1] for fila in conexion.execute(f"PRAGMA table_info({tabla})").fetchall()]
+
+
+def _migracion_tablas_base(conexion: sqlite3.Connection):
+    """Tablas que comparte la app (mismas definiciones que el archivo original) y columnas agregadas después"""
+    _ejecutar_script(conexion, """
+        CREATE TABLE IF NOT EXISTS tganado(
+            idgdo INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            aretegdo TEXT, nombregdo TEXT, sexogdo TEXT, razagdo TEXT, nacimientogdo TEXT,
+            corralgdo TEXT, alimentogdo TEXT, prodgdo TEXT, estatusgdo TEXT, observaciongdo TEXT,
+            fotogdo BLOB
+        );
+        CREATE TABLE IF NOT EXISTS tbecerros(
+            idbece INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            aretebece TEXT, nombrebece TEXT, pesobece TEXT, sexobece TEXT, razabece TEXT,
+            nacimientobece TEXT, corralbece TEXT, estatusbece TEXT, aretemadre TEXT,
+            observacionbece TEXT, fotobece BLOB
+        );
+        CREATE TABLE IF NOT EXISTS tsalud(
+            idsalud INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            areteanimal TEXT NOT NULL, tipoanimal TEXT NOT NULL DEFAULT 'adulto', nomvet TEXT,
+            procedimiento TEXT, medprev TEXT, condicionsalud TEXT, fecharev TEXT,
+            observacionsalud TEXT, archivo BLOB
+        );
+        CREATE TABLE IF NOT EXISTS treprod(
+            idreprod INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            cargada TEXT, cantpartos TEXT, fservicioactual TEXT, faproxparto TEXT,
+            fnuevoservicio TEXT, tecnica TEXT, observacion TEXT, areteanimal TEXT
+        );
+        CREATE TABLE IF NOT EXISTS tpropietarios(
+            idprop INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            nombreprop TEXT, telprop TEXT, correoprop TEXT, dirprop TEXT, rfcprop TEXT,
+            psgprop TEXT, uppprop TEXT, observacionprop TEXT, fotoprop BLOB
+        );
+        CREATE TABLE IF NOT EXISTS tcorral(
+            idcorral INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            identcorral TEXT, nomcorral TEXT, ubicorral TEXT, capmax TEXT, capactual TEXT,
+            fechamant TEXT, condicion TEXT, observacioncorral TEXT
+        );
+        CREATE TABLE IF NOT EXISTS tbitacora(
+            idbitacora INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            fecha TIMESTAMP DEFAULT CURRENT_TIMESTAMP, usuario TEXT, modulo TEXT, accion TEXT,
+            descripcion TEXT, detalles TEXT, arete_afectado TEXT
+        );
+        CREATE TABLE IF NOT EXISTS tusuarios(
+            idusuario INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            nombre TEXT, telefono TEXT, usuario TEXT, pass TEXT, rol TEXT
+        );
+    """)
+
+    # Bases creadas por versiones anteriores a las que les faltan columnas
+    columnas_agregadas = {
+        "tbecerros": [("fotobece", "BLOB")],
+        "treprod": [("observacion", "TEXT")],
+        "tbitacora": [(c, "TEXT") for c in ("usuario", "modulo", "accion", "descripcion",
+                                            "detalles", "arete_afectado")],
+    }
+    for tabla, columnas in columnas_agregadas.items():
+        existentes = _columnas_de(conexion, tabla)
+        for columna, tipo in columnas:
+            if columna not in existentes:
+                conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+                print(f"🔧 BD - Columna '{columna}' agregada a {tabla}")
+
+
+def _migracion_miniaturas(conexion: sqlite3.Connection):
+    """Tabla de miniaturas y los triggers que la invalidan al cambiar una foto"""
+    _ejecutar_script(conexion, """
+        CREATE TABLE IF NOT EXISTS tminiaturas (
+            entidad TEXT NOT NULL,
+            clave TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            miniatura BLOB NOT NULL,
+            PRIMARY KEY (entidad, clave)
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_miniatura_becerro_upd
+        AFTER UPDATE OF fotobece, aretebece ON tbecerros
+        BEGIN
+            DELETE FROM tminiaturas WHERE entidad = 'becerro' AND clave = OLD.aretebece;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_miniatura_becerro_del
+        AFTER DELETE ON tbecerros
+        BEGIN
+            DELETE FROM tminiaturas WHERE entidad = 'becerro' AND clave = OLD.aretebece;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_miniatura_animal_upd
+        AFTER UPDATE OF fotogdo, aretegdo ON tganado
+        BEGIN
+            DELETE FROM tminiaturas WHERE entidad = 'animal' AND clave = OLD.aretegdo;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_miniatura_animal_del
+        AFTER DELETE ON tganado
+        BEGIN
+            DELETE FROM tminiaturas WHERE entidad = 'animal' AND clave = OLD.aretegdo;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_miniatura_propietario_upd
+        AFTER UPDATE OF fotoprop ON tpropietarios
+        BEGIN
+            DELETE FROM tminiaturas WHERE entidad = 'propietario' AND clave = CAST(OLD.idprop AS TEXT);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_miniatura_propietario_del
+        AFTER DELETE ON tpropietarios
+        BEGIN
+            DELETE FROM tminiaturas WHERE entidad = 'propietario' AND clave = CAST(OLD.idprop AS TEXT);
+        END;
+    """)
+
+
+def _migracion_indices_busqueda(conexion: sqlite3.Connection):
+    """Índices FTS5 de cada tabla y los triggers que los mantienen sincronizados"""
+    try:
+        conexion.execute("CREATE VIRTUAL TABLE temp.prueba_fts5 USING fts5(x)")
+        conexion.execute("DROP TABLE temp.prueba_fts5")
+    except sqlite3.OperationalError as e:
+        # Sin FTS5 la búsqueda sigue funcionando con LIKE
+        print(f"⚠️ BD - SQLite sin FTS5, no se crean índices de búsqueda: {e}")
+        return
+
+    for tabla, (tabla_fts, clave, columnas) in INDICES_BUSQUEDA.items():
+        lista = ", ".join(columnas)
+        nuevos = ", ".join(f"NEW.{c}" for c in columnas)
+        viejos = ", ".join(f"OLD.{c}" for c in columnas)
+        # remove_diacritics 2: "pena" encuentra "Peña"; prefix acelera las búsquedas por prefijo
+        _ejecutar_script(conexion, f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {tabla_fts} USING fts5(
+                {lista},
+                content='{tabla}', content_rowid='{clave}',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla_fts}_ins AFTER INSERT ON {tabla}
+            BEGIN
+                INSERT INTO {tabla_fts} (rowid, {lista}) VALUES (NEW.{clave}, {nuevos});
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla_fts}_del AFTER DELETE ON {tabla}
+            BEGIN
+                INSERT INTO {tabla_fts} ({tabla_fts}, rowid, {lista}) VALUES ('delete', OLD.{clave}, {viejos});
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_{tabla_fts}_upd AFTER UPDATE OF {clave}, {lista} ON {tabla}
+            BEGIN
+                INSERT INTO {tabla_fts} ({tabla_fts}, rowid, {lista}) VALUES ('delete', OLD.{clave}, {viejos});
+                INSERT INTO {tabla_fts} (rowid, {lista}) VALUES (NEW.{clave}, {nuevos});
+            END;
+        """)
+        # Se llena con los registros que ya existían
+        conexion.execute(f"INSERT INTO {tabla_fts} ({tabla_fts}) VALUES ('rebuild')")
+
+
+def _migracion_indices(conexion: sqlite3.Connection):
+    """Índices de las búsquedas por arete, corral, usuario y fecha"""
+    _ejecutar_script(conexion, """
+        CREATE INDEX IF NOT EXISTS idx_tganado_arete ON tganado(aretegdo);
+        CREATE INDEX IF NOT EXISTS idx_tganado_corral ON tganado(corralgdo);
+        CREATE INDEX IF NOT EXISTS idx_tbecerros_arete ON tbecerros(aretebece);
+        CREATE INDEX IF NOT EXISTS idx_tbecerros_corral ON tbecerros(corralbece);
+        CREATE INDEX IF NOT EXISTS idx_tbecerros_madre ON tbecerros(aretemadre);
+        CREATE INDEX IF NOT EXISTS idx_tsalud_arete ON tsalud(areteanimal);
+        CREATE INDEX IF NOT EXISTS idx_treprod_arete ON treprod(areteanimal);
+        CREATE INDEX IF NOT EXISTS idx_tcorral_nombre ON tcorral(nomcorral);
+        CREATE INDEX IF NOT EXISTS idx_tcorral_ident ON tcorral(identcorral);
+        CREATE INDEX IF NOT EXISTS idx_tusuarios_usuario ON tusuarios(usuario);
+        CREATE INDEX IF NOT EXISTS idx_tbitacora_fecha ON tbitacora(fecha);
+    """)
+
+
+def _migracion_aretes_unicos(conexion: sqlite3.Connection):
+    """
+    Aretes y nombres de usuario únicos (los vacíos no cuentan). Si una tabla ya tiene
+    duplicados no se le puede poner la restricción: se avisa cuáles son y se deja esa tabla sin ella.
+    """
+    restricciones = [
+        ("ux_tganado_arete", "tganado", "aretegdo"),
+        ("ux_tbecerros_arete", "tbecerros", "aretebece"),
+        ("ux_tusuarios_usuario", "tusuarios", "usuario"),
+    ]
+    for indice, tabla, columna in restricciones:
+        duplicados = conexion.execute(f"""
+            SELECT {columna}, COUNT(*) FROM {tabla}
+            WHERE {columna} IS NOT NULL AND {columna} <> ''
+            GROUP BY {columna} HAVING COUNT(*) > 1
+        """).fetchall()
+        if duplicados:
+            print(f"⚠️ BD - {tabla}.{columna} tiene valores repetidos, no se puede hacer único: "
+                  f"{', '.join(str(d[0]) for d in duplicados[:10])}")
+            continue
+        conexion.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS {indice} ON {tabla}({columna})
+            WHERE {columna} IS NOT NULL AND {columna} <> ''
+        """)
+
+
+# Columnas de fecha que se guardan en ISO (tabla -> (clave, columnas))
+COLUMNAS_FECHA = {
+    "tsalud": ("idsalud", ("fecharev",)),
+    "tganado": ("idgdo", ("nacimientogdo",)),
+    "tbecerros": ("idbece", ("nacimientobece",)),
+    "treprod": ("idreprod", ("fservicioactual", "faproxparto", "fnuevoservicio")),
+    "tcorral": ("idcorral", ("fechamant",)),
+}
+
+
+def _migracion_fechas_iso(conexion: sqlite3.Connection):
+    """
+    Pasa las fechas d/m/yyyy a yyyy-MM-dd. Los triggers normalizan también lo que escriban
+    otros clientes del archivo con el formato anterior.
+    """
+    for tabla, (clave, columnas) in COLUMNAS_FECHA.items():
+        for columna in columnas:
+            cursor = conexion.execute(
+                f"UPDATE {tabla} SET {columna} = {sql_a_iso(columna)} WHERE {columna} LIKE '%/%/%'")
+            if cursor.rowcount:
+                print(f"🔧 BD - {cursor.rowcount} fechas de {tabla}.{columna} convertidas a ISO")
+
+        asignaciones = ", ".join(
+            f"{c} = CASE WHEN {c} LIKE '%/%/%' THEN {sql_a_iso(c)} ELSE {c} END" for c in columnas)
+        condicion_nuevos = " OR ".join(f"NEW.{c} LIKE '%/%/%'" for c in columnas)
+        _ejecutar_script(conexion, f"""
+            CREATE TRIGGER IF NOT EXISTS trg_fecha_{tabla}_ins AFTER INSERT ON {tabla}
+            WHEN {condicion_nuevos}
+            BEGIN
+                UPDATE {tabla} SET {asignaciones} WHERE {clave} = NEW.{clave};
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_fecha_{tabla}_upd AFTER UPDATE OF {", ".join(columnas)} ON {tabla}
+            WHEN {condicion_nuevos}
+            BEGIN
+                UPDATE {tabla} SET {asignaciones} WHERE {clave} = NEW.{clave};
+            END;
+        """)
+
+    # Rangos por fecha, solos o por arete (el índice compuesto también sirve para buscar solo por arete)
+    _ejecutar_script(conexion, """
+        CREATE INDEX IF NOT EXISTS idx_tsalud_fecha ON tsalud(fecharev);
+        CREATE INDEX IF NOT EXISTS idx_tsalud_arete_fecha ON tsalud(areteanimal, fecharev);
+        DROP INDEX IF EXISTS idx_tsalud_arete;
+        CREATE INDEX IF NOT EXISTS idx_treprod_fecha ON treprod(fservicioactual);
+        CREATE INDEX IF NOT EXISTS idx_treprod_arete_fecha ON treprod(areteanimal, fservicioactual);
+        DROP INDEX IF EXISTS idx_treprod_arete;
+    """)
+
+
+def _sql_archivo_referenciado(valor: str) -> str:
+    """Condición SQL: alguna fila todavía apunta al archivo con ese hash"""
+    return " OR ".join(
+        f"EXISTS (SELECT 1 FROM {tabla} WHERE {columna_hash} = {valor})"
+        for tabla, (_, _, columna_hash) in ARCHIVOS_EN_FILAS.items()
+    )
+
+
+def _migracion_archivos(conexion: sqlite3.Connection):
+    """
+    Fotos y archivos fuera de las filas: se guardan una sola vez en tarchivos (por SHA-256)
+    y cada fila conserva solo el hash, así recorrer un listado no lee megabytes de imágenes.
+    """
+    _ejecutar_script(conexion, """
+        CREATE TABLE IF NOT EXISTS tarchivos (
+            idarchivo INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+            hash TEXT NOT NULL UNIQUE,
+            tamano INTEGER NOT NULL,
+            datos BLOB NOT NULL
+        );
+    """)
+
+    for tabla, (clave, en_linea, columna_hash) in ARCHIVOS_EN_FILAS.items():
+        if columna_hash not in _columnas_de(conexion, tabla):
+            conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna_hash} TEXT")
+
+        _ejecutar_script(conexion, f"""
+            CREATE INDEX IF NOT EXISTS idx_{tabla}_{columna_hash} ON {tabla}({columna_hash})
+            WHERE {columna_hash} IS NOT NULL;
+            -- Filas con bytes en la columna anterior (las escribe otro cliente); se mueven al iniciar
+            CREATE INDEX IF NOT EXISTS idx_{tabla}_{en_linea}_en_linea ON {tabla}({clave})
+            WHERE {en_linea} IS NOT NULL;
+
+            -- Un archivo que ya no usa ninguna fila se borra
+            CREATE TRIGGER IF NOT EXISTS trg_archivo_{tabla}_del AFTER DELETE ON {tabla}
+            WHEN OLD.{columna_hash} IS NOT NULL
+            BEGIN
+                DELETE FROM tarchivos WHERE hash = OLD.{columna_hash}
+                    AND NOT ({_sql_archivo_referenciado(f"OLD.{columna_hash}")});
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_archivo_{tabla}_upd AFTER UPDATE OF {columna_hash} ON {tabla}
+            WHEN OLD.{columna_hash} IS NOT NULL AND OLD.{columna_hash} IS NOT NEW.{columna_hash}
+            BEGIN
+                DELETE FROM tarchivos WHERE hash = OLD.{columna_hash}
+                    AND NOT ({_sql_archivo_referenciado(f"OLD.{columna_hash}")});
+            END;
+            -- Otro cliente escribió bytes en la columna anterior: esos mandan sobre el hash viejo
+            CREATE TRIGGER IF NOT EXISTS trg_archivo_{tabla}_en_linea AFTER UPDATE OF {en_linea} ON {tabla}
+            WHEN NEW.{en_linea} IS NOT NULL AND NEW.{columna_hash} IS NOT NULL
+            BEGIN
+                UPDATE {tabla} SET {columna_hash} = NULL WHERE {clave} = NEW.{clave};
+            END;
+        """)
+
+    # Las miniaturas se invalidan cuando cambia el hash de la foto, no cada vez que se guarda la fila
+    for entidad, tabla, clave, valor_clave in (("becerro", "tbecerros", "aretebece", "OLD.aretebece"),
+                                               ("animal", "tganado", "aretegdo", "OLD.aretegdo"),
+                                               ("propietario", "tpropietarios", None,
+                                                "CAST(OLD.idprop AS TEXT)")):
+        _, _, columna_hash = ARCHIVOS_EN_FILAS[tabla]
+        columnas = f"{columna_hash}, {clave}" if clave else columna_hash
+        condicion = f"OLD.{columna_hash} IS NOT NEW.{columna_hash}"
+        if clave:
+            condicion += f" OR OLD.{clave} IS NOT NEW.{clave}"
+        _ejecutar_script(conexion, f"""
+            DROP TRIGGER IF EXISTS trg_miniatura_{entidad}_upd;
+            CREATE TRIGGER trg_miniatura_{entidad}_upd AFTER UPDATE OF {columnas} ON {tabla}
+            WHEN {condicion}
+            BEGIN
+                DELETE FROM tminiaturas WHERE entidad = '{entidad}' AND clave = {valor_clave};
+            END;
+        """)
+
+    mover_archivos_en_linea(conexion)
+
+
+def mover_archivos_en_linea(conexion: sqlite3.Connection) -> int:
+    """
+    Pasa a tarchivos los bytes que sigan en las columnas anteriores (migración inicial y lo que
+    escriban otros clientes del archivo). El hash se calcula en Python: SQLite no tiene SHA-256.
+    No confirma la transacción. Devuelve cuántas filas movió.
+    """
+    movidas = 0
+    for tabla, (clave, en_linea, columna_hash) in ARCHIVOS_EN_FILAS.items():
+        ids = [fila[0] for fila in conexion.execute(
+            f"SELECT {clave} FROM {tabla} WHERE {en_linea} IS NOT NULL")]
+        for id_fila in ids:
+            # De una fila a la vez: nunca se cargan todas las fotos en memoria
+            fila = conexion.execute(f"SELECT {en_linea} FROM {tabla} WHERE {clave} = ?", (id_fila,)).fetchone()
+            datos = fila[0] if fila else None
+            if isinstance(datos, str):
+                datos = datos.encode()
+            hash_datos = None
+            if datos:
+                hash_datos = hash_archivo(datos)
+                conexion.execute("INSERT OR IGNORE INTO tarchivos (hash, tamano, datos) VALUES (?, ?, ?)",
+                                 (hash_datos, len(datos), sqlite3.Binary(datos)))
+            conexion.execute(f"UPDATE {tabla} SET {columna_hash} = ?, {en_linea} = NULL WHERE {clave} = ?",
+                             (hash_datos, id_fila))
+            movidas += 1
+        if ids:
+            print(f"🔧 BD - {len(ids)} archivos de {tabla}.{en_linea} movidos a tarchivos")
+    return movidas
+
+
+def _migracion_indices_bitacora(conexion: sqlite3.Connection):
+    """
+    Índices del visor de bitácora: cada filtro por igualdad va seguido de fecha, así el rango
+    y el ORDER BY fecha DESC (más el rowid, que va implícito) salen del mismo índice
+    """
+    _ejecutar_script(conexion, """
+        CREATE INDEX IF NOT EXISTS idx_tbitacora_usuario_fecha ON tbitacora(usuario, fecha);
+        CREATE INDEX IF NOT EXISTS idx_tbitacora_arete_fecha ON tbitacora(arete_afectado, fecha);
+        CREATE INDEX IF NOT EXISTS idx_tbitacora_modulo_fecha ON tbitacora(modulo, accion, fecha);
+    """)
+
+
+def _entero(valor) -> int:
+    """Número guardado como TEXT (capmax, capactual); vacío o inválido cuenta como 0"""
+    try:
+        return int(valor) if valor not in (None, '') else 0
+    except (ValueError, TypeError):
+        return 0
+
+
+def _sql_ocupacion(nombre_corral: str) -> str:
+    """Expresión SQL con los animales que ocupan el corral (sale de los índices por corral y estatus)"""
+    fuera = ", ".join(f"'{estatus}'" for estatus in ESTATUS_FUERA_DE_CORRAL)
+    return " + ".join(
+        f"(SELECT COUNT(*) FROM {tabla} WHERE {corral} = {nombre_corral} "
+        f"AND COALESCE({estatus}, '') NOT IN ({fuera}))"
+        for tabla, (corral, estatus) in ANIMALES_EN_CORRAL.items()
+    )
+
+
+def _migracion_ocupacion_corrales(conexion: sqlite3.Connection):
+    """
+    tcorral.capactual lo mantienen triggers: cada alta, baja, cambio de corral o de estatus
+    vuelve a contar los corrales afectados, así leer la ocupación es leer una columna.
+    También se corrige si alguien escribe capactual a mano (p. ej. desde la app móvil).
+    """
+    recuento = _sql_ocupacion("tcorral.nomcorral")
+    for tabla, (corral, estatus) in ANIMALES_EN_CORRAL.items():
+        _ejecutar_script(conexion, f"""
+            CREATE INDEX IF NOT EXISTS idx_{tabla}_corral_estatus ON {tabla}({corral}, {estatus});
+
+            CREATE TRIGGER IF NOT EXISTS trg_ocupacion_{tabla}_ins AFTER INSERT ON {tabla}
+            WHEN NEW.{corral} IS NOT NULL
+            BEGIN
+                UPDATE tcorral SET capactual = {recuento} WHERE nomcorral = NEW.{corral};
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_ocupacion_{tabla}_del AFTER DELETE ON {tabla}
+            WHEN OLD.{corral} IS NOT NULL
+            BEGIN
+                UPDATE tcorral SET capactual = {recuento} WHERE nomcorral = OLD.{corral};
+            END;
+            CREATE TRIGGER IF NOT EXISTS trg_ocupacion_{tabla}_upd AFTER UPDATE OF {corral}, {estatus} ON {tabla}
+            WHEN OLD.{corral} IS NOT NEW.{corral} OR OLD.{estatus} IS NOT NEW.{estatus}
+            BEGIN
+                UPDATE tcorral SET capactual = {recuento} WHERE nomcorral IN (OLD.{corral}, NEW.{corral});
+            END;
+        """)
+
+    _ejecutar_script(conexion, f"""
+        CREATE TRIGGER IF NOT EXISTS trg_ocupacion_tcorral_ins AFTER INSERT ON tcorral
+        BEGIN
+            UPDATE tcorral SET capactual = {recuento} WHERE idcorral = NEW.idcorral;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_ocupacion_tcorral_upd AFTER UPDATE OF nomcorral, capactual ON tcorral
+        WHEN NEW.capactual IS NOT CAST(({_sql_ocupacion("NEW.nomcorral")}) AS TEXT)
+        BEGIN
+            UPDATE tcorral SET capactual = {recuento} WHERE idcorral = NEW.idcorral;
+        END;
+    """)
+    conexion.execute(f"UPDATE tcorral SET capactual = {recuento}")
+
+
+def _migracion_generaciones(conexion: sqlite3.Connection):
+    """
+    Generación de escritura por tabla para los catálogos en caché: solo la suben los cambios
+    en las columnas de COLUMNAS_DE_CATALOGOS (también los que hace la app móvil), así registrar
+    en la bitácora o cambiar un peso no obliga a volver a leer las razas.
+    """
+    _ejecutar_script(conexion, """
+        CREATE TABLE IF NOT EXISTS tgeneraciones (
+            tabla TEXT PRIMARY KEY NOT NULL,
+            generacion INTEGER NOT NULL DEFAULT 0
+        );
+    """)
+    for tabla, columnas in COLUMNAS_DE_CATALOGOS.items():
+        conexion.execute("INSERT OR IGNORE INTO tgeneraciones (tabla) VALUES (?)", (tabla,))
+        subir = f"UPDATE tgeneraciones SET generacion = generacion + 1 WHERE tabla = '{tabla}';"
+        cambio = " OR ".join(f"OLD.{columna} IS NOT NEW.{columna}" for columna in columnas)
+        _ejecutar_script(conexion, f"""
+            CREATE TRIGGER IF NOT EXISTS trg_generacion_{tabla}_ins AFTER INSERT ON {tabla}
+            BEGIN {subir} END;
+            CREATE TRIGGER IF NOT EXISTS trg_generacion_{tabla}_del AFTER DELETE ON {tabla}
+            BEGIN {subir} END;
+            CREATE TRIGGER IF NOT EXISTS trg_generacion_{tabla}_upd AFTER UPDATE OF {", ".join(columnas)} ON {tabla}
+            WHEN {cambio}
+            BEGIN {subir} END;
+        """)
+
+
+# (versión, descripción, función) en orden de aplicación
+MIGRACIONES = [
+    (1, "Tablas base y columnas faltantes", _migracion_tablas_base),
+    (2, "Miniaturas de fotos", _migracion_miniaturas),
+    (3, "Índices de búsqueda de texto (FTS5)", _migracion_indices_busqueda),
+    (4, "Índices por arete, corral, usuario y fecha", _migracion_indices),
+    (5, "Aretes y usuarios únicos", _migracion_aretes_unicos),
+    (6, "Fechas en formato ISO e índices por fecha", _migracion_fechas_iso),
+    (7, "Fotos y archivos en tarchivos", _migracion_archivos),
+    (8, "Índices de la bitácora por usuario, arete y módulo", _migracion_indices_bitacora),
+    (9, "Ocupación de corrales mantenida por triggers", _migracion_ocupacion_corrales),
+    (10, "Generaciones de escritura para los catálogos", _migracion_generaciones),
+]
+VERSION_ESQUEMA = MIGRACIONES[-1][0]
+
+
+def version_esquema(conexion: sqlite3.Connection) -> int:
+    """Versión del esquema registrada en el archivo (0 si nunca se migró)"""
+    try:
+        fila = conexion.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        return fila[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+
+def aplicar_migraciones(conexion: sqlite3.Connection) -> int:
+    """
+    Lleva el esquema a VERSION_ESQUEMA aplicando las migraciones pendientes, cada una en su
+    propia transacción. Con el esquema al día es una sola consulta. Devuelve la versión final.
+    """
+    actual = version_esquema(conexion)
+    if actual >= VERSION_ESQUEMA:
+        return actual
+
+    conexion.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            descripcion TEXT,
+            aplicada TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conexion.commit()
+
+    for version, descripcion, migrar in MIGRACIONES:
+        if version <= actual:
+            continue
+        try:
+            # IMMEDIATE: si otro proceso está migrando se espera a que termine
+            conexion.execute("BEGIN IMMEDIATE")
+            if version_esquema(conexion) >= version:
+                conexion.rollback()
+                continue
+            migrar(conexion)
+            conexion.execute("INSERT INTO schema_version (version, descripcion) VALUES (?, ?)",
+                             (version, descripcion))
+            conexion.commit()
+            print(f"✅ BD - Migración {version} aplicada: {descripcion}")
+        except sqlite3.Error as e:
+            conexion.rollback()
+            print(f"❌ BD - Error en migración {version} ({descripcion}): {e}")
+            break
+
+    return version_esquema(conexion)
+
+
 class Database:
     def __init__(self, db_name="bdd/SDLGAPP.db"):
         self.db_name = db_name
-        self.connection = None
-        self.verificar_columna_foto()  # Verificar que la columna de foto existe
+        self.gestor = GestorConexiones.instancia()
+        # Las migraciones se revisan una sola vez por archivo en todo el proceso
+        if not self.gestor.esquema_verificado(self.db_name):
+            self.migrar_esquema()
+            self.mantener_archivos()
+            self.gestor.marcar_esquema_verificado(self.db_name)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (compartida entre todas las instancias)"""
+        return self.gestor.obtener_conexion(self.db_name)
         
     def connect(self):
         """Establece conexión con la base de datos"""
         try:
-            # Crear directorio si no existe
-            os.makedirs(os.path.dirname(self.db_name), exist_ok=True)
-            
-            abs_path = os.path.abspath(self.db_name)
-            print(f"Abriendo base de datos en: {abs_path}")
-        
-            self.connection = sqlite3.connect(self.db_name)
+            self.gestor.obtener_conexion(self.db_name)
             return True
         except sqlite3.Error as e:
             print(f"Error conectando a la base de datos: {e}")
             return False
     
     def disconnect(self):
-        """Cierra la conexión con la base de datos"""
-        if self.connection:
-            self.connection.close()
+        """Cierra la conexión del hilo actual (se reabre automáticamente si se vuelve a usar)"""
+        self.gestor.cerrar_conexion(self.db_name)
 
     def listar_tablas(self):
         query = "SELECT name FROM sqlite_master WHERE type='table';"
@@ -37,18 +941,133 @@ class Database:
         return []
             
     def ejecutar_consulta(self, query: str, params: tuple = ()) -> Optional[sqlite3.Cursor]:
-        """Ejecuta una consulta y retorna el cursor"""
+        """
+        Ejecuta una consulta y retorna el cursor. Solo confirma si la sentencia abrió una
+        transacción (las lecturas y los PRAGMA no hacen commit) y no se está dentro de
+        transaccion(); ahí un error se propaga para que se deshaga todo el bloque.
+        """
+        conexion = self.connection
         try:
-            if not self.connection:
-                if not self.connect():
-                    return None
-            cursor = self.connection.cursor()
+            cursor = conexion.cursor()
             cursor.execute(query, params)
-            self.connection.commit()
+            if conexion.in_transaction and not self.en_transaccion():
+                conexion.commit()
             return cursor
         except sqlite3.Error as e:
+            if self.en_transaccion():
+                raise
             print(f"Error ejecutando consulta: {e}")
             return None
+
+    def consultar(self, query: str, params: tuple = ()) -> List[Tuple]:
+        """Lectura: todas las filas (o [] si falla). Nunca confirma ni abre transacciones"""
+        try:
+            return self.connection.execute(query, params).fetchall()
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error en consulta: {e}")
+            return []
+
+    def consultar_uno(self, query: str, params: tuple = ()) -> Optional[Tuple]:
+        """Lectura: primera fila (o None)"""
+        try:
+            return self.connection.execute(query, params).fetchone()
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error en consulta: {e}")
+            return None
+
+    def en_transaccion(self) -> bool:
+        return self.gestor.profundidad_transaccion(self.db_name) > 0
+
+    @contextmanager
+    def transaccion(self):
+        """
+        Agrupa varias escrituras en una sola transacción: un solo commit (un fsync) y, si algo
+        falla dentro del bloque, no queda nada a medias. Dentro, ejecutar_consulta no confirma.
+        Los bloques anidados usan SAVEPOINT.
+
+            with db.transaccion() as conexion:
+                conexion.execute(...)
+        """
+        conexion = self.connection
+        profundidad = self.gestor.profundidad_transaccion(self.db_name)
+        punto = f"sp_{profundidad}"
+        if profundidad:
+            conexion.execute(f"SAVEPOINT {punto}")
+        elif not conexion.in_transaction:
+            # IMMEDIATE: el bloqueo de escritura se toma al empezar; con otro cliente escribiendo
+            # se espera aquí (busy_timeout) en lugar de fallar a mitad del bloque
+            conexion.execute("BEGIN IMMEDIATE")
+        self.gestor.cambiar_profundidad_transaccion(self.db_name, 1)
+        try:
+            yield conexion
+        except BaseException:
+            self.gestor.cambiar_profundidad_transaccion(self.db_name, -1)
+            if profundidad:
+                conexion.execute(f"ROLLBACK TO {punto}")
+                conexion.execute(f"RELEASE {punto}")
+            else:
+                conexion.rollback()
+            raise
+        self.gestor.cambiar_profundidad_transaccion(self.db_name, -1)
+        if profundidad:
+            conexion.execute(f"RELEASE {punto}")
+        else:
+            conexion.commit()
+
+    @contextmanager
+    def capacidad_respetada(self, *corrales):
+        """
+        Envuelve una escritura dentro de transaccion(): si al terminar algún corral quedó con más
+        animales que antes y que su capacidad, lanza CorralLleno y la transacción se deshace.
+        Como la transacción es IMMEDIATE nadie más escribe entre la lectura y la escritura: dos
+        estaciones (o la app móvil) no pueden llenar el mismo lugar a la vez.
+        """
+        corrales = [corral for corral in dict.fromkeys(corrales) if corral]
+        antes = {corral: self.contar_animales_en_corral(corral) for corral in corrales}
+        yield
+        for corral in corrales:
+            capacidad = self.obtener_capacidad_corral(corral)
+            ocupados, maximo = capacidad['capacidad_actual'], capacidad['capacidad_maxima']
+            if maximo and ocupados > maximo and ocupados > antes[corral]:
+                raise CorralLleno(corral, ocupados, maximo)
+
+    def ejecutar_lote(self, query: str, filas) -> int:
+        """
+        executemany en una sola transacción (p. ej. cientos de INSERT con un solo commit).
+        Devuelve las filas afectadas, o -1 si falló y no se aplicó ninguna.
+        """
+        try:
+            with self.transaccion() as conexion:
+                return conexion.executemany(query, filas).rowcount
+        except sqlite3.Error as e:
+            if self.en_transaccion():
+                raise
+            print(f"❌ BD - Error en escritura por lotes: {e}")
+            return -1
+
+    def insertar_lote(self, tabla: str, columnas, filas) -> int:
+        """INSERT de muchas filas (tuplas en el orden de columnas) en una transacción"""
+        marcadores = ", ".join("?" * len(columnas))
+        return self.ejecutar_lote(
+            f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({marcadores})", filas)
+
+    def actualizar_lote(self, tabla: str, columnas, clave: str, filas) -> int:
+        """UPDATE de muchas filas por clave; cada fila es (*valores de columnas, valor de la clave)"""
+        asignaciones = ", ".join(f"{columna} = ?" for columna in columnas)
+        return self.ejecutar_lote(f"UPDATE {tabla} SET {asignaciones} WHERE {clave} = ?", filas)
+        
+    def migrar_esquema(self) -> int:
+        """Aplica las migraciones pendientes y devuelve la versión del esquema"""
+        try:
+            return aplicar_migraciones(self.connection)
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error revisando versión del esquema: {e}")
+            return 0
+
+    def checkpoint(self) -> bool:
+        """Vuelca el WAL al archivo principal (necesario antes de copiar el .db como archivo)"""
+        cursor = self.ejecutar_consulta("PRAGMA wal_checkpoint(TRUNCATE)")
+        return cursor is not None
         
     # MÉTODOS PARA BECERROS
     def obtener_becerros(self) -> List[Tuple]:
@@ -57,7 +1076,7 @@ class Database:
             print("🔍 BD - Ejecutando consulta para obtener becerros...")
             query = """
             SELECT idbece, aretebece, nombrebece, pesobece, sexobece, razabece, nacimientobece, 
-                   corralbece, estatusbece, aretemadre, observacionbece, fotobece
+                   corralbece, estatusbece, aretemadre, observacionbece, hashfotobece
             FROM tbecerros
             """
             cursor = self.ejecutar_consulta(query)
@@ -79,40 +1098,49 @@ class Database:
         
     def insertar_becerro(self, arete: str, nombre: str, peso: float, sexo: str, raza: str, 
                        nacimiento: str, corral: str, estatus: str, 
-                       aretemadre: str, observacion: str, foto: bytes = None) -> bool:
-        """Inserta un nuevo registro en la tabla tbecerros"""
+                       aretemadre: str, observacion: str, foto: bytes = None, miniatura: bytes = None) -> bool:
+        """Inserta un nuevo registro en la tabla tbecerros. Lanza CorralLleno si el corral no tiene lugar"""
         query = """
         INSERT INTO tbecerros (aretebece, nombrebece, pesobece, sexobece, razabece, nacimientobece, 
-                           corralbece, estatusbece, aretemadre, observacionbece, fotobece)
+                           corralbece, estatusbece, aretemadre, observacionbece, hashfotobece)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
-        params = (arete, nombre, peso, sexo, raza, nacimiento, corral, estatus, 
-                 aretemadre, observacion, foto)
-        cursor = self.ejecutar_consulta(query, params)
-        return cursor is not None
+        try:
+            # Foto, fila y miniatura en una sola transacción
+            with self.transaccion(), self.capacidad_respetada(corral):
+                params = (arete, nombre, peso, sexo, raza, nacimiento, corral, estatus, 
+                         aretemadre, observacion, self.guardar_archivo(foto))
+                self.ejecutar_consulta(query, params)
+                self._guardar_miniatura_de_ingesta("becerro", arete, foto, miniatura)
+            return True
+        except sqlite3.Error as e:
+            print(f"❌ Error al insertar becerro: {e}")
+            return False
 
     def actualizar_becerro(self, arete_original, arete, nombre, peso, sexo, raza, nacimiento, 
-                      corral, estatus, aretemadre=None, observacion=None, foto=None):
-        """Actualiza un becerro en la base de datos"""
+                      corral, estatus, aretemadre=None, observacion=None, foto=None, miniatura=None):
+        """Actualiza un becerro en la base de datos. Lanza CorralLleno si el corral nuevo no tiene lugar"""
         try:
             query = """
             UPDATE tbecerros 
             SET aretebece = ?, nombrebece = ?, pesobece = ?, sexobece = ?, razabece = ?, 
                 nacimientobece = ?, corralbece = ?, estatusbece = ?, aretemadre = ?, 
-                observacionbece = ?, fotobece = ?
+                observacionbece = ?, hashfotobece = COALESCE(?, hashfotobece), fotobece = NULL
             WHERE aretebece = ?
             """
-            params = (
-                arete, nombre, peso, sexo, raza, nacimiento, corral, 
-                estatus, aretemadre, observacion, foto, arete_original
-            )
-            cursor = self.ejecutar_consulta(query, params)
-            if cursor:
-                print(f"✅ Becerro actualizado: {arete}")
-                return True
-            else:
-                print(f"❌ Error al actualizar becerro: cursor es None")
-                return False
+            with self.transaccion() as conexion, self.capacidad_respetada(corral):
+                # ✅ SIN FOTO NUEVA SE CONSERVA LA QUE TIENE (ANTES SE PASAN A tarchivos LOS BYTES EN LÍNEA)
+                mover_archivos_en_linea(conexion)
+                params = (
+                    arete, nombre, peso, sexo, raza, nacimiento, corral, 
+                    estatus, aretemadre, observacion, self.guardar_archivo(foto), arete_original
+                )
+                self.ejecutar_consulta(query, params)
+                self._guardar_miniatura_de_ingesta("becerro", arete, foto, miniatura)
+            print(f"✅ Becerro actualizado: {arete}")
+            return True
+        except CorralLleno:
+            raise
         except Exception as e:
             print(f"❌ Error al actualizar becerro: {e}")
             return False
@@ -154,31 +1182,23 @@ class Database:
             return False
 
     def eliminar_becerro_por_arete(self, arete: str) -> bool:
-        """Elimina un registro de la tabla tbecerros por arete y sus registros relacionados"""
+        """Elimina un registro de la tabla tbecerros por arete y sus registros relacionados (todo o nada)"""
         try:
             print(f"🗑️ BD - Intentando eliminar becerro y registros relacionados por arete: {arete}")
-        
-        # 1. PRIMERO: Eliminar registros de salud relacionados
-            print("🗑️ BD - Eliminando registros de salud relacionados...")
-            self.eliminar_registros_salud_por_arete(arete)
-        
-        # 2. SEGUNDO: Eliminar registros de reproducción relacionados  
-            print("🗑️ BD - Eliminando registros de reproducción relacionados...")
-            self.eliminar_registros_reproduccion_por_arete(arete)
-        
-        # 3. FINALMENTE: Eliminar el becerro
-            print("🗑️ BD - Eliminando becerro...")
-            query = "DELETE FROM tbecerros WHERE aretebece = ?"
-            cursor = self.ejecutar_consulta(query, (arete,))
-        
-            if cursor:
-                filas_afectadas = cursor.rowcount
-                print(f"🗑️ BD - Becerro eliminado. Filas afectadas: {filas_afectadas}")
-                return filas_afectadas > 0
-            else:
-                print("🗑️ BD - Error: cursor es None")
-                return False
-        except Exception as e:
+            # ✅ UNA SOLA TRANSACCIÓN: SALUD, REPRODUCCIÓN Y EL BECERRO SE BORRAN JUNTOS O NADA
+            with self.transaccion() as conexion:
+                salud = conexion.execute("DELETE FROM tsalud WHERE areteanimal = ?", (arete,)).rowcount
+                reproduccion = conexion.execute("DELETE FROM treprod WHERE areteanimal = ?", (arete,)).rowcount
+                filas_afectadas = conexion.execute("DELETE FROM tbecerros WHERE aretebece = ?", (arete,)).rowcount
+                if not filas_afectadas:
+                    raise LookupError(f"no existe el becerro {arete}")
+            print(f"🗑️ BD - Becerro eliminado junto con {salud} registros de salud y "
+                  f"{reproduccion} de reproducción")
+            return True
+        except LookupError as e:
+            print(f"🗑️ BD - Nada eliminado: {e}")
+            return False
+        except sqlite3.Error as e:
             print(f"🗑️ BD - Error en eliminar_becerro_por_arete: {e}")
             return False
         
@@ -186,36 +1206,9 @@ class Database:
         """Busca becerros en todos los campos de la tabla"""
         try:
             print(f"🔍 BD - Buscando becerros en todos los campos: '{texto}'")
-        
-            # Verificar si el texto es un número para búsquedas en peso
-            texto_like = f'%{texto}%'
-        
-            query = """
-            SELECT idbece, aretebece, nombrebece, pesobece, sexobece, razabece, nacimientobece, 
-                corralbece, estatusbece, aretemadre, observacionbece, fotobece
-            FROM tbecerros
-            WHERE aretebece LIKE ? OR 
-                nombrebece LIKE ? OR 
-                razabece LIKE ? OR 
-                corralbece LIKE ? OR 
-                estatusbece LIKE ? OR 
-                aretemadre LIKE ? OR 
-                observacionbece LIKE ? OR
-                sexobece LIKE ? OR
-                pesobece LIKE ? OR
-                nacimientobece LIKE ?
-            """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like, texto_like, texto_like, texto_like, texto_like
-            ))
-        
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} becerros encontrados en búsqueda múltiple")
-                return resultados
-            return []
-        
+            resultados = self.buscar_en_todos_los_campos("tbecerros", COLUMNAS_BECERROS, texto)
+            print(f"✅ BD - {len(resultados)} becerros encontrados en búsqueda múltiple")
+            return resultados
         except Exception as e:
             print(f"❌ BD - Error en buscar_becerros_en_todos_los_campos: {e}")
             return []
@@ -225,7 +1218,7 @@ class Database:
         """Obtiene un becerro por su arete"""
         query = """
         SELECT idbece, aretebece, nombrebece, pesobece, sexobece, razabece, nacimientobece, 
-               corralbece, estatusbece, aretemadre, observacionbece, fotobece
+               corralbece, estatusbece, aretemadre, observacionbece, hashfotobece
         FROM tbecerros
         WHERE aretebece = ?
         """
@@ -238,9 +1231,9 @@ class Database:
         """Obtiene todos los datos de un becerro por su arete incluyendo foto"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT idbece, aretebece, nombrebece, pesobece, sexobece, razabece, nacimientobece, 
-                       corralbece, estatusbece, aretemadre, observacionbece, fotobece
+                       corralbece, estatusbece, aretemadre, observacionbece, {sql_contenido_archivo("tbecerros")}
                 FROM tbecerros 
                 WHERE aretebece = ?
             """, (arete,))
@@ -249,179 +1242,102 @@ class Database:
             print(f"❌ Error al obtener becerro completo por arete: {e}")
             return None
     
-    def obtener_corrales(self) -> List[Tuple]:
-        """Obtiene todos los corrales de la tabla tcorral"""
+    # CATÁLOGOS PARA LOS COMBOS (EN CACHÉ)
+    def _catalogo(self, nombre: str, tablas, query: str, por_defecto) -> list:
+        """
+        Filas de un catálogo compartido por todos los diálogos. Solo se vuelve a consultar si
+        alguna de sus tablas cambió (lo dice tgeneraciones, que mantienen triggers); si no, abrir
+        un formulario cuesta una lectura de unas pocas filas, sin importar el tamaño del hato.
+        """
         try:
-            print("🔍 BD - Obteniendo corrales desde tcorral...")
-            query = "SELECT identcorral, nomcorral FROM tcorral"  # Cambiado a tcorral
-            cursor = self.ejecutar_consulta(query)
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} corrales encontrados")
-            
-                # Debug: mostrar los corrales encontrados
-                for corral in resultados:
-                    print(f"   - ID: {corral[0]}, Nombre: {corral[1]}")
-                
-                return resultados
-            else:
-                print("❌ BD - Error: cursor es None en obtener_corrales")
-                return []
-        except Exception as e:
-            print(f"❌ BD - Error en obtener_corrales: {e}")
-            return []
-    
+            marcadores = ", ".join("?" * len(tablas))
+            generaciones = tuple(self.connection.execute(
+                f"SELECT tabla, generacion FROM tgeneraciones WHERE tabla IN ({marcadores}) ORDER BY tabla",
+                tuple(tablas)).fetchall())
+            filas = self.gestor.catalogo_en_cache(self.db_name, nombre, generaciones)
+            if filas is None:
+                filas = tuple(self.connection.execute(query).fetchall())
+                self.gestor.guardar_catalogo(self.db_name, nombre, generaciones, filas)
+            return list(filas)
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error leyendo el catálogo {nombre}: {e}")
+            return list(por_defecto)
+
+    def _catalogo_de_columna(self, nombre: str, tabla: str, columna: str, por_defecto) -> List[str]:
+        """Valores distintos (no vacíos) de una columna, desde la caché de catálogos"""
+        query = f"SELECT DISTINCT {columna} FROM {tabla} WHERE {columna} IS NOT NULL AND {columna} != ''"
+        valores = [fila[0] for fila in self._catalogo(nombre, (tabla,), query, [(valor,) for valor in por_defecto])]
+        print(f"🔍 BD - {nombre}: {len(valores)} valores")
+        return valores
+
+    def obtener_corrales(self) -> List[Tuple]:
+        """Corrales (identcorral, nomcorral) de tcorral, desde la caché de catálogos"""
+        corrales = self._catalogo("corrales", ("tcorral",), "SELECT identcorral, nomcorral FROM tcorral", [])
+        print(f"✅ BD - {len(corrales)} corrales")
+        return corrales
+
     def obtener_razas_becerros(self) -> List[str]:
         """Obtiene las razas únicas de la tabla tbecerros"""
-        query = "SELECT DISTINCT razabece FROM tbecerros WHERE razabece IS NOT NULL AND razabece != ''"
-        cursor = self.ejecutar_consulta(query)
-        if cursor:
-            resultados = [fila[0] for fila in cursor.fetchall() if fila[0]]
-            print(f"🔍 Razas encontradas en BD: {resultados}")
-            return resultados
-        print("🔍 No se encontraron razas en la BD")
-        return []
-    
+        return self._catalogo_de_columna("razas_becerros", "tbecerros", "razabece", [])
+
     def obtener_aretes_madres(self) -> List[str]:
         """Obtiene aretes únicos de animales que pueden ser madres"""
-        try:
-            print("🔍 BD - Buscando aretes de madres...")
-            query = """
-            SELECT DISTINCT aretebece FROM tbecerros 
-            WHERE aretebece IS NOT NULL AND aretebece != '' AND sexobece = 'Hembra'
-            UNION
-            SELECT DISTINCT aretegdo FROM tganado 
-            WHERE aretegdo IS NOT NULL AND aretegdo != '' AND sexogdo = 'Hembra'
-            """
-            cursor = self.ejecutar_consulta(query)
-            if cursor:
-                resultados = [fila[0] for fila in cursor.fetchall() if fila[0]]
-                print(f"✅ BD - Arete madres encontrados: {len(resultados)} - {resultados}")
-                return resultados
-            print("🔍 No se encontraron aretes de madres en la BD")
-            return []
-        except Exception as e:
-            print(f"❌ BD - Error en obtener_aretes_madres: {e}")
-            return []
+        query = """
+        SELECT aretebece FROM tbecerros
+        WHERE aretebece IS NOT NULL AND aretebece != '' AND sexobece = 'Hembra'
+        UNION
+        SELECT aretegdo FROM tganado
+        WHERE aretegdo IS NOT NULL AND aretegdo != '' AND sexogdo = 'Hembra'
+        """
+        aretes = [fila[0] for fila in self._catalogo("aretes_madres", ("tbecerros", "tganado"), query, [])]
+        print(f"✅ BD - {len(aretes)} aretes de madres")
+        return aretes
 
     def obtener_capacidad_corral(self, nombre_corral: str) -> dict:
         """Obtiene la capacidad máxima y actual de un corral"""
         try:
-            query = "SELECT capmax, capactual FROM tcorral WHERE nomcorral = ?"
-            cursor = self.ejecutar_consulta(query, (nombre_corral,))
-            if cursor:
-                resultado = cursor.fetchone()
-                if resultado:
-                    capmax, capactual = resultado
-                # Convertir a enteros, manejando casos nulos
-                    try:
-                        if capmax is None or capmax == '':
-                            capmax_int = 0
-                        else:
-                            capmax_int = int(capmax)
-                    except (ValueError, TypeError):
-                        capmax_int = 0
-                    
-                    try:
-                        if capactual is None or capactual == '':
-                            capactual_int = 0
-                        else:
-                            capactual_int = int(capactual)
-                    except (ValueError, TypeError):
-                        capactual_int = 0
-                
-                    return {
-                        'capacidad_maxima': capmax_int,
-                        'capacidad_actual': capactual_int
-                    }
+            fila = self.consultar_uno("SELECT capmax, capactual FROM tcorral WHERE nomcorral = ?", (nombre_corral,))
+            if fila:
+                return {'capacidad_maxima': _entero(fila[0]), 'capacidad_actual': _entero(fila[1])}
             return {'capacidad_maxima': 0, 'capacidad_actual': 0}
         except Exception as e:
             print(f"❌ Error al obtener capacidad del corral: {e}")
             return {'capacidad_maxima': 0, 'capacidad_actual': 0}
 
     def contar_animales_en_corral(self, nombre_corral: str) -> int:
-        """Cuenta cuántos animales hay en un corral específico"""
-        try:
-            # Contar en tganado
-            query_ganado = "SELECT COUNT(*) FROM tganado WHERE corralgdo = ? AND estatusgdo != 'Muerto' AND estatusgdo != 'Vendido'"
-            cursor_ganado = self.ejecutar_consulta(query_ganado, (nombre_corral,))
-            count_ganado = cursor_ganado.fetchone()[0] if cursor_ganado else 0
-        # Contar en tbecerros (si es necesario)
-            query_becerros = "SELECT COUNT(*) FROM tbecerros WHERE corralbece = ? AND estatusbece != 'Muerto' AND estatusbece != 'Vendido'"
-            cursor_becerros = self.ejecutar_consulta(query_becerros, (nombre_corral,))
-            count_becerros = cursor_becerros.fetchone()[0] if cursor_becerros else 0
-        
-            total = count_ganado + count_becerros
-            print(f"🔢 Animales en corral {nombre_corral}: {total} (ganado: {count_ganado}, becerros: {count_becerros})")
-            return total
+        """Animales que ocupan el corral (capactual, mantenido por triggers; muertos y vendidos no cuentan)"""
+        try:
+            fila = self.consultar_uno("SELECT capactual FROM tcorral WHERE nomcorral = ?", (nombre_corral,))
+            if fila is None:
+                # Corral que no está en tcorral: se cuenta directo
+                fila = self.consultar_uno(f"SELECT {_sql_ocupacion('?')}", (nombre_corral,) * len(ANIMALES_EN_CORRAL))
+            return _entero(fila[0]) if fila else 0
         except Exception as e:
             print(f"❌ Error al contar animales en corral: {e}")
             return 0
 
     def obtener_corrales_disponibles(self) -> List[Tuple]:
-        """Obtiene solo los corrales que tienen capacidad disponible"""
+        """
+        Corrales con lugar disponible (o sin límite): (identcorral, nomcorral, capmax, capactual).
+        Una sola consulta; capactual ya es la ocupación real.
+        """
         try:
-            print("🔍 BD - Obteniendo corrales disponibles...")
-            query = "SELECT identcorral, nomcorral, capmax, capactual FROM tcorral"
-            cursor = self.ejecutar_consulta(query)
-            if cursor:
-                todos_corrales = cursor.fetchall()
-                corrales_disponibles = []
-            
-                for corral in todos_corrales:
-                    identcorral, nomcorral, capmax, capactual = corral
-                
-                    try:
-                        if capmax is None or capmax == '':
-                            capmax_int = 0
-                        else:
-                            capmax_int = int(capmax)
-                    except (ValueError, TypeError):
-                        capmax_int = 0
-
-                    try:
-                        if capactual is None or capactual == '':
-                            capactual_int = 0
-                        else:
-                            capactual_int = int(capactual)
-                    except (ValueError, TypeError):
-                        capactual_int = 0
-
-                    if capmax_int == 0:
-                        corrales_disponibles.append(corral)
-                        print(f"✅ Corral sin límite: {nomcorral}")
-                        continue
-                
-                # Contar animales actuales en el corral
-                    animales_actuales = self.contar_animales_en_corral(nomcorral)
-                
-                    if animales_actuales < capmax_int:
-                        corrales_disponibles.append(corral)
-                        print(f"✅ Corral disponible: {nomcorral} ({animales_actuales}/{capmax_int})")
-                    else:
-                        print(f"❌ Corral lleno: {nomcorral} ({animales_actuales}/{capmax_int})")
-            
-                print(f"✅ BD - {len(corrales_disponibles)} corrales disponibles encontrados")
-                
-                return corrales_disponibles
-            else:
-                print("❌ BD - Error: cursor es None en obtener_corrales_disponibles")
-                return []
+            filas = self.consultar("SELECT identcorral, nomcorral, capmax, capactual FROM tcorral")
+            corrales_disponibles = [
+                corral for corral in filas
+                if _entero(corral[2]) == 0 or _entero(corral[3]) < _entero(corral[2])
+            ]
+            print(f"✅ BD - {len(corrales_disponibles)} de {len(filas)} corrales con lugar disponible")
+            return corrales_disponibles
         except Exception as e:
             print(f"❌ BD - Error en obtener_corrales_disponibles: {e}")
             return []
     
     def obtener_estatus_becerros(self) -> List[str]:
         """Obtiene estatus únicos de la tabla tbecerros"""
-        query = "SELECT DISTINCT estatusbece FROM tbecerros WHERE estatusbece IS NOT NULL AND estatusbece != ''"
-        cursor = self.ejecutar_consulta(query)
-        if cursor:
-            resultados = [fila[0] for fila in cursor.fetchall() if fila[0]]
-            print(f"🔍 Estatus encontrados en BD: {resultados}")
-            return resultados
-        print("🔍 No se encontraron estatus en la BD")
-        return ["Activo", "Enfermo", "Vendido", "Muerto"]  # Valores por defecto
-    
+        return self._catalogo_de_columna("estatus_becerros", "tbecerros", "estatusbece",
+                                         ["Activo", "Enfermo", "Vendido", "Muerto"])
+
     def insertar_nueva_raza(self, raza: str) -> bool:
         """Inserta una nueva raza en algún registro para que aparezca en las opciones"""
         # Buscamos un registro existente para actualizar
@@ -447,7 +1363,7 @@ class Database:
         """Obtiene la foto de un becerro por su arete"""
         try:
             print(f"🔍 BD - Buscando foto para becerro arete: {arete}")
-            query = "SELECT fotobece FROM tbecerros WHERE aretebece = ?"
+            query = f"SELECT {sql_contenido_archivo('tbecerros')} FROM tbecerros WHERE aretebece = ?"
             cursor = self.ejecutar_consulta(query, (arete,))
             
             if cursor:
@@ -466,33 +1382,191 @@ class Database:
             print(f"❌ BD - Error en obtener_foto_becerro_por_arete: {e}")
             return None
 
-    def verificar_columna_foto(self):
-        """Verifica si existe la columna de foto y la crea si no existe"""
+    # MÉTODOS PARA ARCHIVOS (FOTOS Y ADJUNTOS)
+    def guardar_archivo(self, datos: bytes) -> Optional[str]:
+        """Guarda los bytes en tarchivos (una sola copia por contenido) y devuelve su hash"""
+        if not datos:
+            return None
         try:
-            # Verificar si la columna existe
-            query = "PRAGMA table_info(tbecerros)"
-            cursor = self.ejecutar_consulta(query)
-            if cursor:
-                columnas = cursor.fetchall()
-                columnas_existentes = [col[1] for col in columnas]
-                
-                if 'fotobece' not in columnas_existentes:
-                    print("🔧 Columna 'fotobece' no existe, creándola...")
-                    query_alter = "ALTER TABLE tbecerros ADD COLUMN fotobece BLOB"
-                    cursor_alter = self.ejecutar_consulta(query_alter)
-                    if cursor_alter:
-                        print("✅ Columna 'fotobece' creada exitosamente")
-                        return True
-                    else:
-                        print("❌ Error al crear columna 'fotobece'")
-                        return False
-                else:
-                    print("✅ Columna 'fotobece' ya existe")
-                    return True
-        except Exception as e:
-            print(f"❌ Error verificando columna foto: {e}")
+            hash_datos = hash_archivo(datos)
+            self.connection.execute(
+                "INSERT OR IGNORE INTO tarchivos (hash, tamano, datos) VALUES (?, ?, ?)",
+                (hash_datos, len(datos), sqlite3.Binary(datos)))
+            return hash_datos
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error guardando archivo: {e}")
+            if self.en_transaccion():
+                # Dentro de transaccion() la fila no debe guardarse sin su foto: se deshace todo
+                raise
+            return None
+
+    def obtener_archivo(self, hash_datos: str) -> Optional[bytes]:
+        """Bytes completos de un archivo por su hash"""
+        if not hash_datos:
+            return None
+        try:
+            fila = self.connection.execute("SELECT datos FROM tarchivos WHERE hash = ?", (hash_datos,)).fetchone()
+            return bytes(fila[0]) if fila else None
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error leyendo archivo {hash_datos[:12]}: {e}")
+            return None
+
+    def tamano_archivo(self, hash_datos: str) -> int:
+        """Tamaño en bytes de un archivo sin leer su contenido"""
+        fila = self.connection.execute("SELECT tamano FROM tarchivos WHERE hash = ?", (hash_datos,)).fetchone()
+        return fila[0] if fila else 0
+
+    def leer_archivo_por_partes(self, hash_datos: str, tamano_parte: int = TAMANO_PARTE_ARCHIVO):
+        """
+        Generador con el contenido de un archivo en partes de tamano_parte bytes (para copiarlo
+        a disco o a un reporte sin tenerlo entero en memoria)
+        """
+        fila = self.connection.execute("SELECT idarchivo FROM tarchivos WHERE hash = ?", (hash_datos,)).fetchone()
+        if not fila:
+            return
+        if hasattr(self.connection, "blobopen"):
+            # E/S incremental de SQLite: solo se leen las páginas de la parte pedida
+            with self.connection.blobopen("tarchivos", "datos", fila[0], readonly=True) as blob:
+                while True:
+                    parte = blob.read(tamano_parte)
+                    if not parte:
+                        break
+                    yield parte
+            return
+
+        inicio = 1
+        while True:
+            parte = self.connection.execute(
+                "SELECT substr(datos, ?, ?) FROM tarchivos WHERE idarchivo = ?",
+                (inicio, tamano_parte, fila[0])).fetchone()
+            if not parte or not parte[0]:
+                break
+            yield bytes(parte[0])
+            inicio += tamano_parte
+
+    def exportar_archivo(self, hash_datos: str, ruta: str) -> bool:
+        """Escribe un archivo guardado en disco, por partes"""
+        try:
+            with open(ruta, "wb") as destino:
+                for parte in self.leer_archivo_por_partes(hash_datos):
+                    destino.write(parte)
+            return True
+        except (OSError, sqlite3.Error) as e:
+            print(f"❌ BD - Error exportando archivo a {ruta}: {e}")
             return False
 
+    def mantener_archivos(self) -> int:
+        """
+        Mueve a tarchivos los bytes que otro cliente haya dejado en las columnas anteriores y
+        borra archivos que ninguna fila usa (p. ej. de un guardado que falló). Devuelve las filas movidas.
+        """
+        try:
+            with self.transaccion() as conexion:
+                movidas = mover_archivos_en_linea(conexion)
+                huerfanos = conexion.execute(
+                    f"DELETE FROM tarchivos WHERE NOT ({_sql_archivo_referenciado('tarchivos.hash')})").rowcount
+            if huerfanos:
+                print(f"🧹 BD - {huerfanos} archivos sin uso eliminados de tarchivos")
+            return movidas
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error moviendo archivos a tarchivos: {e}")
+            return 0
+
+    # MÉTODOS PARA MINIATURAS
+    def obtener_miniaturas(self, entidad: str, claves: List[str]) -> dict:
+        """Obtiene en una sola consulta las miniaturas guardadas: {clave: (hash, bytes)}"""
+        resultado = {}
+        try:
+            claves = [str(c) for c in claves if c]
+            # SQLite limita la cantidad de parámetros por consulta
+            for inicio in range(0, len(claves), 500):
+                lote = claves[inicio:inicio + 500]
+                marcadores = ",".join("?" * len(lote))
+                query = f"""
+                SELECT clave, hash, miniatura FROM tminiaturas
+                WHERE entidad = ? AND clave IN ({marcadores})
+                """
+                cursor = self.connection.execute(query, (entidad, *lote))
+                for clave, hash_foto, miniatura in cursor.fetchall():
+                    resultado[clave] = (hash_foto, miniatura)
+            return resultado
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error obteniendo miniaturas de {entidad}: {e}")
+            return resultado
+
+    def guardar_miniatura(self, entidad: str, clave: str, hash_foto: str, miniatura: bytes) -> bool:
+        """Guarda (o reemplaza) la miniatura de una foto"""
+        return self.guardar_miniaturas(entidad, [(clave, hash_foto, miniatura)]) > 0
+
+    def guardar_miniaturas(self, entidad: str, miniaturas) -> int:
+        """
+        Guarda varias miniaturas [(clave, hash, bytes)] con un solo commit. Es un caché: si falla
+        dentro de otra transacción solo se deshace lo suyo (SAVEPOINT), no la operación que la llamó
+        """
+        query = """
+        INSERT OR REPLACE INTO tminiaturas (entidad, clave, hash, miniatura)
+        VALUES (?, ?, ?, ?)
+        """
+        filas = [(entidad, str(clave), hash_foto, sqlite3.Binary(miniatura))
+                 for clave, hash_foto, miniatura in miniaturas]
+        if not filas:
+            return 0
+        try:
+            with self.transaccion() as conexion:
+                conexion.executemany(query, filas)
+            return len(filas)
+        except sqlite3.Error as e:
+            print(f"⚠️ BD - Error guardando miniaturas de {entidad}: {e}")
+            return 0
+
+    def _guardar_miniatura_de_ingesta(self, entidad: str, clave, foto: bytes, miniatura: bytes):
+        """Guarda la miniatura que ya generó la ingesta de la foto, así no se vuelve a escalar"""
+        if foto and miniatura:
+            self.guardar_miniatura(entidad, clave, hash_archivo(foto), miniatura)
+
+    def eliminar_miniatura(self, entidad: str, clave: str) -> bool:
+        """Elimina la miniatura guardada de un registro"""
+        query = "DELETE FROM tminiaturas WHERE entidad = ? AND clave = ?"
+        cursor = self.ejecutar_consulta(query, (entidad, str(clave)))
+        return cursor is not None
+
+    # MÉTODOS PARA BÚSQUEDA DE TEXTO (FTS5)
+    @staticmethod
+    def _consulta_fts(texto: str) -> str:
+        """Convierte el texto del buscador en una consulta FTS5: cada palabra como prefijo ("pe"* "ma"*)"""
+        palabras = re.findall(r"\w+", texto)
+        return " ".join(f'"{p}"*' for p in palabras)
+
+    def buscar_en_todos_los_campos(self, tabla: str, columnas_resultado, texto: str) -> List[Tuple]:
+        """
+        Busca el texto en las columnas indexadas de la tabla usando su índice FTS5 (cada palabra
+        como prefijo). Sin resultados en el índice no hay resultados: LIKE '%texto%' (que recorre
+        toda la tabla) solo se usa si el índice no existe en esta BD.
+        """
+        tabla_fts, clave, columnas = INDICES_BUSQUEDA[tabla]
+        texto = texto_de_busqueda(texto)
+        seleccion = ", ".join(f"t.{c}" for c in columnas_resultado)
+
+        consulta = self._consulta_fts(texto)
+        if not consulta:
+            return []
+        try:
+            query = f"""
+            SELECT {seleccion}
+            FROM {tabla_fts} f JOIN {tabla} t ON t.{clave} = f.rowid
+            WHERE {tabla_fts} MATCH ?
+            ORDER BY f.rank
+            """
+            return self.connection.execute(query, (consulta,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"⚠️ BD - Índice {tabla_fts} no disponible, se usa LIKE: {e}")
+
+        texto_like = f'%{texto}%'
+        condiciones = " OR ".join(f"t.{c} LIKE ?" for c in columnas)
+        query = f"SELECT {seleccion} FROM {tabla} t WHERE {condiciones}"
+        cursor = self.ejecutar_consulta(query, (texto_like,) * len(columnas))
+        return cursor.fetchall() if cursor else []
+
     # MÉTODOS PARA ANIMALES (GANADO)
     def obtener_animales(self) -> List[Tuple]:
         """Obtiene todos los registros de la tabla tganado"""
@@ -500,7 +1574,7 @@ class Database:
             print("🔍 BD - Ejecutando consulta para obtener animales...")
             query = """
             SELECT idgdo, aretegdo, nombregdo, corralgdo, sexogdo, razagdo, prodgdo, 
-                   alimentogdo, nacimientogdo, estatusgdo, observaciongdo, fotogdo
+                   alimentogdo, nacimientogdo, estatusgdo, observaciongdo, hashfotogdo
             FROM tganado
             """
             cursor = self.ejecutar_consulta(query)
@@ -518,9 +1592,9 @@ class Database:
     def obtener_animal_por_arete(self, arete: str) -> Optional[dict]:
         """Obtiene un animal completo por su arete incluyendo foto - DEVUELVE DICCIONARIO"""
         try:
-            query = """
+            query = f"""
             SELECT idgdo, aretegdo, nombregdo, corralgdo, sexogdo, razagdo, prodgdo, 
-                   alimentogdo, nacimientogdo, estatusgdo, observaciongdo, fotogdo
+                   alimentogdo, nacimientogdo, estatusgdo, observaciongdo, {sql_contenido_archivo("tganado")}
             FROM tganado 
             WHERE aretegdo = ?
             """
@@ -555,7 +1629,7 @@ class Database:
         """Obtiene un animal por su arete (versión tupla - para compatibilidad)"""
         query = """
         SELECT idgdo, aretegdo, nombregdo, corralgdo, sexogdo, razagdo, prodgdo, 
-               alimentogdo, nacimientogdo, estatusgdo, observaciongdo, fotogdo
+               alimentogdo, nacimientogdo, estatusgdo, observaciongdo, hashfotogdo
         FROM tganado
         WHERE aretegdo = ?
         """
@@ -566,80 +1640,70 @@ class Database:
 
     def insertar_animal(self, arete: str, nombre: str, sexo: str, raza: str, tipo_produccion: str,
                        tipo_alimento: str, fecha_nacimiento: str, corral: str, estatus: str,
-                       observaciones: str = None, foto: bytes = None) -> bool:
-        """Inserta un nuevo registro en la tabla tganado"""
+                       observaciones: str = None, foto: bytes = None, miniatura: bytes = None) -> bool:
+        """Inserta un nuevo registro en la tabla tganado. Lanza CorralLleno si el corral no tiene lugar"""
         query = """
         INSERT INTO tganado (aretegdo, nombregdo, sexogdo, razagdo, prodgdo, alimentogdo, 
-                           nacimientogdo, corralgdo, estatusgdo, observaciongdo, fotogdo)
+                           nacimientogdo, corralgdo, estatusgdo, observaciongdo, hashfotogdo)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """
-        params = (arete, nombre, sexo, raza, tipo_produccion, tipo_alimento, fecha_nacimiento, 
-                 corral, estatus, observaciones, foto)
-        cursor = self.ejecutar_consulta(query, params)
-        
-        if cursor:
+        try:
+            # Foto, fila y miniatura en una sola transacción
+            with self.transaccion(), self.capacidad_respetada(corral):
+                params = (arete, nombre, sexo, raza, tipo_produccion, tipo_alimento, fecha_nacimiento, 
+                         corral, estatus, observaciones, self.guardar_archivo(foto))
+                self.ejecutar_consulta(query, params)
+                self._guardar_miniatura_de_ingesta("animal", arete, foto, miniatura)
             print(f"✅ Animal insertado correctamente: {nombre} - {arete}")
             return True
-        else:
-            print(f"❌ Error al insertar animal: {nombre} - {arete}")
+        except sqlite3.Error as e:
+            print(f"❌ Error al insertar animal: {nombre} - {arete}: {e}")
             return False
 
     def actualizar_animal(self, arete_original: str, arete: str, nombre: str, sexo: str, raza: str, 
                          tipo_produccion: str, tipo_alimento: str, fecha_nacimiento: str, 
-                         corral: str, estatus: str, observaciones: str = None, foto: bytes = None) -> bool:
-        """Actualiza un animal en la base de datos"""
+                         corral: str, estatus: str, observaciones: str = None, foto: bytes = None,
+                         miniatura: bytes = None) -> bool:
+        """Actualiza un animal en la base de datos. Lanza CorralLleno si el corral nuevo no tiene lugar"""
         try:
             query = """
             UPDATE tganado 
             SET aretegdo = ?, nombregdo = ?, sexogdo = ?, razagdo = ?, prodgdo = ?, 
                 alimentogdo = ?, nacimientogdo = ?, corralgdo = ?, estatusgdo = ?, 
-                observaciongdo = ?, fotogdo = ?
+                observaciongdo = ?, hashfotogdo = COALESCE(?, hashfotogdo), fotogdo = NULL
             WHERE aretegdo = ?
             """
-            params = (arete, nombre, sexo, raza, tipo_produccion, tipo_alimento, 
-                     fecha_nacimiento, corral, estatus, observaciones, foto, arete_original)
-            
-            cursor = self.ejecutar_consulta(query, params)
-            
-            if cursor:
-                filas_afectadas = cursor.rowcount
-                print(f"✅ Animal actualizado: {nombre} - {arete}. Filas afectadas: {filas_afectadas}")
-                return filas_afectadas > 0
-            else:
-                print(f"❌ Error al actualizar animal: cursor es None")
-                return False
+            with self.transaccion() as conexion, self.capacidad_respetada(corral):
+                # ✅ SIN FOTO NUEVA SE CONSERVA LA QUE TIENE (ANTES SE PASAN A tarchivos LOS BYTES EN LÍNEA)
+                mover_archivos_en_linea(conexion)
+                params = (arete, nombre, sexo, raza, tipo_produccion, tipo_alimento, 
+                         fecha_nacimiento, corral, estatus, observaciones, self.guardar_archivo(foto), arete_original)
+                filas_afectadas = self.ejecutar_consulta(query, params).rowcount
+                if filas_afectadas:
+                    self._guardar_miniatura_de_ingesta("animal", arete, foto, miniatura)
+            print(f"✅ Animal actualizado: {nombre} - {arete}. Filas afectadas: {filas_afectadas}")
+            return filas_afectadas > 0
                 
+        except CorralLleno:
+            raise
         except Exception as e:
             print(f"❌ Error al actualizar animal: {e}")
             return False
 
     def obtener_estatus_animales(self) -> List[str]:
         """Obtiene estatus únicos de la tabla tganado"""
-        query = "SELECT DISTINCT estatusgdo FROM tganado WHERE estatusgdo IS NOT NULL AND estatusgdo != ''"
-        cursor = self.ejecutar_consulta(query)
-        if cursor:
-            resultados = [fila[0] for fila in cursor.fetchall() if fila[0]]
-            print(f"🔍 Estatus animales encontrados en BD: {resultados}")
-            return resultados
-        print("🔍 No se encontraron estatus en la BD para animales")
-        return ["Activo", "Enfermo", "Vendido", "Muerto", "En producción"]
+        return self._catalogo_de_columna("estatus_animales", "tganado", "estatusgdo",
+                                         ["Activo", "Enfermo", "Vendido", "Muerto", "En producción"])
 
     def obtener_razas_animales(self) -> List[str]:
         """Obtiene las razas únicas de la tabla tganado"""
-        query = "SELECT DISTINCT razagdo FROM tganado WHERE razagdo IS NOT NULL AND razagdo != ''"
-        cursor = self.ejecutar_consulta(query)
-        if cursor:
-            resultados = [fila[0] for fila in cursor.fetchall() if fila[0]]
-            print(f"🔍 Razas animales encontradas en BD: {resultados}")
-            return resultados
-        print("🔍 No se encontraron razas en la BD para animales")
-        return []
+        return self._catalogo_de_columna("razas_animales", "tganado", "razagdo", [])
 
     def obtener_foto_animal_por_arete(self, arete: str) -> Optional[bytes]:
         """Obtiene la foto de un animal por su arete"""
         try:
             print(f"🔍 BD - Buscando foto para animal arete: {arete}")
-            query = "SELECT fotogdo FROM tganado WHERE aretegdo = ?"
+            query = f"SELECT {sql_contenido_archivo('tganado')} FROM tganado WHERE aretegdo = ?"
             cursor = self.ejecutar_consulta(query, (arete,))
             
             if cursor:
@@ -659,75 +1723,280 @@ class Database:
             return None
 
     def buscar_animales_en_todos_los_campos(self, texto: str) -> List[Tuple]:
+        """Busca animales en todos los campos usando el índice de texto completo"""
+        try:
+            print(f"🔍 BD - Buscando animales en todos los campos: '{texto}'")
+            resultados = self.buscar_en_todos_los_campos("tganado", COLUMNAS_ANIMALES, texto)
+            print(f"✅ BD - {len(resultados)} animales encontrados en búsqueda múltiple")
+            return resultados
+        except Exception as e:
+            print(f"❌ BD - Error en buscar_animales_en_todos_los_campos: {e}")
+            return []
+
+    def eliminar_animal_por_arete(self, arete: str) -> bool:
+        """Elimina un registro de la tabla tganado por arete y sus registros relacionados (todo o nada)"""
+        try:
+            print(f"🗑️ BD - Intentando eliminar animal y registros relacionados por arete: {arete}")
+            # ✅ UNA SOLA TRANSACCIÓN: SALUD, REPRODUCCIÓN Y EL ANIMAL SE BORRAN JUNTOS O NADA
+            with self.transaccion() as conexion:
+                salud = conexion.execute("DELETE FROM tsalud WHERE areteanimal = ?", (arete,)).rowcount
+                reproduccion = conexion.execute("DELETE FROM treprod WHERE areteanimal = ?", (arete,)).rowcount
+                filas_afectadas = conexion.execute("DELETE FROM tganado WHERE aretegdo = ?", (arete,)).rowcount
+                if not filas_afectadas:
+                    raise LookupError(f"no existe el animal {arete}")
+            print(f"🗑️ BD - Animal eliminado junto con {salud} registros de salud y "
+                  f"{reproduccion} de reproducción")
+            return True
+        except LookupError as e:
+            print(f"🗑️ BD - Nada eliminado: {e}")
+            return False
+        except sqlite3.Error as e:
+            print(f"🗑️ BD - Error en eliminar_animal_por_arete: {e}")
+            return False
+
+    # MÉTODOS PARA PROMOVER BECERROS A GANADO
+    # La fila pasa de tbecerros a tganado con INSERT ... SELECT dentro de una transacción: la foto
+    # no se lee (se copia el hash de tarchivos) y nunca queda el animal duplicado ni perdido.
+    # El historial de salud y reproducción se conserva (sigue el arete).
+
+    _SQL_PROMOVER = """
+        INSERT INTO tganado (aretegdo, nombregdo, sexogdo, razagdo, prodgdo, alimentogdo, nacimientogdo,
+                             corralgdo, estatusgdo, observaciongdo, hashfotogdo)
+        SELECT COALESCE(?, aretebece), COALESCE(?, nombrebece), COALESCE(?, sexobece), COALESCE(?, razabece),
+               ?, ?, COALESCE(?, nacimientobece), COALESCE(?, corralbece), ?, COALESCE(?, observacionbece),
+               COALESCE(?, hashfotobece)
+        FROM tbecerros
+    """
+
+    def promover_becerro(self, arete_becerro: str, arete: str = None, nombre: str = None, sexo: str = None,
+                         raza: str = None, tipo_produccion: str = None, tipo_alimento: str = None,
+                         fecha_nacimiento: str = None, corral: str = None, estatus: str = "Activo",
+                         observaciones: str = None, foto: bytes = None, miniatura: bytes = None) -> bool:
+        """
+        Pasa un becerro a tganado en una sola transacción. Los datos en None se toman del becerro;
+        foto solo se indica si se eligió una nueva (si no, se reutiliza la del becerro).
+        Lanza CorralLleno si el corral destino no tiene lugar (el becerro que ya estaba ahí no suma).
+        """
+        arete = arete or arete_becerro
+        try:
+            with self.transaccion() as conexion, self.capacidad_respetada(corral):
+                # Bytes que otro cliente haya dejado en fotobece: primero a tarchivos
+                mover_archivos_en_linea(conexion)
+                hash_foto = self.guardar_archivo(foto)
+                insertados = conexion.execute(self._SQL_PROMOVER + " WHERE aretebece = ?", (
+                    arete, nombre, sexo, raza, tipo_produccion, tipo_alimento, fecha_nacimiento, corral,
+                    estatus, observaciones, hash_foto, arete_becerro)).rowcount
+                if not insertados:
+                    raise LookupError(f"no existe el becerro {arete_becerro}")
+
+                if arete != arete_becerro:
+                    conexion.execute("UPDATE tsalud SET areteanimal = ? WHERE areteanimal = ?", (arete, arete_becerro))
+                    conexion.execute("UPDATE treprod SET areteanimal = ? WHERE areteanimal = ?", (arete, arete_becerro))
+                if foto:
+                    self._guardar_miniatura_de_ingesta("animal", arete, foto, miniatura)
+                else:
+                    conexion.execute("""
+                        UPDATE OR REPLACE tminiaturas SET entidad = 'animal', clave = ?
+                        WHERE entidad = 'becerro' AND clave = ?
+                    """, (arete, arete_becerro))
+                conexion.execute("DELETE FROM tbecerros WHERE aretebece = ?", (arete_becerro,))
+            print(f"✅ BD - Becerro {arete_becerro} promovido a ganado como {arete}")
+            return True
+        except LookupError as e:
+            print(f"❌ BD - No se promovió: {e}")
+            return False
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error promoviendo becerro {arete_becerro} (no se cambió nada): {e}")
+            return False
+
+    @staticmethod
+    def _criterios_destete(edad_minima_meses=None, peso_minimo=None, corral=None):
+        """WHERE y parámetros para elegir becerros a destetar (vivos y no vendidos)"""
+        condiciones = ["COALESCE(estatusbece, '') NOT IN ('Muerto', 'Vendido')"]
+        parametros = []
+        if edad_minima_meses:
+            # Fechas ISO: la comparación de texto es cronológica
+            condiciones.append("nacimientobece <> '' AND nacimientobece <= date('now', 'localtime', ?)")
+            parametros.append(f"-{int(edad_minima_meses)} months")
+        if peso_minimo:
+            condiciones.append("CAST(pesobece AS REAL) >= ?")
+            parametros.append(float(peso_minimo))
+        if corral:
+            condiciones.append("corralbece = ?")
+            parametros.append(corral)
+        return " AND ".join(condiciones), parametros
+
+    def becerros_para_destete(self, edad_minima_meses=None, peso_minimo=None, corral=None) -> dict:
+        """
+        Vista previa del destete: {'aptos': [(idbece, arete, nombre)], 'duplicados': [aretes]}.
+        Los duplicados ya tienen un animal con el mismo arete y no se promueven.
+        """
+        condicion, parametros = self._criterios_destete(edad_minima_meses, peso_minimo, corral)
+        filas = self.consultar(f"""
+            SELECT idbece, aretebece, nombrebece,
+                   EXISTS (SELECT 1 FROM tganado WHERE aretegdo = aretebece) AS duplicado
+            FROM tbecerros WHERE {condicion} ORDER BY idbece
+        """, tuple(parametros))
+        return {
+            'aptos': [fila[:3] for fila in filas if not fila[3]],
+            'duplicados': [fila[1] for fila in filas if fila[3]],
+        }
+
+    def promover_becerros(self, edad_minima_meses=None, peso_minimo=None, corral=None, corral_destino=None,
+                          tipo_produccion=None, tipo_alimento=None, estatus="Activo",
+                          progreso=None, cancelada=None) -> dict:
+        """
+        Destete por lotes: promueve a ganado todos los becerros que cumplen los criterios, en una
+        sola transacción (todos o ninguno; cancelar deshace todo). progreso(hechos, total) se llama
+        por cada lote de BECERROS_POR_LOTE. Devuelve {'promovidos', 'duplicados'}.
+        Lanza PromocionCancelada, CorralLleno (corral destino sin lugar) o sqlite3.Error.
+        """
+        with self.transaccion() as conexion, self.capacidad_respetada(corral_destino):
+            # Se vuelve a elegir dentro de la transacción: nadie puede cambiar la selección a mitad
+            seleccion = self.becerros_para_destete(edad_minima_meses, peso_minimo, corral)
+            ids = [fila[0] for fila in seleccion['aptos']]
+            total = len(ids)
+
+            mover_archivos_en_linea(conexion)
+            hechos = 0
+            if progreso:
+                progreso(0, total)
+            for inicio in range(0, total, BECERROS_POR_LOTE):
+                if cancelada and cancelada():
+                    raise PromocionCancelada()
+                lote = ids[inicio:inicio + BECERROS_POR_LOTE]
+                marcadores = ",".join("?" * len(lote))
+                conexion.execute(self._SQL_PROMOVER + f" WHERE idbece IN ({marcadores})", (
+                    None, None, None, None, tipo_produccion, tipo_alimento, None, corral_destino,
+                    estatus, None, None, *lote))
+                conexion.execute(f"""
+                    UPDATE OR REPLACE tminiaturas SET entidad = 'animal'
+                    WHERE entidad = 'becerro'
+                      AND clave IN (SELECT aretebece FROM tbecerros WHERE idbece IN ({marcadores}))
+                """, lote)
+                conexion.execute(f"DELETE FROM tbecerros WHERE idbece IN ({marcadores})", lote)
+                hechos += len(lote)
+                if progreso:
+                    progreso(hechos, total)
+            if cancelada and cancelada():
+                raise PromocionCancelada()
+
+        print(f"✅ BD - Destete: {hechos} becerros promovidos a ganado, "
+              f"{len(seleccion['duplicados'])} omitidos por arete duplicado")
+        return {'promovidos': hechos, 'duplicados': seleccion['duplicados']}
+
+    # MÉTODOS PARA PAGINACIÓN
+    def paginar_becerros(self, orden="idbece", descendente=False, tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """Cursor por páginas sobre tbecerros (mismas columnas que obtener_becerros)"""
+        return CursorPaginado(self, "tbecerros", COLUMNAS_BECERROS, "idbece", orden, descendente, tamano_pagina)
+
+    def paginar_animales(self, orden="idgdo", descendente=False, tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """Cursor por páginas sobre tganado (mismas columnas que obtener_animales)"""
+        return CursorPaginado(self, "tganado", COLUMNAS_ANIMALES, "idgdo", orden, descendente, tamano_pagina)
+
+    def paginar_registros_salud(self, orden="fecharev", descendente=True, tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """Cursor por páginas sobre tsalud (mismas columnas que obtener_todos_registros_salud)"""
+        return CursorPaginado(self, "tsalud", COLUMNAS_SALUD, "idsalud", orden, descendente, tamano_pagina)
+
+    def paginar_registros_reproduccion(self, orden="fservicioactual", descendente=True,
+                                       tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """Cursor por páginas sobre treprod (mismas columnas que obtener_todos_registros_reproduccion)"""
+        return CursorPaginado(self, "treprod", COLUMNAS_REPRODUCCION, "idreprod", orden, descendente, tamano_pagina)
+
+    def paginar_propietarios(self, orden="idprop", descendente=False, tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """Cursor por páginas sobre tpropietarios (mismas columnas que obtener_propietarios_completos)"""
+        return CursorPaginado(self, "tpropietarios", COLUMNAS_PROPIETARIOS, "idprop", orden, descendente, tamano_pagina)
+
+    def paginar_usuarios(self, orden="idusuario", descendente=True, tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """Cursor por páginas sobre tusuarios (mismas columnas que obtener_usuarios)"""
+        return CursorPaginado(self, "tusuarios", COLUMNAS_USUARIOS, "idusuario", orden, descendente, tamano_pagina)
+
+    def paginar_bitacora(self, fecha_desde=None, fecha_hasta=None, usuario=None, modulo=None, accion=None,
+                         arete=None, tamano_pagina=TAMANO_PAGINA) -> CursorPaginado:
+        """
+        Cursor por páginas sobre tbitacora, del más reciente al más antiguo. Los filtros se
+        comparan sobre la columna tal cual (fechas yyyy-MM-dd, ambas incluidas) para que
+        SQLite use los índices idx_tbitacora_*
+        """
+        condiciones = ["fecha IS NOT NULL"]
+        parametros = []
+        if fecha_desde:
+            condiciones.append("fecha >= ?")
+            parametros.append(fecha_desde)
+        if fecha_hasta:
+            condiciones.append("fecha < date(?, '+1 day')")
+            parametros.append(fecha_hasta)
+        for columna, valor in (("usuario", usuario), ("modulo", modulo), ("accion", accion),
+                               ("arete_afectado", arete)):
+            if valor:
+                condiciones.append(f"{columna} = ?")
+                parametros.append(valor)
+        return CursorPaginado(self, "tbitacora", COLUMNAS_BITACORA, "idbitacora", "fecha", True, tamano_pagina,
+                              " AND ".join(condiciones), parametros, sin_nulos=("fecha",))
+
+    def obtener_valores_filtro_bitacora(self) -> dict:
+        """Usuarios, módulos y acciones que aparecen en la bitácora (leídos de los índices, no de la tabla)"""
+        valores = {'usuarios': [], 'modulos': [], 'acciones': []}
         try:
-            print(f"🔍 BD - Buscando animales en todos los campos: '{texto}'")
-    
-            texto_like = f'%{texto}%'
-    
+            cursor = self.connection.cursor()
+            cursor.execute("SELECT DISTINCT usuario FROM tbitacora WHERE usuario IS NOT NULL ORDER BY usuario")
+            valores['usuarios'] = [fila[0] for fila in cursor.fetchall()]
+            cursor.execute("SELECT DISTINCT modulo, accion FROM tbitacora WHERE modulo IS NOT NULL")
+            pares = cursor.fetchall()
+            valores['modulos'] = sorted({modulo for modulo, _ in pares})
+            valores['acciones'] = sorted({accion for _, accion in pares if accion})
+        except sqlite3.Error as e:
+            print(f"❌ BD - Error leyendo filtros de bitácora: {e}")
+        return valores
+
+    # MÉTODOS PARA ESTADÍSTICAS
+    def obtener_estadisticas_rebano(self) -> dict:
+        """Obtiene todos los contadores del panel principal con una sola consulta agrupada"""
+        estadisticas = {
+            'total_animales': 0,
+            'total_becerros': 0,
+            'total_ganado': 0,
+            'machos': 0,
+            'hembras': 0,
+        }
+        try:
+            # El sexo se normaliza en SQL; las columnas BLOB nunca se leen
             query = """
-            SELECT idgdo, aretegdo, nombregdo, corralgdo, sexogdo, razagdo, prodgdo, 
-                alimentogdo, nacimientogdo, estatusgdo, observaciongdo, fotogdo
-            FROM tganado
-            WHERE aretegdo LIKE ? OR 
-                nombregdo LIKE ? OR 
-                corralgdo LIKE ? OR 
-                sexogdo LIKE ? OR 
-                razagdo LIKE ? OR 
-                prodgdo LIKE ? OR 
-                alimentogdo LIKE ? OR 
-                estatusgdo LIKE ? OR 
-                observaciongdo LIKE ? OR
-                nacimientogdo LIKE ?  -- ✅ INCLUYE FECHA DE NACIMIENTO
+            SELECT origen,
+                   CASE
+                       WHEN LOWER(TRIM(sexo)) IN ('macho', 'm', 'male') THEN 'machos'
+                       WHEN LOWER(TRIM(sexo)) IN ('hembra', 'h', 'f', 'female') THEN 'hembras'
+                       ELSE 'otro'
+                   END AS sexo_normalizado,
+                   COUNT(*)
+            FROM (
+                SELECT 'total_animales' AS origen, sexogdo AS sexo FROM tganado
+                UNION ALL
+                SELECT 'total_becerros' AS origen, sexobece AS sexo FROM tbecerros
+            )
+            GROUP BY origen, sexo_normalizado
             """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like  # ✅ 10 parámetros
-            ))
-    
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} animales encontrados en búsqueda múltiple")
-                return resultados
-            return []
-    
-        except Exception as e:
-            print(f"❌ BD - Error en buscar_animales_en_todos_los_campos: {e}")
-            return []
+            cursor = self.ejecutar_consulta(query)
+            if not cursor:
+                print("❌ BD - Error: cursor es None en obtener_estadisticas_rebano")
+                return estadisticas
 
-    def eliminar_animal_por_arete(self, arete: str) -> bool:
-        """Elimina un registro de la tabla tganado por arete y sus registros relacionados"""
-        try:
-            print(f"🗑️ BD - Intentando eliminar animal y registros relacionados por arete: {arete}")
-        
-        # 1. PRIMERO: Eliminar registros de salud relacionados
-            print("🗑️ BD - Eliminando registros de salud relacionados...")
-            self.eliminar_registros_salud_por_arete(arete)
-        
-        # 2. SEGUNDO: Eliminar registros de reproducción relacionados  
-            print("🗑️ BD - Eliminando registros de reproducción relacionados...")
-            self.eliminar_registros_reproduccion_por_arete(arete)
-        
-        # 3. FINALMENTE: Eliminar el animal
-            print("🗑️ BD - Eliminando animal...")
-            query = "DELETE FROM tganado WHERE aretegdo = ?"
-            cursor = self.ejecutar_consulta(query, (arete,))
-        
-            if cursor:
-                filas_afectadas = cursor.rowcount
-                print(f"🗑️ BD - Animal eliminado. Filas afectadas: {filas_afectadas}")
-                return filas_afectadas > 0
-            else:
-                print("🗑️ BD - Error: cursor es None")
-                return False
+            for origen, sexo, cantidad in cursor.fetchall():
+                estadisticas[origen] += cantidad
+                if sexo in ('machos', 'hembras'):
+                    estadisticas[sexo] += cantidad
+
+            estadisticas['total_ganado'] = estadisticas['total_animales'] + estadisticas['total_becerros']
+            print(f"📊 BD - Estadísticas del rebaño: {estadisticas}")
+            return estadisticas
         except Exception as e:
-            print(f"🗑️ BD - Error en eliminar_animal_por_arete: {e}")
-            return False
+            print(f"❌ BD - Error en obtener_estadisticas_rebano: {e}")
+            return estadisticas
 
     # MÉTODOS PARA SALUD
     def obtener_archivo_salud(self, id_salud: int) -> Optional[bytes]:
         """Obtiene el archivo asociado a un registro de salud"""
-        query = "SELECT archivo FROM tsalud WHERE id_salud = ?"
+        query = f"SELECT {sql_contenido_archivo('tsalud')} FROM tsalud WHERE idsalud = ?"
         cursor = self.ejecutar_consulta(query, (id_salud,))
         if cursor:
             resultado = cursor.fetchone()
@@ -774,32 +2043,9 @@ class Database:
         """Busca corrales en todos los campos de la tabla tcorral"""
         try:
             print(f"🔍 BD - Buscando corrales en todos los campos: '{texto}'")
-    
-            texto_like = f'%{texto}%'
-    
-            query = """
-            SELECT identcorral, nomcorral, ubicorral, capmax, capactual, 
-                fechamant, condicion, observacioncorral
-            FROM tcorral
-            WHERE nomcorral LIKE ? OR 
-                ubicorral LIKE ? OR 
-                capmax LIKE ? OR 
-                capactual LIKE ? OR 
-                fechamant LIKE ? OR 
-                condicion LIKE ? OR 
-                observacioncorral LIKE ?
-            """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like, texto_like
-            ))
-    
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} corrales encontrados en búsqueda múltiple")
-                return resultados
-            return []
-    
+            resultados = self.buscar_en_todos_los_campos("tcorral", COLUMNAS_CORRALES, texto)
+            print(f"✅ BD - {len(resultados)} corrales encontrados en búsqueda múltiple")
+            return resultados
         except Exception as e:
             print(f"❌ BD - Error en buscar_corrales_en_todos_los_campos: {e}")
             return []
@@ -829,7 +2075,7 @@ class Database:
         try:
             print("🔍 BD - Ejecutando consulta para obtener propietarios completos...")
             query = """
-            SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, fotoprop
+            SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, hashfotoprop
             FROM tpropietarios
             """
             cursor = self.ejecutar_consulta(query)
@@ -847,7 +2093,7 @@ class Database:
     def obtener_propietario_por_id(self, idpropietario: str) -> Optional[Tuple]:
         """Obtiene un propietario por su ID"""
         query = """
-        SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, fotoprop
+        SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, hashfotoprop
         FROM tpropietarios
         WHERE idprop = ?
         """
@@ -860,7 +2106,7 @@ class Database:
         """Obtiene la foto de un propietario por su ID"""
         try:
             print(f"🔍 BD - Buscando foto para propietario ID: {idpropietario}")
-            query = "SELECT fotoprop FROM tpropietarios WHERE idprop = ?"
+            query = f"SELECT {sql_contenido_archivo('tpropietarios')} FROM tpropietarios WHERE idprop = ?"
             cursor = self.ejecutar_consulta(query, (idpropietario,))
             
             if cursor:
@@ -883,32 +2129,9 @@ class Database:
         """Busca propietarios en todos los campos de la tabla tpropietarios"""
         try:
             print(f"🔍 BD - Buscando propietarios en todos los campos: '{texto}'")
-    
-            texto_like = f'%{texto}%'
-    
-            query = """
-            SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, fotoprop
-            FROM tpropietarios
-            WHERE nombreprop LIKE ? OR 
-                telprop LIKE ? OR 
-                correoprop LIKE ? OR 
-                dirprop LIKE ? OR 
-                psgprop LIKE ? OR 
-                uppprop LIKE ? OR 
-                rfcprop LIKE ? OR 
-                observacionprop LIKE ?
-            """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like, texto_like, texto_like
-            ))
-    
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} propietarios encontrados en búsqueda múltiple")
-                return resultados
-            return []
-    
+            resultados = self.buscar_en_todos_los_campos("tpropietarios", COLUMNAS_PROPIETARIOS, texto)
+            print(f"✅ BD - {len(resultados)} propietarios encontrados en búsqueda múltiple")
+            return resultados
         except Exception as e:
             print(f"❌ BD - Error en buscar_propietarios_en_todos_los_campos: {e}")
             return []
@@ -979,7 +2202,7 @@ class Database:
                     print(f"   - {col[1]} ({col[2]})")
             
             # Contar registros con fotos
-            query_fotos = "SELECT COUNT(*) FROM tbecerros WHERE fotobece IS NOT NULL"
+            query_fotos = "SELECT COUNT(*) FROM tbecerros WHERE hashfotobece IS NOT NULL"
             cursor_fotos = self.ejecutar_consulta(query_fotos)
             if cursor_fotos:
                 count_fotos = cursor_fotos.fetchone()[0]
@@ -1041,12 +2264,12 @@ class Database:
             # 3. Verificar fotos específicamente
             print("\n🖼️  3. INFORMACIÓN DE FOTOS:")
             query_fotos = """
-            SELECT idbece, aretebece, 
-                   CASE WHEN fotobece IS NULL THEN 'NULL' 
-                        WHEN fotobece = '' THEN 'VACÍO' 
+            SELECT b.idbece, b.aretebece, 
+                   CASE WHEN b.hashfotobece IS NULL THEN 'NULL' 
+                        WHEN a.hash IS NULL THEN 'SIN ARCHIVO' 
                         ELSE 'CON DATOS' END as estado_foto,
-                   LENGTH(fotobece) as tamaño_bytes
-            FROM tbecerros
+                   a.tamano as tamaño_bytes
+            FROM tbecerros b LEFT JOIN tarchivos a ON a.hash = b.hashfotobece
             """
             cursor_fotos = self.ejecutar_consulta(query_fotos)
             if cursor_fotos:
@@ -1119,26 +2342,23 @@ class Database:
     # MÉTODOS PARA PROPIETARIOS - INSERTAR Y ACTUALIZAR
     def insertar_propietario(self, nombre: str, telefono: str, correo: str = None, direccion: str = None,
                             psg: str = None, upp: str = None, rfc: str = None, observaciones: str = None,
-                            foto: bytes = None) -> bool:
+                            foto: bytes = None, miniatura: bytes = None) -> bool:
         """Inserta un nuevo propietario en la tabla tpropietarios"""
         try:
             print(f"💾 BD - Insertando nuevo propietario: {nombre}")
             
             query = """
             INSERT INTO tpropietarios 
-            (nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, fotoprop)
+            (nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, hashfotoprop)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """
-            params = (nombre, telefono, correo, direccion, psg, upp, rfc, observaciones, foto)
-            
-            cursor = self.ejecutar_consulta(query, params)
-            
-            if cursor:
-                print(f"✅ Propietario insertado correctamente: {nombre}")
-                return True
-            else:
-                print(f"❌ Error al insertar propietario: {nombre}")
-                return False
+            with self.transaccion():
+                params = (nombre, telefono, correo, direccion, psg, upp, rfc, observaciones,
+                          self.guardar_archivo(foto))
+                cursor = self.ejecutar_consulta(query, params)
+                self._guardar_miniatura_de_ingesta("propietario", cursor.lastrowid, foto, miniatura)
+            print(f"✅ Propietario insertado correctamente: {nombre}")
+            return True
                 
         except Exception as e:
             print(f"❌ Error en insertar_propietario: {e}")
@@ -1146,7 +2366,7 @@ class Database:
 
     def actualizar_propietario(self, id_propietario: str, nombre: str, telefono: str, correo: str = None, 
                               direccion: str = None, psg: str = None, upp: str = None, rfc: str = None, 
-                              observaciones: str = None, foto: bytes = None) -> bool:
+                              observaciones: str = None, foto: bytes = None, miniatura: bytes = None) -> bool:
         """Actualiza un propietario en la base de datos"""
         try:
             print(f"💾 BD - Actualizando propietario: {nombre} (ID: {id_propietario})")
@@ -1154,20 +2374,17 @@ class Database:
             query = """
             UPDATE tpropietarios 
             SET nombreprop = ?, telprop = ?, correoprop = ?, dirprop = ?, 
-                psgprop = ?, uppprop = ?, rfcprop = ?, observacionprop = ?, fotoprop = ?
+                psgprop = ?, uppprop = ?, rfcprop = ?, observacionprop = ?, hashfotoprop = ?, fotoprop = NULL
             WHERE idprop = ?
             """
-            params = (nombre, telefono, correo, direccion, psg, upp, rfc, observaciones, foto, id_propietario)
-            
-            cursor = self.ejecutar_consulta(query, params)
-            
-            if cursor:
-                filas_afectadas = cursor.rowcount
-                print(f"✅ Propietario actualizado: {nombre}. Filas afectadas: {filas_afectadas}")
-                return filas_afectadas > 0
-            else:
-                print(f"❌ Error al actualizar propietario: cursor es None")
-                return False
+            with self.transaccion():
+                params = (nombre, telefono, correo, direccion, psg, upp, rfc, observaciones,
+                          self.guardar_archivo(foto), id_propietario)
+                filas_afectadas = self.ejecutar_consulta(query, params).rowcount
+                if filas_afectadas:
+                    self._guardar_miniatura_de_ingesta("propietario", id_propietario, foto, miniatura)
+            print(f"✅ Propietario actualizado: {nombre}. Filas afectadas: {filas_afectadas}")
+            return filas_afectadas > 0
                 
         except Exception as e:
             print(f"❌ Error al actualizar propietario: {e}")
@@ -1177,8 +2394,9 @@ class Database:
     def obtener_propietario_por_id_dict(self, idpropietario: str) -> Optional[dict]:
         """Obtiene un propietario por su ID y devuelve un diccionario"""
         try:
-            query = """
-            SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop, fotoprop
+            query = f"""
+            SELECT idprop, nombreprop, telprop, correoprop, dirprop, psgprop, uppprop, rfcprop, observacionprop,
+                   {sql_contenido_archivo("tpropietarios")}
             FROM tpropietarios
             WHERE idprop = ?
             """
@@ -1308,7 +2526,7 @@ class Database:
             
             query = """
             SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
+                   medprev, condicionsalud, fecharev, observacionsalud, hasharchivo
             FROM tsalud 
             WHERE areteanimal = ?
             ORDER BY fecharev DESC
@@ -1337,11 +2555,11 @@ class Database:
         try:
             print(f"🔍 BD - Buscando en arete específico '{arete_animal}' con texto: '{texto}'")
 
-            texto_like = f'%{texto}%'
+            texto_like = f'%{texto_de_busqueda(texto)}%'
     
             query = """
             SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
+                   medprev, condicionsalud, fecharev, observacionsalud, hasharchivo
             FROM tsalud
             WHERE areteanimal = ? AND (
                 tipoanimal LIKE ? OR 
@@ -1386,15 +2604,9 @@ class Database:
     def obtener_todos_registros_salud(self):
         """Obtiene todos los registros de salud"""
         try:
-            # Verificar si la tabla existe
-            tablas = self.listar_tablas()
-            if 'tsalud' not in tablas:
-                print("❌ La tabla 'tsalud' no existe")
-                return []
-                
             query = """
             SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
+                   medprev, condicionsalud, fecharev, observacionsalud, hasharchivo
             FROM tsalud 
             ORDER BY fecharev DESC
             """
@@ -1413,7 +2625,7 @@ class Database:
         try:
             query = """
             SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
+                   medprev, condicionsalud, fecharev, observacionsalud, hasharchivo
             FROM tsalud 
             WHERE areteanimal LIKE ? OR nomvet LIKE ? OR procedimiento LIKE ? 
                OR condicionsalud LIKE ? OR observacionsalud LIKE ? OR tipoanimal LIKE ?
@@ -1467,12 +2679,6 @@ class Database:
     def obtener_todos_registros_reproduccion(self):
         """Obtiene todos los registros de la tabla treprod"""
         try:
-            # Verificar si la tabla existe
-            tablas = self.listar_tablas()
-            if 'treprod' not in tablas:
-                print("❌ La tabla 'treprod' no existe")
-                return []
-                
             query = """
             SELECT idreprod, areteanimal, cargada, cantpartos, fservicioactual, 
                    faproxparto, fnuevoservicio, tecnica, observacion
@@ -1544,7 +2750,7 @@ class Database:
             WHERE fservicioactual BETWEEN ? AND ?
             ORDER BY fservicioactual DESC
             """
-            cursor = self.ejecutar_consulta(query, (fecha_inicio, fecha_fin))
+            cursor = self.ejecutar_consulta(query, (a_iso(fecha_inicio), a_iso(fecha_fin)))
             if cursor:
                 return cursor.fetchall()
             return []
@@ -1592,7 +2798,7 @@ class Database:
         try:
             print(f"🔍 BD - Buscando en arete específico '{arete_animal}' con texto: '{texto}'")
 
-            texto_like = f'%{texto}%'
+            texto_like = f'%{texto_de_busqueda(texto)}%'
     
             query = """
             SELECT idreprod, areteanimal, cargada, cantpartos, fservicioactual, 
@@ -1649,11 +2855,7 @@ class Database:
             ORDER BY fservicioactual DESC
             """
         
-            if not self.connection:
-                self.connect()
-            
-            cursor = self.connection.cursor()
-            cursor.execute(query, (arete_animal.strip(), fecha_inicio, fecha_fin))
+            cursor = self.connection.execute(query, (arete_animal.strip(), a_iso(fecha_inicio), a_iso(fecha_fin)))
             resultados = cursor.fetchall()
         
             print(f"✅ BD - {len(resultados)} registros encontrados para arete '{arete_animal}' en el rango de fechas")
@@ -1663,50 +2865,20 @@ class Database:
             print(f"❌ BD - Error en obtener_registros_reproduccion_por_arete_y_fecha: {e}")
             return []
         
-    def obtener_registros_salud_por_arete_y_fecha(self, arete_animal: str, fecha_inicio: str, fecha_fin: str) -> List[Tuple]:
-        """Obtiene registros de salud por rango de fechas SOLO para un arete específico"""
-        try:
-            print(f"🔍 BD - Filtrando por fecha para arete específico '{arete_animal}': {fecha_inicio} a {fecha_fin}")
-        
-            query = """
-            SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
-            FROM tsalud 
-            WHERE areteanimal = ? AND fecharev BETWEEN ? AND ?
-            ORDER BY fecharev DESC
-            """
-        
-            if not self.connection:
-                self.connect()
-            
-            cursor = self.connection.cursor()
-            cursor.execute(query, (arete_animal.strip(), fecha_inicio, fecha_fin))
-            resultados = cursor.fetchall()
-        
-            print(f"✅ BD - {len(resultados)} registros encontrados para arete '{arete_animal}' en el rango de fechas")
-            return resultados
-        
-        except Exception as e:
-            print(f"❌ BD - Error en obtener_registros_salud_por_arete_y_fecha: {e}")
-            return []
-
     def obtener_registros_salud_por_fecha(self, fecha_inicio, fecha_fin):
         """Obtiene registros de salud por rango de fechas - MEJORADO"""
         try:
             print(f"🔍 BD - Buscando registros entre {fecha_inicio} y {fecha_fin}")
             
-            fecha_inicio_bd = self.convertir_fecha_a_formato_bd(fecha_inicio)
-            fecha_fin_bd = self.convertir_fecha_a_formato_bd(fecha_fin)
-        
+            # Fechas ISO: el rango se resuelve con el índice idx_tsalud_fecha
             query = """
             SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
+                   medprev, condicionsalud, fecharev, observacionsalud, hasharchivo
             FROM tsalud 
             WHERE fecharev BETWEEN ? AND ?
-            ORDER BY 
-                substr(fecharev, 7, 4) || substr(fecharev, 4, 2) || substr(fecharev, 1, 2) DESC
+            ORDER BY fecharev DESC
             """
-            cursor = self.ejecutar_consulta(query, (fecha_inicio_bd, fecha_fin_bd))
+            cursor = self.ejecutar_consulta(query, (a_iso(fecha_inicio), a_iso(fecha_fin)))
             if cursor:
                 resultados = cursor.fetchall()
                 print(f"✅ BD - {len(resultados)} registros encontrados por fecha")
@@ -1721,23 +2893,16 @@ class Database:
         try:
             print(f"🔍 BD - Buscando registros para arete '{arete_animal}' entre {fecha_inicio} y {fecha_fin}")
 
-            fecha_inicio_bd = self.convertir_fecha_a_formato_bd(fecha_inicio)
-            fecha_fin_bd = self.convertir_fecha_a_formato_bd(fecha_fin)
-        
+            # Fechas ISO: arete y rango se resuelven con el índice idx_tsalud_arete_fecha
             query = """
             SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
+                   medprev, condicionsalud, fecharev, observacionsalud, hasharchivo
             FROM tsalud 
             WHERE areteanimal = ? AND fecharev BETWEEN ? AND ?
-            ORDER BY 
-                substr(fecharev, 7, 4) || substr(fecharev, 4, 2) || substr(fecharev, 1, 2) DESC
+            ORDER BY fecharev DESC
             """
         
-            if not self.connection:
-                self.connect()
-        
-            cursor = self.connection.cursor()
-            cursor.execute(query, (arete_animal.strip(), fecha_inicio_bd, fecha_fin_bd))
+            cursor = self.connection.execute(query, (arete_animal.strip(), a_iso(fecha_inicio), a_iso(fecha_fin)))
             resultados = cursor.fetchall()
         
             print(f"✅ BD - {len(resultados)} registros encontrados para arete '{arete_animal}' en el rango de fechas")
@@ -1747,95 +2912,6 @@ class Database:
             print(f"❌ BD - Error en obtener_registros_salud_por_arete_y_fecha: {e}")
             return []
 
-    def convertir_fecha_a_formato_bd(self, fecha_iso: str) -> str:
-        """Convierte fecha de formato yyyy-MM-dd a dd/MM/yyyy"""
-        try:
-        # Parsear fecha ISO (yyyy-MM-dd)
-            partes = fecha_iso.split('-')
-            if len(partes) == 3:
-                año, mes, dia = partes
-            # Convertir a formato BD (dd/MM/yyyy)
-                return f"{int(dia)}/{int(mes)}/{año}"
-            return fecha_iso
-        except Exception as e:
-            print(f"❌ Error convirtiendo fecha {fecha_iso}: {e}")
-            return fecha_iso
-
-    def verificar_tabla_usuarios(self):
-        """Verifica si la tabla de usuarios existe y la crea si no, con la estructura correcta"""
-        try:
-            print("🔍 Verificando tabla de usuarios...")
-            
-            # Verificar si la tabla existe
-            query = "SELECT name FROM sqlite_master WHERE type='table' AND name='tusuarios'"
-            cursor = self.ejecutar_consulta(query)
-            
-            if cursor:
-                tabla_existe = cursor.fetchone() is not None
-                
-                if not tabla_existe:
-                    print("🔧 La tabla 'tusuarios' no existe, creándola...")
-                    query_crear = """
-                    CREATE TABLE tusuarios (
-                        idusuario INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nombre TEXT NOT NULL,
-                        usuario TEXT UNIQUE NOT NULL,
-                        rol TEXT NOT NULL,
-                        telefono TEXT,
-                        pass TEXT NOT NULL
-                    )
-                    """
-                    cursor_crear = self.ejecutar_consulta(query_crear)
-                    if cursor_crear:
-                        print("✅ Tabla 'tusuarios' creada exitosamente")
-                        return True
-                    else:
-                        print("❌ Error al crear tabla 'tusuarios'")
-                        return False
-                else:
-                    print("✅ Tabla 'tusuarios' ya existe")
-                    # Verificar la estructura de la tabla
-                    return self.verificar_estructura_tusuarios()
-            else:
-                print("❌ Error al verificar existencia de tabla")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Error verificando tabla usuarios: {e}")
-            return False
-
-    def verificar_estructura_tusuarios(self):
-        """Verifica que la tabla tusuarios tenga la estructura correcta"""
-        try:
-            print("🔍 Verificando estructura de tabla tusuarios...")
-            
-            query = "PRAGMA table_info(tusuarios)"
-            cursor = self.ejecutar_consulta(query)
-            
-            if cursor:
-                columnas = cursor.fetchall()
-                columnas_esperadas = ['idusuario', 'nombre', 'usuario', 'rol', 'telefono', 'pass']
-                columnas_actuales = [col[1] for col in columnas]
-                
-                print(f"📋 Columnas actuales: {columnas_actuales}")
-                print(f"📋 Columnas esperadas: {columnas_esperadas}")
-                
-                # Verificar que todas las columnas esperadas existan
-                for col_esperada in columnas_esperadas:
-                    if col_esperada not in columnas_actuales:
-                        print(f"❌ Columna faltante: {col_esperada}")
-                        return False
-                
-                print("✅ Estructura de tabla correcta")
-                return True
-            else:
-                print("❌ Error al obtener estructura de tabla")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Error verificando estructura: {e}")
-            return False
-
     def diagnostico_completo_usuarios(self):
         """Diagnóstico completo de la tabla de usuarios"""
         try:
@@ -1937,27 +3013,9 @@ class Database:
         """Busca usuarios en todos los campos de la tabla tusuarios"""
         try:
             print(f"🔍 BD - Buscando usuarios en todos los campos: '{texto}'")
-    
-            texto_like = f'%{texto}%'
-    
-            query = """
-            SELECT idusuario, usuario, nombre, telefono, rol
-            FROM tusuarios
-            WHERE usuario LIKE ? OR 
-                nombre LIKE ? OR 
-                telefono LIKE ? OR 
-                rol LIKE ?
-            """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like
-            ))
-    
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} usuarios encontrados en búsqueda múltiple")
-                return resultados
-            return []
-    
+            resultados = self.buscar_en_todos_los_campos("tusuarios", COLUMNAS_USUARIOS, texto)
+            print(f"✅ BD - {len(resultados)} usuarios encontrados en búsqueda múltiple")
+            return resultados
         except Exception as e:
             print(f"❌ BD - Error en buscar_usuarios_en_todos_los_campos: {e}")
             return []
@@ -2011,49 +3069,6 @@ class Database:
             print(f"❌ Error verificando credenciales: {e}")
             return None
 
-    def verificar_tabla_usuarios(self):
-        """Verifica si la tabla de usuarios existe y la crea si no (sin usuario por defecto)"""
-        try:
-            print("🔍 Verificando tabla de usuarios...")
-            
-            # Verificar si la tabla existe
-            query = "SELECT name FROM sqlite_master WHERE type='table' AND name='tusuarios'"
-            cursor = self.ejecutar_consulta(query)
-            
-            if cursor:
-                tabla_existe = cursor.fetchone() is not None
-                
-                if not tabla_existe:
-                    print("🔧 La tabla 'tusuarios' no existe, creándola...")
-                    query_crear = """
-                    CREATE TABLE tusuarios (
-                        idusuario INTEGER PRIMARY KEY AUTOINCREMENT,
-                        nombre TEXT NOT NULL,
-                        usuario TEXT UNIQUE NOT NULL,
-                        rol TEXT NOT NULL,
-                        telefono TEXT,
-                        pass TEXT NOT NULL
-                    )
-                    """
-                    cursor_crear = self.ejecutar_consulta(query_crear)
-                    if cursor_crear:
-                        print("✅ Tabla 'tusuarios' creada exitosamente")
-                        return True
-                    else:
-                        print("❌ Error al crear tabla 'tusuarios'")
-                        return False
-                else:
-                    print("✅ Tabla 'tusuarios' ya existe")
-                    # Verificar la estructura de la tabla
-                    return self.verificar_estructura_tusuarios()
-            else:
-                print("❌ Error al verificar existencia de tabla")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Error verificando tabla usuarios: {e}")
-            return False
-
     def obtener_usuario_por_id(self, id_usuario: int) -> Optional[Tuple]:
         """Obtiene un usuario por su ID"""
         try:
@@ -2140,83 +3155,13 @@ class Database:
                 
         except Exception as e:
             print(f"❌ Error en diagnóstico: {e}")
-# En tu database.py, agrega este método para actualizar la tabla de bitácora
-
-    def actualizar_tabla_bitacora(self):
-        """Actualizar la tabla de bitácora con las columnas necesarias"""
-        try:
-            print("🔧 Actualizando estructura de tabla bitácora...")
-            
-            # Verificar si la tabla existe y obtener su estructura
-            query = "PRAGMA table_info(tbitacora)"
-            cursor = self.ejecutar_consulta(query)
-            
-            if not cursor:
-                print("❌ No se puede acceder a la estructura de tbitacora (cursor es None)")
-                return False
-            
-            columnas = cursor.fetchall()
-            columnas_existentes = [col[1] for col in columnas]
-            
-            # Agregar columna arete_afectado si no existe
-            if 'arete_afectado' not in columnas_existentes:
-                print("🔧 Agregando columna 'arete_afectado' a tbitacora...")
-                query_alter = "ALTER TABLE tbitacora ADD COLUMN arete_afectado TEXT"
-                cursor_alter = self.ejecutar_consulta(query_alter)
-                if cursor_alter:
-                    print("✅ Columna 'arete_afectado' agregada correctamente")
-                else:
-                    print("❌ Error al agregar columna 'arete_afectado'")
-            
-            # También verificar otras columnas que puedan faltar
-            columnas_necesarias = ['fecha', 'usuario', 'modulo', 'accion', 'descripcion', 'detalles', 'arete_afectado']
-            
-            for columna in columnas_necesarias:
-                if columna not in columnas_existentes:
-                    print(f"🔧 Agregando columna '{columna}' a tbitacora...")
-                    query_alter = f"ALTER TABLE tbitacora ADD COLUMN {columna} TEXT"
-                    cursor_alter = self.ejecutar_consulta(query_alter)
-                    if cursor_alter:
-                        print(f"✅ Columna '{columna}' agregada correctamente")
-                    else:
-                        print(f"❌ Error al agregar columna '{columna}'")
-            
-            return True
-        except Exception as e:
-            print(f"❌ Error actualizando tabla bitácora: {e}")
-            return False
-
     def buscar_registros_salud_en_todos_los_campos(self, texto: str) -> List[Tuple]:
         """Busca registros de salud en todos los campos de la tabla tsalud"""
         try:
             print(f"🔍 BD - Buscando registros de salud en todos los campos: '{texto}'")
-
-            texto_like = f'%{texto}%'
-    
-            query = """
-            SELECT idsalud, areteanimal, tipoanimal, nomvet, procedimiento, 
-                   medprev, condicionsalud, fecharev, observacionsalud, archivo
-            FROM tsalud
-            WHERE areteanimal LIKE ? OR 
-                tipoanimal LIKE ? OR 
-                nomvet LIKE ? OR 
-                procedimiento LIKE ? OR 
-                medprev LIKE ? OR 
-                condicionsalud LIKE ? OR 
-                observacionsalud LIKE ? OR
-                fecharev LIKE ?
-            """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like, texto_like, texto_like
-            ))
-    
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} registros de salud encontrados en búsqueda múltiple")
-                return resultados
-            return []
-    
+            resultados = self.buscar_en_todos_los_campos("tsalud", COLUMNAS_SALUD, texto)
+            print(f"✅ BD - {len(resultados)} registros de salud encontrados en búsqueda múltiple")
+            return resultados
         except Exception as e:
             print(f"❌ BD - Error en buscar_registros_salud_en_todos_los_campos: {e}")
             return []
@@ -2225,33 +3170,9 @@ class Database:
         """Busca registros de reproducción en todos los campos de la tabla treprod"""
         try:
             print(f"🔍 BD - Buscando registros de reproducción en todos los campos: '{texto}'")
-    
-            texto_like = f'%{texto}%'
-    
-            query = """
-            SELECT idreprod, areteanimal, cargada, cantpartos, fservicioactual, 
-                   faproxparto, fnuevoservicio, tecnica, observacion
-            FROM treprod
-            WHERE areteanimal LIKE ? OR 
-                cargada LIKE ? OR 
-                cantpartos LIKE ? OR 
-                fservicioactual LIKE ? OR 
-                faproxparto LIKE ? OR 
-                fnuevoservicio LIKE ? OR 
-                tecnica LIKE ? OR 
-                observacion LIKE ?
-            """
-            cursor = self.ejecutar_consulta(query, (
-                texto_like, texto_like, texto_like, texto_like, 
-                texto_like, texto_like, texto_like, texto_like
-            ))
-
-            if cursor:
-                resultados = cursor.fetchall()
-                print(f"✅ BD - {len(resultados)} registros de reproducción encontrados en búsqueda múltiple")
-                return resultados
-            return []
-    
+            resultados = self.buscar_en_todos_los_campos("treprod", COLUMNAS_REPRODUCCION, texto)
+            print(f"✅ BD - {len(resultados)} registros de reproducción encontrados en búsqueda múltiple")
+            return resultados
         except Exception as e:
             print(f"❌ BD - Error en buscar_registros_reproduccion_en_todos_los_campos: {e}")
             return []
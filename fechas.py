@@ -0,0 +1,73 @@
+import re
+from datetime import date, datetime
+
+# Las fechas se guardan como texto ISO-8601 (yyyy-MM-dd), que ordena y compara bien en SQLite
+# y permite usar índices en los filtros por rango. En pantalla se muestran como dd/MM/yyyy.
+FORMATO_PANTALLA = "%d/%m/%Y"
+FORMATO_PANTALLA_HORA = "%d/%m/%Y %H:%M"
+
+_ISO = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?")
+_DIA_MES_ANIO = re.compile(r"^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$")
+
+
+def _leer(texto):
+    """Devuelve (date o datetime) a partir de un texto ISO o d/m/yyyy; None si no es una fecha"""
+    texto = str(texto).strip()
+    try:
+        coincidencia = _ISO.match(texto)
+        if coincidencia:
+            anio, mes, dia, hora, minuto, segundo = coincidencia.groups()
+            if hora is not None:
+                return datetime(int(anio), int(mes), int(dia), int(hora), int(minuto), int(segundo or 0))
+            return date(int(anio), int(mes), int(dia))
+        coincidencia = _DIA_MES_ANIO.match(texto)
+        if coincidencia:
+            dia, mes, anio = coincidencia.groups()
+            return date(int(anio), int(mes), int(dia))
+    except ValueError:
+        return None
+    return None
+
+
+def a_iso(valor) -> str:
+    """Normaliza una fecha (ISO, d/m/yyyy, date o QDate ya convertido a texto) a yyyy-MM-dd"""
+    if valor is None or valor == "":
+        return ""
+    if isinstance(valor, (date, datetime)):
+        return valor.strftime("%Y-%m-%d")
+    fecha = _leer(valor)
+    if fecha is None:
+        return str(valor)
+    return fecha.strftime("%Y-%m-%d")
+
+
+def para_mostrar(valor) -> str:
+    """Texto de una fecha guardada tal como se muestra en tablas, diálogos y reportes"""
+    if valor is None or valor == "":
+        return ""
+    fecha = valor if isinstance(valor, (date, datetime)) else _leer(valor)
+    if fecha is None:
+        return str(valor)
+    if isinstance(fecha, datetime):
+        return fecha.strftime(FORMATO_PANTALLA_HORA)
+    return fecha.strftime(FORMATO_PANTALLA)
+
+
+def texto_de_busqueda(texto: str) -> str:
+    """Si lo que se escribió en un buscador es una fecha completa, la pasa a ISO para encontrarla"""
+    fecha = _leer(texto)
+    if fecha is None:
+        return texto
+    return fecha.strftime("%Y-%m-%d")
+
+
+def sql_a_iso(columna: str) -> str:
+    """
+    Expresión SQL (solo funciones nativas de SQLite, válida en triggers que ejecuta cualquier
+    cliente del archivo) que convierte un valor d/m/yyyy de la columna a yyyy-MM-dd
+    """
+    resto = f"substr({columna}, instr({columna}, '/') + 1)"
+    dia = f"CAST(substr({columna}, 1, instr({columna}, '/') - 1) AS INTEGER)"
+    mes = f"CAST(substr({resto}, 1, instr({resto}, '/') - 1) AS INTEGER)"
+    anio = f"CAST(substr({resto}, instr({resto}, '/') + 1) AS INTEGER)"
+    return f"printf('%04d-%02d-%02d', {anio}, {mes}, {dia})"
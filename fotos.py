@@ -0,0 +1,206 @@
+import os
+import sqlite3
+
+from PyQt5 import QtCore, QtGui
+
+from database import ARCHIVOS_EN_FILAS
+from miniaturas import miniatura_de_imagen
+
+# Lado mayor (px) con el que se guarda una foto; las de celular llegan de 4000 px o más
+LADO_MAXIMO = 1600
+# Peso máximo de la foto ya comprimida; se baja la calidad JPEG hasta entrar
+TAMANO_MAXIMO_FOTO = 400 * 1024
+CALIDAD_INICIAL = 85
+CALIDAD_MINIMA = 50
+# Archivos de entrada que ni se intentan abrir
+LIMITE_ENTRADA_IMAGEN = 40 * 1024 * 1024
+# Adjuntos que no son imagen (PDF) se guardan tal cual, hasta este tamaño
+LIMITE_ADJUNTO = 10 * 1024 * 1024
+
+FILTRO_IMAGENES = "Imágenes (*.png *.jpg *.jpeg *.bmp *.gif *.tiff *.webp);;Todos los archivos (*)"
+
+
+class ArchivoProcesado:
+    """Resultado de la ingesta: bytes a guardar y, si es foto, su miniatura para la tabla"""
+
+    def __init__(self, ruta, datos, miniatura=None, ancho=0, alto=0, tamano_original=0):
+        self.ruta = ruta
+        self.nombre = os.path.basename(ruta)
+        self.datos = datos
+        self.miniatura = miniatura
+        self.ancho = ancho
+        self.alto = alto
+        self.tamano_original = tamano_original
+
+    @property
+    def es_imagen(self):
+        return self.ancho > 0
+
+    def resumen(self):
+        """Texto corto para el log: tamaño original -> guardado"""
+        texto = f"{self.tamano_original / 1024:.0f} KB -> {len(self.datos) / 1024:.0f} KB"
+        if self.es_imagen:
+            texto += f" ({self.ancho}x{self.alto})"
+        return texto
+
+
+def _codificar_jpeg(imagen, calidad) -> bytes:
+    arreglo = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(arreglo)
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    imagen.save(buffer, "JPEG", calidad)
+    buffer.close()
+    return bytes(arreglo)
+
+
+def procesar_foto(ruta: str) -> ArchivoProcesado:
+    """
+    Decodifica la foto aplicando la orientación EXIF, la limita a LADO_MAXIMO, la vuelve a
+    comprimir como JPEG de peso acotado sin metadatos y genera la miniatura de la tabla.
+    Solo usa QImage (no QPixmap), así que puede correr en un hilo del pool.
+    Lanza ValueError con un mensaje para el usuario si el archivo no sirve.
+    """
+    tamano_original = os.path.getsize(ruta)
+    if tamano_original > LIMITE_ENTRADA_IMAGEN:
+        raise ValueError(f"La imagen no puede ser mayor a {LIMITE_ENTRADA_IMAGEN // (1024 * 1024)}MB")
+    return _procesar(QtGui.QImageReader(ruta), ruta, tamano_original)
+
+
+def procesar_datos_foto(datos: bytes, nombre: str = "") -> ArchivoProcesado:
+    """Igual que procesar_foto, para una foto que ya está en memoria (p. ej. guardada en la BD)"""
+    buffer = QtCore.QBuffer()
+    buffer.setData(datos)
+    buffer.open(QtCore.QIODevice.ReadOnly)
+    return _procesar(QtGui.QImageReader(buffer), nombre, len(datos))
+
+
+def _procesar(lector, ruta, tamano_original) -> ArchivoProcesado:
+    lector.setAutoTransform(True)  # gira según la orientación EXIF de la cámara
+    tamano = lector.size()
+    if tamano.isValid() and max(tamano.width(), tamano.height()) > LADO_MAXIMO:
+        # ✅ SE DECODIFICA YA REDUCIDA (JPEG escala al decodificar: menos memoria y tiempo)
+        lector.setScaledSize(tamano.scaled(LADO_MAXIMO, LADO_MAXIMO, QtCore.Qt.KeepAspectRatio))
+
+    leida = lector.read()
+    if leida.isNull():
+        raise ValueError(f"No se pudo leer la imagen: {lector.errorString()}")
+    if max(leida.width(), leida.height()) > LADO_MAXIMO:
+        leida = leida.scaled(LADO_MAXIMO, LADO_MAXIMO, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+
+    # Se copia sobre fondo blanco: quita la transparencia (JPEG no la tiene) y cualquier metadato
+    imagen = QtGui.QImage(leida.size(), QtGui.QImage.Format_RGB32)
+    imagen.fill(QtCore.Qt.white)
+    pintor = QtGui.QPainter(imagen)
+    pintor.drawImage(0, 0, leida)
+    pintor.end()
+
+    calidad = CALIDAD_INICIAL
+    datos = _codificar_jpeg(imagen, calidad)
+    while len(datos) > TAMANO_MAXIMO_FOTO and calidad > CALIDAD_MINIMA:
+        calidad -= 10
+        datos = _codificar_jpeg(imagen, calidad)
+
+    return ArchivoProcesado(ruta, datos, miniatura_de_imagen(imagen), imagen.width(), imagen.height(),
+                            tamano_original)
+
+
+def procesar_adjunto(ruta: str) -> ArchivoProcesado:
+    """Adjunto de salud: si es imagen pasa por procesar_foto; otro tipo (PDF) se guarda tal cual"""
+    if QtGui.QImageReader(ruta).canRead():
+        return procesar_foto(ruta)
+
+    tamano_original = os.path.getsize(ruta)
+    if tamano_original > LIMITE_ADJUNTO:
+        raise ValueError(f"El archivo no puede ser mayor a {LIMITE_ADJUNTO // (1024 * 1024)}MB")
+    with open(ruta, "rb") as archivo:
+        return ArchivoProcesado(ruta, archivo.read(), tamano_original=tamano_original)
+
+
+class _TareaIngesta(QtCore.QRunnable):
+    """Procesa un archivo en un hilo del QThreadPool"""
+
+    def __init__(self, procesador, generacion, ruta, funcion):
+        super().__init__()
+        self.procesador = procesador
+        self.generacion = generacion
+        self.ruta = ruta
+        self.funcion = funcion
+
+    def run(self):
+        try:
+            resultado, error = self.funcion(self.ruta), ""
+        except Exception as e:
+            print(f"❌ Error procesando {self.ruta}: {e}")
+            resultado, error = None, str(e)
+        try:
+            self.procesador._listo.emit(self.generacion, resultado, error)
+        except RuntimeError:
+            # El diálogo ya se cerró
+            pass
+
+
+class ProcesadorFotos(QtCore.QObject):
+    """
+    Corre procesar_foto/procesar_adjunto fuera del hilo de la interfaz.
+    terminado(ArchivoProcesado) o fallido(mensaje) llegan en el hilo de la interfaz;
+    si se elige otro archivo antes de terminar, solo se entrega el último.
+    """
+
+    terminado = QtCore.pyqtSignal(object)
+    fallido = QtCore.pyqtSignal(str)
+    _listo = QtCore.pyqtSignal(int, object, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._generacion = 0
+        self.ocupado = False
+        self._listo.connect(self._entregar, QtCore.Qt.QueuedConnection)
+
+    def procesar(self, ruta: str, adjunto: bool = False):
+        self._generacion += 1
+        self.ocupado = True
+        funcion = procesar_adjunto if adjunto else procesar_foto
+        QtCore.QThreadPool.globalInstance().start(_TareaIngesta(self, self._generacion, ruta, funcion))
+
+    def _entregar(self, generacion, resultado, error):
+        if generacion != self._generacion:
+            return
+        self.ocupado = False
+        if resultado is None:
+            self.fallido.emit(error)
+        else:
+            self.terminado.emit(resultado)
+
+
+def recomprimir_fotos_guardadas(db) -> int:
+    """
+    Pasa por procesar_datos_foto las imágenes ya guardadas en tarchivos que superan
+    TAMANO_MAXIMO_FOTO (fotos subidas antes de la ingesta) y apunta las filas a la versión
+    reducida; los triggers borran la original. Los adjuntos que no son imagen no se tocan.
+    Devuelve cuántos archivos se reemplazaron.
+    """
+    reemplazados = 0
+    grandes = db.connection.execute(
+        "SELECT hash FROM tarchivos WHERE tamano > ?", (TAMANO_MAXIMO_FOTO,)).fetchall()
+    for (hash_original,) in grandes:
+        datos = db.obtener_archivo(hash_original)
+        try:
+            foto = procesar_datos_foto(datos, hash_original[:12])
+        except ValueError:
+            continue  # PDF u otro adjunto
+        if len(foto.datos) >= len(datos):
+            continue
+
+        # La versión reducida y las filas que apuntan a ella se cambian juntas
+        try:
+            with db.transaccion() as conexion:
+                hash_nuevo = db.guardar_archivo(foto.datos)
+                for tabla, (_, _, columna_hash) in ARCHIVOS_EN_FILAS.items():
+                    conexion.execute(f"UPDATE {tabla} SET {columna_hash} = ? WHERE {columna_hash} = ?",
+                                     (hash_nuevo, hash_original))
+        except sqlite3.Error as e:
+            print(f"⚠️ Foto {hash_original[:12]} no recomprimida (se conserva la original): {e}")
+            continue
+        reemplazados += 1
+        print(f"🗜️ Foto {hash_original[:12]} recomprimida: {foto.resumen()}")
+    return reemplazados
@@ -0,0 +1,73 @@
+from PyQt5 import QtCore, QtGui
+
+TAMANO_MINIATURA = 60
+# Límite de la caché de pixmaps en KB (cada miniatura de 60x60 ocupa ~14 KB)
+LIMITE_CACHE_KB = 20 * 1024
+
+QtGui.QPixmapCache.setCacheLimit(max(QtGui.QPixmapCache.cacheLimit(), LIMITE_CACHE_KB))
+
+
+def generar_miniatura(datos: bytes, tamano: int = TAMANO_MINIATURA):
+    """Escala una foto a miniatura y la devuelve como PNG en bytes (None si no se puede leer)"""
+    imagen = QtGui.QImage()
+    if not imagen.loadFromData(datos):
+        return None
+    return miniatura_de_imagen(imagen, tamano)
+
+
+def miniatura_de_imagen(imagen, tamano: int = TAMANO_MINIATURA) -> bytes:
+    """Miniatura PNG de una QImage ya decodificada (se puede usar fuera del hilo de la interfaz)"""
+    imagen = imagen.scaled(tamano, tamano, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+
+    arreglo = QtCore.QByteArray()
+    buffer = QtCore.QBuffer(arreglo)
+    buffer.open(QtCore.QIODevice.WriteOnly)
+    imagen.save(buffer, "PNG")
+    buffer.close()
+    return bytes(arreglo)
+
+
+def obtener_miniaturas(db, entidad: str, fotos: dict) -> dict:
+    """
+    Devuelve {clave: QPixmap o None} para las fotos indicadas ({clave: hash de la foto en tarchivos}).
+    Orden de búsqueda: QPixmapCache -> tabla tminiaturas -> generar desde la foto original.
+    """
+    resultado = {}
+    claves_con_foto = [clave for clave, hash_foto in fotos.items() if hash_foto]
+    for clave, hash_foto in fotos.items():
+        if not hash_foto:
+            resultado[clave] = None
+
+    guardadas = db.obtener_miniaturas(entidad, claves_con_foto) if claves_con_foto else {}
+    nuevas = []
+
+    for clave in claves_con_foto:
+        hash_foto = fotos[clave]
+        pixmap = QtGui.QPixmapCache.find(f"{entidad}:{clave}:{hash_foto}")
+        if pixmap is not None and not pixmap.isNull():
+            resultado[clave] = pixmap
+            continue
+
+        hash_guardado, miniatura = guardadas.get(str(clave), (None, None))
+        if miniatura is None or hash_guardado != hash_foto:
+            # ✅ SOLO SE LEE Y ESCALA LA FOTO ORIGINAL UNA VEZ; DESPUÉS SE LEE DE tminiaturas
+            original = db.obtener_archivo(hash_foto)
+            miniatura = generar_miniatura(original) if original else None
+            if miniatura is None:
+                resultado[clave] = None
+                continue
+            nuevas.append((clave, hash_foto, miniatura))
+
+        pixmap = QtGui.QPixmap()
+        if not pixmap.loadFromData(miniatura):
+            resultado[clave] = None
+            continue
+        QtGui.QPixmapCache.insert(f"{entidad}:{clave}:{hash_foto}", pixmap)
+        resultado[clave] = pixmap
+
+    # Las generadas en esta pasada se guardan juntas (un solo commit, no uno por foto)
+    if nuevas:
+        db.guardar_miniaturas(entidad, nuevas)
+
+    return resultado
+
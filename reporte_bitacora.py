@@ -0,0 +1,150 @@
+import os
+from datetime import datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+from fechas import para_mostrar
+
+# Filas que se leen de la BD por vez
+FILAS_POR_LECTURA = 500
+# Filas por tabla: cerca de una página, así ReportLab nunca parte una tabla gigante
+FILAS_POR_TABLA = 40
+
+SQL_REGISTROS = """
+    SELECT fecha, usuario, modulo, accion, descripcion
+    FROM tbitacora
+    WHERE fecha >= ? AND fecha < date(?, '+1 day')
+    ORDER BY fecha DESC
+"""
+
+ENCABEZADO = ['Fecha/Hora', 'Usuario', 'Módulo', 'Acción', 'Descripción']
+
+ESTILO_TABLA = TableStyle([
+    # Encabezado
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2E86AB')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+
+    # Filas de datos
+    ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+
+    # Grid
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+
+
+class ReporteCancelado(Exception):
+    """El usuario canceló el reporte"""
+
+
+class _FlowablesPorLotes(list):
+    """
+    Lista que doc.build va vaciando y que se rellena desde un generador cuando queda vacía:
+    en memoria solo está el lote que se está dibujando, no el reporte completo.
+    """
+
+    def __init__(self, iniciales, generador):
+        super().__init__(iniciales)
+        self.generador = generador
+
+    def __len__(self):
+        if not super().__len__():
+            siguiente = next(self.generador, None)
+            if siguiente is not None:
+                self.append(siguiente)
+        return super().__len__()
+
+
+def contar_registros(conexion, fecha_desde: str, fecha_hasta: str) -> int:
+    """Registros de la bitácora en el rango (yyyy-MM-dd, ambos incluidos)"""
+    return conexion.execute(
+        "SELECT COUNT(*) FROM tbitacora WHERE fecha >= ? AND fecha < date(?, '+1 day')",
+        (fecha_desde, fecha_hasta)).fetchone()[0]
+
+
+def _fila_tabla(registro):
+    fecha, usuario, modulo, accion, descripcion = registro
+    # Limitar longitud de campos para que quepan en la tabla
+    if descripcion and len(descripcion) > 50:
+        descripcion = descripcion[:50] + '...'
+    return [para_mostrar(fecha), usuario or 'N/A', modulo or 'N/A', accion or 'N/A', descripcion or '']
+
+
+def _tablas(conexion, fecha_desde, fecha_hasta, total, progreso, cancelada):
+    """Lee con fetchmany y entrega una tabla de FILAS_POR_TABLA filas por vez"""
+    cursor = conexion.execute(SQL_REGISTROS, (fecha_desde, fecha_hasta))
+    hechas = 0
+    pendientes = []
+    try:
+        while True:
+            lote = cursor.fetchmany(FILAS_POR_LECTURA)
+            pendientes.extend(_fila_tabla(registro) for registro in lote)
+            while len(pendientes) >= FILAS_POR_TABLA or (not lote and pendientes):
+                filas, pendientes = pendientes[:FILAS_POR_TABLA], pendientes[FILAS_POR_TABLA:]
+                if cancelada and cancelada():
+                    raise ReporteCancelado()
+                tabla = Table([ENCABEZADO] + filas, repeatRows=1)
+                tabla.setStyle(ESTILO_TABLA)
+                hechas += len(filas)
+                if progreso:
+                    progreso(hechas, total)
+                yield tabla
+            if not lote:
+                break
+    finally:
+        cursor.close()
+
+
+def generar_pdf_bitacora(conexion, ruta: str, fecha_desde: str, fecha_hasta: str, generado_por: str,
+                         total: int, progreso=None, cancelada=None) -> int:
+    """
+    Genera el PDF de la bitácora leyendo y dibujando por lotes (memoria constante aunque
+    sea un año de registros). Se escribe en un temporal que se renombra al terminar: un
+    reporte cancelado no deja un PDF a medias. Devuelve el total de registros.
+    """
+    temporal = ruta + ".tmp"
+    doc = SimpleDocTemplate(temporal, pagesize=A4, topMargin=1*inch, bottomMargin=1*inch)
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        alignment=1  # Centrado
+    )
+
+    fecha_generacion = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    info_text = f"""
+    <b>Período:</b> {para_mostrar(fecha_desde)} a {para_mostrar(fecha_hasta)}<br/>
+    <b>Total de registros:</b> {total}<br/>
+    <b>Generado por:</b> {generado_por}<br/>
+    <b>Fecha de generación:</b> {fecha_generacion}
+    """
+    iniciales = [
+        Paragraph("REPORTE DE BITÁCORA - SISTEMA GANADERO", title_style),
+        Paragraph(info_text, styles['Normal']),
+        Spacer(1, 0.3*inch),
+    ]
+
+    try:
+        doc.build(_FlowablesPorLotes(
+            iniciales, _tablas(conexion, fecha_desde, fecha_hasta, total, progreso, cancelada)))
+        os.replace(temporal, ruta)
+        print(f"✅ PDF generado exitosamente: {ruta}")
+        return total
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
@@ -0,0 +1,931 @@
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from database import ARCHIVOS_EN_FILAS, CorralLleno, aplicar_migraciones, mover_archivos_en_linea, version_esquema
+
+# Motor de copias de seguridad (sin Qt: lo usa la interfaz y también se puede correr sin ella)
+
+RUTA_BD = "bdd/SDLGAPP.db"
+DIRECTORIO_RESPALDOS = "backups"
+ARCHIVO_LOG = os.path.join("logs", "backups.log")
+# Páginas que se copian por paso; entre pasos se reporta el progreso y se revisa si se canceló
+PAGINAS_POR_PASO = 256
+# Repositorio de instantáneas: bloques de páginas guardados una sola vez + un manifiesto por copia
+DIRECTORIO_REPOSITORIO = os.path.join(DIRECTORIO_RESPALDOS, "repositorio")
+# Cada bloque es una página de la BD (PRAGMA page_size): un cambio de una fila solo agrega las
+# pocas páginas que tocó (con bloques más grandes casi todos cambiaban en cada copia)
+# Bloques nuevos aceptables en una copia tras cambiar una sola fila (comprobar_deduplicacion)
+BLOQUES_NUEVOS_POR_FILA = 16
+NIVEL_COMPRESION = 6
+# Programación de copias automáticas (opcional; si no existe se usan los valores por defecto)
+ARCHIVO_PROGRAMACION = os.path.join(DIRECTORIO_RESPALDOS, "programacion.json")
+# Un bloqueo más viejo que esto quedó de un proceso que murió
+BLOQUEO_VENCIDO_SEGUNDOS = 3600
+
+
+class RespaldoCancelado(Exception):
+    """El usuario canceló la copia"""
+
+
+class RepositorioOcupado(Exception):
+    """Otro proceso (la app o el respaldo automático) está escribiendo en el repositorio"""
+
+
+def copiar_base_de_datos(origen: str, destino: str, progreso=None, cancelada=None,
+                         paginas_por_paso: int = PAGINAS_POR_PASO) -> int:
+    """
+    Copia la base con la API de backup de SQLite, por pasos de paginas_por_paso páginas.
+    Toda la copia sale de una sola transacción de lectura: es consistente aunque se esté
+    escribiendo (en WAL los demás no se bloquean). Se escribe en un temporal que se renombra
+    al terminar, así una copia cancelada o fallida nunca deja un archivo a medias.
+
+    progreso(copiadas, total) se llama en cada paso; si cancelada() devuelve True se lanza
+    RespaldoCancelado. Devuelve el total de páginas copiadas.
+    """
+    temporal = destino + ".tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    fuente = sqlite3.connect(origen, isolation_level=None)
+    copia = sqlite3.connect(temporal)
+    total_paginas = 0
+    try:
+        fuente.execute("PRAGMA busy_timeout = 5000")
+        # ✅ SE ABRE LA LECTURA ANTES DEL PRIMER PASO: TODOS LOS PASOS VEN LA MISMA VERSIÓN
+        fuente.execute("BEGIN")
+        fuente.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        def paso(estado, restantes, total):
+            nonlocal total_paginas
+            total_paginas = total
+            if progreso:
+                progreso(total - restantes, total)
+            if cancelada and cancelada():
+                raise RespaldoCancelado()
+
+        fuente.backup(copia, pages=paginas_por_paso, progress=paso)
+        fuente.execute("COMMIT")
+        copia.close()
+        os.replace(temporal, destino)
+        return total_paginas
+    except BaseException:
+        copia.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    finally:
+        fuente.close()
+
+
+def _abrir_solo_lectura(ruta: str) -> sqlite3.Connection:
+    """Abre una copia sin modificarla (sin crear -wal ni -shm junto a ella)"""
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(ruta)
+    inmutable = "" if os.path.exists(ruta + "-wal") else "&immutable=1"
+    return sqlite3.connect(f"file:{os.path.abspath(ruta)}?mode=ro{inmutable}", uri=True)
+
+
+def verificar_base_de_datos(ruta: str, completa: bool = True, cancelada=None) -> list:
+    """
+    PRAGMA integrity_check (o quick_check, mucho más rápido) sobre un archivo.
+    Devuelve la lista de problemas; vacía si está sano.
+    """
+    try:
+        conexion = _abrir_solo_lectura(ruta)
+    except (OSError, sqlite3.Error) as e:
+        return [f"No se pudo abrir: {e}"]
+    try:
+        if cancelada:
+            # Corta el chequeo si se cancela (SQLite lo interrumpe con OperationalError)
+            conexion.set_progress_handler(lambda: 1 if cancelada() else 0, 10000)
+        pragma = "integrity_check" if completa else "quick_check"
+        filas = [fila[0] for fila in conexion.execute(f"PRAGMA {pragma}").fetchall()]
+        return [] if filas == ["ok"] else filas
+    except sqlite3.DatabaseError as e:
+        if cancelada and cancelada():
+            raise RespaldoCancelado()
+        return [str(e)]
+    finally:
+        conexion.close()
+
+
+def restaurar_base_de_datos(candidata: str, destino: str = RUTA_BD, progreso=None, cancelada=None,
+                            verificar: bool = True, paginas_por_paso: int = PAGINAS_POR_PASO) -> int:
+    """
+    Reemplaza el contenido de destino por el de candidata con la API de backup, sin copiar
+    archivos: todo ocurre en una transacción de escritura sobre la BD en uso, así las demás
+    conexiones siguen viendo los datos anteriores hasta el final y una restauración cancelada
+    o fallida no cambia nada. Antes se corre integrity_check: nunca se instala un archivo dañado.
+    Devuelve el total de páginas copiadas.
+    """
+    if verificar:
+        problemas = verificar_base_de_datos(candidata, True, cancelada)
+        if problemas:
+            raise ValueError(f"La copia está dañada: {'; '.join(problemas[:3])}")
+
+    fuente = _abrir_solo_lectura(candidata)
+    copia = sqlite3.connect(destino, timeout=10)
+    total_paginas = 0
+    try:
+        copia.execute("PRAGMA busy_timeout = 10000")
+
+        def paso(estado, restantes, total):
+            nonlocal total_paginas
+            total_paginas = total
+            if progreso:
+                progreso(total - restantes, total)
+            if cancelada and cancelada():
+                raise RespaldoCancelado()
+
+        fuente.backup(copia, pages=paginas_por_paso, progress=paso)
+        resultado = copia.execute("PRAGMA quick_check").fetchone()
+        if not resultado or resultado[0] != "ok":
+            raise ValueError(f"La base restaurada no pasó quick_check: {resultado}")
+        return total_paginas
+    finally:
+        fuente.close()
+        copia.close()
+
+
+def restaurar(tipo: str, origen: str, destino: str = RUTA_BD, repositorio=None,
+              progreso=None, cancelada=None, usuario: str = "") -> dict:
+    """
+    Restaura una instantánea del repositorio (tipo "instantanea", origen = id) o una copia
+    completa antigua (tipo "archivo", origen = ruta): reconstruye si hace falta, verifica,
+    guarda la BD actual como instantánea "pre_restauracion" y la reemplaza en caliente.
+    """
+    repositorio = repositorio or RepositorioRespaldos()
+    temporal = None
+    try:
+        if tipo == "instantanea":
+            temporal = os.path.join(repositorio.directorio, f"restaurar_{origen}.db")
+            candidata = repositorio.reconstruir(origen, temporal, cancelada=cancelada)
+        else:
+            candidata = origen
+
+        problemas = verificar_base_de_datos(candidata, True, cancelada)
+        if problemas:
+            raise ValueError(f"La copia está dañada: {'; '.join(problemas[:3])}")
+
+        anterior = None
+        if os.path.exists(destino):
+            anterior = repositorio.crear_instantanea(destino, "pre_restauracion", cancelada=cancelada,
+                                                     usuario=usuario)["id"]
+
+        paginas = restaurar_base_de_datos(candidata, destino, progreso, cancelada, verificar=False)
+        return {"paginas": paginas, "tamano": os.path.getsize(candidata), "anterior": anterior}
+    finally:
+        if temporal and os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def registrar_en_log(mensaje: str):
+    """Agrega una línea con fecha y hora a logs/backups.log"""
+    try:
+        os.makedirs(os.path.dirname(ARCHIVO_LOG), exist_ok=True)
+        marca = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(ARCHIVO_LOG, "a", encoding="utf-8") as log:
+            log.write(f"[{marca}] {mensaje}\n")
+    except OSError as e:
+        print(f"⚠️ Error registrando en {ARCHIVO_LOG}: {e}")
+
+
+def registrar_error_respaldo(error):
+    """Falla de una copia automática (desde la app o desde main): a la consola y a logs/backups.log"""
+    print(f"❌ Error en la copia automática: {error}")
+    registrar_en_log(f"Error en backup automático: {error}")
+
+
+def resumir_contenido(ruta: str) -> dict:
+    """Versión del esquema y filas por tabla de una copia (sin las tablas internas de FTS)"""
+    conexion = _abrir_solo_lectura(ruta)
+    try:
+        tablas = conexion.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "ORDER BY name").fetchall()
+        virtuales = [nombre for nombre, sql in tablas if (sql or "").upper().startswith("CREATE VIRTUAL")]
+        filas = {}
+        for nombre, _ in tablas:
+            if any(nombre == v or nombre.startswith(v + "_") for v in virtuales):
+                continue
+            filas[nombre] = conexion.execute(f'SELECT COUNT(*) FROM "{nombre}"').fetchone()[0]
+        return {"version_esquema": version_esquema(conexion), "filas": filas}
+    finally:
+        conexion.close()
+
+
+# Tablas que se pueden restaurar por separado, con su clave primaria
+TABLAS_RESTAURABLES = {
+    "tganado": "idgdo",
+    "tbecerros": "idbece",
+    "tsalud": "idsalud",
+    "treprod": "idreprod",
+    "tpropietarios": "idprop",
+    "tcorral": "idcorral",
+    "tusuarios": "idusuario",
+}
+# Restauración por arete: el animal (adulto o becerro) y su historial
+COLUMNAS_ARETE = {
+    "tganado": "aretegdo",
+    "tbecerros": "aretebece",
+    "tsalud": "areteanimal",
+    "treprod": "areteanimal",
+}
+
+# Tablas que se muestran al describir una copia
+TABLAS_RESUMEN = (("tganado", "animales"), ("tbecerros", "becerros"), ("tsalud", "registros de salud"),
+                  ("treprod", "reproducciones"), ("tpropietarios", "propietarios"))
+
+
+def resumen_filas(filas: dict) -> str:
+    """Texto corto con las filas de las tablas principales de una copia"""
+    partes = [f"{filas[tabla]} {nombre}" for tabla, nombre in TABLAS_RESUMEN if tabla in filas]
+    return ", ".join(partes) or "sin datos de contenido"
+
+
+class RepositorioRespaldos:
+    """
+    Copias de seguridad incrementales: el archivo se parte en bloques de una página, cada bloque
+    se guarda comprimido (zlib) una sola vez con su SHA-256 como nombre y cada copia es un
+    manifiesto JSON con la lista de bloques. Una copia diaria solo escribe los bloques que
+    cambiaron desde la anterior.
+
+        repositorio/bloques/ab/abcd....z
+        repositorio/instantaneas/20251118-025544.json
+        repositorio/catalogo.db   (índice de las copias: qué contienen, quién y dónde se hicieron)
+    """
+
+    def __init__(self, directorio: str = DIRECTORIO_REPOSITORIO):
+        self.directorio = directorio
+        self.dir_bloques = os.path.join(directorio, "bloques")
+        self.dir_instantaneas = os.path.join(directorio, "instantaneas")
+        self.ruta_catalogo = os.path.join(directorio, "catalogo.db")
+
+    # ✅ CREAR
+    def crear_instantanea(self, origen: str = RUTA_BD, tipo: str = "manual", etiqueta: str = "",
+                          progreso=None, cancelada=None, usuario: str = "") -> dict:
+        """
+        Toma una copia consistente con la API de backup (a un temporal), la parte en bloques y
+        guarda solo los que no existen. Devuelve el manifiesto de la nueva instantánea.
+        """
+        os.makedirs(self.dir_bloques, exist_ok=True)
+        os.makedirs(self.dir_instantaneas, exist_ok=True)
+        with self._bloqueo():
+            manifiesto = self._crear_instantanea(origen, tipo, etiqueta, progreso, cancelada, usuario)
+            self._registrar_en_catalogo(manifiesto)
+            return manifiesto
+
+    def _crear_instantanea(self, origen, tipo, etiqueta, progreso, cancelada, usuario) -> dict:
+        identificador = self._nuevo_identificador()
+        temporal = os.path.join(self.directorio, f"{identificador}.db.tmp")
+
+        # Mitad del progreso para la copia y mitad para guardar los bloques
+        def progreso_copia(hechas, total):
+            if progreso:
+                progreso(hechas, total * 2)
+
+        try:
+            copiar_base_de_datos(origen, temporal, progreso_copia, cancelada)
+            tamano = os.path.getsize(temporal)
+            tamano_pagina = self._tamano_pagina(temporal)
+            tamano_bloque = tamano_pagina
+            total_bloques = (tamano + tamano_bloque - 1) // tamano_bloque
+            contenido = resumir_contenido(temporal)
+
+            bloques, nuevos, bytes_nuevos = [], 0, 0
+            suma = hashlib.sha256()
+            with open(temporal, "rb") as archivo:
+                while True:
+                    datos = archivo.read(tamano_bloque)
+                    if not datos:
+                        break
+                    suma.update(datos)
+                    clave, escrito = self._guardar_bloque(datos)
+                    bloques.append(clave)
+                    if escrito:
+                        nuevos += 1
+                        bytes_nuevos += escrito
+                    if progreso:
+                        progreso(total_bloques + len(bloques), total_bloques * 2)
+                    if cancelada and cancelada():
+                        raise RespaldoCancelado()
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        manifiesto = {
+            "id": identificador,
+            "creada": datetime.now().isoformat(timespec="seconds"),
+            "tipo": tipo,
+            "etiqueta": etiqueta,
+            "usuario": usuario,
+            "equipo": platform.node(),
+            "tamano": tamano,
+            "suma": suma.hexdigest(),
+            "version_esquema": contenido["version_esquema"],
+            "filas": contenido["filas"],
+            "tamano_pagina": tamano_pagina,
+            "tamano_bloque": tamano_bloque,
+            "bloques": bloques,
+            "bloques_nuevos": nuevos,
+            "bytes_nuevos": bytes_nuevos,
+        }
+        self._escribir_json(self._ruta_manifiesto(identificador), manifiesto)
+        print(f"✅ Instantánea {identificador}: {len(bloques)} bloques, {nuevos} nuevos ({bytes_nuevos} bytes)")
+        return manifiesto
+
+    @contextmanager
+    def _bloqueo(self):
+        """
+        Bloqueo entre procesos (archivo creado en exclusiva): mientras se crea una instantánea
+        no se pueden borrar bloques, porque la nueva puede estar reutilizando alguno.
+        """
+        ruta = os.path.join(self.directorio, ".bloqueo")
+        os.makedirs(self.directorio, exist_ok=True)
+        try:
+            if time.time() - os.path.getmtime(ruta) > BLOQUEO_VENCIDO_SEGUNDOS:
+                os.remove(ruta)
+        except OSError:
+            pass
+        try:
+            descriptor = os.open(ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise RepositorioOcupado("Ya hay una copia de seguridad en curso")
+        try:
+            os.write(descriptor, str(os.getpid()).encode())
+            os.close(descriptor)
+            yield
+        finally:
+            os.remove(ruta)
+
+    def _nuevo_identificador(self) -> str:
+        base = datetime.now().strftime("%Y%m%d-%H%M%S")
+        identificador, n = base, 1
+        while os.path.exists(self._ruta_manifiesto(identificador)):
+            n += 1
+            identificador = f"{base}-{n}"
+        return identificador
+
+    @staticmethod
+    def _tamano_pagina(ruta: str) -> int:
+        conexion = sqlite3.connect(ruta)
+        try:
+            return conexion.execute("PRAGMA page_size").fetchone()[0]
+        finally:
+            conexion.close()
+
+    def _ruta_bloque(self, clave: str) -> str:
+        return os.path.join(self.dir_bloques, clave[:2], clave + ".z")
+
+    def _guardar_bloque(self, datos: bytes):
+        """Guarda el bloque si no existe; devuelve (clave, bytes escritos o 0 si ya estaba)"""
+        clave = hashlib.sha256(datos).hexdigest()
+        ruta = self._ruta_bloque(clave)
+        if os.path.exists(ruta):
+            return clave, 0
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        comprimido = zlib.compress(datos, NIVEL_COMPRESION)
+        with open(ruta + ".tmp", "wb") as archivo:
+            archivo.write(comprimido)
+        os.replace(ruta + ".tmp", ruta)
+        return clave, len(comprimido)
+
+    # ✅ LEER Y RECONSTRUIR
+    def _ruta_manifiesto(self, identificador: str) -> str:
+        return os.path.join(self.dir_instantaneas, f"{identificador}.json")
+
+    def listar_instantaneas(self) -> list:
+        """Identificadores de las instantáneas, de la más reciente a la más antigua"""
+        if not os.path.isdir(self.dir_instantaneas):
+            return []
+        return sorted((n[:-5] for n in os.listdir(self.dir_instantaneas) if n.endswith(".json")), reverse=True)
+
+    def cargar_manifiesto(self, identificador: str) -> dict:
+        with open(self._ruta_manifiesto(identificador), encoding="utf-8") as archivo:
+            return json.load(archivo)
+
+    def reconstruir(self, identificador: str, destino: str, progreso=None, cancelada=None) -> str:
+        """
+        Escribe el archivo .db de una instantánea en destino, bloque por bloque (verificando
+        el hash de cada uno). Como en las copias, se usa un temporal que se renombra al final.
+        """
+        manifiesto = self.cargar_manifiesto(identificador)
+        bloques = manifiesto["bloques"]
+        temporal = destino + ".tmp"
+        suma = hashlib.sha256()
+        try:
+            with open(temporal, "wb") as salida:
+                for n, clave in enumerate(bloques, 1):
+                    with open(self._ruta_bloque(clave), "rb") as archivo:
+                        datos = zlib.decompress(archivo.read())
+                    if hashlib.sha256(datos).hexdigest() != clave:
+                        raise ValueError(f"El bloque {clave[:12]} de la copia {identificador} está dañado")
+                    salida.write(datos)
+                    suma.update(datos)
+                    if progreso:
+                        progreso(n, len(bloques))
+                    if cancelada and cancelada():
+                        raise RespaldoCancelado()
+            if manifiesto.get("suma") and suma.hexdigest() != manifiesto["suma"]:
+                raise ValueError(f"La copia {identificador} no coincide con su suma de verificación")
+            os.replace(temporal, destino)
+            return destino
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    # ✅ ELIMINAR
+    def eliminar_instantanea(self, identificador: str):
+        """Borra el manifiesto; los bloques que nadie más usa se borran con limpiar_bloques"""
+        ruta = self._ruta_manifiesto(identificador)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+        with self._catalogo() as conexion:
+            conexion.execute("DELETE FROM instantaneas WHERE id = ?", (identificador,))
+
+    def limpiar_bloques(self) -> int:
+        """Borra los bloques que no aparecen en ningún manifiesto. Devuelve cuántos borró"""
+        with self._bloqueo():
+            return self._limpiar_bloques()
+
+    def _limpiar_bloques(self) -> int:
+        en_uso = set()
+        for identificador in self.listar_instantaneas():
+            en_uso.update(self.cargar_manifiesto(identificador)["bloques"])
+        borrados = 0
+        if not os.path.isdir(self.dir_bloques):
+            return 0
+        for carpeta in os.listdir(self.dir_bloques):
+            ruta_carpeta = os.path.join(self.dir_bloques, carpeta)
+            for nombre in os.listdir(ruta_carpeta):
+                if nombre[:-2] not in en_uso or not nombre.endswith(".z"):
+                    os.remove(os.path.join(ruta_carpeta, nombre))
+                    borrados += 1
+        return borrados
+
+    def ultima_instantanea(self):
+        """Datos de catálogo de la copia más reciente (de cualquier tipo) o None"""
+        copias = self.catalogo(limite=1)
+        return copias[0] if copias else None
+
+    # ✅ CATÁLOGO
+    def _conectar_catalogo(self) -> sqlite3.Connection:
+        os.makedirs(self.directorio, exist_ok=True)
+        conexion = sqlite3.connect(self.ruta_catalogo, timeout=10)
+        conexion.row_factory = sqlite3.Row
+        conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS instantaneas (
+                id TEXT PRIMARY KEY,
+                creada TEXT NOT NULL,
+                tipo TEXT,
+                etiqueta TEXT,
+                usuario TEXT,
+                equipo TEXT,
+                tamano INTEGER,
+                bytes_nuevos INTEGER,
+                version_esquema INTEGER,
+                suma TEXT,
+                filas TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_instantaneas_creada ON instantaneas(creada);
+        """)
+        return conexion
+
+    @contextmanager
+    def _catalogo(self):
+        """Conexión al catálogo dentro de una transacción; se cierra al salir"""
+        conexion = self._conectar_catalogo()
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    def _registrar_en_catalogo(self, manifiesto: dict, conexion=None):
+        fila = (manifiesto["id"], manifiesto["creada"], manifiesto.get("tipo"), manifiesto.get("etiqueta"),
+                manifiesto.get("usuario"), manifiesto.get("equipo"), manifiesto.get("tamano"),
+                manifiesto.get("bytes_nuevos"), manifiesto.get("version_esquema"), manifiesto.get("suma"),
+                json.dumps(manifiesto.get("filas") or {}, ensure_ascii=False))
+        sql = "INSERT OR REPLACE INTO instantaneas VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        if conexion is not None:
+            conexion.execute(sql, fila)
+            return
+        with self._catalogo() as conexion:
+            conexion.execute(sql, fila)
+
+    def catalogo(self, limite: int = None) -> list:
+        """
+        Copias del catálogo, de la más reciente a la más antigua, sin abrir los manifiestos.
+        Si el catálogo no coincide con los manifiestos (se borró, o hay copias de antes del
+        catálogo) se pone al día primero.
+        """
+        conexion = self._conectar_catalogo()
+        try:
+            registradas = {fila[0] for fila in conexion.execute("SELECT id FROM instantaneas")}
+            existentes = set(self.listar_instantaneas())
+            if registradas != existentes:
+                self._sincronizar_catalogo(conexion, registradas, existentes)
+
+            sql = "SELECT * FROM instantaneas ORDER BY creada DESC, id DESC"
+            if limite:
+                sql += f" LIMIT {int(limite)}"
+            copias = []
+            for fila in conexion.execute(sql):
+                copia = dict(fila)
+                copia["filas"] = json.loads(copia["filas"] or "{}")
+                copias.append(copia)
+            return copias
+        finally:
+            conexion.close()
+
+    def _sincronizar_catalogo(self, conexion, registradas: set, existentes: set):
+        with conexion:
+            for identificador in registradas - existentes:
+                conexion.execute("DELETE FROM instantaneas WHERE id = ?", (identificador,))
+            for identificador in existentes - registradas:
+                try:
+                    self._registrar_en_catalogo(self.cargar_manifiesto(identificador), conexion)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️ Manifiesto ilegible {identificador}: {e}")
+        print(f"🔄 Catálogo de copias actualizado ({len(existentes)} copias)")
+
+    # ✅ RETENCIÓN
+    def aplicar_retencion(self, politica) -> list:
+        """
+        Borra las copias automáticas que la política no conserva y los bloques que quedan sin uso.
+        Las manuales y las "pre_restauracion" (el punto para deshacer una restauración) no se
+        tocan: solo se borran a mano.
+        """
+        manifiestos = [m for m in self.catalogo() if m.get("tipo") == "automatica"]
+        conservar = instantaneas_a_conservar(manifiestos, politica.diarias, politica.semanales,
+                                             politica.mensuales)
+        borradas = [m["id"] for m in manifiestos if m["id"] not in conservar]
+        for identificador in borradas:
+            self.eliminar_instantanea(identificador)
+        if borradas:
+            bloques = self.limpiar_bloques()
+            print(f"🧹 Retención: {len(borradas)} copias y {bloques} bloques borrados")
+        return borradas
+
+    @staticmethod
+    def _escribir_json(ruta: str, datos: dict):
+        with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False, indent=1)
+        os.replace(ruta + ".tmp", ruta)
+
+
+def comprobar_deduplicacion(origen: str = RUTA_BD) -> dict:
+    """
+    Comprueba que la copia siguiente a un cambio de una fila solo guarde unos pocos bloques:
+    en un directorio temporal copia la BD, toma una instantánea, agrega una fila a la bitácora
+    y toma otra. La BD en uso no se modifica.
+    """
+    with tempfile.TemporaryDirectory() as directorio:
+        prueba = os.path.join(directorio, "prueba.db")
+        copiar_base_de_datos(origen, prueba)
+        repositorio = RepositorioRespaldos(os.path.join(directorio, "repositorio"))
+        repositorio.crear_instantanea(prueba, "prueba")
+        conexion = sqlite3.connect(prueba)
+        try:
+            conexion.execute("INSERT INTO tbitacora (fecha, usuario, modulo, accion) "
+                             "VALUES (datetime('now'), 'respaldos', 'Respaldos', 'PRUEBA')")
+            conexion.commit()
+        finally:
+            conexion.close()
+        segunda = repositorio.crear_instantanea(prueba, "prueba")
+    nuevos = segunda["bloques_nuevos"]
+    return {"bloques": len(segunda["bloques"]), "bloques_nuevos": nuevos,
+            "correcta": nuevos <= BLOQUES_NUEVOS_POR_FILA}
+
+
+def instantaneas_a_conservar(manifiestos: list, diarias: int, semanales: int, mensuales: int) -> set:
+    """
+    Retención abuelo-padre-hijo: la copia más reciente de cada uno de los últimos `diarias`
+    días, `semanales` semanas y `mensuales` meses que tienen copias. La última siempre queda.
+    """
+    ordenados = sorted(manifiestos, key=lambda m: m["creada"], reverse=True)
+    conservar = {ordenados[0]["id"]} if ordenados else set()
+    periodos = (
+        (lambda f: f.date(), diarias),
+        (lambda f: f.isocalendar()[:2], semanales),
+        (lambda f: (f.year, f.month), mensuales),
+    )
+    for periodo, cantidad in periodos:
+        vistos = set()
+        for manifiesto in ordenados:
+            clave = periodo(datetime.fromisoformat(manifiesto["creada"]))
+            if clave in vistos:
+                continue
+            if len(vistos) >= cantidad:
+                break
+            vistos.add(clave)
+            conservar.add(manifiesto["id"])
+    return conservar
+
+
+class PoliticaRespaldos:
+    """
+    Cuándo se hacen las copias automáticas y cuántas se guardan.
+    modo "hora": una vez al día a partir de `hora` (si la app estaba cerrada, al abrirla);
+    modo "intervalo": cada `intervalo_horas`. Solo se copia si la BD lleva
+    `inactividad_segundos` sin escrituras.
+    """
+
+    def __init__(self, modo="hora", hora="02:00", intervalo_horas=24, diarias=7, semanales=4,
+                 mensuales=12, inactividad_segundos=120):
+        self.modo = modo
+        self.hora = hora
+        self.intervalo_horas = intervalo_horas
+        self.diarias = diarias
+        self.semanales = semanales
+        self.mensuales = mensuales
+        self.inactividad_segundos = inactividad_segundos
+
+    @classmethod
+    def cargar(cls, ruta: str = ARCHIVO_PROGRAMACION):
+        """Lee la programación de backups/programacion.json; sin archivo, la de por defecto"""
+        politica = cls()
+        try:
+            with open(ruta, encoding="utf-8") as archivo:
+                for clave, valor in json.load(archivo).items():
+                    if hasattr(politica, clave):
+                        setattr(politica, clave, valor)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Programación de copias ilegible ({e}); se usan los valores por defecto")
+        return politica
+
+    def pendiente(self, ultima, ahora=None) -> bool:
+        """True si ya toca una copia, dada la fecha de la última (datetime o None)"""
+        ahora = ahora or datetime.now()
+        if ultima is None:
+            return True
+        if self.modo == "intervalo":
+            return ahora - ultima >= timedelta(hours=self.intervalo_horas)
+        horas, minutos = (int(parte) for parte in self.hora.split(":"))
+        programada = ahora.replace(hour=horas, minute=minutos, second=0, microsecond=0)
+        if ahora < programada:
+            programada -= timedelta(days=1)
+        return ultima < programada
+
+
+def segundos_sin_escrituras(ruta: str = RUTA_BD) -> float:
+    """
+    Tiempo desde la última escritura en la BD por cualquier proceso (app, sincronización
+    de Android): en WAL los commits modifican el -wal, los checkpoints el archivo principal.
+    """
+    modificado = 0
+    for archivo in (ruta, ruta + "-wal"):
+        try:
+            modificado = max(modificado, os.path.getmtime(archivo))
+        except OSError:
+            pass
+    return time.time() - modificado
+
+
+def ejecutar_respaldo_programado(politica=None, repositorio=None, origen: str = RUTA_BD,
+                                 forzar: bool = False, progreso=None, cancelada=None):
+    """
+    Hace la copia automática si toca y la BD está quieta, y aplica la retención.
+    Devuelve el manifiesto creado o None si no correspondía (o el repositorio estaba ocupado).
+    """
+    politica = politica or PoliticaRespaldos.cargar()
+    repositorio = repositorio or RepositorioRespaldos()
+    if not forzar:
+        ultima = repositorio.ultima_instantanea()
+        if not politica.pendiente(datetime.fromisoformat(ultima["creada"]) if ultima else None):
+            return None
+        if segundos_sin_escrituras(origen) < politica.inactividad_segundos:
+            print("⏳ Copia automática pospuesta: la base de datos se está usando")
+            return None
+
+    try:
+        manifiesto = repositorio.crear_instantanea(origen, "automatica", datetime.now().strftime("%d-%m-%Y"),
+                                                   progreso, cancelada)
+    except RepositorioOcupado:
+        print("⏳ Copia automática pospuesta: hay otra copia en curso")
+        return None
+    registrar_en_log(f"Backup automático - Copia: {manifiesto['id']}, Tamaño: {manifiesto['tamano']} bytes, "
+                     f"Nuevos: {manifiesto['bytes_nuevos']} bytes")
+
+    try:
+        borradas = repositorio.aplicar_retencion(politica)
+        if borradas:
+            registrar_en_log(f"Retención - Copias borradas: {', '.join(borradas)}")
+    except RepositorioOcupado:
+        pass  # se aplica en la próxima copia
+    return manifiesto
+
+
+class RestauracionParcial:
+    """
+    Compara una copia con la BD en uso (ATTACH) y devuelve solo las filas elegidas: una
+    tabla completa o un arete con su historial de salud y reproducción, en una transacción.
+    La copia se prepara en un temporal llevado al esquema actual, así las columnas coinciden
+    aunque la copia sea de una versión anterior.
+    """
+
+    def __init__(self, ruta_copia: str, destino: str = RUTA_BD):
+        self.ruta_copia = ruta_copia
+        self.destino = destino
+
+    @classmethod
+    def preparar(cls, tipo: str, origen: str, destino: str = RUTA_BD, repositorio=None, cancelada=None):
+        """Reconstruye la instantánea (o copia el archivo antiguo) a un temporal y lo migra"""
+        repositorio = repositorio or RepositorioRespaldos()
+        os.makedirs(repositorio.directorio, exist_ok=True)
+        temporal = os.path.join(repositorio.directorio, f"parcial_{os.path.basename(origen)}.db")
+        if tipo == "instantanea":
+            repositorio.reconstruir(origen, temporal, cancelada=cancelada)
+        else:
+            copiar_base_de_datos(origen, temporal, cancelada=cancelada)
+
+        try:
+            problemas = verificar_base_de_datos(temporal, False, cancelada)
+            if problemas:
+                raise ValueError(f"La copia está dañada: {'; '.join(problemas[:3])}")
+            conexion = sqlite3.connect(temporal)
+            try:
+                aplicar_migraciones(conexion)
+                mover_archivos_en_linea(conexion)
+                conexion.commit()
+            finally:
+                conexion.close()
+        except BaseException:
+            os.remove(temporal)
+            raise
+        return cls(temporal, destino)
+
+    def cerrar(self):
+        """Borra el temporal de la copia"""
+        for ruta in (self.ruta_copia, self.ruta_copia + "-wal", self.ruta_copia + "-shm"):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+    def _conectar(self) -> sqlite3.Connection:
+        conexion = sqlite3.connect(self.destino, timeout=10, isolation_level=None)
+        conexion.execute("PRAGMA busy_timeout = 10000")
+        conexion.execute("ATTACH DATABASE ? AS copia", (self.ruta_copia,))
+        return conexion
+
+    @staticmethod
+    def _columnas(conexion, tabla: str) -> list:
+        """Columnas que existen en las dos bases"""
+        actuales = [fila[1] for fila in conexion.execute(f"PRAGMA main.table_info({tabla})")]
+        en_copia = {fila[1] for fila in conexion.execute(f"PRAGMA copia.table_info({tabla})")}
+        return [c for c in actuales if c in en_copia]
+
+    # ✅ COMPARAR
+    def _diferencias(self, conexion, tabla: str, filtro: str = "1", parametros: tuple = ()) -> dict:
+        clave = TABLAS_RESTAURABLES[tabla]
+        lista = ", ".join(self._columnas(conexion, tabla))
+        faltantes = conexion.execute(
+            f"SELECT COUNT(*) FROM copia.{tabla} WHERE ({filtro}) "
+            f"AND {clave} NOT IN (SELECT {clave} FROM main.{tabla})", parametros).fetchone()[0]
+        nuevas = conexion.execute(
+            f"SELECT COUNT(*) FROM main.{tabla} WHERE ({filtro}) "
+            f"AND {clave} NOT IN (SELECT {clave} FROM copia.{tabla})", parametros).fetchone()[0]
+        modificadas = conexion.execute(
+            f"SELECT COUNT(*) FROM (SELECT {lista} FROM copia.{tabla} WHERE ({filtro}) "
+            f"AND {clave} IN (SELECT {clave} FROM main.{tabla}) "
+            f"EXCEPT SELECT {lista} FROM main.{tabla})", parametros).fetchone()[0]
+        return {"faltantes": faltantes, "modificadas": modificadas, "nuevas": nuevas}
+
+    def comparar_tabla(self, tabla: str) -> dict:
+        """Filas que solo están en la copia (borradas después), distintas, y agregadas después"""
+        conexion = self._conectar()
+        try:
+            return self._diferencias(conexion, tabla)
+        finally:
+            conexion.close()
+
+    def comparar_arete(self, arete: str) -> dict:
+        """Las mismas diferencias, por tabla, limitadas a un arete"""
+        conexion = self._conectar()
+        try:
+            return {tabla: self._diferencias(conexion, tabla, f"{columna} = ?", (arete,))
+                    for tabla, columna in COLUMNAS_ARETE.items()}
+        finally:
+            conexion.close()
+
+    # ✅ RESTAURAR
+    def _copiar_filas(self, conexion, tabla: str, filtro: str, parametros: tuple, sobrescribir: bool) -> dict:
+        clave = TABLAS_RESTAURABLES[tabla]
+        columnas = self._columnas(conexion, tabla)
+        lista = ", ".join(columnas)
+
+        # Primero los archivos (fotos, adjuntos) a los que apuntan las filas de la copia
+        if tabla in ARCHIVOS_EN_FILAS:
+            columna_hash = ARCHIVOS_EN_FILAS[tabla][2]
+            conexion.execute(
+                f"INSERT OR IGNORE INTO main.tarchivos (hash, tamano, datos) "
+                f"SELECT hash, tamano, datos FROM copia.tarchivos WHERE hash IN "
+                f"(SELECT {columna_hash} FROM copia.{tabla} WHERE ({filtro}))", parametros)
+
+        actualizadas = 0
+        if sobrescribir:
+            # UPDATE (no REPLACE): así corren los triggers de búsqueda, miniaturas y archivos
+            otras = [c for c in columnas if c != clave]
+            cursor = conexion.execute(
+                f"UPDATE main.{tabla} SET ({', '.join(otras)}) = "
+                f"(SELECT {', '.join(otras)} FROM copia.{tabla} AS c WHERE c.{clave} = main.{tabla}.{clave}) "
+                f"WHERE {clave} IN (SELECT {clave} FROM (SELECT {lista} FROM copia.{tabla} WHERE ({filtro}) "
+                f"EXCEPT SELECT {lista} FROM main.{tabla}))", parametros)
+            actualizadas = cursor.rowcount
+
+        cursor = conexion.execute(
+            f"INSERT INTO main.{tabla} ({lista}) SELECT {lista} FROM copia.{tabla} "
+            f"WHERE ({filtro}) AND {clave} NOT IN (SELECT {clave} FROM main.{tabla})", parametros)
+        return {"insertadas": cursor.rowcount, "actualizadas": actualizadas}
+
+    @staticmethod
+    def _ocupacion(conexion) -> dict:
+        """Corral -> (ocupados, capacidad) en la BD en uso; capactual lo mantienen los triggers"""
+        return {nombre: (ocupados, capacidad) for nombre, ocupados, capacidad in conexion.execute(
+            "SELECT nomcorral, CAST(capactual AS INTEGER), CAST(capmax AS INTEGER) FROM main.tcorral")}
+
+    def _verificar_capacidad(self, conexion, antes: dict):
+        """
+        La misma regla que capacidad_respetada: si un corral quedó con más animales que antes
+        y que su capacidad, CorralLleno y la restauración se deshace
+        """
+        for corral, (ocupados, capacidad) in self._ocupacion(conexion).items():
+            if capacidad and ocupados > capacidad and ocupados > antes.get(corral, (0, 0))[0]:
+                raise CorralLleno(corral, ocupados, capacidad)
+
+    def _en_transaccion(self, copiar) -> dict:
+        conexion = self._conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            try:
+                antes = self._ocupacion(conexion)
+                resultado = copiar(conexion)
+                # ✅ LAS FILAS DE LA COPIA TAMBIÉN RESPETAN LA CAPACIDAD DE LOS CORRALES
+                self._verificar_capacidad(conexion, antes)
+                conexion.execute("COMMIT")
+                return resultado
+            except BaseException:
+                conexion.execute("ROLLBACK")
+                raise
+        finally:
+            conexion.close()
+
+    def restaurar_tabla(self, tabla: str, sobrescribir: bool = False) -> dict:
+        """
+        Devuelve a la tabla las filas de la copia que ya no están; con sobrescribir, también
+        deja como en la copia las que cambiaron. Las filas agregadas después no se tocan.
+        """
+        return self._en_transaccion(
+            lambda conexion: {tabla: self._copiar_filas(conexion, tabla, "1", (), sobrescribir)})
+
+    def restaurar_arete(self, arete: str, sobrescribir: bool = False) -> dict:
+        """Devuelve el animal o becerro con ese arete y sus registros de salud y reproducción"""
+        return self._en_transaccion(lambda conexion: {
+            tabla: self._copiar_filas(conexion, tabla, f"{columna} = ?", (arete,), sobrescribir)
+            for tabla, columna in COLUMNAS_ARETE.items()})
+
+
+def main():
+    """Copias sin interfaz, p. ej. desde el Programador de tareas o cron"""
+    parser = argparse.ArgumentParser(description="Copias de seguridad automáticas de SDLG")
+    parser.add_argument("--forzar", action="store_true", help="copiar ahora aunque no toque")
+    parser.add_argument("--continuo", action="store_true", help="quedar corriendo y revisar cada minuto")
+    parser.add_argument("--comprobar-bloques", action="store_true",
+                        help="comprobar que un cambio de una fila solo agrega unos pocos bloques")
+    argumentos = parser.parse_args()
+
+    if argumentos.comprobar_bloques:
+        resultado = comprobar_deduplicacion()
+        estado = "✅" if resultado["correcta"] else "❌"
+        print(f"{estado} Un cambio de una fila agregó {resultado['bloques_nuevos']} de "
+              f"{resultado['bloques']} bloques (máximo esperado: {BLOQUES_NUEVOS_POR_FILA})")
+        sys.exit(0 if resultado["correcta"] else 1)
+
+    while True:
+        try:
+            manifiesto = ejecutar_respaldo_programado(forzar=argumentos.forzar)
+            if manifiesto:
+                print(f"✅ Copia automática creada: {manifiesto['id']}")
+        except Exception as e:
+            registrar_error_respaldo(e)
+        if not argumentos.continuo:
+            break
+        argumentos.forzar = False
+        time.sleep(60)
+
+
+if __name__ == "__main__":
+    main()
+
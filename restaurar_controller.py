@@ -1,13 +1,18 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 import os
-import shutil
-import sqlite3
 from datetime import datetime
-import sys
+
+from database import reabrir_base_de_datos
+from respaldos import (RUTA_BD, DIRECTORIO_RESPALDOS, TABLAS_RESTAURABLES, RepositorioRespaldos,
+                        RestauracionParcial, restaurar, resumen_filas)
+from tareas import TareaFondo
 
 class RestaurarController:
     def __init__(self, restaurar_widget):
         self.restaurar_widget = restaurar_widget
+        self.repositorio = RepositorioRespaldos()
+        self.tarea_restauracion = None
+        self.progress_dialog = None
         self.setup_connections()
         self.cargar_backups()
         print("✅ RestaurarController inicializado")
@@ -38,6 +43,14 @@ class RestaurarController:
                 print("✅ ComboBox encontrado")
             else:
                 print("❌ No se encontró comboBox")
+            
+            # ✅ RESTAURACIÓN PARCIAL: JUNTO AL BOTÓN RESTAURAR (LA PÁGINA NO TIENE UNO EN EL .ui)
+            if self.btn_restaurar:
+                self.btn_parcial = QtWidgets.QPushButton("Restauración parcial", self.btn_restaurar.parentWidget())
+                self.btn_parcial.setToolTip("Devolver solo un animal (con su historial) o una tabla desde la copia")
+                layout = self.btn_restaurar.parentWidget().layout()
+                layout.insertWidget(layout.indexOf(self.btn_restaurar), self.btn_parcial)
+                self.btn_parcial.clicked.connect(self.abrir_restauracion_parcial)
                 
         except Exception as e:
             print(f"❌ Error en setup_connections: {e}")
@@ -52,28 +65,41 @@ class RestaurarController:
             # Limpiar comboBox
             self.combo_backups.clear()
             
-            # Directorio de backups
-            backup_dir = "backups"
+            backups = []
             
-            if not os.path.exists(backup_dir):
-                print("⚠️ No existe directorio de backups")
-                self.combo_backups.addItem("No hay backups disponibles")
-                return
+            # Instantáneas del repositorio incremental (del catálogo: no se abre ningún archivo)
+            for copia in self.repositorio.catalogo():
+                nombre = f"Copia {copia['etiqueta'] or copia['id']}"
+                if copia['tipo'] != "manual":
+                    nombre += f" ({copia['tipo']})"
+                if copia['usuario']:
+                    nombre += f" por {copia['usuario']}"
+                detalle = (f"Esquema v{copia['version_esquema']} · {resumen_filas(copia['filas'])}\n"
+                           f"Equipo: {copia['equipo']} · Suma: {(copia['suma'] or '')[:16]}")
+                backups.append({
+                    'archivo': nombre,
+                    'ruta': ("instantanea", copia['id']),
+                    'tamaño': copia['tamano'],
+                    'fecha_mod': datetime.fromisoformat(copia['creada']),
+                    'detalle': detalle
+                })
             
-            # Buscar archivos .db en el directorio de backups
-            backups = []
-            for archivo in os.listdir(backup_dir):
-                if archivo.endswith('.db') and 'backup' in archivo.lower():
-                    ruta_completa = os.path.join(backup_dir, archivo)
-                    tamaño = os.path.getsize(ruta_completa)
-                    fecha_modificacion = datetime.fromtimestamp(os.path.getmtime(ruta_completa))
-                    
-                    backups.append({
-                        'archivo': archivo,
-                        'ruta': ruta_completa,
-                        'tamaño': tamaño,
-                        'fecha_mod': fecha_modificacion
-                    })
+            # Copias completas antiguas (un .db por día)
+            backup_dir = DIRECTORIO_RESPALDOS
+            if os.path.exists(backup_dir):
+                for archivo in os.listdir(backup_dir):
+                    if archivo.endswith('.db') and 'backup' in archivo.lower():
+                        ruta_completa = os.path.join(backup_dir, archivo)
+                        tamaño = os.path.getsize(ruta_completa)
+                        fecha_modificacion = datetime.fromtimestamp(os.path.getmtime(ruta_completa))
+                        
+                        backups.append({
+                            'archivo': archivo,
+                            'ruta': ("archivo", ruta_completa),
+                            'tamaño': tamaño,
+                            'fecha_mod': fecha_modificacion,
+                            'detalle': "Copia completa antigua (sin datos de catálogo)"
+                        })
             
             # Ordenar por fecha de modificación (más reciente primero)
             backups.sort(key=lambda x: x['fecha_mod'], reverse=True)
@@ -90,6 +116,8 @@ class RestaurarController:
                 display_text = f"{backup['archivo']} - {fecha_str} - {tamaño_str}"
                 
                 self.combo_backups.addItem(display_text, backup['ruta'])
+                self.combo_backups.setItemData(self.combo_backups.count() - 1, backup['detalle'],
+                                               QtCore.Qt.ToolTipRole)
             
             print(f"✅ {len(backups)} backups cargados en el ComboBox")
             
@@ -130,6 +158,12 @@ class RestaurarController:
             print(f"❌ Error obteniendo main window: {e}")
             return None
 
+    def nombre_usuario_actual(self):
+        """Usuario con sesión iniciada, para el catálogo de copias"""
+        main_window = self.get_main_window()
+        usuario = getattr(main_window, 'usuario_actual', None) or {}
+        return usuario.get('usuario', '')
+
     def restaurar_backup(self):
         """Restaura el backup seleccionado"""
         try:
@@ -138,22 +172,22 @@ class RestaurarController:
                 self.mostrar_error("No hay backups disponibles para restaurar.")
                 return
             
-            # Obtener la ruta del backup seleccionado
+            # Obtener el backup seleccionado: ("instantanea", id) o ("archivo", ruta)
             backup_ruta = self.combo_backups.currentData()
             
-            if not backup_ruta or not os.path.exists(backup_ruta):
+            if not backup_ruta or not self.backup_existe(backup_ruta):
                 self.mostrar_error("El backup seleccionado no es válido o no existe.")
                 return
             
             # Ruta de la base de datos original
-            db_original = "bdd/SDLGAPP.db"
+            db_original = RUTA_BD
             
             # Confirmar restauración
             respuesta = QtWidgets.QMessageBox.question(
                 self.restaurar_widget,
                 "Confirmar Restauración",
                 f"¿Está seguro de que desea restaurar el backup?\n\n"
-                f"Backup: {os.path.basename(backup_ruta)}\n"
+                f"Backup: {self.combo_backups.currentText()}\n"
                 f"Esta acción reemplazará la base de datos actual.",
                 QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
                 QtWidgets.QMessageBox.No
@@ -169,67 +203,108 @@ class RestaurarController:
             print(f"❌ Error al restaurar backup: {e}")
             self.mostrar_error(f"Error al restaurar backup: {str(e)}")
 
+    def abrir_restauracion_parcial(self):
+        """Abre el diálogo para restaurar un arete o una tabla desde la copia seleccionada"""
+        try:
+            backup_ruta = self.combo_backups.currentData()
+            if not backup_ruta or not self.backup_existe(backup_ruta):
+                self.mostrar_error("Seleccione una copia de seguridad válida.")
+                return
+            dialogo = RestauracionParcialDialog(self, backup_ruta, self.combo_backups.currentText())
+            dialogo.exec_()
+        except Exception as e:
+            print(f"❌ Error abriendo restauración parcial: {e}")
+            self.mostrar_error(f"Error en la restauración parcial: {str(e)}")
+
     def ejecutar_restauracion(self, backup_ruta, db_original):
-        """Ejecuta el proceso de restauración"""
+        """Verifica y restaura en segundo plano; la aplicación sigue abierta, sin reiniciar"""
         try:
-            # Mostrar progreso
-            progress_dialog = QtWidgets.QProgressDialog("Restaurando copia de seguridad...", "Cancelar", 0, 100, self.restaurar_widget)
-            progress_dialog.setWindowTitle("Procesando")
-            progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
-            progress_dialog.show()
-            
-            # Simular progreso
-            for i in range(101):
-                QtCore.QThread.msleep(20)  # Pequeña pausa para simular trabajo
-                progress_dialog.setValue(i)
-                QtWidgets.QApplication.processEvents()
-                
-                if progress_dialog.wasCanceled():
-                    progress_dialog.close()
-                    self.mostrar_informacion("Restauración cancelada.")
-                    return
-            
-            progress_dialog.close()
+            if self.tarea_restauracion and self.tarea_restauracion.en_curso:
+                self.mostrar_informacion("Ya hay una restauración en curso.")
+                return
             
-            # Crear backup de la base de datos actual antes de restaurar
-            if os.path.exists(db_original):
-                backup_actual = f"backups/SDLGAPP_backup_pre_restore_{datetime.now().strftime('%d-%m-%Y_%H-%M-%S')}.db"
-                shutil.copy2(db_original, backup_actual)
-                print(f"✅ Backup de BD actual creado: {backup_actual}")
+            # Sin máximo hasta que empieza el reemplazo (reconstruir y verificar no reportan avance)
+            self.progress_dialog = QtWidgets.QProgressDialog(
+                "Verificando y restaurando copia de seguridad...", "Cancelar", 0, 0, self.restaurar_widget)
+            self.progress_dialog.setWindowTitle("Procesando")
+            self.progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+            self.progress_dialog.setAutoClose(False)
+            self.progress_dialog.setAutoReset(False)
             
-            # Realizar la restauración
-            shutil.copy2(backup_ruta, db_original)
+            # ✅ RECONSTRUIR, integrity_check, COPIA PREVIA Y REEMPLAZO CON LA API DE BACKUP: TODO FUERA DE LA INTERFAZ
+            tipo, origen = backup_ruta
+            usuario = self.nombre_usuario_actual()
+            self.tarea_restauracion = TareaFondo(
+                lambda progreso, cancelada: restaurar(tipo, origen, db_original, self.repositorio,
+                                                      progreso, cancelada, usuario),
+                self.restaurar_widget
+            )
+            self.tarea_restauracion.progreso.connect(self.actualizar_progreso)
+            self.tarea_restauracion.terminada.connect(
+                lambda resultado: self.restauracion_terminada(origen, resultado))
+            self.tarea_restauracion.cancelada.connect(self.restauracion_cancelada)
+            self.tarea_restauracion.fallida.connect(self.restauracion_fallida)
+            self.progress_dialog.canceled.connect(self.tarea_restauracion.cancelar)
             
-            # Verificar que se restauró correctamente
-            if os.path.exists(db_original):
-                tamaño_original = os.path.getsize(backup_ruta)
-                tamaño_restaurado = os.path.getsize(db_original)
+            self.progress_dialog.show()
+            self.tarea_restauracion.iniciar()
                 
-                if tamaño_original == tamaño_restaurado:
-                    mensaje = f"""
+        except Exception as e:
+            print(f"❌ Error en ejecutar_restauracion: {e}")
+            self.mostrar_error(f"Error durante la restauración: {str(e)}")
+
+    def actualizar_progreso(self, copiadas, total):
+        """Actualiza la barra con las páginas reemplazadas"""
+        if self.progress_dialog and total:
+            self.progress_dialog.setMaximum(total)
+            self.progress_dialog.setValue(copiadas)
+
+    def cerrar_progreso(self):
+        if self.progress_dialog:
+            self.progress_dialog.close()
+            self.progress_dialog = None
+
+    def restauracion_terminada(self, origen, resultado):
+        """La BD ya tiene el contenido de la copia: se reabren conexiones y se vacían las cachés"""
+        self.cerrar_progreso()
+        
+        # ✅ LAS CONEXIONES SE REABREN Y LA COPIA SE MIGRA AL ESQUEMA ACTUAL SI ERA MÁS VIEJA
+        reabrir_base_de_datos(RUTA_BD)
+        QtGui.QPixmapCache.clear()
+        
+        mensaje = f"""
 ✅ Restauración completada exitosamente
 
 📊 Detalles:
-• Backup restaurado: {os.path.basename(backup_ruta)}
-• Tamaño: {self.formatear_tamaño(tamaño_restaurado)}
+• Backup restaurado: {os.path.basename(origen)}
+• Tamaño: {self.formatear_tamaño(resultado['tamano'])}
+• Copia de la BD anterior: {resultado['anterior'] or 'no había base de datos'}
 • Fecha: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
 
-🔄 La aplicación se reiniciará para aplicar los cambios.
-                    """
-                    
-                    # Registrar en logs
-                    self.registrar_restauracion(backup_ruta, tamaño_restaurado)
-                    
-                    # Mostrar mensaje y reiniciar
-                    self.mostrar_reinicio(mensaje)
-                else:
-                    self.mostrar_error("Error: Los tamaños no coinciden. La restauración puede estar corrupta.")
-            else:
-                self.mostrar_error("No se pudo restaurar la base de datos.")
-                
-        except Exception as e:
-            print(f"❌ Error en ejecutar_restauracion: {e}")
-            self.mostrar_error(f"Error durante la restauración: {str(e)}")
+Los datos ya están actualizados; no es necesario reiniciar.
+        """
+        
+        # Registrar en logs
+        self.registrar_restauracion(origen, resultado['tamano'])
+        self.cargar_backups()
+        self.mostrar_informacion(mensaje)
+
+    def restauracion_cancelada(self):
+        self.cerrar_progreso()
+        print("⚠️ Restauración cancelada")
+        self.mostrar_informacion("Restauración cancelada. La base de datos no se modificó.")
+
+    def restauracion_fallida(self, error):
+        self.cerrar_progreso()
+        print(f"❌ Error en la restauración: {error}")
+        self.mostrar_error(f"No se restauró la copia (la base de datos no se modificó):\n{error}")
+
+    def backup_existe(self, backup):
+        """Verifica que la instantánea o el archivo seleccionado sigan existiendo"""
+        tipo, origen = backup
+        if tipo == "instantanea":
+            return os.path.exists(self.repositorio._ruta_manifiesto(origen))
+        return os.path.exists(origen)
 
     def formatear_tamaño(self, bytes):
         """Formatea el tamaño en bytes a formato legible"""
@@ -239,8 +314,8 @@ class RestaurarController:
             bytes /= 1024.0
         return f"{bytes:.2f} TB"
 
-    def registrar_restauracion(self, backup_ruta, tamaño):
-        """Registra la restauración en un archivo de log"""
+    def registrar_restauracion(self, backup_ruta, tamaño, parcial=""):
+        """Registra la restauración (completa o parcial) en un archivo de log"""
         try:
             log_dir = "logs"
             if not os.path.exists(log_dir):
@@ -250,39 +325,16 @@ class RestaurarController:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             
             with open(log_file, "a", encoding="utf-8") as f:
-                f.write(f"[{timestamp}] Restauración - Backup: {backup_ruta}, Tamaño: {tamaño} bytes\n")
+                if parcial:
+                    f.write(f"[{timestamp}] Restauración parcial - Backup: {backup_ruta}, {parcial}\n")
+                else:
+                    f.write(f"[{timestamp}] Restauración - Backup: {backup_ruta}, Tamaño: {tamaño} bytes\n")
             
             print(f"✅ Restauración registrada en log: {log_file}")
             
         except Exception as e:
             print(f"⚠️ Error registrando restauración en log: {e}")
 
-    def mostrar_reinicio(self, mensaje):
-        """Muestra mensaje de reinicio"""
-        try:
-            msg = QtWidgets.QMessageBox(self.restaurar_widget)
-            msg.setWindowTitle("Restauración Completada")
-            msg.setText(mensaje)
-            msg.setIcon(QtWidgets.QMessageBox.Information)
-            msg.setStandardButtons(QtWidgets.QMessageBox.Ok)
-            
-            # Conectar el botón OK para reiniciar la aplicación
-            msg.buttonClicked.connect(self.reiniciar_aplicacion)
-            msg.exec_()
-            
-        except Exception as e:
-            print(f"❌ Error mostrando mensaje de reinicio: {e}")
-
-    def reiniciar_aplicacion(self):
-        """Reinicia la aplicación"""
-        try:
-            print("🔄 Reiniciando aplicación...")
-            QtWidgets.QApplication.quit()
-            # En un entorno real, aquí reiniciarías la aplicación
-            # os.execv(sys.executable, ['python'] + sys.argv)
-        except Exception as e:
-            print(f"❌ Error reiniciando aplicación: {e}")
-
     def mostrar_error(self, mensaje):
         """Muestra un mensaje de error"""
         try:
@@ -313,4 +365,171 @@ class RestaurarController:
 
     def limpiar_recursos(self):
         """Método para limpiar recursos cuando se cierra la aplicación"""
-        print("🧹 Limpiando recursos del controlador Restaurar...")
\ No newline at end of file
+        print("🧹 Limpiando recursos del controlador Restaurar...")
+
+
+# Nombres de las tablas para el usuario
+NOMBRES_TABLAS = {
+    "tganado": "Animales",
+    "tbecerros": "Becerros",
+    "tsalud": "Registros de salud",
+    "treprod": "Reproducción",
+    "tpropietarios": "Propietarios",
+    "tcorral": "Corrales",
+    "tusuarios": "Usuarios",
+}
+
+
+class RestauracionParcialDialog(QtWidgets.QDialog):
+    """Compara la copia con la BD actual y devuelve solo un arete o una tabla"""
+
+    def __init__(self, controller, backup, nombre_copia):
+        super().__init__(controller.restaurar_widget)
+        self.controller = controller
+        self.backup = backup
+        self.parcial = None
+        self.setWindowTitle("Restauración parcial")
+        self.setMinimumWidth(480)
+        self.crear_controles(nombre_copia)
+
+        # ✅ LA COPIA SE RECONSTRUYE Y MIGRA EN SEGUNDO PLANO; MIENTRAS, LOS CONTROLES ESPERAN
+        tipo, origen = backup
+        self.tarea = TareaFondo(
+            lambda progreso, cancelada: RestauracionParcial.preparar(
+                tipo, origen, RUTA_BD, controller.repositorio, cancelada),
+            self
+        )
+        self.tarea.terminada.connect(self.copia_lista)
+        self.tarea.fallida.connect(self.copia_fallida)
+        self.habilitar(False)
+        self.tarea.iniciar()
+
+    def crear_controles(self, nombre_copia):
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(QtWidgets.QLabel(f"Copia: {nombre_copia}"))
+
+        formulario = QtWidgets.QFormLayout()
+        self.combo_modo = QtWidgets.QComboBox()
+        self.combo_modo.addItems(["Un animal o becerro (por arete)", "Una tabla completa"])
+        self.combo_modo.currentIndexChanged.connect(self.cambiar_modo)
+        formulario.addRow("Restaurar:", self.combo_modo)
+
+        self.txt_arete = QtWidgets.QLineEdit()
+        self.txt_arete.setPlaceholderText("Arete del animal")
+        formulario.addRow("Arete:", self.txt_arete)
+
+        self.combo_tabla = QtWidgets.QComboBox()
+        for tabla in TABLAS_RESTAURABLES:
+            self.combo_tabla.addItem(NOMBRES_TABLAS.get(tabla, tabla), tabla)
+        formulario.addRow("Tabla:", self.combo_tabla)
+        layout.addLayout(formulario)
+
+        self.chk_sobrescribir = QtWidgets.QCheckBox("Dejar también como en la copia los registros modificados")
+        layout.addWidget(self.chk_sobrescribir)
+
+        self.lbl_resultado = QtWidgets.QLabel("Preparando la copia...")
+        self.lbl_resultado.setWordWrap(True)
+        layout.addWidget(self.lbl_resultado)
+
+        botones = QtWidgets.QDialogButtonBox()
+        self.btn_comparar = botones.addButton("Comparar", QtWidgets.QDialogButtonBox.ActionRole)
+        self.btn_aplicar = botones.addButton("Restaurar selección", QtWidgets.QDialogButtonBox.AcceptRole)
+        botones.addButton(QtWidgets.QDialogButtonBox.Close)
+        self.btn_comparar.clicked.connect(self.comparar)
+        self.btn_aplicar.clicked.connect(self.aplicar)
+        botones.rejected.connect(self.reject)
+        layout.addWidget(botones)
+        self.cambiar_modo(0)
+
+    def habilitar(self, habilitado):
+        for control in (self.combo_modo, self.txt_arete, self.combo_tabla, self.chk_sobrescribir,
+                        self.btn_comparar, self.btn_aplicar):
+            control.setEnabled(habilitado)
+        if habilitado:
+            self.cambiar_modo(self.combo_modo.currentIndex())
+
+    def cambiar_modo(self, indice):
+        self.txt_arete.setEnabled(indice == 0)
+        self.combo_tabla.setEnabled(indice == 1)
+
+    def copia_lista(self, parcial):
+        self.parcial = parcial
+        self.lbl_resultado.setText("Elija qué restaurar y presione Comparar.")
+        self.habilitar(True)
+
+    def copia_fallida(self, error):
+        self.lbl_resultado.setText(f"❌ No se pudo preparar la copia: {error}")
+
+    def seleccion(self):
+        """("arete", valor) o ("tabla", nombre); None si falta el arete"""
+        if self.combo_modo.currentIndex() == 0:
+            arete = self.txt_arete.text().strip()
+            return ("arete", arete) if arete else None
+        return ("tabla", self.combo_tabla.currentData())
+
+    @staticmethod
+    def describir(diferencias):
+        return (f"{diferencias['faltantes']} borrados desde la copia, {diferencias['modificadas']} modificados, "
+                f"{diferencias['nuevas']} agregados después (estos no se tocan)")
+
+    def comparar(self):
+        seleccion = self.seleccion()
+        if not seleccion:
+            self.lbl_resultado.setText("Escriba el arete del animal.")
+            return
+        try:
+            modo, valor = seleccion
+            if modo == "arete":
+                diferencias = self.parcial.comparar_arete(valor)
+                lineas = [f"• {NOMBRES_TABLAS[tabla]}: {self.describir(d)}" for tabla, d in diferencias.items()]
+            else:
+                lineas = [f"• {NOMBRES_TABLAS[valor]}: {self.describir(self.parcial.comparar_tabla(valor))}"]
+            self.lbl_resultado.setText("\n".join(lineas))
+        except Exception as e:
+            print(f"❌ Error comparando copia: {e}")
+            self.lbl_resultado.setText(f"❌ Error comparando: {e}")
+
+    def aplicar(self):
+        seleccion = self.seleccion()
+        if not seleccion:
+            self.lbl_resultado.setText("Escriba el arete del animal.")
+            return
+        modo, valor = seleccion
+        descripcion = f"el arete {valor}" if modo == "arete" else f"la tabla {NOMBRES_TABLAS[valor]}"
+        respuesta = QtWidgets.QMessageBox.question(
+            self, "Confirmar restauración parcial",
+            f"¿Restaurar {descripcion} desde la copia?\nEl resto de la base de datos no se modifica.",
+            QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No, QtWidgets.QMessageBox.No)
+        if respuesta == QtWidgets.QMessageBox.No:
+            return
+
+        try:
+            sobrescribir = self.chk_sobrescribir.isChecked()
+            if modo == "arete":
+                resultado = self.parcial.restaurar_arete(valor, sobrescribir)
+            else:
+                resultado = self.parcial.restaurar_tabla(valor, sobrescribir)
+        except Exception as e:
+            # Todo fue en una transacción: si algo falla (p. ej. el arete ya existe) no cambia nada
+            print(f"❌ Error en restauración parcial: {e}")
+            self.lbl_resultado.setText(f"❌ No se restauró nada: {e}")
+            return
+
+        lineas = [f"• {NOMBRES_TABLAS[tabla]}: {r['insertadas']} recuperados, {r['actualizadas']} actualizados"
+                  for tabla, r in resultado.items() if r['insertadas'] or r['actualizadas']]
+        self.lbl_resultado.setText("✅ Restauración parcial completada\n" + ("\n".join(lineas) or "No había diferencias."))
+        QtGui.QPixmapCache.clear()
+        self.controller.registrar_restauracion(
+            self.backup[1], 0, f"{descripcion}: " + "; ".join(
+                f"{tabla} +{r['insertadas']} ~{r['actualizadas']}" for tabla, r in resultado.items()))
+
+    def done(self, resultado):
+        """Al cerrar se borra la copia temporal (o se cancela su preparación)"""
+        if self.tarea.en_curso:
+            self.tarea.cancelar()
+            self.tarea.terminada.connect(lambda parcial: parcial.cerrar())
+        if self.parcial:
+            self.parcial.cerrar()
+            self.parcial = None
+        super().done(resultado)
+
@@ -0,0 +1,536 @@
+from collections import OrderedDict
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+from fechas import para_mostrar
+from miniaturas import obtener_miniaturas
+
+# Tipos de columna del grid
+TEXTO = "texto"
+FOTO = "foto"
+OBSERVACIONES = "observaciones"
+FECHA = "fecha"
+ACCIONES = "acciones"
+
+# Miniaturas que el proveedor conserva ya decodificadas (el resto queda en QPixmapCache/tminiaturas)
+LIMITE_MINIATURAS_EN_MEMORIA = 300
+
+
+class Columna:
+    """Describe una columna del grid: de qué posición de la fila sale y cómo se dibuja"""
+
+    def __init__(self, titulo, indice=None, tipo=TEXTO, largo_preview=30, placeholder="📷"):
+        self.titulo = titulo
+        self.indice = indice
+        self.tipo = tipo
+        self.largo_preview = largo_preview
+        self.placeholder = placeholder
+
+
+class Accion:
+    """Botón dibujado dentro de la columna de opciones; funcion recibe la fila completa"""
+
+    def __init__(self, texto, color, color_hover, tooltip, funcion, visible=None, habilitada=None):
+        self.texto = texto
+        self.color = color
+        self.color_hover = color_hover
+        self.tooltip = tooltip
+        self.funcion = funcion
+        self.visible = visible
+        self.habilitada = habilitada
+
+    def texto_para(self, fila):
+        return self.texto(fila) if callable(self.texto) else self.texto
+
+    def es_visible(self, fila):
+        return self.visible is None or bool(self.visible(fila))
+
+    def es_habilitada(self, fila):
+        return self.habilitada is None or bool(self.habilitada(fila))
+
+
+class ModeloTabla(QtCore.QAbstractTableModel):
+    """Modelo de solo lectura sobre las tuplas tal como las devuelve la base de datos"""
+
+    def __init__(self, columnas, parent=None):
+        super().__init__(parent)
+        self.columnas = columnas
+        self._filas = []
+        self._orden = None
+        self._cursor = None
+        self.proveedor_fotos = None
+
+    # ✅ ALMACÉN DE FILAS
+    def establecer_filas(self, filas):
+        """Reemplaza todas las filas; la vista solo pinta las que están en pantalla"""
+        self.beginResetModel()
+        self._cursor = None
+        self._filas = list(filas)
+        if self._orden:
+            self._ordenar(*self._orden)
+        if self.proveedor_fotos:
+            self.proveedor_fotos.limpiar()
+        self.endResetModel()
+
+    def establecer_cursor(self, cursor):
+        """Muestra un listado paginado (CursorPaginado); las páginas siguientes se piden al hacer scroll"""
+        if self._orden:
+            cursor = self._cursor_ordenado(cursor, *self._orden)
+        self.beginResetModel()
+        self._cursor = cursor
+        self._filas = cursor.siguiente_pagina()
+        if self.proveedor_fotos:
+            self.proveedor_fotos.limpiar()
+        self.endResetModel()
+
+    def _cursor_ordenado(self, cursor, column, order):
+        """El orden se resuelve en SQL para que cada página llegue ya ordenada"""
+        indice = self.columnas[column].indice
+        if indice is None or indice >= len(cursor.columnas):
+            return cursor
+        return cursor.reordenado(cursor.columnas[indice], order == QtCore.Qt.DescendingOrder)
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        return not parent.isValid() and self._cursor is not None and self._cursor.hay_mas
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        filas = self._cursor.siguiente_pagina()
+        if not filas:
+            return
+        inicio = len(self._filas)
+        self.beginInsertRows(QtCore.QModelIndex(), inicio, inicio + len(filas) - 1)
+        self._filas.extend(filas)
+        self.endInsertRows()
+
+    def cargar_todo(self):
+        """Lee las páginas pendientes (para exportar el listado completo)"""
+        while self.canFetchMore():
+            self.fetchMore()
+
+    def fila(self, row):
+        if 0 <= row < len(self._filas):
+            return self._filas[row]
+        return None
+
+    def filas(self):
+        return self._filas
+
+    def valor(self, row, column):
+        """Valor crudo de la celda según la columna"""
+        columna = self.columnas[column]
+        fila = self._filas[row]
+        if columna.indice is None or columna.indice >= len(fila):
+            return None
+        return fila[columna.indice]
+
+    def texto(self, row, column):
+        """Texto de la celda tal como se exporta (observaciones completas, botones por su texto)"""
+        columna = self.columnas[column]
+        if columna.tipo == ACCIONES:
+            delegado = self._delegado_acciones(column)
+            fila = self._filas[row]
+            if delegado is None:
+                return ""
+            return " ".join(a.texto_para(fila) for a in delegado.acciones if a.es_visible(fila))
+        valor = self.valor(row, column)
+        if columna.tipo == FECHA:
+            # Se guarda en ISO (ordena bien); se muestra y exporta como dd/MM/yyyy
+            return para_mostrar(valor)
+        return "" if valor is None else str(valor)
+
+    def _delegado_acciones(self, column):
+        vista = self.parent()
+        if isinstance(vista, QtWidgets.QAbstractItemView):
+            delegado = vista.itemDelegateForColumn(column)
+            if isinstance(delegado, DelegadoAcciones):
+                return delegado
+        return None
+
+    # ✅ INTERFAZ DE QAbstractTableModel
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.columnas)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            if 0 <= section < len(self.columnas):
+                return self.columnas[section].titulo
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        columna = self.columnas[index.column()]
+
+        if columna.tipo == ACCIONES:
+            return None
+
+        if columna.tipo == FOTO:
+            if self.proveedor_fotos is None:
+                return None
+            if role == QtCore.Qt.DecorationRole:
+                return self.proveedor_fotos.pixmap(index.row())
+            if role == QtCore.Qt.ToolTipRole:
+                if self.proveedor_fotos.tiene_foto(index.row()):
+                    return "Haz clic para ver la foto en tamaño completo"
+                return "📷 Sin foto - Haz clic para más información"
+            return None
+
+        texto = self.texto(index.row(), index.column())
+
+        if columna.tipo == OBSERVACIONES:
+            tiene_texto = bool(texto.strip())
+            if role == QtCore.Qt.DisplayRole:
+                largo = columna.largo_preview
+                return texto[:largo] + "..." if len(texto) > largo else texto
+            if role == QtCore.Qt.UserRole:
+                return texto
+            if role == QtCore.Qt.ForegroundRole:
+                return QtGui.QColor('#2980b9' if tiene_texto else '#95a5a6')
+            if role == QtCore.Qt.ToolTipRole:
+                return "Doble clic para ver observaciones completas" if tiene_texto else "Sin observaciones"
+            return None
+
+        if role == QtCore.Qt.DisplayRole:
+            return texto
+        if role == QtCore.Qt.UserRole:
+            return self.valor(index.row(), index.column())
+        return None
+
+    def sort(self, column, order=QtCore.Qt.AscendingOrder):
+        if not (0 <= column < len(self.columnas)) or self.columnas[column].indice is None:
+            return
+        if self._cursor is not None:
+            self._orden = (column, order)
+            cursor = self._cursor_ordenado(self._cursor, column, order)
+            self.beginResetModel()
+            self._cursor = cursor
+            self._filas = cursor.siguiente_pagina()
+            self.endResetModel()
+            return
+        self.layoutAboutToBeChanged.emit()
+        self._ordenar(column, order)
+        self.layoutChanged.emit()
+
+    def _ordenar(self, column, order):
+        self._orden = (column, order)
+        indice = self.columnas[column].indice
+
+        def clave(fila):
+            valor = fila[indice] if indice < len(fila) else None
+            if valor is None:
+                return (2, 0, "")
+            try:
+                return (0, float(valor), "")
+            except (TypeError, ValueError):
+                return (1, 0, str(valor).lower())
+
+        self._filas.sort(key=clave, reverse=order == QtCore.Qt.DescendingOrder)
+
+
+class ProveedorMiniaturas(QtCore.QObject):
+    """Entrega las miniaturas de las filas que se pintan, cargándolas por lotes fuera del paint"""
+
+    def __init__(self, modelo, db, entidad, indice_clave, indice_foto, columna):
+        super().__init__(modelo)
+        self.modelo = modelo
+        self.db = db
+        self.entidad = entidad
+        self.indice_clave = indice_clave
+        self.indice_foto = indice_foto
+        self.columna = columna
+        self._pixmaps = OrderedDict()  # {clave: QPixmap | None}, LRU acotado
+        self._pendientes = {}  # {clave: hash de la foto}
+
+        self._temporizador = QtCore.QTimer(self)
+        self._temporizador.setSingleShot(True)
+        self._temporizador.setInterval(0)
+        self._temporizador.timeout.connect(self._cargar_pendientes)
+
+        modelo.proveedor_fotos = self
+
+    def _clave_y_foto(self, row):
+        fila = self.modelo.fila(row)
+        if fila is None:
+            return "", None
+        clave = str(fila[self.indice_clave] if fila[self.indice_clave] else "")
+        foto = fila[self.indice_foto] if len(fila) > self.indice_foto else None
+        return clave, foto
+
+    def tiene_foto(self, row):
+        return bool(self._clave_y_foto(row)[1])
+
+    def pixmap(self, row):
+        """Miniatura de la fila, o None mientras se carga / si no tiene foto"""
+        clave, foto = self._clave_y_foto(row)
+        if not foto:
+            return None
+        if clave in self._pixmaps:
+            self._pixmaps.move_to_end(clave)
+            return self._pixmaps[clave]
+        self._pendientes[clave] = foto
+        self._temporizador.start()
+        return None
+
+    def _cargar_pendientes(self):
+        pendientes, self._pendientes = self._pendientes, {}
+        if not pendientes:
+            return
+        try:
+            self._pixmaps.update(obtener_miniaturas(self.db, self.entidad, pendientes))
+        except Exception as e:
+            print(f"❌ Error cargando miniaturas de {self.entidad}: {e}")
+            self._pixmaps.update({clave: None for clave in pendientes})
+        while len(self._pixmaps) > LIMITE_MINIATURAS_EN_MEMORIA:
+            self._pixmaps.popitem(last=False)
+
+        total = self.modelo.rowCount()
+        if total:
+            self.modelo.dataChanged.emit(
+                self.modelo.index(0, self.columna),
+                self.modelo.index(total - 1, self.columna),
+                [QtCore.Qt.DecorationRole]
+            )
+
+    def limpiar(self):
+        self._pixmaps.clear()
+        self._pendientes.clear()
+
+
+def _pintar_fondo(painter, option):
+    """Pinta el fondo de la celda (selección, filas alternas) como lo haría la vista"""
+    opcion = QtWidgets.QStyleOptionViewItem(option)
+    estilo = opcion.widget.style() if opcion.widget else QtWidgets.QApplication.style()
+    estilo.drawPrimitive(QtWidgets.QStyle.PE_PanelItemViewItem, opcion, painter, opcion.widget)
+
+
+class DelegadoFoto(QtWidgets.QStyledItemDelegate):
+    """Pinta la miniatura (o el placeholder) sin crear un QLabel por fila"""
+
+    clic = QtCore.pyqtSignal(object)  # fila completa
+
+    def __init__(self, placeholder="📷", parent=None):
+        super().__init__(parent)
+        self.placeholder = placeholder
+
+    def paint(self, painter, option, index):
+        _pintar_fondo(painter, option)
+
+        area = option.rect.adjusted(8, 6, -8, -6)
+        lado = min(area.width(), area.height())
+        marco = QtCore.QRect(0, 0, lado, lado)
+        marco.moveCenter(area.center())
+
+        pixmap = index.data(QtCore.Qt.DecorationRole)
+        tiene_pixmap = isinstance(pixmap, QtGui.QPixmap) and not pixmap.isNull()
+
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setPen(QtGui.QPen(QtGui.QColor('#bdc3c7'), 2,
+                                  QtCore.Qt.SolidLine if tiene_pixmap else QtCore.Qt.DashLine))
+        painter.setBrush(QtGui.QColor('#ecf0f1'))
+        painter.drawRoundedRect(marco, 5, 5)
+
+        if tiene_pixmap:
+            interior = marco.adjusted(2, 2, -2, -2)
+            destino = QtCore.QRect(QtCore.QPoint(0, 0),
+                                   pixmap.size().scaled(interior.size(), QtCore.Qt.KeepAspectRatio))
+            destino.moveCenter(interior.center())
+            painter.drawPixmap(destino, pixmap)
+        else:
+            fuente = QtGui.QFont(option.font)
+            fuente.setPixelSize(24)
+            painter.setFont(fuente)
+            painter.setPen(QtGui.QColor('#95a5a6'))
+            painter.drawText(marco, QtCore.Qt.AlignCenter, self.placeholder)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if (event.type() == QtCore.QEvent.MouseButtonRelease
+                and event.button() == QtCore.Qt.LeftButton
+                and option.rect.contains(event.pos())):
+            fila = model.fila(index.row())
+            # Diferido: el manejador puede abrir diálogos modales y recargar el modelo
+            QtCore.QTimer.singleShot(0, lambda: self.clic.emit(fila))
+            return True
+        return False
+
+
+class DelegadoAcciones(QtWidgets.QStyledItemDelegate):
+    """Pinta los botones de opciones de cada fila y despacha el clic a la acción correspondiente"""
+
+    ALTO_BOTON = 26
+    ESPACIO = 4
+    MARGEN = 2
+
+    def __init__(self, acciones, tamano_fuente=12, ancho_minimo=30, parent=None):
+        super().__init__(parent)
+        self.acciones = acciones
+        self.tamano_fuente = tamano_fuente
+        self.ancho_minimo = ancho_minimo
+        self._hover = None  # (fila, posición del botón)
+
+    def _fuente(self, base):
+        fuente = QtGui.QFont(base)
+        fuente.setPixelSize(self.tamano_fuente)
+        return fuente
+
+    def _botones(self, rect, fila, fuente):
+        """[(acción, rectángulo)] de los botones visibles en la celda"""
+        metricas = QtGui.QFontMetrics(fuente)
+        alto = min(self.ALTO_BOTON, rect.height() - 2 * self.MARGEN)
+        y = rect.center().y() - alto // 2
+        x = rect.left() + self.MARGEN
+        botones = []
+        for accion in self.acciones:
+            if not accion.es_visible(fila):
+                continue
+            ancho = max(self.ancho_minimo, metricas.horizontalAdvance(accion.texto_para(fila)) + 12)
+            botones.append((accion, QtCore.QRect(x, y, ancho, alto)))
+            x += ancho + self.ESPACIO
+        return botones
+
+    def paint(self, painter, option, index):
+        _pintar_fondo(painter, option)
+        fila = index.model().fila(index.row())
+        if fila is None:
+            return
+
+        fuente = self._fuente(option.font)
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setFont(fuente)
+        for posicion, (accion, rect) in enumerate(self._botones(option.rect, fila, fuente)):
+            if not accion.es_habilitada(fila):
+                fondo, color_texto = '#bdc3c7', '#7f8c8d'
+            elif self._hover == (index.row(), posicion):
+                fondo, color_texto = accion.color_hover, 'white'
+            else:
+                fondo, color_texto = accion.color, 'white'
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.setBrush(QtGui.QColor(fondo))
+            painter.drawRoundedRect(rect, 3, 3)
+            painter.setPen(QtGui.QColor(color_texto))
+            painter.drawText(rect, QtCore.Qt.AlignCenter, accion.texto_para(fila))
+        painter.restore()
+
+    def boton_en(self, rect, fila, fuente, pos):
+        for posicion, (accion, rect_boton) in enumerate(self._botones(rect, fila, fuente)):
+            if rect_boton.contains(pos):
+                return posicion, accion
+        return None, None
+
+    def actualizar_hover(self, vista, index, pos):
+        """Resalta el botón bajo el cursor; devuelve True si hay un botón habilitado"""
+        hover = None
+        habilitado = False
+        if index.isValid():
+            fila = index.model().fila(index.row())
+            if fila is not None:
+                posicion, accion = self.boton_en(vista.visualRect(index), fila, self._fuente(vista.font()), pos)
+                if accion is not None:
+                    hover = (index.row(), posicion)
+                    habilitado = accion.es_habilitada(fila)
+        if hover != self._hover:
+            self._hover = hover
+            vista.viewport().update()
+        return habilitado
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QtCore.QEvent.MouseButtonRelease and event.button() == QtCore.Qt.LeftButton:
+            fila = model.fila(index.row())
+            if fila is None:
+                return False
+            _, accion = self.boton_en(option.rect, fila, self._fuente(option.font), event.pos())
+            if accion is not None and accion.es_habilitada(fila):
+                # Diferido: la acción puede abrir diálogos modales y recargar el modelo
+                QtCore.QTimer.singleShot(0, lambda: accion.funcion(fila))
+                return True
+        return False
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QtCore.QEvent.ToolTip:
+            fila = index.model().fila(index.row())
+            if fila is not None:
+                _, accion = self.boton_en(option.rect, fila, self._fuente(option.font), event.pos())
+                if accion is not None:
+                    QtWidgets.QToolTip.showText(event.globalPos(), accion.tooltip, view)
+                    return True
+            QtWidgets.QToolTip.hideText()
+            return True
+        return super().helpEvent(event, view, option, index)
+
+
+class VistaTabla(QtWidgets.QTableView):
+    """QTableView que sustituye al QTableWidget del .ui para trabajar con ModeloTabla"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Necesario para resaltar el botón bajo el cursor sin hacer clic
+        self.setMouseTracking(True)
+        self.viewport().setMouseTracking(True)
+
+    def mouseMoveEvent(self, event):
+        index = self.indexAt(event.pos())
+        delegado = self.itemDelegateForColumn(index.column()) if index.isValid() else None
+        clickeable = False
+        if isinstance(delegado, DelegadoAcciones):
+            clickeable = delegado.actualizar_hover(self, index, event.pos())
+        elif isinstance(delegado, DelegadoFoto):
+            clickeable = True
+        for columna in range(self.model().columnCount() if self.model() else 0):
+            otro = self.itemDelegateForColumn(columna)
+            if isinstance(otro, DelegadoAcciones) and otro is not delegado:
+                otro.actualizar_hover(self, QtCore.QModelIndex(), event.pos())
+        if clickeable:
+            self.viewport().setCursor(QtCore.Qt.PointingHandCursor)
+        else:
+            self.viewport().unsetCursor()
+        super().mouseMoveEvent(event)
+
+    def leaveEvent(self, event):
+        for columna in range(self.model().columnCount() if self.model() else 0):
+            delegado = self.itemDelegateForColumn(columna)
+            if isinstance(delegado, DelegadoAcciones):
+                delegado.actualizar_hover(self, QtCore.QModelIndex(), QtCore.QPoint())
+        self.viewport().unsetCursor()
+        super().leaveEvent(event)
+
+
+def reemplazar_tabla(tabla, modelo):
+    """
+    Sustituye el QTableWidget del .ui por una VistaTabla en el mismo lugar del layout
+    y le asigna el modelo. Si ya es una VistaTabla solo cambia el modelo.
+    """
+    if isinstance(tabla, VistaTabla):
+        vista = tabla
+    else:
+        contenedor = tabla.parentWidget()
+        vista = VistaTabla(contenedor)
+        vista.setObjectName(tabla.objectName())
+        vista.setSizePolicy(tabla.sizePolicy())
+        layout = contenedor.layout() if contenedor else None
+        if layout is not None:
+            layout.replaceWidget(tabla, vista)
+        else:
+            vista.setGeometry(tabla.geometry())
+        tabla.hide()
+        tabla.setParent(None)
+        tabla.deleteLater()
+        vista.show()
+
+    anterior = vista.model()
+    modelo.setParent(vista)
+    vista.setModel(modelo)
+    if isinstance(anterior, ModeloTabla) and anterior is not modelo:
+        anterior.deleteLater()
+    return vista
@@ -0,0 +1,113 @@
+from PyQt5 import QtCore
+
+from respaldos import ejecutar_respaldo_programado, registrar_error_respaldo
+
+
+class _Ejecucion(QtCore.QRunnable):
+    """Corre la función de la tarea en un hilo del QThreadPool"""
+
+    def __init__(self, tarea):
+        super().__init__()
+        self.tarea = tarea
+
+    def run(self):
+        tarea = self.tarea
+        try:
+            resultado = tarea.funcion(tarea._reportar_progreso, tarea.fue_cancelada)
+            tarea._fin.emit("terminada", resultado)
+        except Exception as e:
+            if tarea.fue_cancelada():
+                # La función se detuvo a pedido del usuario (lanza su propia excepción de cancelación)
+                tarea._fin.emit("cancelada", None)
+            else:
+                print(f"❌ Error en tarea en segundo plano: {e}")
+                tarea._fin.emit("fallida", str(e))
+
+
+class TareaFondo(QtCore.QObject):
+    """
+    Ejecuta funcion(reportar_progreso, cancelada) fuera del hilo de la interfaz.
+    La función llama reportar_progreso(hecho, total) cuando avanza y revisa cancelada()
+    para detenerse lanzando una excepción. Las señales llegan en el hilo de la interfaz.
+    """
+
+    progreso = QtCore.pyqtSignal(int, int)
+    terminada = QtCore.pyqtSignal(object)
+    fallida = QtCore.pyqtSignal(str)
+    cancelada = QtCore.pyqtSignal()
+
+    _avance = QtCore.pyqtSignal(int, int)
+    _fin = QtCore.pyqtSignal(str, object)
+
+    def __init__(self, funcion, parent=None):
+        super().__init__(parent)
+        self.funcion = funcion
+        self.en_curso = False
+        self._cancelar = False
+        self._avance.connect(self.progreso, QtCore.Qt.QueuedConnection)
+        self._fin.connect(self._terminar, QtCore.Qt.QueuedConnection)
+
+    def iniciar(self):
+        self._cancelar = False
+        self.en_curso = True
+        QtCore.QThreadPool.globalInstance().start(_Ejecucion(self))
+
+    def cancelar(self):
+        """Pide que la tarea se detenga en su próximo punto de revisión"""
+        self._cancelar = True
+
+    def fue_cancelada(self):
+        return self._cancelar
+
+    def _reportar_progreso(self, hecho, total):
+        self._avance.emit(int(hecho), int(total))
+
+    def _terminar(self, estado, resultado):
+        self.en_curso = False
+        if estado == "terminada":
+            self.terminada.emit(resultado)
+        elif estado == "cancelada":
+            self.cancelada.emit()
+        else:
+            self.fallida.emit(resultado)
+
+
+class ProgramadorRespaldos(QtCore.QObject):
+    """
+    Revisa cada minuto si toca la copia automática (ver respaldos.PoliticaRespaldos) y la
+    hace en segundo plano. La copia usa la API de backup en WAL: no bloquea a quien registra
+    datos, y además solo arranca cuando la BD lleva un rato sin escrituras.
+    """
+
+    INTERVALO_REVISION_MS = 60 * 1000
+
+    copia_creada = QtCore.pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tarea = TareaFondo(lambda progreso, cancelada: ejecutar_respaldo_programado(
+            progreso=progreso, cancelada=cancelada), self)
+        self.tarea.terminada.connect(self._terminada)
+        # ✅ LAS FALLAS QUEDAN EN logs/backups.log, IGUAL QUE LAS DE LA COPIA POR LÍNEA DE COMANDOS
+        self.tarea.fallida.connect(registrar_error_respaldo)
+        self.temporizador = QtCore.QTimer(self)
+        self.temporizador.timeout.connect(self.revisar)
+
+    def iniciar(self):
+        self.temporizador.start(self.INTERVALO_REVISION_MS)
+        print("⏰ Copias automáticas programadas")
+
+    def detener(self):
+        self.temporizador.stop()
+        if self.tarea.en_curso:
+            self.tarea.cancelar()
+
+    def revisar(self):
+        if not self.tarea.en_curso:
+            self.tarea.iniciar()
+
+    def _terminada(self, manifiesto):
+        if manifiesto:
+            print(f"✅ Copia automática creada: {manifiesto['id']}")
+            self.copia_creada.emit(manifiesto)
+